@@ -40,6 +40,9 @@ def create_app(config_name='development'):
     # 注册WebSocket事件处理器
     register_websocket_events()
     
+    # 注册后台任务
+    register_background_tasks(app)
+    
     return app
 
 def register_apis(app):
@@ -55,6 +58,11 @@ def register_error_handlers(app):
     from app.exceptions.handlers import register_handlers
     register_handlers(app)
 
+def register_background_tasks(app):
+    """注册后台任务"""
+    from app.services.housekeeping_service import HousekeepingService
+    HousekeepingService.init_app(app)
+
 def register_websocket_events():
     """注册WebSocket事件处理器"""
     # 导入事件处理器模块，使装饰器生效
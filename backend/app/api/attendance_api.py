@@ -168,7 +168,9 @@ class AttendanceAPI:
                         page=query.page,
                         per_page=query.per_page,
                         course_id=query.course_id,
-                        status=query.status.value if query.status else None
+                        status=query.status.value if query.status else None,
+                        cursor=query.cursor,
+                        with_total=query.with_total
                     )
                 elif query.course_id:
                     result = AttendanceService.get_attendances_by_course(
@@ -184,7 +186,9 @@ class AttendanceAPI:
                         page=query.page,
                         per_page=query.per_page,
                         course_id=query.course_id,
-                        status=query.status.value if query.status else None
+                        status=query.status.value if query.status else None,
+                        cursor=query.cursor,
+                        with_total=query.with_total
                     )
             else:
                 # 教师只能查看自己创建的考勤
@@ -193,7 +197,9 @@ class AttendanceAPI:
                     page=query.page,
                     per_page=query.per_page,
                     course_id=query.course_id,
-                    status=query.status.value if query.status else None
+                    status=query.status.value if query.status else None,
+                    cursor=query.cursor,
+                    with_total=query.with_total
                 )
             
             # 转换为字典并添加统计信息
@@ -208,14 +214,21 @@ class AttendanceAPI:
                 att_dict['attendance_rate'] = att.get_attendance_rate()
                 attendances.append(att_dict)
             
-            return {
+            response = {
                 'attendances': attendances,
                 'total': result['total'],
                 'page': result['page'],
                 'per_page': result['per_page'],
                 'pages': result['pages']
-            }, 200
+            }
+            if 'next_cursor' in result:
+                response['next_cursor'] = result['next_cursor']
+                response['has_next'] = result['has_next']
+            
+            return response, 200
             
+        except ValueError as e:
+            return {'message': str(e)}, 400
         except Exception as e:
             logger.error(f"Error listing attendances: {str(e)}")
             return {
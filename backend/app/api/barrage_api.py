@@ -10,6 +10,8 @@ from app.schemas.interaction_schemas import (
 )
 from app.schemas.common_schemas import MessageResponseModel, QueryModel
 from app.services.barrage_service import BarrageService
+from app.services.barrage_ingest_service import BarrageIngestService
+from app.exceptions.base import RateLimitError
 from app.utils.auth_decorators import login_required
 from app.utils.response_handler import ResponseHandler
 from app.models.user import UserRole
@@ -49,7 +51,7 @@ class BarrageAPI:
     @barrage_api_bp.post('/',
                         summary="发送弹幕",
                         tags=[barrage_tag],
-                        responses={201: BarrageResponseModel, 400: MessageResponseModel})
+                        responses={201: BarrageResponseModel, 400: MessageResponseModel, 429: MessageResponseModel})
     @login_required
     def create_barrage(body: BarrageCreateModel):
         """
@@ -57,28 +59,28 @@ class BarrageAPI:
         
         用户发送自由弹幕，内容会自动进行敏感词过滤。
         如果包含敏感词，将返回错误。
+        弹幕校验通过后立即向课程房间广播，稍后批量写库。
         """
         try:
             user_id = session.get('user_id')
             
             BarrageAPI.log_request("CREATE_BARRAGE", f"user_id={user_id}, course_id={body.course_id}")
             
-            # 创建弹幕（自动敏感词过滤）
-            barrage = BarrageService.create_barrage(user_id, body)
-            
-            # ⭐ WebSocket广播弹幕（待集成）
-            # from app.extensions import socketio
-            # socketio.emit('new_barrage', {
-            #     'barrage': barrage.to_dict(),
-            #     'is_answer': False,
-            #     'question_id': None
-            # }, room=f'course_{barrage.course_id}')
+            # 限流、校验、敏感词过滤后广播，后台写库
+            barrage = BarrageIngestService.ingest(
+                user_id, body.course_id, body.content, body.is_anonymous
+            )
             
             return ResponseHandler.success(
-                data=barrage.to_dict(),
+                data=barrage,
                 message="弹幕发送成功"
             ), 201
             
+        except RateLimitError as e:
+            return ResponseHandler.error(
+                message=e.message,
+                error_code=e.error_code
+            ), e.status_code
         except ValueError as e:
             logger.warning(f"Barrage creation validation failed: {str(e)}")
             return ResponseHandler.error(
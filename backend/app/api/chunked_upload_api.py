@@ -8,8 +8,10 @@ from flask import request, session
 from app.schemas.common_schemas import MessageResponseModel
 from app.utils.auth_decorators import login_required
 from app.utils.response_handler import success_response, error_response
+from app.services.blob_store_service import BlobStoreService
+from app.services.storage_usage_service import StorageUsageService
 from app.utils.chunked_upload import chunked_upload_manager
-from app.utils.file_utils import generate_unique_filename, get_upload_path
+from app.utils.file_utils import generate_unique_filename, get_file_extension, get_upload_path
 import logging
 import os
 
@@ -40,6 +42,11 @@ class ChunkedUploadAPI:
         - filename: 文件名
         - file_size: 文件大小（字节）
         - total_chunks: 总分片数
+        - chunk_size: 分片大小（字节，可选）；给出时分片直接写入目标文件，合并不再复制数据
+        - file_hash: 整个文件的 SHA-256（可选）；服务器已有相同内容时直接完成（秒传），合并时校验
+        - chunk_hashes: 每个分片的 SHA-256 列表（可选），分片到达时校验
+        
+        秒传时返回 instant=true 和 file_hash，之后用 file_hash 创建资料，不需要上传分片。
         """
         try:
             data = request.get_json()
@@ -47,22 +54,48 @@ class ChunkedUploadAPI:
             filename = data.get('filename')
             file_size = data.get('file_size')
             total_chunks = data.get('total_chunks')
+            chunk_size = data.get('chunk_size')
+            file_hash = data.get('file_hash')
+            chunk_hashes = data.get('chunk_hashes')
             
             if not all([filename, file_size, total_chunks]):
                 return error_response("缺少必要参数", 400)
             
+            # 超出存储配额时不开始上传
+            StorageUsageService.check_quota(session.get('user_id'), file_size)
+            
+            # 服务器已有相同内容的文件，不需要传输
+            if file_hash:
+                blob = BlobStoreService.find(file_hash.lower())
+                if blob is not None and blob.file_size == file_size:
+                    return success_response(
+                        data={
+                            'instant': True,
+                            'file_hash': blob.sha256,
+                            'filename': filename,
+                            'file_size': file_size
+                        },
+                        message="文件已存在，秒传成功"
+                    )
+            
             # 初始化上传
             metadata = chunked_upload_manager.init_upload(
                 filename=filename,
                 file_size=file_size,
-                total_chunks=total_chunks
+                total_chunks=total_chunks,
+                chunk_size=chunk_size,
+                file_hash=file_hash,
+                chunk_hashes=chunk_hashes
             )
+            metadata['instant'] = False
             
             return success_response(
                 data=metadata,
                 message="分片上传初始化成功"
             )
             
+        except ValueError as e:
+            return error_response(str(e), 400)
         except Exception as e:
             logger.error(f"初始化分片上传失败: {str(e)}")
             return error_response(f"初始化失败: {str(e)}", 500)
@@ -115,6 +148,9 @@ class ChunkedUploadAPI:
                 message="分片上传成功"
             )
             
+        except ValueError as e:
+            # 分片校验失败，客户端重新上传该分片
+            return error_response(str(e), 400)
         except Exception as e:
             logger.error(f"上传分片失败: {str(e)}")
             return error_response(f"上传失败: {str(e)}", 500)
@@ -160,14 +196,20 @@ class ChunkedUploadAPI:
             output_path = os.path.join(upload_path, unique_filename)
             
             # 合并分片
-            success = chunked_upload_manager.merge_chunks(upload_id, output_path)
+            file_hash = chunked_upload_manager.merge_chunks(upload_id, output_path)
             
-            if not success:
+            if not file_hash:
                 return error_response("合并分片失败", 500)
             
+            # 存入内容存储（暂无资料引用），之后用 file_hash 创建资料
+            blob = BlobStoreService.put_file(
+                output_path, '.' + get_file_extension(metadata['filename']), file_hash, acquire=False
+            )
+            
             return success_response(
                 data={
-                    'file_path': output_path,
+                    'file_path': blob.file_path,
+                    'file_hash': file_hash,
                     'filename': unique_filename,
                     'original_filename': metadata['filename']
                 },
@@ -196,8 +238,8 @@ class ChunkedUploadAPI:
             if not metadata:
                 return error_response("上传信息不存在", 404)
             
+            uploaded_chunks = chunked_upload_manager.get_uploaded_chunks(upload_id)
             missing_chunks = chunked_upload_manager.get_missing_chunks(upload_id)
-            is_complete = chunked_upload_manager.is_upload_complete(upload_id)
             
             return success_response(
                 data={
@@ -205,10 +247,10 @@ class ChunkedUploadAPI:
                     'filename': metadata['filename'],
                     'file_size': metadata['file_size'],
                     'total_chunks': metadata['total_chunks'],
-                    'uploaded_chunks': metadata['uploaded_chunks'],
+                    'uploaded_chunks': uploaded_chunks,
                     'missing_chunks': missing_chunks,
-                    'is_complete': is_complete,
-                    'progress': len(metadata['uploaded_chunks']) / metadata['total_chunks'] * 100
+                    'is_complete': not missing_chunks,
+                    'progress': len(uploaded_chunks) / metadata['total_chunks'] * 100
                 },
                 message="查询成功"
             )
@@ -4,7 +4,7 @@
 提供资料上传、下载、查询、更新、删除等功能。
 """
 from flask_openapi3 import APIBlueprint, Tag, FileStorage
-from flask import send_file, request, current_app, session
+from flask import request, current_app, session
 from app.schemas.material_schemas import (
     MaterialUploadModel, MaterialUpdateModel, MaterialResponseModel,
     MaterialDetailResponseModel, MaterialListResponseModel,
@@ -13,13 +13,20 @@ from app.schemas.material_schemas import (
 from app.schemas.classification_schemas import (
     ClassifyMaterialResponseModel, KeywordResponseModel, KeywordQueryModel,
     TagSuggestionResponseModel, ClassificationLogPathModel,
-    MaterialClassifyPathModel
+    MaterialClassifyPathModel, BatchClassifyBodyModel, BatchClassifyResponseModel,
+    KeywordSearchQueryModel, PopularKeywordQueryModel, RelatedMaterialQueryModel,
+    DuplicateReportResponseModel
 )
+from app.schemas.intelligence_schemas import PopularKeywordListModel
 from app.schemas.common_schemas import BaseResponseModel, MessageResponseModel
 from app.services.material_service import MaterialService
 from app.services.classification_service import ClassificationService
-from app.utils.auth_decorators import login_required, log_user_action
+from app.services.rendition_service import RenditionService
+from app.models.user import UserRole
+from app.utils.auth_decorators import login_required, role_required, log_user_action
 from app.utils.response_handler import success_response, error_response
+from app.utils.file_delivery import deliver_file, is_new_download
+from app.utils.file_utils import resolve_file_path
 import logging
 import os
 
@@ -56,18 +63,24 @@ class MaterialAPI:
         
         支持的文件类型：PDF、Word、PPT、Excel、图片、压缩包等。
         最大文件大小：100MB
+        
+        服务器已有文件内容时（秒传、分片上传合并后），可不传 file，
+        改为传 file_hash（文件 SHA-256）和 file_name（原始文件名）。
         """
         try:
             # 获取当前用户ID
             user_id = session.get('user_id')
             
+            file_hash = request.form.get('file_hash')
+            file_name = request.form.get('file_name')
+            
             # 获取上传的文件
-            if 'file' not in request.files:
+            if 'file' not in request.files and not file_hash:
                 return error_response("未找到上传文件", 400)
             
-            file = request.files['file']
+            file = request.files.get('file')
             
-            if file.filename == '':
+            if (file.filename if file else file_name) in ('', None):
                 return error_response("文件名为空", 400)
             
             # 获取表单数据
@@ -84,15 +97,27 @@ class MaterialAPI:
                 return error_response("资料标题不能为空", 400)
             
             # 调用服务层上传资料
-            material = MaterialService.upload_material(
-                file=file,
-                title=title,
-                uploader_id=user_id,
-                description=description,
-                course_id=course_id,
-                category_id=category_id,
-                tags=tags
-            )
+            if file:
+                material = MaterialService.upload_material(
+                    file=file,
+                    title=title,
+                    uploader_id=user_id,
+                    description=description,
+                    course_id=course_id,
+                    category_id=category_id,
+                    tags=tags
+                )
+            else:
+                material = MaterialService.upload_material_by_hash(
+                    file_hash=file_hash,
+                    file_name=file_name,
+                    title=title,
+                    uploader_id=user_id,
+                    description=description,
+                    course_id=course_id,
+                    category_id=category_id,
+                    tags=tags
+                )
             
             return success_response(
                 data=material.to_dict(),
@@ -185,7 +210,9 @@ class MaterialAPI:
                 start_date=start_date,
                 end_date=end_date,
                 sort_by=sort_by,
-                order=order
+                order=order,
+                cursor=query.cursor,
+                with_total=query.with_total
             )
             
             # 使用 Pydantic 模型序列化每个资料（to_dict 已自动转换 datetime）
@@ -200,11 +227,15 @@ class MaterialAPI:
                 total=result['total'],
                 page=result['page'],
                 per_page=result['per_page'],
-                pages=result['pages']
+                pages=result['pages'],
+                next_cursor=result.get('next_cursor'),
+                has_next=result.get('has_next')
             )
             
             return success_response(data=response_model)
             
+        except ValueError as e:
+            return error_response(str(e), 400)
         except Exception as e:
             logger.error(f"获取资料列表失败: {str(e)}")
             return error_response("获取资料列表失败", 500)
@@ -246,6 +277,9 @@ class MaterialAPI:
             if uploader:
                 material_data['uploader_name'] = uploader.real_name or uploader.username
             
+            # 添加内容近似重复的资料
+            material_data['near_duplicates'] = ClassificationService.find_near_duplicates(material.id)
+            
             # 使用 Pydantic 模型序列化，success_response 会自动转换为驼峰命名
             response_model = MaterialDetailResponseModel(**material_data)
             
@@ -336,23 +370,15 @@ class MaterialAPI:
         下载资料文件
         
         返回文件流，浏览器会自动下载文件。
+        支持 ETag 条件请求（304）和 Range 分段下载；续传等后续分段不重复计入下载次数。
         """
         try:
-            material = MaterialService.download_material(path.material_id)
+            material = MaterialService.get_material_by_id(path.material_id)
             
             if not material:
                 return error_response("资料不存在", 404)
             
-            # 转换为绝对路径
-            # 如果是相对路径，则相对于项目根目录（backend目录）
-            if not os.path.isabs(material.file_path):
-                # 获取项目根目录（backend目录）
-                # __file__ 是 app/api/material_api.py
-                # 需要向上两级到 app，再向上一级到 backend
-                base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-                file_path = os.path.join(base_dir, material.file_path)
-            else:
-                file_path = material.file_path
+            file_path = resolve_file_path(material.file_path)
             
             # 检查文件是否存在
             if not os.path.exists(file_path):
@@ -360,11 +386,10 @@ class MaterialAPI:
                 return error_response("文件不存在", 404)
             
             # 发送文件
-            return send_file(
-                file_path,
-                as_attachment=True,
-                download_name=material.file_name
-            )
+            response = deliver_file(file_path, material.file_name, as_attachment=True)
+            if is_new_download(response):
+                MaterialService.record_download(material)
+            return response
             
         except Exception as e:
             logger.error(f"文件下载失败: {str(e)}")
@@ -383,6 +408,11 @@ class MaterialAPI:
         
         返回文件流，浏览器会在线预览文件（不下载）。
         支持PDF、图片等可以在浏览器中直接显示的文件类型。
+        支持 ETag 条件请求（304）和 Range 分段请求。
+        
+        图片已生成缩略图时默认返回缩略图，传 original=true 返回原图；
+        文档默认返回原文件（供 PDF、Word 预览组件渲染），传 rendition=excerpt 且已生成时返回开头的文本摘录。
+        返回副本时响应头 X-Preview-Rendition 标明副本类型，副本尚未生成时返回原文件。
         """
         try:
             material = MaterialService.get_material_by_id(path.material_id)
@@ -390,24 +420,26 @@ class MaterialAPI:
             if not material:
                 return error_response("资料不存在", 404)
             
-            # 转换为绝对路径
-            if not os.path.isabs(material.file_path):
-                base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-                file_path = os.path.join(base_dir, material.file_path)
-            else:
-                file_path = material.file_path
+            file_path = resolve_file_path(material.file_path)
             
             # 检查文件是否存在
             if not os.path.exists(file_path):
                 logger.error(f"文件不存在: {file_path}")
                 return error_response("文件不存在", 404)
             
-            # 发送文件用于预览（不作为附件下载）
-            return send_file(
-                file_path,
-                as_attachment=False,  # 关键：设置为False，浏览器会尝试在线预览
-                download_name=material.file_name
-            )
+            # 图片默认返回缩略图，文档的文本摘录只在明确要求时返回
+            kind = RenditionService.rendition_kind(material.file_path)
+            original = request.args.get('original', 'false').lower() == 'true'
+            if kind is not None and not original and kind == request.args.get('rendition', 'thumbnail'):
+                rendition_path = RenditionService.get_rendition(material)
+                if rendition_path:
+                    download_name = os.path.splitext(material.file_name)[0] + os.path.splitext(rendition_path)[1]
+                    response = deliver_file(rendition_path, download_name, as_attachment=False)
+                    response.headers['X-Preview-Rendition'] = kind
+                    return response
+            
+            # 发送文件用于预览（不作为附件下载），视频可按 Range 拖动进度
+            return deliver_file(file_path, material.file_name, as_attachment=False)
             
         except Exception as e:
             logger.error(f"文件预览失败: {str(e)}")
@@ -485,10 +517,6 @@ class MaterialAPI:
         try:
             stats = MaterialService.get_material_statistics()
             
-            # 转换资料列表为字典
-            stats['recent_uploads'] = [m.to_dict() for m in stats['recent_uploads']]
-            stats['popular_materials'] = [m.to_dict() for m in stats['popular_materials']]
-            
             return success_response(data=stats)
             
         except Exception as e:
@@ -522,9 +550,24 @@ class ClassificationAPI:
         - 高置信度 (>0.7): 自动应用分类
         - 中等置信度 (0.5-0.7): 需要用户确认
         - 低置信度 (<0.5): 不推荐分类
+        
+        资料上传后会在后台自动分析，这里直接返回已保存的结果；
+        后台分析尚未完成时返回 pending，未分析过的资料（如历史资料）即时分析。
         """
         try:
-            result = ClassificationService.classify_material(path.material_id)
+            if ClassificationService.is_analysis_pending(path.material_id):
+                response = ClassifyMaterialResponseModel(
+                    material_id=path.material_id,
+                    confidence=0.0,
+                    should_auto_apply=False,
+                    needs_confirmation=False,
+                    pending=True
+                )
+                return success_response(data=response, message="资料正在后台分析，完成后将推送通知")
+            
+            result = ClassificationService.get_classification(path.material_id)
+            if result is None:
+                result = ClassificationService.classify_material(path.material_id)
             
             # 转换关键词为响应模型
             keywords = [
@@ -587,6 +630,144 @@ class ClassificationAPI:
             logger.error(f"获取关键词异常: {str(e)}")
             return error_response("获取关键词失败", 500)
     
+    @staticmethod
+    @material_api_bp.get('/<int:materialId>/related',
+                        summary="获取相似资料",
+                        tags=[classification_tag],
+                        responses={200: MaterialListResponseModel, 404: MessageResponseModel})
+    @login_required
+    def get_related_materials(path: MaterialClassifyPathModel, query: RelatedMaterialQueryModel):
+        """
+        获取相似资料
+        
+        基于资料内容的 TF-IDF 向量余弦相似度，按相似度降序返回。
+        """
+        try:
+            materials = ClassificationService.get_related_materials(path.material_id, query.limit)
+            
+            return success_response(data={'materials': materials, 'total': len(materials)})
+            
+        except ValueError as e:
+            logger.warning(f"获取相似资料失败: {str(e)}")
+            return error_response(str(e), 404)
+        except Exception as e:
+            logger.error(f"获取相似资料异常: {str(e)}")
+            return error_response("获取相似资料失败", 500)
+    
+    @staticmethod
+    @material_api_bp.get('/duplicates',
+                        summary="获取近似重复资料报告",
+                        tags=[classification_tag],
+                        responses={200: DuplicateReportResponseModel})
+    @login_required
+    @role_required(UserRole.ADMIN)
+    def get_duplicate_report():
+        """
+        获取近似重复资料报告
+        
+        基于资料内容的 SimHash 指纹，找出内容几乎相同的资料组及其占用的存储空间。
+        只有管理员可以查看。
+        """
+        try:
+            report = ClassificationService.get_duplicate_report()
+            
+            return success_response(data=DuplicateReportResponseModel(**report))
+            
+        except Exception as e:
+            logger.error(f"获取近似重复资料报告失败: {str(e)}")
+            return error_response("获取近似重复资料报告失败", 500)
+    
+    @staticmethod
+    @material_api_bp.post('/fingerprints/backfill',
+                         summary="补算资料指纹",
+                         tags=[classification_tag],
+                         responses={202: MessageResponseModel})
+    @login_required
+    @role_required(UserRole.ADMIN)
+    @log_user_action("补算资料指纹")
+    def backfill_fingerprints():
+        """
+        补算资料指纹
+        
+        在后台为尚无内容词的历史资料计算内容词和指纹，完成后重建相似资料索引。只有管理员可以操作。
+        """
+        try:
+            ClassificationService.schedule_fingerprint_backfill()
+            
+            return success_response(message="资料指纹补算任务已提交", status_code=202)
+            
+        except Exception as e:
+            logger.error(f"提交资料指纹补算任务失败: {str(e)}")
+            return error_response("提交资料指纹补算任务失败", 500)
+    
+    @staticmethod
+    @material_api_bp.get('/keyword-search',
+                        summary="按关键词查找资料",
+                        tags=[classification_tag],
+                        responses={200: MaterialListResponseModel})
+    @login_required
+    def search_by_keywords(query: KeywordSearchQueryModel):
+        """
+        按关键词查找资料
+        
+        根据资料分析提取的关键词精确匹配，支持多个关键词（逗号分隔），
+        按命中关键词的权重之和降序返回。
+        """
+        try:
+            keywords = query.keywords.split(',')
+            materials = ClassificationService.search_materials_by_keywords(keywords, query.limit)
+            
+            return success_response(data={'materials': materials, 'total': len(materials)})
+            
+        except Exception as e:
+            logger.error(f"按关键词查找资料失败: {str(e)}")
+            return error_response("按关键词查找资料失败", 500)
+    
+    @staticmethod
+    @material_api_bp.get('/popular-keywords',
+                        summary="获取热门关键词",
+                        tags=[classification_tag],
+                        responses={200: PopularKeywordListModel})
+    @login_required
+    def get_popular_keywords(query: PopularKeywordQueryModel):
+        """
+        获取热门关键词
+        
+        按包含该关键词的资料数降序排列。
+        """
+        try:
+            keywords = ClassificationService.get_popular_keywords(query.limit)
+            
+            return success_response(data={'keywords': keywords})
+            
+        except Exception as e:
+            logger.error(f"获取热门关键词失败: {str(e)}")
+            return error_response("获取热门关键词失败", 500)
+    
+    @staticmethod
+    @material_api_bp.post('/popular-keywords/rebuild',
+                         summary="重建关键词统计",
+                         tags=[classification_tag],
+                         responses={200: MessageResponseModel})
+    @login_required
+    @role_required(UserRole.ADMIN)
+    @log_user_action("重建关键词统计")
+    def rebuild_keyword_stats():
+        """
+        重建关键词统计
+        
+        按资料关键词全量重建热门关键词所用的统计。升级后执行一次，
+        把升级前已分析的资料计入统计。只有管理员可以操作。
+        """
+        try:
+            count = ClassificationService.rebuild_keyword_stats()
+            
+            return success_response(message=f"关键词统计已重建，共 {count} 个关键词")
+            
+        except Exception as e:
+            logger.error(f"重建关键词统计失败: {str(e)}")
+            return error_response("重建关键词统计失败", 500)
+    
     @staticmethod
     @material_api_bp.post('/<int:materialId>/suggest-tags',
                          summary="获取标签建议",
@@ -674,3 +855,40 @@ class ClassificationAPI:
         except Exception as e:
             logger.error(f"拒绝分类建议异常: {str(e)}")
             return error_response("拒绝分类建议失败", 500)
+    
+    @staticmethod
+    @material_api_bp.post('/classify-batch',
+                         summary="批量分类资料",
+                         tags=[classification_tag],
+                         responses={202: BatchClassifyResponseModel, 400: MessageResponseModel})
+    @login_required
+    @role_required(UserRole.ADMIN, UserRole.TEACHER)
+    @log_user_action("批量分类资料")
+    def classify_batch(body: BatchClassifyBodyModel):
+        """
+        批量分类资料
+        
+        在后台分批分析并分类资料，不传资料ID时分类全部未分类资料。
+        每批完成后推送 batch_classification_progress 事件，
+        全部完成后推送 batch_classification_completed 事件。
+        只有管理员和教师可以批量分类。
+        """
+        try:
+            # 去重并保持顺序
+            material_ids = list(dict.fromkeys(body.material_ids)) if body.material_ids is not None else None
+            if material_ids is None:
+                material_ids = ClassificationService.get_unclassified_material_ids()
+            
+            if not material_ids:
+                return error_response("没有需要分类的资料", 400)
+            
+            job_id = ClassificationService.schedule_batch_classification(
+                material_ids, session.get('user_id')
+            )
+            
+            response = BatchClassifyResponseModel(job_id=job_id, total=len(material_ids))
+            return success_response(data=response, message="批量分类任务已提交", status_code=202)
+            
+        except Exception as e:
+            logger.error(f"批量分类异常: {str(e)}")
+            return error_response("批量分类失败", 500)
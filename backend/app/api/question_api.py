@@ -127,13 +127,25 @@ class QuestionAPI:
             # 获取状态过滤（如果有）
             status = query.status if hasattr(query, 'status') else None
             
-            # 获取问题列表
-            questions, total = QuestionService.get_questions_by_course(
-                course_id=course_id,
-                page=query.page if hasattr(query, 'page') else 1,
-                per_page=query.per_page if hasattr(query, 'per_page') else 20,
-                status=status
-            )
+            # 获取问题列表：传入游标时使用游标分页
+            if query.cursor is not None:
+                result = QuestionService.get_questions_by_course_cursor(
+                    course_id=course_id,
+                    cursor=query.cursor,
+                    per_page=query.per_page,
+                    status=status,
+                    with_total=query.with_total
+                )
+                questions, total = result['items'], result['total']
+                page, next_cursor, has_next = None, result['next_cursor'], result['has_next']
+            else:
+                questions, total = QuestionService.get_questions_by_course(
+                    course_id=course_id,
+                    page=query.page if hasattr(query, 'page') else 1,
+                    per_page=query.per_page if hasattr(query, 'per_page') else 20,
+                    status=status
+                )
+                page, next_cursor, has_next = (query.page if hasattr(query, 'page') else 1), None, None
             
             # 转换为字典列表，包含回答数量
             question_list = []
@@ -145,11 +157,18 @@ class QuestionAPI:
             return ResponseHandler.paginated(
                 items=question_list,
                 total=total,
-                page=query.page if hasattr(query, 'page') else 1,
+                page=page,
                 per_page=query.per_page if hasattr(query, 'per_page') else 20,
-                message="获取问题列表成功"
+                message="获取问题列表成功",
+                next_cursor=next_cursor,
+                has_next=has_next
             ), 200
             
+        except ValueError as e:
+            return ResponseHandler.error(
+                message=str(e),
+                error_code="INVALID_CURSOR"
+            ), 400
         except Exception as e:
             logger.error(f"Error listing questions: {str(e)}")
             return ResponseHandler.error(
@@ -558,7 +577,7 @@ class QuestionAPI:
                 ), 404
             
             return ResponseHandler.success(
-                data={'like_count': question.like_count},
+                data={'like_count': question.get_count('like_count')},
                 message="点赞成功"
             ), 200
             
@@ -595,7 +614,7 @@ class QuestionAPI:
                 ), 404
             
             return ResponseHandler.success(
-                data={'like_count': question.like_count},
+                data={'like_count': question.get_count('like_count')},
                 message="取消点赞成功"
             ), 200
             
@@ -632,7 +651,7 @@ class QuestionAPI:
                 ), 404
             
             return ResponseHandler.success(
-                data={'like_count': answer.like_count},
+                data={'like_count': answer.get_count('like_count')},
                 message="点赞成功"
             ), 200
             
@@ -669,7 +688,7 @@ class QuestionAPI:
                 ), 404
             
             return ResponseHandler.success(
-                data={'like_count': answer.like_count},
+                data={'like_count': answer.get_count('like_count')},
                 message="取消点赞成功"
             ), 200
             
@@ -87,11 +87,15 @@ class StudentAttendanceAPI:
                 student_id=student_id,
                 page=query.page,
                 per_page=query.per_page,
-                status=query.status
+                status=query.status,
+                cursor=query.cursor,
+                with_total=query.with_total
             )
             
             return result, 200
             
+        except ValueError as e:
+            return {'message': str(e)}, 400
         except Exception as e:
             logger.error(f"Error getting student attendances: {str(e)}")
             return {
@@ -27,6 +27,22 @@ class Config:
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
     
+    # 文件下发配置
+    # direct: 由应用发送文件；x-accel: 交给 nginx（X-Accel-Redirect）；x-sendfile: 交给 Apache 等（X-Sendfile）
+    FILE_DELIVERY_MODE = os.environ.get('FILE_DELIVERY_MODE') or 'direct'
+    # x-accel 模式下 nginx internal location 的前缀，该 location 指向 FILE_DELIVERY_ROOT 目录
+    FILE_ACCEL_PREFIX = os.environ.get('FILE_ACCEL_PREFIX') or '/protected-files/'
+    FILE_DELIVERY_ROOT = os.environ.get('FILE_DELIVERY_ROOT') or os.path.abspath(os.path.join(basedir, '..'))
+    
+    # 额外的敏感词文件（每行一个词，# 开头为注释），与内置词库合并
+    SENSITIVE_WORDS_FILE = os.environ.get('SENSITIVE_WORDS_FILE')
+    
+    # 每个用户上传资料的存储配额（MB），0 表示不限制
+    USER_STORAGE_QUOTA_MB = int(os.environ.get('USER_STORAGE_QUOTA_MB') or 0)
+    
+    # 定期清理（过期上传、临时文件、旧日志和通知），设为 false 可关闭
+    HOUSEKEEPING_ENABLED = os.environ.get('HOUSEKEEPING_ENABLED', 'true').lower() != 'false'
+    
     # 其他配置
     JSON_AS_ASCII = False
     JSONIFY_PRETTYPRINT_REGULAR = True
@@ -45,6 +61,7 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    HOUSEKEEPING_ENABLED = False
 
 class ProductionConfig(Config):
     """生产环境配置"""
@@ -4,24 +4,38 @@
 该模块提供文档内容分析、关键词提取、智能分类推荐和标签推荐能力。
 
 主要组件:
-- DocumentParser: 文档解析器，支持 PDF、Word、文本文件
+- DocumentParser: 文档解析器，支持 PDF、Word、文本文件，可按页数/字符预算流式解析
+- ParserPool: 沙箱解析进程池，限制解析的 CPU 时间、墙钟时间和内存
 - KeywordExtractor: 关键词提取器，使用 Jieba 分词和 TF-IDF 算法
 - CategoryClassifier: 分类器，基于 Naive Bayes 进行文档分类
+- ModelStore: 分类模型版本存储，支持多进程共享加载和热更新
+- SimilarityIndex: 相似资料索引，基于 TF-IDF 稀疏矩阵查找相似资料
+- fingerprint: SimHash 文档指纹，用于发现近似重复的资料
 - TagRecommender: 标签推荐器，根据关键词推荐相关标签
+- TagIndex: 标签索引，按关键词快速匹配现有标签
 """
 
-from .document_parser import DocumentParser, ParseResult
+from .document_parser import DocumentParser, ParseResult, TextStream
+from .parser_pool import ParserPool
 from .keyword_extractor import KeywordExtractor, KeywordResult
 from .category_classifier import CategoryClassifier, ClassificationResult
+from .model_store import ModelStore
+from .similarity_index import SimilarityIndex
 from .tag_recommender import TagRecommender, TagSuggestion
+from .tag_index import TagIndex
 
 __all__ = [
     'DocumentParser',
     'ParseResult',
+    'TextStream',
+    'ParserPool',
     'KeywordExtractor',
     'KeywordResult',
     'CategoryClassifier',
     'ClassificationResult',
+    'ModelStore',
+    'SimilarityIndex',
     'TagRecommender',
     'TagSuggestion',
+    'TagIndex',
 ]
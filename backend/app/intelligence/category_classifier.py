@@ -7,11 +7,11 @@
 import json
 import logging
 import os
-import pickle
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple
 
 import jieba
+import joblib
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.pipeline import Pipeline
@@ -151,55 +151,112 @@ class CategoryClassifier:
         words = jieba.cut(text, cut_all=False)
         return " ".join(words)
 
-    def predict(self, text: str, keywords: Optional[List[str]] = None) -> ClassificationResult:
+    def predict(
+        self,
+        text: str,
+        keywords: Optional[List[str]] = None,
+        tokens: Optional[List[str]] = None
+    ) -> ClassificationResult:
         """
         预测文档分类
         
         Args:
             text: 文档文本内容
             keywords: 可选的关键词列表，用于增强分类
+            tokens: 可选的分词结果，传入时直接使用，不再对 text 重新分词
             
         Returns:
             ClassificationResult: 分类结果
         """
+        return self.predict_batch(
+            [text],
+            keywords_list=[keywords],
+            tokens_list=[tokens]
+        )[0]
+
+    def predict_batch(
+        self,
+        texts: List[str],
+        keywords_list: Optional[List[Optional[List[str]]]] = None,
+        tokens_list: Optional[List[Optional[List[str]]]] = None
+    ) -> List[ClassificationResult]:
+        """
+        批量预测文档分类
+        
+        所有文档一次完成 TF-IDF 转换，只调用一次 predict_proba，
+        分类取概率最大的类别（与 predict 的结果一致）。
+        
+        Args:
+            texts: 文档文本内容列表
+            keywords_list: 与 texts 一一对应的关键词列表，可选
+            tokens_list: 与 texts 一一对应的分词结果，可选
+            
+        Returns:
+            与 texts 一一对应的分类结果列表
+        """
+        results = [ClassificationResult.from_confidence(0.0) for _ in texts]
+        
         # 如果模型未训练，返回低置信度结果
         if not self.is_trained:
             logger.warning("分类模型未训练，无法进行预测")
-            return ClassificationResult.from_confidence(0.0)
+            return results
         
-        # 准备输入文本
-        input_text = text
-        if keywords:
-            # 将关键词添加到文本中以增强特征
-            input_text = f"{text} {' '.join(keywords)}"
+        keywords_list = keywords_list or [None] * len(texts)
+        tokens_list = tokens_list or [None] * len(texts)
         
-        # 分词
-        tokenized_text = self._tokenize(input_text)
+        # 空文本不参与预测，保持低置信度结果
+        positions = []
+        tokenized_texts = []
+        for position, (text, keywords, tokens) in enumerate(zip(texts, keywords_list, tokens_list)):
+            tokenized_text = self._prepare_text(text, keywords, tokens)
+            if tokenized_text.strip():
+                positions.append(position)
+                tokenized_texts.append(tokenized_text)
         
-        if not tokenized_text.strip():
-            return ClassificationResult.from_confidence(0.0)
+        if not tokenized_texts:
+            return results
         
         try:
-            # 预测分类
-            predicted_category_id = self._pipeline.predict([tokenized_text])[0]
-            
-            # 获取预测概率
-            probabilities = self._pipeline.predict_proba([tokenized_text])[0]
-            confidence = float(max(probabilities))
+            # 一次转换、一次求概率，类别由概率矩阵的最大值得出
+            probabilities = self._pipeline.predict_proba(tokenized_texts)
+            classes = self._pipeline.classes_
+            best = probabilities.argmax(axis=1)
             
-            # 获取分类名称
-            category_name = self._category_mapping.get(predicted_category_id)
-            
-            # 根据置信度创建结果
-            return ClassificationResult.from_confidence(
-                confidence=confidence,
-                category_id=predicted_category_id,
-                category_name=category_name
-            )
+            for position, row, index in zip(positions, probabilities, best):
+                predicted_category_id = classes[index].item()
+                results[position] = ClassificationResult.from_confidence(
+                    confidence=float(row[index]),
+                    category_id=predicted_category_id,
+                    category_name=self._category_mapping.get(predicted_category_id)
+                )
             
         except Exception as e:
             logger.error(f"分类预测失败: {str(e)}")
-            return ClassificationResult.from_confidence(0.0)
+        
+        return results
+
+    def _prepare_text(
+        self,
+        text: str,
+        keywords: Optional[List[str]],
+        tokens: Optional[List[str]]
+    ) -> str:
+        """生成用于预测的分词文本"""
+        if tokens is not None:
+            # 复用已有分词结果，只对少量关键词单独分词后追加以增强特征
+            tokenized_text = " ".join(tokens)
+            if keywords:
+                tokenized_text = f"{tokenized_text} {self._tokenize(' '.join(keywords))}"
+            return tokenized_text
+        
+        # 准备输入文本
+        input_text = text
+        if keywords:
+            # 将关键词添加到文本中以增强特征
+            input_text = f"{text} {' '.join(keywords)}"
+        
+        # 分词
+        return self._tokenize(input_text)
 
     def train(self, training_data: List[TrainingItem], category_names: Optional[Dict[int, str]] = None) -> TrainResult:
         """
@@ -313,14 +370,22 @@ class CategoryClassifier:
             # 确保目录存在
             os.makedirs(os.path.dirname(path) if os.path.dirname(path) else '.', exist_ok=True)
             
+            # stop_words_ 记录了被 max_features 等裁掉的全部词，仅供调试，
+            # 体积往往比词表本身大得多，保存前去掉以减小文件和加载开销
+            tfidf = self._pipeline.named_steps.get('tfidf')
+            if tfidf is not None and hasattr(tfidf, 'stop_words_'):
+                del tfidf.stop_words_
+            
             # 保存模型和映射
             model_data = {
                 'pipeline': self._pipeline,
                 'category_mapping': self._category_mapping
             }
             
-            with open(path, 'wb') as f:
-                pickle.dump(model_data, f)
+            # 不压缩保存，numpy 数组可按 mmap 方式加载；先写临时文件再替换，避免读到半个文件
+            tmp_path = f"{path}.tmp"
+            joblib.dump(model_data, tmp_path)
+            os.replace(tmp_path, path)
             
             logger.info(f"模型已保存到: {path}")
             return True
@@ -329,12 +394,15 @@ class CategoryClassifier:
             logger.error(f"保存模型失败: {str(e)}")
             return False
 
-    def load_model(self, path: str) -> bool:
+    def load_model(self, path: str, mmap: bool = True) -> bool:
         """
         从文件加载模型
         
+        兼容旧版 pickle 格式的模型文件。
+        
         Args:
             path: 模型文件路径
+            mmap: 是否以只读 mmap 方式加载 numpy 数组，多个进程共享同一份页缓存
             
         Returns:
             bool: 是否加载成功
@@ -344,8 +412,7 @@ class CategoryClassifier:
             return False
         
         try:
-            with open(path, 'rb') as f:
-                model_data = pickle.load(f)
+            model_data = joblib.load(path, mmap_mode='r' if mmap else None)
             
             self._pipeline = model_data['pipeline']
             self._category_mapping = model_data.get('category_mapping', {})
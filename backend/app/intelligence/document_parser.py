@@ -4,16 +4,27 @@
 负责从不同格式的文件中提取文本内容，支持 PDF、Word、文本文件。
 """
 
+import codecs
 import json
 import logging
 import os
 from dataclasses import dataclass, asdict
 from datetime import datetime
-from typing import Optional
+from typing import Iterator, List, Optional
 
 logger = logging.getLogger(__name__)
 
 
+# 文本文件流式读取的块大小（字符）
+TXT_BLOCK_SIZE = 64 * 1024
+
+# 探测文本编码时读取的字节数
+ENCODING_SAMPLE_SIZE = 64 * 1024
+
+# 文本文件候选编码，按优先级排序
+TXT_ENCODINGS = ['utf-8', 'utf-8-sig', 'gbk', 'gb2312', 'gb18030', 'latin-1']
+
+
 @dataclass
 class ParseResult:
     """解析结果数据类"""
@@ -23,6 +34,9 @@ class ParseResult:
     file_type: str                  # 文件类型
     extraction_method: str          # 提取方法
     timestamp: datetime             # 提取时间
+    truncated: bool = False         # 是否因页数/字符预算提前截断
+    tokens: Optional[List[str]] = None  # 分词结果，分词后随解析结果一起缓存复用
+    error_code: Optional[str] = None    # 沙箱解析失败的原因（timeout/cpu_limit/memory_limit/worker_crashed）
 
     def to_json(self) -> str:
         """序列化为 JSON
@@ -52,6 +66,148 @@ class ParseResult:
         return bool(self.content and self.content.strip())
 
 
+class TextStream:
+    """流式文本读取器
+    
+    逐页（PDF）、逐段（Word）或逐块（文本文件）产出文本，
+    达到页数或字符预算时立即停止读取，剩余内容不会被解析。
+    
+    用法::
+    
+        stream = DocumentParser.stream(file_path, max_pages=50, max_chars=200000)
+        for segment in stream:
+            ...
+        stream.truncated  # 是否因预算被截断
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        file_type: str,
+        max_pages: Optional[int] = None,
+        max_chars: Optional[int] = None
+    ):
+        """
+        初始化流式读取器
+        
+        Args:
+            file_path: 文件路径
+            file_type: 文件类型 (pdf/docx/txt)
+            max_pages: 最多读取的页数（仅对 PDF 生效），None 表示不限制
+            max_chars: 最多产出的字符数，None 表示不限制
+        """
+        self.file_path = file_path
+        self.file_type = file_type
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.truncated = False
+
+    def __iter__(self) -> Iterator[str]:
+        remaining = self.max_chars
+        
+        for segment in self._segments():
+            if remaining is not None and len(segment) >= remaining:
+                if remaining > 0:
+                    yield segment[:remaining]
+                # 提前返回会关闭底层生成器，文件随之关闭
+                self.truncated = True
+                return
+            
+            yield segment
+            if remaining is not None:
+                remaining -= len(segment)
+
+    def read(self) -> str:
+        """读取全部（预算内的）文本
+        
+        页与段之间以换行连接；文本文件的块是任意切分的，直接拼接。
+        """
+        separator = '' if self.file_type == 'txt' else '\n'
+        return separator.join(self)
+
+    def _segments(self) -> Iterator[str]:
+        """根据文件类型选择分段读取方式"""
+        if self.file_type == 'pdf':
+            return self._iter_pdf_pages()
+        if self.file_type == 'docx':
+            return self._iter_docx_paragraphs()
+        return self._iter_txt_blocks()
+
+    def _iter_pdf_pages(self) -> Iterator[str]:
+        """逐页提取 PDF 文本
+        
+        传入文件对象而不是路径，PyPDF2 不会把整个文件读入内存，
+        页面对象也只在访问时才解析。
+        """
+        try:
+            from PyPDF2 import PdfReader
+        except ImportError:
+            raise ImportError('PyPDF2 未安装，请运行: pip install PyPDF2')
+        
+        with open(self.file_path, 'rb') as f:
+            reader = PdfReader(f)
+            
+            for index, page in enumerate(reader.pages):
+                if self.max_pages is not None and index >= self.max_pages:
+                    self.truncated = True
+                    return
+                
+                page_text = page.extract_text()
+                if page_text:
+                    yield page_text
+
+    def _iter_docx_paragraphs(self) -> Iterator[str]:
+        """逐段提取 Word 文本，段落之后是表格行"""
+        try:
+            from docx import Document
+        except ImportError:
+            raise ImportError('python-docx 未安装，请运行: pip install python-docx')
+        
+        doc = Document(self.file_path)
+        
+        # 提取段落内容
+        for para in doc.paragraphs:
+            if para.text.strip():
+                yield para.text
+        
+        # 提取表格内容
+        for table in doc.tables:
+            for row in table.rows:
+                row_text = []
+                for cell in row.cells:
+                    cell_text = cell.text.strip()
+                    if cell_text:
+                        row_text.append(cell_text)
+                if row_text:
+                    yield ' | '.join(row_text)
+
+    def _iter_txt_blocks(self) -> Iterator[str]:
+        """按固定大小分块读取文本文件"""
+        encoding = self._detect_encoding()
+        
+        with open(self.file_path, 'r', encoding=encoding, errors='replace') as f:
+            while True:
+                block = f.read(TXT_BLOCK_SIZE)
+                if not block:
+                    return
+                yield block
+
+    def _detect_encoding(self) -> str:
+        """根据文件开头的样本探测编码"""
+        with open(self.file_path, 'rb') as f:
+            sample = f.read(ENCODING_SAMPLE_SIZE)
+        
+        for encoding in TXT_ENCODINGS:
+            try:
+                # 增量解码，样本末尾被截断的多字节字符不算错误
+                codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+                return encoding
+            except UnicodeDecodeError:
+                continue
+        
+        return 'latin-1'
+
+
 class DocumentParser:
     """文档解析器
     
@@ -73,12 +229,29 @@ class DocumentParser:
         '.htm': 'txt',
     }
 
+    # 各文件类型对应的提取方法
+    EXTRACTION_METHODS = {
+        'pdf': 'PyPDF2',
+        'docx': 'python-docx',
+        'txt': 'text-read',
+    }
+
     @classmethod
-    def parse(cls, file_path: str) -> ParseResult:
+    def parse(
+        cls,
+        file_path: str,
+        max_pages: Optional[int] = None,
+        max_chars: Optional[int] = None
+    ) -> ParseResult:
         """根据文件类型自动选择解析方法
         
+        指定 max_pages 或 max_chars 时改为流式解析，达到预算即停止读取，
+        超大文档的解析耗时和内存占用保持有界。
+        
         Args:
             file_path: 文件路径
+            max_pages: 最多解析的页数（仅对 PDF 生效），None 表示不限制
+            max_chars: 最多提取的字符数，None 表示不限制
             
         Returns:
             ParseResult: 解析结果
@@ -112,18 +285,21 @@ class DocumentParser:
             )
         
         file_type = cls.SUPPORTED_EXTENSIONS[ext]
+        extraction_method = cls.EXTRACTION_METHODS[file_type]
+        truncated = False
         
         try:
-            # 根据文件类型选择解析方法
-            if file_type == 'pdf':
+            if max_pages is not None or max_chars is not None:
+                # 有预算时流式读取
+                stream = TextStream(file_path, file_type, max_pages=max_pages, max_chars=max_chars)
+                content = stream.read()
+                truncated = stream.truncated
+            elif file_type == 'pdf':
                 content = cls.parse_pdf(file_path)
-                extraction_method = 'PyPDF2'
             elif file_type == 'docx':
                 content = cls.parse_docx(file_path)
-                extraction_method = 'python-docx'
             else:  # txt
                 content = cls.parse_txt(file_path)
-                extraction_method = 'text-read'
             
             # 检查内容是否为空
             if not content or not content.strip():
@@ -133,7 +309,8 @@ class DocumentParser:
                     error_message='文档内容为空或仅包含空白字符',
                     file_type=file_type,
                     extraction_method=extraction_method,
-                    timestamp=timestamp
+                    timestamp=timestamp,
+                    truncated=truncated
                 )
             
             return ParseResult(
@@ -142,7 +319,8 @@ class DocumentParser:
                 error_message=None,
                 file_type=file_type,
                 extraction_method=extraction_method,
-                timestamp=timestamp
+                timestamp=timestamp,
+                truncated=truncated
             )
             
         except Exception as e:
@@ -156,12 +334,44 @@ class DocumentParser:
                 timestamp=timestamp
             )
 
+    @classmethod
+    def stream(
+        cls,
+        file_path: str,
+        max_pages: Optional[int] = None,
+        max_chars: Optional[int] = None
+    ) -> TextStream:
+        """创建流式文本读取器
+        
+        Args:
+            file_path: 文件路径
+            max_pages: 最多读取的页数（仅对 PDF 生效），None 表示不限制
+            max_chars: 最多产出的字符数，None 表示不限制
+            
+        Returns:
+            TextStream: 可迭代的文本流，逐页/逐段产出文本
+            
+        Raises:
+            ValueError: 文件格式不支持
+        """
+        _, ext = os.path.splitext(file_path)
+        ext = ext.lower()
+        
+        if ext not in cls.SUPPORTED_EXTENSIONS:
+            raise ValueError(f'不支持的文件格式: {ext}')
+        
+        return TextStream(
+            file_path,
+            cls.SUPPORTED_EXTENSIONS[ext],
+            max_pages=max_pages,
+            max_chars=max_chars
+        )
 
     @staticmethod
     def parse_pdf(file_path: str) -> str:
         """解析 PDF 文件
         
-        使用 PyPDF2 提取 PDF 文本内容。
+        使用 PyPDF2 逐页提取 PDF 文本内容。
         
         Args:
             file_path: PDF 文件路径
@@ -172,20 +382,7 @@ class DocumentParser:
         Raises:
             Exception: 解析失败时抛出异常
         """
-        try:
-            from PyPDF2 import PdfReader
-        except ImportError:
-            raise ImportError('PyPDF2 未安装，请运行: pip install PyPDF2')
-        
-        reader = PdfReader(file_path)
-        text_parts = []
-        
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text_parts.append(page_text)
-        
-        return '\n'.join(text_parts)
+        return TextStream(file_path, 'pdf').read()
 
     @staticmethod
     def parse_docx(file_path: str) -> str:
@@ -202,31 +399,7 @@ class DocumentParser:
         Raises:
             Exception: 解析失败时抛出异常
         """
-        try:
-            from docx import Document
-        except ImportError:
-            raise ImportError('python-docx 未安装，请运行: pip install python-docx')
-        
-        doc = Document(file_path)
-        text_parts = []
-        
-        # 提取段落内容
-        for para in doc.paragraphs:
-            if para.text.strip():
-                text_parts.append(para.text)
-        
-        # 提取表格内容
-        for table in doc.tables:
-            for row in table.rows:
-                row_text = []
-                for cell in row.cells:
-                    cell_text = cell.text.strip()
-                    if cell_text:
-                        row_text.append(cell_text)
-                if row_text:
-                    text_parts.append(' | '.join(row_text))
-        
-        return '\n'.join(text_parts)
+        return TextStream(file_path, 'docx').read()
 
     @staticmethod
     def parse_txt(file_path: str) -> str:
@@ -243,10 +416,7 @@ class DocumentParser:
         Raises:
             Exception: 读取失败时抛出异常
         """
-        # 尝试的编码列表，按优先级排序
-        encodings = ['utf-8', 'utf-8-sig', 'gbk', 'gb2312', 'gb18030', 'latin-1']
-        
-        for encoding in encodings:
+        for encoding in TXT_ENCODINGS:
             try:
                 with open(file_path, 'r', encoding=encoding) as f:
                     return f.read()
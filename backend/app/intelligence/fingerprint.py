@@ -0,0 +1,68 @@
+"""
+文档指纹模块
+
+使用 SimHash 为文档内容生成 64 位指纹，用于发现内容几乎相同的资料。
+"""
+
+import hashlib
+from collections import Counter
+from typing import List
+
+import numpy as np
+
+# 指纹位数
+SIMHASH_BITS = 64
+
+# LSH 分段数：指纹切成 SIMHASH_BANDS 段，任意一段相同即为候选。
+# 海明距离不超过 SIMHASH_BANDS - 1 的两个指纹至少有一段完全相同，候选不会遗漏
+SIMHASH_BANDS = 4
+
+# 判定为近似重复的最大海明距离
+DUPLICATE_MAX_DISTANCE = 3
+
+_BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+
+def simhash(tokens: List[str]) -> int:
+    """
+    计算 SimHash 指纹
+
+    每个词按出现次数加权，对其 64 位哈希的每一位投票，票数为正的位置 1。
+    使用 blake2b 而不是内置 hash，保证不同进程、不同时间算出的指纹一致。
+
+    Args:
+        tokens: 分词结果（应已过滤停用词）
+
+    Returns:
+        64 位无符号整数指纹，没有词时为 0
+    """
+    counts = Counter(tokens)
+    if not counts:
+        return 0
+
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'big')
+         for token in counts),
+        dtype=np.uint64, count=len(counts)
+    )
+    weights = np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+
+    # 每个词的每一位：1 投正票、0 投反票，票数为词频
+    bits = (hashes[:, None] >> np.arange(SIMHASH_BITS, dtype=np.uint64)) & np.uint64(1)
+    votes = weights @ (bits.astype(np.int64) * 2 - 1)
+
+    fingerprint = 0
+    for bit in np.flatnonzero(votes > 0):
+        fingerprint |= 1 << int(bit)
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """两个指纹的海明距离"""
+    return bin(a ^ b).count('1')
+
+
+def split_bands(fingerprint: int) -> List[int]:
+    """把指纹切成 SIMHASH_BANDS 段，用作 LSH 分桶键"""
+    return [(fingerprint >> (band * _BAND_BITS)) & _BAND_MASK for band in range(SIMHASH_BANDS)]
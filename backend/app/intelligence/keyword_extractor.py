@@ -6,7 +6,8 @@
 
 import os
 from dataclasses import dataclass
-from typing import List, Optional, Set
+from operator import itemgetter
+from typing import List, Optional, Set, Tuple
 
 import jieba
 import jieba.analyse
@@ -82,31 +83,41 @@ class KeywordExtractor:
         """获取停用词集合"""
         return self._stop_words.copy()
 
-    def extract(self, text: str, top_n: int = 10) -> List[KeywordResult]:
+    def extract(
+        self,
+        text: str,
+        top_n: int = 10,
+        tokens: Optional[List[str]] = None
+    ) -> List[KeywordResult]:
         """
         从文本中提取关键词
         
         使用 TF-IDF 算法计算关键词权重，返回权重最高的 top_n 个关键词。
+        如果调用方已经分过词，可以传入 tokens 复用分词结果，避免重复分词。
         
         Args:
             text: 输入文本
             top_n: 返回的关键词数量上限，默认为 10
+            tokens: 可选的分词结果（segment 的返回值）
             
         Returns:
             关键词结果列表，按权重降序排列
         """
-        if not text or not text.strip():
+        if tokens is None:
+            if not text or not text.strip():
+                return []
+            tokens = self.segment(text)
+        
+        if not tokens:
             return []
         
         # 确保 top_n 为正整数
         top_n = max(1, int(top_n))
         
-        # 使用 jieba 的 TF-IDF 提取关键词
-        # extract_tags 返回 (keyword, weight) 元组列表
-        keywords_with_weights = jieba.analyse.extract_tags(
-            text, 
-            topK=top_n * 2,  # 多提取一些，以便过滤后仍有足够数量
-            withWeight=True
+        # 基于分词结果计算 TF-IDF
+        keywords_with_weights = self._rank_by_tfidf(
+            tokens,
+            top_k=top_n * 2  # 多提取一些，以便过滤后仍有足够数量
         )
         
         results: List[KeywordResult] = []
@@ -131,6 +142,36 @@ class KeywordExtractor:
         
         return results
 
+    @staticmethod
+    def _rank_by_tfidf(tokens: List[str], top_k: int) -> List[Tuple[str, float]]:
+        """
+        根据分词结果计算 TF-IDF 权重
+        
+        与 jieba.analyse.extract_tags 的计算方式一致（使用同一份 IDF 词典和停用词），
+        但直接使用已有的分词结果，不再对原文重新分词。
+        
+        Args:
+            tokens: 分词结果
+            top_k: 返回数量
+            
+        Returns:
+            (关键词, 权重) 列表，按权重降序排列
+        """
+        tfidf = jieba.analyse.default_tfidf
+        stop_words = tfidf.stop_words
+        
+        freq = {}
+        for word in tokens:
+            if len(word.strip()) < 2 or word.lower() in stop_words:
+                continue
+            freq[word] = freq.get(word, 0.0) + 1.0
+        
+        total = sum(freq.values())
+        for word in freq:
+            freq[word] *= tfidf.idf_freq.get(word, tfidf.median_idf) / total
+        
+        return sorted(freq.items(), key=itemgetter(1), reverse=True)[:top_k]
+
     def segment(self, text: str) -> List[str]:
         """
         对文本进行中文分词
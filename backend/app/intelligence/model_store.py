@@ -0,0 +1,127 @@
+"""
+模型版本存储模块
+
+以版本化文件保存分类模型，供多个 worker 进程共享和热更新。
+"""
+
+import json
+import logging
+import os
+import time
+from typing import Optional, Tuple
+
+from .category_classifier import CategoryClassifier
+
+logger = logging.getLogger(__name__)
+
+
+# 保留的历史版本数量（当前版本之外）
+KEEP_OLD_VERSIONS = 2
+
+
+class ModelStore:
+    """
+    模型版本存储
+
+    目录结构：
+        classifier-<版本号>.joblib   各版本的模型文件，写入后不再修改
+        CURRENT                      当前版本清单（JSON），通过原子替换切换版本
+
+    模型文件不压缩保存，加载时 numpy 数组以只读 mmap 方式映射，
+    同一台机器上的多个 worker 共享操作系统页缓存中的同一份数据。
+    各进程通过 stat 清单文件检查版本变化，开销只有一次系统调用。
+    """
+
+    MANIFEST_NAME = 'CURRENT'
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory: 模型存储目录
+        """
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, self.MANIFEST_NAME)
+
+    def publish(self, classifier: CategoryClassifier) -> Optional[str]:
+        """
+        发布新版本模型
+
+        Args:
+            classifier: 已训练的分类器
+
+        Returns:
+            新版本号，保存失败返回 None
+        """
+        os.makedirs(self.directory, exist_ok=True)
+
+        now = time.time()
+        version = f"{time.strftime('%Y%m%d%H%M%S', time.localtime(now))}{int(now * 1000) % 1000:03d}-{os.getpid()}"
+        file_name = f"classifier-{version}.joblib"
+        if not classifier.save_model(os.path.join(self.directory, file_name)):
+            return None
+
+        # 模型文件落盘后再切换清单，读者要么看到旧版本、要么看到完整的新版本
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': version, 'file': file_name}, f)
+        os.replace(tmp_path, self.manifest_path)
+
+        logger.info(f"模型新版本已发布: {version}")
+        self._remove_old_versions(file_name)
+        return version
+
+    def stamp(self) -> Optional[Tuple[int, int]]:
+        """
+        清单文件的修改时间和 inode，用于低成本判断版本是否变化
+
+        Returns:
+            (st_mtime_ns, st_ino)，尚无已发布版本时返回 None
+        """
+        try:
+            stat = os.stat(self.manifest_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_ino
+
+    def current(self) -> Optional[Tuple[str, str]]:
+        """
+        读取当前版本
+
+        Returns:
+            (版本号, 模型文件路径)，尚无已发布版本时返回 None
+        """
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return None
+
+        return manifest['version'], os.path.join(self.directory, manifest['file'])
+
+    def load(self, path: str) -> Optional[CategoryClassifier]:
+        """
+        加载指定模型文件
+
+        Args:
+            path: 模型文件路径
+
+        Returns:
+            加载好的分类器，失败返回 None
+        """
+        classifier = CategoryClassifier()
+        if not classifier.load_model(path, mmap=True):
+            return None
+        return classifier
+
+    def _remove_old_versions(self, current_file: str) -> None:
+        """删除过旧的模型文件（已映射该文件的进程不受影响）"""
+        files = sorted(
+            name for name in os.listdir(self.directory)
+            if name.startswith('classifier-') and name.endswith('.joblib') and name != current_file
+        )
+
+        for name in files[:-KEEP_OLD_VERSIONS] if KEEP_OLD_VERSIONS else files:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError as e:
+                logger.warning(f"删除旧模型文件失败: {name} - {str(e)}")
@@ -0,0 +1,288 @@
+"""
+沙箱解析进程池模块
+
+在独立子进程中解析文档，限制每个任务的 CPU 时间、墙钟时间和内存，
+畸形或病态文档不会拖垮 Web 进程。
+"""
+
+import json
+import logging
+import os
+import queue
+import signal
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from .document_parser import DocumentParser, ParseResult
+
+logger = logging.getLogger(__name__)
+
+
+# 子进程数量（即同时解析的文档数）
+PARSER_WORKERS = 2
+
+# 单个任务的墙钟时间上限（秒）
+PARSE_WALL_TIMEOUT = 60
+
+# 单个任务的 CPU 时间上限（秒）
+PARSE_CPU_LIMIT = 30
+
+# 子进程常驻内存上限（字节）
+PARSE_MEMORY_LIMIT = 512 * 1024 * 1024
+
+# 子进程处理该数量的任务后回收重建，释放解析库积累的内存
+WORKER_MAX_JOBS = 100
+
+# 等待结果期间检查超时和内存的间隔（秒）
+MONITOR_INTERVAL = 0.1
+
+# 解析失败原因，写入 ParseResult.error_code
+ERROR_TIMEOUT = 'timeout'
+ERROR_CPU_LIMIT = 'cpu_limit'
+ERROR_MEMORY_LIMIT = 'memory_limit'
+ERROR_WORKER_CRASHED = 'worker_crashed'
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parser_worker.py')
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+class _Worker:
+    """一个解析子进程"""
+
+    def __init__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, WORKER_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            encoding='utf-8',
+            errors='replace'
+        )
+        self.jobs = 0
+
+        # 管道不能在所有平台上用 select 等待（Windows 不支持），由读取线程逐行读出放入队列，
+        # 等待结果时按超时从队列取；读到文件末尾时放入 None
+        self.lines: queue.Queue = queue.Queue()
+        self._reader = threading.Thread(target=self._read_lines, name=f'parser-reader-{self.pid}', daemon=True)
+        self._reader.start()
+
+    @property
+    def pid(self) -> int:
+        return self.process.pid
+
+    def _read_lines(self) -> None:
+        """读取线程：把子进程输出的完整行放入队列"""
+        try:
+            for line in self.process.stdout:
+                self.lines.put(line)
+        except (OSError, ValueError):
+            # 子进程被结束、管道已关闭
+            pass
+        self.lines.put(None)
+
+    def rss(self) -> Optional[int]:
+        """当前常驻内存（字节），无法读取时返回 None"""
+        try:
+            with open(f'/proc/{self.process.pid}/statm', 'r') as f:
+                return int(f.read().split()[1]) * _PAGE_SIZE
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def kill(self) -> None:
+        """强制结束子进程"""
+        try:
+            self.process.kill()
+        except OSError:
+            pass
+        self.process.wait()
+        self._close_pipes()
+
+    def close(self) -> None:
+        """关闭标准输入让子进程自行退出，超时则强制结束"""
+        # 标准输出由读取线程持有，子进程退出、读取线程读到末尾后再关闭
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self.kill()
+            return
+        self._close_pipes()
+
+    def _close_pipes(self) -> None:
+        for pipe in (self.process.stdin, self.process.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+
+class ParserPool:
+    """
+    沙箱解析进程池
+
+    每个子进程以独立脚本运行 parser_worker.py，通过管道逐行交换 JSON：
+    父进程写入任务，子进程返回 ParseResult。父进程等待结果时定期检查：
+        墙钟时间  超过 wall_timeout 即结束子进程
+        内存      常驻内存超过 memory_limit 即结束子进程（读取 /proc，仅 Linux）
+    CPU 时间由子进程通过 RLIMIT_CPU 自行限制，超出时被内核以 SIGXCPU 结束。
+    任何一种超限都返回 success=False 且带 error_code 的 ParseResult，
+    被结束的子进程在下一个任务时重建；处理满 max_jobs 个任务的子进程也会回收重建。
+
+    可被多个线程同时调用，同时进行的任务数不超过子进程数量。
+    """
+
+    def __init__(
+        self,
+        workers: int = PARSER_WORKERS,
+        wall_timeout: float = PARSE_WALL_TIMEOUT,
+        cpu_limit: int = PARSE_CPU_LIMIT,
+        memory_limit: int = PARSE_MEMORY_LIMIT,
+        max_jobs: int = WORKER_MAX_JOBS
+    ):
+        """
+        Args:
+            workers: 子进程数量
+            wall_timeout: 单个任务的墙钟时间上限（秒）
+            cpu_limit: 单个任务的 CPU 时间上限（秒）
+            memory_limit: 子进程常驻内存上限（字节）
+            max_jobs: 子进程回收前最多处理的任务数
+        """
+        self.wall_timeout = wall_timeout
+        self.cpu_limit = cpu_limit
+        self.memory_limit = memory_limit
+        self.max_jobs = max_jobs
+
+        self._idle: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(workers)
+
+    def parse(
+        self,
+        file_path: str,
+        max_pages: Optional[int] = None,
+        max_chars: Optional[int] = None
+    ) -> ParseResult:
+        """
+        在子进程中解析文档，参数与 DocumentParser.parse 相同
+
+        Returns:
+            ParseResult: 解析结果；超限时 success=False，error_code 说明原因
+        """
+        # 文件不存在或格式不支持时不会真正解析，无需交给子进程
+        ext = os.path.splitext(file_path)[1].lower()
+        if not os.path.exists(file_path) or ext not in DocumentParser.SUPPORTED_EXTENSIONS:
+            return DocumentParser.parse(file_path, max_pages=max_pages, max_chars=max_chars)
+
+        job = json.dumps({
+            'file_path': file_path,
+            'max_pages': max_pages,
+            'max_chars': max_chars,
+            'cpu_limit': self.cpu_limit
+        }, ensure_ascii=False)
+        file_type = DocumentParser.SUPPORTED_EXTENSIONS[ext]
+
+        with self._slots:
+            worker = self._acquire()
+            try:
+                result = self._run(worker, job, file_type)
+            except Exception:
+                worker.kill()
+                raise
+
+            if worker.process.poll() is None and worker.jobs < self.max_jobs:
+                with self._lock:
+                    self._idle.append(worker)
+            else:
+                worker.close()
+
+        if result.error_code:
+            logger.warning(f'沙箱解析失败 {file_path}: {result.error_message}')
+        return result
+
+    def shutdown(self) -> None:
+        """结束所有空闲子进程（正在执行任务的子进程在任务结束后关闭）"""
+        with self._lock:
+            workers, self._idle = self._idle, []
+        for worker in workers:
+            worker.close()
+
+    def _acquire(self) -> _Worker:
+        """取一个存活的空闲子进程，没有则新建"""
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.process.poll() is None:
+                    return worker
+                worker.kill()
+        return _Worker()
+
+    def _run(self, worker: _Worker, job: str, file_type: str) -> ParseResult:
+        """把任务交给子进程并等待结果，期间监控超时和内存"""
+        worker.jobs += 1
+        try:
+            worker.process.stdin.write(job + '\n')
+            worker.process.stdin.flush()
+        except (BrokenPipeError, OSError):
+            return self._crashed_result(worker, file_type)
+
+        deadline = time.monotonic() + self.wall_timeout
+
+        while True:
+            try:
+                # 只有完整的一行才会放入队列，结果分几次写出也不会阻塞到超时之后
+                line = worker.lines.get(timeout=MONITOR_INTERVAL)
+            except queue.Empty:
+                pass
+            else:
+                if line is None:
+                    return self._crashed_result(worker, file_type)
+                try:
+                    return ParseResult.from_json(line)
+                except (ValueError, TypeError, KeyError):
+                    worker.kill()
+                    return self._error_result(file_type, ERROR_WORKER_CRASHED, '解析进程返回了无效结果')
+
+            if time.monotonic() >= deadline:
+                worker.kill()
+                return self._error_result(
+                    file_type, ERROR_TIMEOUT, f'解析超时（超过 {self.wall_timeout} 秒）'
+                )
+
+            rss = worker.rss()
+            if rss is not None and rss > self.memory_limit:
+                worker.kill()
+                return self._error_result(
+                    file_type, ERROR_MEMORY_LIMIT,
+                    f'解析内存超限（超过 {self.memory_limit // (1024 * 1024)} MB）'
+                )
+
+    def _crashed_result(self, worker: _Worker, file_type: str) -> ParseResult:
+        """子进程意外退出时的结果，SIGXCPU 退出说明 CPU 时间超限"""
+        worker.kill()
+        if hasattr(signal, 'SIGXCPU') and worker.process.returncode == -signal.SIGXCPU:
+            return self._error_result(
+                file_type, ERROR_CPU_LIMIT, f'解析 CPU 时间超限（超过 {self.cpu_limit} 秒）'
+            )
+        return self._error_result(
+            file_type, ERROR_WORKER_CRASHED, f'解析进程异常退出（退出码 {worker.process.returncode}）'
+        )
+
+    @staticmethod
+    def _error_result(file_type: str, error_code: str, error_message: str) -> ParseResult:
+        """构造超限或异常时的解析结果"""
+        return ParseResult(
+            content='',
+            success=False,
+            error_message=error_message,
+            file_type=file_type,
+            extraction_method='none',
+            timestamp=datetime.now(),
+            error_code=error_code
+        )
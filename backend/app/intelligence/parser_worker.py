@@ -0,0 +1,58 @@
+"""
+文档解析子进程
+
+由 ParserPool 以独立脚本方式启动，不导入 app 包：启动快，也不会在子进程中重复创建应用。
+从标准输入逐行读取 JSON 任务，解析后把 ParseResult 的 JSON 逐行写回标准输出。
+标准输入关闭（父进程退出）时子进程随之退出。
+"""
+
+import json
+import sys
+
+try:
+    import resource
+except ImportError:  # 非 POSIX 平台没有 resource 模块，不限制 CPU 时间
+    resource = None
+
+# 作为脚本运行时本目录在 sys.path 中，document_parser 只依赖标准库和解析库
+from document_parser import DocumentParser
+
+
+def set_cpu_limit(seconds):
+    """
+    限制本次任务可用的 CPU 时间
+
+    RLIMIT_CPU 按进程累计计时，因此把软限制设为"已用时间 + 本次预算"。
+    超出后内核发送 SIGXCPU 终止进程，父进程据此返回 cpu_limit 错误。
+    """
+    if resource is None or not seconds:
+        return
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime) + seconds
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def main():
+    # 解析库可能向标准输出打印信息，协议输出单独保留，其余输出转到标准错误
+    output = sys.stdout
+    sys.stdout = sys.stderr
+    sys.stdin.reconfigure(encoding='utf-8')
+    output.reconfigure(encoding='utf-8', errors='replace')
+
+    for line in sys.stdin:
+        job = json.loads(line)
+        set_cpu_limit(job.get('cpu_limit'))
+
+        result = DocumentParser.parse(
+            job['file_path'], max_pages=job.get('max_pages'), max_chars=job.get('max_chars')
+        )
+        output.write(result.to_json() + '\n')
+        output.flush()
+
+
+if __name__ == '__main__':
+    main()
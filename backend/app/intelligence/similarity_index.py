@@ -0,0 +1,286 @@
+"""
+相似资料索引模块
+
+基于全库 TF-IDF 稀疏矩阵计算资料之间的余弦相似度。
+"""
+
+import logging
+import os
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+logger = logging.getLogger(__name__)
+
+
+# 词表最大规模
+MAX_FEATURES = 50000
+
+# 出现在超过该比例资料中的词不进入词表；资料少于 MAX_DF_MIN_DOCUMENTS 份时不剔除
+# （只有一两份资料时，每个词的文档比例都超过该值，词表会被清空）
+MAX_DF = 0.95
+MAX_DF_MIN_DOCUMENTS = 10
+
+# 增量追加的行数达到该值且达到全量行数的 REBUILD_RATIO 时，需要全量重建
+# （新资料只用已有词表和 IDF 表示，新词不会进入词表）
+REBUILD_MIN_APPENDS = 20
+REBUILD_RATIO = 0.2
+
+
+class SimilarityIndex:
+    """
+    相似资料索引
+
+    每份资料一行 L2 归一化的 TF-IDF 向量，两行点积即余弦相似度。
+    查询时用稀疏矩阵乘一次得到与全部资料的相似度，再取 top-k。
+
+    持久化为两个 .npz 文件：
+        base   全量构建的矩阵、行对应的资料 ID、词表和 IDF，只在重建时写入
+        delta  重建后增量追加的行和被删除的资料 ID，每次追加只重写这个小文件
+    资料 ID 为 0 的行表示已失效（资料被重新分析或删除），重建时清除。
+    """
+
+    def __init__(
+        self,
+        material_ids: np.ndarray,
+        matrix: sparse.csr_matrix,
+        terms: Sequence[str],
+        idf: np.ndarray,
+        built_at: Optional[int] = None
+    ):
+        """
+        Args:
+            material_ids: 每行对应的资料 ID
+            matrix: L2 归一化的 TF-IDF 矩阵（全部为全量构建的行）
+            terms: 词表
+            idf: 与词表对应的 IDF
+            built_at: 全量构建的时间戳（纳秒），用于判断增量文件是否属于这次构建
+        """
+        self._terms = np.asarray(terms, dtype=str)
+        self._idf = np.asarray(idf, dtype=np.float64)
+        self._vocabulary: Dict[str, int] = {term: i for i, term in enumerate(self._terms)}
+        self._base_rows = matrix.shape[0]
+        self._built_at = time.time_ns() if built_at is None else built_at
+        self._removed: List[int] = []
+
+        # 资料 ID 与矩阵作为一个整体替换，并发查询不会看到不一致的两者
+        self._state: Tuple[np.ndarray, sparse.csr_matrix] = (np.asarray(material_ids, dtype=np.int64), matrix)
+
+    @classmethod
+    def build(cls, documents: Iterable[Tuple[int, List[str]]], max_features: int = MAX_FEATURES) -> 'SimilarityIndex':
+        """
+        全量构建索引
+
+        Args:
+            documents: (资料 ID, 分词结果) 序列
+
+        Returns:
+            新索引
+        """
+        material_ids = []
+
+        def token_lists():
+            # 边读边向量化，不在内存中保留全部分词结果
+            for material_id, tokens in documents:
+                material_ids.append(material_id)
+                yield tokens
+
+        # 输入已是分词结果，不再由向量化器切分
+        vectorizer = TfidfVectorizer(analyzer=lambda tokens: tokens, max_features=max_features)
+        try:
+            matrix = vectorizer.fit_transform(token_lists()).tocsr()
+            terms, idf = vectorizer.get_feature_names_out(), vectorizer.idf_
+        except ValueError:
+            # 没有文档，或全部文档都没有有效词
+            matrix = None
+
+        if matrix is not None and matrix.shape[0] >= MAX_DF_MIN_DOCUMENTS:
+            # 文档数读完才知道，构建后再剔除过于常见的词并重新归一化
+            document_frequency = np.bincount(matrix.indices, minlength=matrix.shape[1])
+            keep = document_frequency <= MAX_DF * matrix.shape[0]
+            if not keep.any():
+                matrix = None
+            elif not keep.all():
+                matrix = normalize(matrix[:, keep]).tocsr()
+                terms, idf = terms[keep], idf[keep]
+
+        if matrix is None:
+            return cls(np.asarray(material_ids, dtype=np.int64),
+                       sparse.csr_matrix((len(material_ids), 0)), [], np.zeros(0))
+        return cls(np.asarray(material_ids), matrix, terms, idf)
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._state[0]))
+
+    @property
+    def has_vocabulary(self) -> bool:
+        """是否已有词表（全量构建时有资料带有效词）"""
+        return bool(len(self._terms))
+
+    @property
+    def needs_rebuild(self) -> bool:
+        """增量追加的行是否已多到需要全量重建（尚无词表时有追加即需要）"""
+        appended = self._state[1].shape[0] - self._base_rows
+        if not len(self._terms):
+            return appended > 0
+        return appended >= max(REBUILD_MIN_APPENDS, self._base_rows * REBUILD_RATIO)
+
+    def transform(self, tokens: List[str]) -> sparse.csr_matrix:
+        """用现有词表和 IDF 把分词结果转成 L2 归一化的行向量"""
+        counts = Counter(token for token in tokens if token in self._vocabulary)
+        columns = np.fromiter((self._vocabulary[token] for token in counts), dtype=np.int64, count=len(counts))
+        values = np.fromiter(counts.values(), dtype=np.float64, count=len(counts)) * self._idf[columns]
+
+        norm = np.linalg.norm(values)
+        if norm > 0:
+            values /= norm
+
+        return sparse.csr_matrix((values, (np.zeros(len(columns), dtype=np.int64), columns)),
+                                 shape=(1, len(self._terms)))
+
+    def add(self, material_id: int, tokens: List[str]) -> None:
+        """
+        增量追加一份资料（已存在时替换旧行）
+
+        Args:
+            material_id: 资料 ID
+            tokens: 分词结果
+        """
+        material_ids, matrix = self._state
+        material_ids = np.append(np.where(material_ids == material_id, 0, material_ids), material_id)
+        matrix = sparse.vstack([matrix, self.transform(tokens)], format='csr')
+        self._state = (material_ids, matrix)
+
+    def remove(self, material_id: int) -> None:
+        """移除资料"""
+        material_ids, matrix = self._state
+        self._state = (np.where(material_ids == material_id, 0, material_ids), matrix)
+        self._removed.append(material_id)
+
+    def related(self, material_id: int, top_k: int = 10) -> List[Tuple[int, float]]:
+        """
+        查找与指定资料最相似的资料
+
+        Args:
+            material_id: 资料 ID
+            top_k: 返回数量
+
+        Returns:
+            (资料 ID, 相似度) 列表，按相似度降序；资料不在索引中时返回空列表
+        """
+        material_ids, matrix = self._state
+        rows = np.flatnonzero(material_ids == material_id)
+        if not len(rows):
+            return []
+        return self.related_to_vector(matrix[rows[-1]], top_k, exclude=material_id)
+
+    def related_to_vector(
+        self,
+        vector: sparse.csr_matrix,
+        top_k: int = 10,
+        exclude: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        查找与给定向量最相似的资料
+
+        Args:
+            vector: transform 得到的行向量
+            top_k: 返回数量
+            exclude: 排除的资料 ID（通常是查询的资料本身）
+
+        Returns:
+            (资料 ID, 相似度) 列表，按相似度降序，不含相似度为 0 的资料
+        """
+        material_ids, matrix = self._state
+        if not matrix.shape[0] or not vector.nnz:
+            return []
+
+        scores = (matrix @ vector.T).toarray().ravel()
+        scores[(material_ids == 0) | (material_ids == exclude)] = 0.0
+
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(scores[candidates], -top_k)[-top_k:]]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+
+        return [(int(material_ids[i]), float(scores[i])) for i in candidates]
+
+    def save(self, base_path: str, delta_path: str, full: bool = False) -> None:
+        """
+        持久化索引
+
+        Args:
+            base_path: 全量部分文件路径
+            delta_path: 增量部分文件路径
+            full: 是否重写全量部分（重建后使用），否则只重写增量部分
+        """
+        material_ids, matrix = self._state
+        base_rows = self._base_rows
+
+        built_at = np.asarray(self._built_at, dtype=np.int64)
+
+        if full:
+            _save_npz(base_path, material_ids=material_ids[:base_rows], matrix=matrix[:base_rows],
+                      terms=self._terms, idf=self._idf, built_at=built_at)
+
+        _save_npz(delta_path, material_ids=material_ids[base_rows:], matrix=matrix[base_rows:],
+                  removed=np.asarray(self._removed, dtype=np.int64), built_at=built_at)
+
+    @classmethod
+    def load(cls, base_path: str, delta_path: str) -> Optional['SimilarityIndex']:
+        """
+        加载索引
+
+        Returns:
+            索引，全量部分不存在时返回 None
+        """
+        if not os.path.exists(base_path):
+            return None
+
+        base = _load_npz(base_path)
+        index = cls(base['material_ids'], base['matrix'], base['terms'], base['idf'], int(base['built_at']))
+
+        if not os.path.exists(delta_path):
+            return index
+
+        delta = _load_npz(delta_path)
+        if int(delta['built_at']) != index._built_at:
+            # 增量文件属于上一次全量构建，其中的资料已包含在新的全量部分中
+            return index
+
+        # 增量行替换全量部分中同一资料的旧行，被删除的资料整体失效
+        material_ids, matrix = index._state
+        stale = np.isin(material_ids, np.concatenate([delta['material_ids'], delta['removed']]))
+        index._state = (
+            np.concatenate([np.where(stale, 0, material_ids), delta['material_ids']]),
+            sparse.vstack([matrix, delta['matrix']], format='csr')
+        )
+        index._removed = delta['removed'].tolist()
+        return index
+
+
+def _save_npz(path: str, matrix: sparse.csr_matrix, **arrays: np.ndarray) -> None:
+    """把稀疏矩阵和附带数组保存到同一个 .npz 文件（写临时文件后原子替换）"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    matrix = matrix.tocsr()
+    np.savez(tmp_path, data=matrix.data, indices=matrix.indices, indptr=matrix.indptr,
+             shape=np.asarray(matrix.shape), **arrays)
+    os.replace(tmp_path, path)
+
+
+def _load_npz(path: str) -> Dict[str, object]:
+    """读取 _save_npz 保存的文件"""
+    with np.load(path, allow_pickle=False) as data:
+        result = {key: data[key] for key in data.files}
+
+    result['matrix'] = sparse.csr_matrix(
+        (result.pop('data'), result.pop('indices'), result.pop('indptr')),
+        shape=tuple(result.pop('shape'))
+    )
+    return result
@@ -0,0 +1,163 @@
+"""
+标签索引模块
+
+为现有标签建立内存索引，快速找出与关键词相关的标签。
+"""
+
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+class TagIndex:
+    """
+    标签索引
+
+    标签与关键词"相关"的判定与原先的逐个比较一致（忽略大小写）：
+    1. 标签名与关键词完全相同
+    2. 关键词包含在标签名中
+    3. 标签名包含在关键词中
+
+    情况 1、2 通过单字和相邻两字的倒排表找出候选标签（取关键词各相邻两字的倒排表之交），
+    再逐个确认关键词确实包含在标签名中；每个标签名只登记 O(长度) 个键。
+    情况 3 通过以全部标签名构建的 Aho-Corasick 自动机扫描关键词一遍查出。
+    """
+
+    def __init__(self, tags: Iterable[Tuple[int, str]]):
+        """
+        构建索引
+
+        Args:
+            tags: (标签 ID, 标签名) 序列
+        """
+        self._names: Dict[int, str] = {}
+        # 小写标签名，以及单字、相邻两字 -> 标签 ID 的倒排表
+        self._keys: Dict[int, str] = {}
+        self._postings: Dict[str, Set[int]] = {}
+
+        # Aho-Corasick 自动机：转移表、失配指针、各状态命中的标签
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[int]] = [[]]
+
+        for tag_id, name in tags:
+            key = name.lower()
+            if not key:
+                continue
+            self._names[tag_id] = name
+            self._keys[tag_id] = key
+            self._add_postings(tag_id, key)
+            self._add_pattern(tag_id, key)
+
+        self._build_failure_links()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def get_name(self, tag_id: int) -> Optional[str]:
+        """获取标签名"""
+        return self._names.get(tag_id)
+
+    def match(self, keyword: str) -> Set[int]:
+        """
+        查找与单个关键词相关的标签
+
+        Args:
+            keyword: 关键词
+
+        Returns:
+            相关标签的 ID 集合
+        """
+        key = keyword.lower()
+        if not key:
+            return set()
+
+        return self._containing(key) | self._scan(key)
+
+    def match_keywords(self, keywords: List[str]) -> Dict[int, int]:
+        """
+        查找与一组关键词相关的标签
+
+        Args:
+            keywords: 关键词列表（通常按权重降序）
+
+        Returns:
+            标签 ID -> 第一个与之相关的关键词下标，按标签 ID 升序
+        """
+        matched: Dict[int, int] = {}
+
+        for position, keyword in enumerate(keywords):
+            for tag_id in self.match(keyword):
+                if tag_id not in matched:
+                    matched[tag_id] = position
+
+        return dict(sorted(matched.items()))
+
+    def _add_postings(self, tag_id: int, key: str) -> None:
+        """登记标签名中的单字和相邻两字"""
+        for start, char in enumerate(key):
+            self._postings.setdefault(char, set()).add(tag_id)
+            if start + 2 <= len(key):
+                self._postings.setdefault(key[start:start + 2], set()).add(tag_id)
+
+    def _containing(self, key: str) -> Set[int]:
+        """返回标签名包含关键词的所有标签"""
+        if len(key) == 1:
+            return set(self._postings.get(key, ()))
+
+        # 取互不重叠、覆盖整个关键词的相邻两字，从最短的倒排表开始求交，结果为空即可提前结束
+        starts = sorted(set(range(0, len(key) - 1, 2)) | {len(key) - 2})
+        postings = sorted((self._postings.get(key[start:start + 2], set()) for start in starts), key=len)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates = candidates & posting
+
+        if len(key) == 2:
+            return candidates
+        return {tag_id for tag_id in candidates if key in self._keys[tag_id]}
+
+    def _add_pattern(self, tag_id: int, key: str) -> None:
+        """把标签名插入自动机的字典树"""
+        node = 0
+        for char in key:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            node = next_node
+        self._outputs[node].append(tag_id)
+
+    def _build_failure_links(self) -> None:
+        """广度优先计算失配指针，并合并后缀状态的命中标签"""
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+
+                if self._outputs[self._fail[child]]:
+                    self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
+
+    def _scan(self, text: str) -> Set[int]:
+        """扫描文本，返回出现在文本中的所有标签"""
+        found: Set[int] = set()
+        node = 0
+
+        for char in text:
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            if self._outputs[node]:
+                found.update(self._outputs[node])
+
+        return found
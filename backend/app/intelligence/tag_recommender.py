@@ -5,15 +5,23 @@
 """
 
 import logging
+import threading
+import time
 from dataclasses import dataclass
 from typing import List, Optional
 
+from .tag_index import TagIndex
+
 logger = logging.getLogger(__name__)
 
 
 # 最大推荐标签数量
 MAX_SUGGESTED_TAGS = 5
 
+# 标签索引最长使用时间（秒）
+# 其他 worker 进程增删标签时无法通知本进程，到期后重建索引兜底
+TAG_INDEX_MAX_AGE = 300
+
 
 @dataclass
 class KeywordResult:
@@ -37,8 +45,47 @@ class TagRecommender:
     
     根据提取的关键词推荐相关标签。
     优先匹配现有标签，如果没有匹配则建议从关键词创建新标签。
+    现有标签通过进程内共享的 TagIndex 匹配，索引懒加载，标签增删时失效。
     """
 
+    # 进程内共享的标签索引
+    _tag_index: Optional[TagIndex] = None
+    _tag_index_built_at: float = 0.0
+    _tag_index_lock = threading.Lock()
+    # 每次失效加一，重建期间发生失效时不发布重建结果
+    _tag_index_generation: int = 0
+
+    @classmethod
+    def get_tag_index(cls) -> TagIndex:
+        """获取标签索引（懒加载，过期或失效后从数据库重建）"""
+        index = cls._tag_index
+        if index is not None and time.monotonic() - cls._tag_index_built_at < TAG_INDEX_MAX_AGE:
+            return index
+        
+        with cls._tag_index_lock:
+            # 等锁期间可能已被其他线程重建
+            if cls._tag_index is None or time.monotonic() - cls._tag_index_built_at >= TAG_INDEX_MAX_AGE:
+                # 延迟导入以避免循环依赖
+                from app.models.material import MaterialTag
+                
+                generation = cls._tag_index_generation
+                rows = MaterialTag.query.with_entities(MaterialTag.id, MaterialTag.name).all()
+                index = TagIndex(rows)
+                if generation != cls._tag_index_generation:
+                    # 读取标签后又有增删，本次结果只用于当前调用，下次调用重新构建
+                    return index
+                cls._tag_index = index
+                cls._tag_index_built_at = time.monotonic()
+                logger.info(f"标签索引已重建，共 {len(index)} 个标签")
+            
+            return cls._tag_index
+
+    @classmethod
+    def invalidate_tag_index(cls) -> None:
+        """使标签索引失效，下次匹配时重建（正在进行的重建不会再发布旧结果）"""
+        cls._tag_index_generation += 1
+        cls._tag_index = None
+
     def __init__(self, max_tags: int = MAX_SUGGESTED_TAGS):
         """
         初始化标签推荐器
@@ -105,31 +152,16 @@ class TagRecommender:
         suggestions = []
         
         try:
-            # 延迟导入以避免循环依赖
-            from app.models.material import MaterialTag
+            index = self.get_tag_index()
+            matched = index.match_keywords([kw.keyword for kw in keywords])
             
-            # 获取所有现有标签
-            existing_tags = MaterialTag.query.all()
-            
-            # 创建关键词到权重的映射
-            keyword_weights = {kw.keyword.lower(): kw.weight for kw in keywords}
-            
-            for tag in existing_tags:
-                tag_name_lower = tag.name.lower()
-                
-                # 检查标签名是否与任何关键词匹配
-                for kw in keywords:
-                    kw_lower = kw.keyword.lower()
-                    
-                    # 完全匹配或包含关系
-                    if tag_name_lower == kw_lower or kw_lower in tag_name_lower or tag_name_lower in kw_lower:
-                        suggestions.append(TagSuggestion(
-                            tag_name=tag.name,
-                            tag_id=tag.id,
-                            is_existing=True,
-                            relevance=kw.weight
-                        ))
-                        break
+            for tag_id, position in matched.items():
+                suggestions.append(TagSuggestion(
+                    tag_name=index.get_name(tag_id),
+                    tag_id=tag_id,
+                    is_existing=True,
+                    relevance=keywords[position].weight
+                ))
             
         except Exception as e:
             logger.warning(f"匹配现有标签时出错: {str(e)}")
@@ -185,18 +217,13 @@ class TagRecommender:
         try:
             from app.models.material import MaterialTag
             
-            matched_tags = []
-            existing_tags = MaterialTag.query.all()
-            
-            for tag in existing_tags:
-                tag_name_lower = tag.name.lower()
-                for kw in keywords:
-                    kw_lower = kw.lower()
-                    if tag_name_lower == kw_lower or kw_lower in tag_name_lower or tag_name_lower in kw_lower:
-                        matched_tags.append(tag)
-                        break
+            matched_ids = list(self.get_tag_index().match_keywords(keywords))
+            if not matched_ids:
+                return []
             
-            return matched_tags
+            return MaterialTag.query.filter(
+                MaterialTag.id.in_(matched_ids)
+            ).order_by(MaterialTag.id).all()
             
         except Exception as e:
             logger.warning(f"匹配现有标签时出错: {str(e)}")
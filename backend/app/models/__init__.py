@@ -12,7 +12,7 @@ from .user import User, UserRole
 from .class_model import Class
 
 # 资料中心模块
-from .material import Material, MaterialCategory, MaterialTag, material_tag_relation
+from .material import Material, MaterialCategory, MaterialTag, FileDigest, FileBlob, StorageUsage, material_tag_relation
 
 # 课程模块
 from .course import Course, course_classes
@@ -42,11 +42,11 @@ from .interaction import (
 )
 
 # 智能模块
-from .intelligence import DocumentKeyword, ClassificationLog
+from .intelligence import DocumentKeyword, KeywordStat, DocumentFingerprint, DocumentTerms, ClassificationLog
 
 # 系统日志模块
 from .system import (
-    SystemLog, Notification,
+    SystemLog, Notification, HousekeepingRun, IdSequence,
     NotificationType, NotificationPriority
 )
 
@@ -58,7 +58,7 @@ __all__ = [
     'User', 'UserRole', 'Class',
     
     # 资料中心
-    'Material', 'MaterialCategory', 'MaterialTag', 'material_tag_relation',
+    'Material', 'MaterialCategory', 'MaterialTag', 'FileDigest', 'FileBlob', 'StorageUsage', 'material_tag_relation',
     
     # 课程
     'Course', 'course_classes',
@@ -80,9 +80,9 @@ __all__ = [
     'PollType', 'PollStatus', 'QuestionStatus',
     
     # 智能模块
-    'DocumentKeyword', 'ClassificationLog',
+    'DocumentKeyword', 'KeywordStat', 'DocumentFingerprint', 'DocumentTerms', 'ClassificationLog',
     
     # 系统日志
-    'SystemLog', 'Notification',
+    'SystemLog', 'Notification', 'HousekeepingRun', 'IdSequence',
     'NotificationType', 'NotificationPriority',
 ]
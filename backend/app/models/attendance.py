@@ -38,6 +38,11 @@ class Attendance(BaseModel):
     教师创建的考勤任务。
     """
     __tablename__ = 'attendances'
+    __table_args__ = (
+        # 教师考勤列表、班级考勤通知的游标分页
+        db.Index('ix_attendances_teacher_start_time', 'teacher_id', 'start_time'),
+        db.Index('ix_attendances_class_created_at', 'class_id', 'created_at'),
+    )
     
     # ==================== 字段定义 ====================
     # 基本信息
@@ -1,6 +1,7 @@
 from datetime import datetime
 from enum import Enum
 from app.extensions import db
+from app.utils.counter_buffer import CounterBuffer
 
 class BaseModel(db.Model):
     """基础模型类"""
@@ -11,6 +12,9 @@ class BaseModel(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.now, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now, nullable=False)
     
+    # 通过计数缓冲累加的计数列，读取时需加上尚未写回的增量
+    buffered_counters = ()
+    
     def to_dict(self):
         """
         转换为字典
@@ -20,7 +24,7 @@ class BaseModel(db.Model):
         """
         result = {}
         for c in self.__table__.columns:
-            value = getattr(self, c.name)
+            value = self.get_count(c.name) if c.name in self.buffered_counters else getattr(self, c.name)
             # 自动转换 datetime 为字符串（ISO格式，不带时区标记）
             if isinstance(value, datetime):
                 result[c.name] = value.strftime('%Y-%m-%d %H:%M:%S')
@@ -31,6 +35,17 @@ class BaseModel(db.Model):
                 result[c.name] = value
         return result
     
+    def get_count(self, name):
+        """获取计数列的当前值（数据库值加本进程尚未写回的增量）"""
+        value = getattr(self, name) or 0
+        if self.id is None:
+            return value
+        return max(value + CounterBuffer.pending(self.__tablename__, name, self.id), 0)
+    
+    def increment_count(self, name, delta=1):
+        """累加计数列（写入计数缓冲，由后台线程批量写回）"""
+        CounterBuffer.increment(self.__tablename__, name, self.id, delta)
+    
     def save(self):
         """保存到数据库"""
         db.session.add(self)
@@ -48,21 +48,237 @@ class DocumentKeyword(BaseModel):
         return cls.query.filter(cls.keyword.like(f'%{keyword}%')).all()
     
     @classmethod
-    def get_popular_keywords(cls, limit=20):
-        """获取热门关键词"""
+    def search_materials(cls, keywords, limit=20):
+        """
+        按多个关键词查找资料（精确匹配，走 keyword 索引）
+        
+        资料得分为命中关键词的权重之和，按得分降序返回
+        (material_id, score, matched) 行。
+        """
         from sqlalchemy import func
         return db.session.query(
-            cls.keyword,
-            func.count(cls.id).label('count'),
-            func.avg(cls.weight).label('avg_weight')
-        ).group_by(cls.keyword).order_by(
-            func.count(cls.id).desc()
+            cls.material_id,
+            func.sum(cls.weight).label('score'),
+            func.count(cls.id).label('matched')
+        ).filter(cls.keyword.in_(keywords)).group_by(cls.material_id).order_by(
+            func.sum(cls.weight).desc(), cls.material_id
         ).limit(limit).all()
     
+    @classmethod
+    def get_popular_keywords(cls, limit=20):
+        """
+        获取热门关键词（读取增量维护的 KeywordStat，不再对全表聚合）
+        
+        升级前已有的关键词需由管理员执行一次 KeywordStat.rebuild() 计入统计。
+        """
+        return KeywordStat.get_popular(limit)
+    
     def __repr__(self):
         return f'<DocumentKeyword {self.keyword} weight:{self.weight}>'
 
 
+class KeywordStat(BaseModel):
+    """关键词统计模型
+    
+    按关键词汇总资料数和权重之和，随资料关键词的保存和删除增量更新，
+    热门关键词排行直接按 material_count 索引读取。
+    """
+    __tablename__ = 'keyword_stats'
+    
+    # ==================== 字段定义 ====================
+    keyword = db.Column(db.String(100), unique=True, nullable=False, index=True)
+    material_count = db.Column(db.Integer, default=0, nullable=False, index=True)
+    total_weight = db.Column(db.Numeric(12, 4), default=0.0000, nullable=False)
+    
+    # ==================== 类方法 ====================
+    @classmethod
+    def apply_change(cls, removed, added):
+        """
+        按资料关键词的变化更新统计（不提交，由调用方统一提交）
+        
+        Args:
+            removed: 移除的 (关键词, 权重) 列表
+            added: 新增的 (关键词, 权重) 列表
+        """
+        from sqlalchemy.exc import IntegrityError
+        
+        deltas = {}
+        for keyword, weight, sign in [(k, w, -1) for k, w in removed] + [(k, w, 1) for k, w in added]:
+            count, total = deltas.get(keyword, (0, 0))
+            deltas[keyword] = (count + sign, total + sign * float(weight))
+        
+        for keyword, (count, total) in deltas.items():
+            if count == 0 and total == 0:
+                continue
+            
+            # 原子自增，多个进程同时更新同一关键词也不会丢失计数
+            changes = {
+                cls.material_count: cls.material_count + count,
+                cls.total_weight: cls.total_weight + total
+            }
+            if cls.query.filter_by(keyword=keyword).update(changes, synchronize_session=False) or count <= 0:
+                continue
+            
+            try:
+                with db.session.begin_nested():
+                    db.session.add(cls(keyword=keyword, material_count=count, total_weight=total))
+            except IntegrityError:
+                # 其他进程刚插入了同一关键词
+                cls.query.filter_by(keyword=keyword).update(changes, synchronize_session=False)
+    
+    @classmethod
+    def get_popular(cls, limit=20):
+        """获取热门关键词，返回 (keyword, count, avg_weight) 行"""
+        return db.session.query(
+            cls.keyword,
+            cls.material_count.label('count'),
+            (cls.total_weight / cls.material_count).label('avg_weight')
+        ).filter(cls.material_count > 0).order_by(
+            cls.material_count.desc(), cls.keyword
+        ).limit(limit).all()
+    
+    @classmethod
+    def rebuild(cls):
+        """
+        从 DocumentKeyword 全量重建统计（升级后执行一次，或用于校正误差）
+        
+        先删除再以一条 INSERT ... SELECT 写入，删除后本事务持有写锁，
+        汇总期间其他请求的关键词变化要等重建提交后再计入，不会丢失。
+        
+        Returns:
+            重建后的关键词数
+        """
+        from datetime import datetime
+        from sqlalchemy import func, insert, literal, select
+        now = literal(datetime.now(), db.DateTime)
+        cls.query.delete(synchronize_session=False)
+        db.session.execute(
+            insert(cls).from_select(
+                ['keyword', 'material_count', 'total_weight', 'created_at', 'updated_at'],
+                select(
+                    DocumentKeyword.keyword,
+                    func.count(DocumentKeyword.id),
+                    func.sum(DocumentKeyword.weight),
+                    now,
+                    now
+                ).group_by(DocumentKeyword.keyword)
+            )
+        )
+        db.session.commit()
+        return cls.query.count()
+    
+    def __repr__(self):
+        return f'<KeywordStat {self.keyword} count:{self.material_count}>'
+
+
+class DocumentFingerprint(BaseModel):
+    """文档指纹模型
+    
+    存储资料内容的 SimHash 指纹及其 LSH 分段，用于查找近似重复的资料。
+    各分段单独建索引，查找候选时只需按分段等值查询。
+    """
+    __tablename__ = 'document_fingerprints'
+    
+    # ==================== 字段定义 ====================
+    material_id = db.Column(db.Integer, db.ForeignKey('materials.id'), unique=True, nullable=False, index=True)
+    
+    # 64 位指纹按有符号整数存储（数据库 BIGINT 为有符号）
+    simhash = db.Column(db.BigInteger, nullable=False)
+    band_0 = db.Column(db.Integer, nullable=False, index=True)
+    band_1 = db.Column(db.Integer, nullable=False, index=True)
+    band_2 = db.Column(db.Integer, nullable=False, index=True)
+    band_3 = db.Column(db.Integer, nullable=False, index=True)
+    
+    # ==================== 实例方法 ====================
+    @property
+    def fingerprint(self):
+        """无符号 64 位指纹"""
+        return self.simhash & 0xFFFFFFFFFFFFFFFF
+    
+    # ==================== 类方法 ====================
+    @classmethod
+    def save_for_material(cls, material_id, fingerprint):
+        """保存资料指纹（已存在则更新，不提交）"""
+        from app.intelligence.fingerprint import split_bands
+        
+        record = cls.query.filter_by(material_id=material_id).first()
+        if record is None:
+            record = cls(material_id=material_id)
+            db.session.add(record)
+        
+        # 转成有符号 64 位整数
+        record.simhash = fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+        record.band_0, record.band_1, record.band_2, record.band_3 = split_bands(fingerprint)
+        return record
+    
+    @classmethod
+    def find_similar(cls, fingerprint, max_distance, exclude_material_id=None):
+        """
+        查找指纹相近的资料
+        
+        先按任一分段相同取候选（走分段索引），再计算海明距离过滤。
+        
+        Returns:
+            (DocumentFingerprint, 海明距离) 列表，按距离升序
+        """
+        from sqlalchemy import or_
+        from app.intelligence.fingerprint import split_bands, hamming_distance
+        
+        bands = split_bands(fingerprint)
+        query = cls.query.filter(or_(
+            cls.band_0 == bands[0],
+            cls.band_1 == bands[1],
+            cls.band_2 == bands[2],
+            cls.band_3 == bands[3]
+        ))
+        if exclude_material_id is not None:
+            query = query.filter(cls.material_id != exclude_material_id)
+        
+        results = []
+        for record in query.all():
+            distance = hamming_distance(fingerprint, record.fingerprint)
+            if distance <= max_distance:
+                results.append((record, distance))
+        
+        return sorted(results, key=lambda item: (item[1], item[0].material_id))
+    
+    def __repr__(self):
+        return f'<DocumentFingerprint material:{self.material_id} simhash:{self.fingerprint:016x}>'
+
+
+class DocumentTerms(BaseModel):
+    """文档内容词模型
+    
+    存储资料分析时得到的内容词（已过滤停用词，以空格连接），
+    相似资料索引全量重建时直接读取，不必重新解析全部文档。
+    """
+    __tablename__ = 'document_terms'
+    
+    # ==================== 字段定义 ====================
+    material_id = db.Column(db.Integer, db.ForeignKey('materials.id'), unique=True, nullable=False, index=True)
+    terms = db.Column(db.Text, nullable=False)
+    
+    # ==================== 实例方法 ====================
+    def get_terms(self):
+        """内容词列表"""
+        return self.terms.split()
+    
+    # ==================== 类方法 ====================
+    @classmethod
+    def save_for_material(cls, material_id, terms):
+        """保存资料内容词（已存在则更新，不提交）"""
+        record = cls.query.filter_by(material_id=material_id).first()
+        if record is None:
+            record = cls(material_id=material_id)
+            db.session.add(record)
+        
+        record.terms = ' '.join(terms)
+        return record
+    
+    def __repr__(self):
+        return f'<DocumentTerms material:{self.material_id}>'
+
+
 class ClassificationLog(BaseModel):
     """分类日志模型
     
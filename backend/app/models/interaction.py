@@ -151,6 +151,10 @@ class Question(BaseModel):
     课堂提问功能。
     """
     __tablename__ = 'questions'
+    __table_args__ = (
+        # 课程问题列表游标分页按 (created_at, id) 定位
+        db.Index('ix_questions_course_created_at', 'course_id', 'created_at'),
+    )
     
     # ==================== 字段定义 ====================
     # 基本信息
@@ -166,6 +170,7 @@ class Question(BaseModel):
     # 状态
     status = db.Column(db.Enum(QuestionStatus), default=QuestionStatus.PENDING, nullable=False, index=True)
     like_count = db.Column(db.Integer, default=0, nullable=False)
+    buffered_counters = ('like_count',)
     
     # ==================== 关系定义 ====================
     # 一对多：问题的回答
@@ -186,15 +191,13 @@ class Question(BaseModel):
         db.session.commit()
     
     def increment_like(self):
-        """增加点赞数"""
-        self.like_count += 1
-        db.session.commit()
+        """增加点赞数（经计数缓冲批量写回）"""
+        self.increment_count('like_count')
     
     def decrement_like(self):
-        """减少点赞数"""
-        if self.like_count > 0:
-            self.like_count -= 1
-            db.session.commit()
+        """减少点赞数（经计数缓冲批量写回）"""
+        if self.get_count('like_count') > 0:
+            self.increment_count('like_count', -1)
     
     def get_answer_count(self):
         """获取回答数量"""
@@ -247,6 +250,7 @@ class QuestionAnswer(BaseModel):
     # 状态
     is_accepted = db.Column(db.Boolean, default=False, nullable=False)
     like_count = db.Column(db.Integer, default=0, nullable=False)
+    buffered_counters = ('like_count',)
     
     # ==================== 实例方法 ====================
     def accept(self):
@@ -263,15 +267,13 @@ class QuestionAnswer(BaseModel):
         db.session.commit()
     
     def increment_like(self):
-        """增加点赞数"""
-        self.like_count += 1
-        db.session.commit()
+        """增加点赞数（经计数缓冲批量写回）"""
+        self.increment_count('like_count')
     
     def decrement_like(self):
-        """减少点赞数"""
-        if self.like_count > 0:
-            self.like_count -= 1
-            db.session.commit()
+        """减少点赞数（经计数缓冲批量写回）"""
+        if self.get_count('like_count') > 0:
+            self.increment_count('like_count', -1)
     
     # ==================== 类方法 ====================
     @classmethod
@@ -3,6 +3,8 @@
 
 包含资料、分类、标签等相关模型定义。
 """
+import os
+
 from app.extensions import db
 from sqlalchemy.orm import foreign
 from .base import BaseModel
@@ -111,6 +113,9 @@ class MaterialTag(BaseModel):
         if not tag:
             tag = cls(name=tag_name)
             tag.save()
+            # 延迟导入以避免循环依赖
+            from app.intelligence.tag_recommender import TagRecommender
+            TagRecommender.invalidate_tag_index()
         return tag
     
     @classmethod
@@ -128,6 +133,10 @@ class Material(BaseModel):
     存储所有教学资料的元数据和文件信息。
     """
     __tablename__ = 'materials'
+    __table_args__ = (
+        # 游标分页按 (created_at, id) 定位
+        db.Index('ix_materials_created_at', 'created_at'),
+    )
     
     # ==================== 字段定义 ====================
     # 基本信息
@@ -148,6 +157,7 @@ class Material(BaseModel):
     # 统计信息
     download_count = db.Column(db.Integer, default=0, nullable=False)
     view_count = db.Column(db.Integer, default=0, nullable=False)
+    buffered_counters = ('download_count', 'view_count')
     
     # 智能归类
     keywords = db.Column(db.Text, nullable=True)
@@ -168,6 +178,18 @@ class Material(BaseModel):
                                       lazy='dynamic', 
                                       cascade='all, delete-orphan')
     
+    # 一对一：资料内容指纹
+    document_fingerprint = db.relationship('DocumentFingerprint',
+                                         backref='material',
+                                         uselist=False,
+                                         cascade='all, delete-orphan')
+    
+    # 一对一：资料内容词
+    document_terms = db.relationship('DocumentTerms',
+                                   backref='material',
+                                   uselist=False,
+                                   cascade='all, delete-orphan')
+    
     # 一对多：分类日志
     classification_logs = db.relationship('ClassificationLog', 
                                         backref='material', 
@@ -176,14 +198,12 @@ class Material(BaseModel):
     
     # ==================== 实例方法 ====================
     def increment_download_count(self):
-        """增加下载次数"""
-        self.download_count += 1
-        db.session.commit()
+        """增加下载次数（经计数缓冲批量写回）"""
+        self.increment_count('download_count')
     
     def increment_view_count(self):
-        """增加浏览次数"""
-        self.view_count += 1
-        db.session.commit()
+        """增加浏览次数（经计数缓冲批量写回）"""
+        self.increment_count('view_count')
     
     def is_owner(self, user_id):
         """检查是否为上传者"""
@@ -244,3 +264,164 @@ class Material(BaseModel):
     
     def __repr__(self):
         return f'<Material {self.title}>'
+
+
+class FileDigest(BaseModel):
+    """文件摘要模型
+    
+    按文件路径缓存文件内容的 SHA-256，用作下载和预览响应的强 ETag。
+    文件大小或修改时间变化后重新计算。
+    """
+    __tablename__ = 'file_digests'
+    
+    # ==================== 字段定义 ====================
+    file_path = db.Column(db.String(500), unique=True, nullable=False)
+    file_size = db.Column(db.BigInteger, nullable=False)
+    mtime_ns = db.Column(db.BigInteger, nullable=False)
+    sha256 = db.Column(db.String(64), nullable=False, index=True)
+    
+    # ==================== 类方法 ====================
+    @classmethod
+    def get_sha256(cls, file_path, stat=None):
+        """
+        获取文件的 SHA-256（有有效缓存时不读文件）
+        
+        Args:
+            file_path: 文件绝对路径
+            stat: 文件的 os.stat 结果，调用方已取得时传入
+        """
+        from app.utils.file_utils import compute_file_hash
+        
+        stat = stat or os.stat(file_path)
+        record = cls.query.filter_by(file_path=file_path).first()
+        if record and record.file_size == stat.st_size and record.mtime_ns == stat.st_mtime_ns:
+            return record.sha256
+        
+        digest = compute_file_hash(file_path)
+        cls.remember(file_path, digest, stat)
+        return digest
+    
+    @classmethod
+    def remember(cls, file_path, sha256, stat):
+        """
+        记录调用方已算出的文件 SHA-256（文件由应用自己写入时使用，免去重新读取）
+        
+        Args:
+            file_path: 文件绝对路径
+            sha256: 文件内容的 SHA-256
+            stat: 文件的 os.stat 结果
+        """
+        from sqlalchemy.exc import IntegrityError
+        
+        record = cls.query.filter_by(file_path=file_path).first()
+        if record is None:
+            record = cls(file_path=file_path)
+            db.session.add(record)
+        record.file_size = stat.st_size
+        record.mtime_ns = stat.st_mtime_ns
+        record.sha256 = sha256
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # 其他请求同时写入了同一文件的摘要
+            db.session.rollback()
+    
+    @classmethod
+    def forget(cls, file_path):
+        """文件删除后清除其摘要缓存"""
+        cls.query.filter_by(file_path=file_path).delete()
+        db.session.commit()
+    
+    def __repr__(self):
+        return f'<FileDigest {self.file_path}>'
+
+
+class FileBlob(BaseModel):
+    """文件内容模型
+    
+    按内容 SHA-256 存放的资料文件，内容相同的资料共用同一个文件，
+    ref_count 记录引用它的资料数，最后一个引用释放后才删除文件。
+    """
+    __tablename__ = 'file_blobs'
+    
+    # ==================== 字段定义 ====================
+    sha256 = db.Column(db.String(64), unique=True, nullable=False)
+    file_path = db.Column(db.String(500), unique=True, nullable=False)
+    file_size = db.Column(db.BigInteger, nullable=False)
+    ref_count = db.Column(db.Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f'<FileBlob {self.sha256}>'
+
+
+class StorageUsage(BaseModel):
+    """存储用量模型
+    
+    按目录、分类、用户汇总文件占用的字节数和文件数，随文件的保存和删除增量更新，
+    查询存储信息和检查用户配额时直接读取，不再遍历目录。
+    目录用量是磁盘上的实际占用（内容相同的资料只算一次），分类和用户用量按资料的文件大小累计。
+    """
+    __tablename__ = 'storage_usage'
+    __table_args__ = (
+        db.UniqueConstraint('scope', 'key', name='uk_storage_usage_scope_key'),
+    )
+    
+    # 统计范围
+    SCOPE_DIRECTORY = 'directory'
+    SCOPE_CATEGORY = 'category'
+    SCOPE_USER = 'user'
+    
+    # ==================== 字段定义 ====================
+    scope = db.Column(db.String(20), nullable=False)
+    key = db.Column(db.String(100), nullable=False)
+    total_size = db.Column(db.BigInteger, default=0, nullable=False)
+    file_count = db.Column(db.Integer, default=0, nullable=False)
+    
+    # ==================== 类方法 ====================
+    @classmethod
+    def apply_change(cls, scope, key, size, count):
+        """
+        增减用量（不提交，由调用方统一提交）
+        
+        Args:
+            scope: 统计范围
+            key: 目录名、分类 ID 或用户 ID
+            size: 字节数变化
+            count: 文件数变化
+        """
+        from sqlalchemy.exc import IntegrityError
+        
+        if size == 0 and count == 0:
+            return
+        key = str(key)
+        
+        # 原子自增，多个进程同时更新同一行也不会丢失计数
+        changes = {cls.total_size: cls.total_size + size, cls.file_count: cls.file_count + count}
+        if cls.query.filter_by(scope=scope, key=key).update(changes, synchronize_session=False):
+            return
+        
+        try:
+            with db.session.begin_nested():
+                db.session.add(cls(scope=scope, key=key, total_size=size, file_count=count))
+        except IntegrityError:
+            # 其他进程刚插入了同一行
+            cls.query.filter_by(scope=scope, key=key).update(changes, synchronize_session=False)
+    
+    @classmethod
+    def get_usage(cls, scope, key):
+        """获取用量，返回 (字节数, 文件数)"""
+        row = db.session.query(cls.total_size, cls.file_count).filter_by(scope=scope, key=str(key)).first()
+        return (row.total_size, row.file_count) if row else (0, 0)
+    
+    @classmethod
+    def get_scope_usage(cls, scope):
+        """获取一个范围内的全部用量，返回 {key: (字节数, 文件数)}"""
+        return {
+            key: (total_size, file_count)
+            for key, total_size, file_count in db.session.query(
+                cls.key, cls.total_size, cls.file_count
+            ).filter_by(scope=scope)
+        }
+    
+    def __repr__(self):
+        return f'<StorageUsage {self.scope}:{self.key} {self.total_size}>'
@@ -8,6 +8,27 @@ from .base import BaseModel
 from enum import Enum
 
 
+# 批量清理时每批删除的行数，避免一次大删除长时间占用数据库写锁
+CLEANUP_BATCH_SIZE = 1000
+
+
+def _delete_in_batches(model, criteria, batch_size=CLEANUP_BATCH_SIZE):
+    """
+    按批删除满足条件的行，每批单独提交
+    
+    Returns:
+        int: 删除的行数
+    """
+    deleted = 0
+    while True:
+        ids = [row.id for row in db.session.query(model.id).filter(*criteria).limit(batch_size)]
+        if not ids:
+            return deleted
+        model.query.filter(model.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        deleted += len(ids)
+
+
 class NotificationType(Enum):
     """通知类型枚举"""
     SYSTEM = 'system'          # 系统通知
@@ -123,12 +144,12 @@ class SystemLog(BaseModel):
         return cls.query.order_by(cls.created_at.desc()).limit(limit).all()
     
     @classmethod
-    def clean_old_logs(cls, days=30):
-        """清理旧日志"""
+    def clean_old_logs(cls, days=30, batch_size=CLEANUP_BATCH_SIZE):
+        """清理旧日志（分批删除），返回删除的条数"""
         from datetime import datetime, timedelta
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-        cls.query.filter(cls.created_at < cutoff_date).delete()
-        db.session.commit()
+        # created_at 使用本地时间
+        cutoff_date = datetime.now() - timedelta(days=days)
+        return _delete_in_batches(cls, [cls.created_at < cutoff_date], batch_size)
     
     def __repr__(self):
         return f'<SystemLog {self.action} by user:{self.user_id}>'
@@ -259,16 +280,88 @@ class Notification(BaseModel):
         db.session.commit()
     
     @classmethod
-    def delete_old_notifications(cls, user_id, days=30):
-        """删除旧通知"""
+    def delete_old_notifications(cls, user_id=None, days=30, batch_size=CLEANUP_BATCH_SIZE):
+        """删除旧的已读通知（user_id 为 None 时清理所有用户，分批删除），返回删除的条数"""
         from datetime import datetime, timedelta
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-        cls.query.filter(
-            cls.user_id == user_id,
-            cls.is_read == True,
-            cls.created_at < cutoff_date
-        ).delete()
-        db.session.commit()
+        # created_at 使用本地时间
+        cutoff_date = datetime.now() - timedelta(days=days)
+        criteria = [cls.is_read == True, cls.created_at < cutoff_date]
+        if user_id is not None:
+            criteria.append(cls.user_id == user_id)
+        return _delete_in_batches(cls, criteria, batch_size)
     
     def __repr__(self):
         return f'<Notification {self.title} to user:{self.user_id}>'
+
+
+class HousekeepingRun(BaseModel):
+    """清理任务记录模型
+    
+    定期清理任务每次执行每项任务记录一行：清理了多少条目、回收了多少字节。
+    """
+    __tablename__ = 'housekeeping_runs'
+    
+    # ==================== 字段定义 ====================
+    task = db.Column(db.String(50), nullable=False, index=True)
+    items_removed = db.Column(db.Integer, default=0, nullable=False)
+    bytes_reclaimed = db.Column(db.BigInteger, default=0, nullable=False)
+    duration_ms = db.Column(db.Integer, default=0, nullable=False)
+    error_message = db.Column(db.Text, nullable=True)
+    
+    # ==================== 类方法 ====================
+    @classmethod
+    def get_recent(cls, limit=100):
+        """获取最近的清理记录"""
+        return cls.query.order_by(cls.created_at.desc(), cls.id.desc()).limit(limit).all()
+    
+    def __repr__(self):
+        return f'<HousekeepingRun {self.task}: {self.items_removed}>'
+
+
+class IdSequence(BaseModel):
+    """ID 序列模型
+    
+    为先分配 ID、稍后批量写入的记录（如弹幕）预留 ID 段：每次原子地把 next_value 加上段长，
+    各进程只在自己领到的段内分配，互不重复。
+    """
+    __tablename__ = 'id_sequences'
+    
+    # ==================== 字段定义 ====================
+    name = db.Column(db.String(50), unique=True, nullable=False)
+    next_value = db.Column(db.BigInteger, nullable=False)
+    
+    # ==================== 类方法 ====================
+    @classmethod
+    def reserve(cls, name, size, floor=0):
+        """
+        预留 size 个连续 ID（会提交当前事务）
+        
+        Args:
+            name: 序列名
+            size: 预留的个数
+            floor: 表中已用的最大 ID，预留段总在其之后（兼容不经过序列写入的记录）
+            
+        Returns:
+            tuple: (起始 ID, 结束 ID)，可用区间为 [起始 ID, 结束 ID)
+        """
+        from sqlalchemy import case
+        from sqlalchemy.exc import IntegrityError
+        
+        start = case((cls.next_value > floor, cls.next_value), else_=floor + 1)
+        changes = {cls.next_value: start + size}
+        
+        # 原子自增，多个进程同时预留也不会拿到重叠的段
+        if not cls.query.filter_by(name=name).update(changes, synchronize_session=False):
+            try:
+                with db.session.begin_nested():
+                    db.session.add(cls(name=name, next_value=floor + 1 + size))
+            except IntegrityError:
+                # 其他进程刚创建了同一序列
+                cls.query.filter_by(name=name).update(changes, synchronize_session=False)
+        
+        end = db.session.query(cls.next_value).filter_by(name=name).scalar()
+        db.session.commit()
+        return end - size, end
+    
+    def __repr__(self):
+        return f'<IdSequence {self.name}: {self.next_value}>'
@@ -137,10 +137,12 @@ class AttendanceDetailResponseModel(AttendanceResponseModel):
 class AttendanceListResponseModel(CamelCaseModel):
     """考勤任务列表响应模型"""
     attendances: List[AttendanceResponseModel] = Field(..., description="考勤列表")
-    total: int = Field(..., description="考勤总数")
-    page: int = Field(1, description="当前页码")
+    total: Optional[int] = Field(..., description="考勤总数（游标分页未请求总数时为空）")
+    page: Optional[int] = Field(1, description="当前页码（游标分页时为空）")
     per_page: int = Field(20, description="每页数量")
-    pages: int = Field(..., description="总页数")
+    pages: Optional[int] = Field(..., description="总页数（游标分页时为空）")
+    next_cursor: Optional[str] = Field(None, description="下一页游标（游标分页时返回）")
+    has_next: Optional[bool] = Field(None, description="是否有下一页（游标分页时返回）")
 
 
 class AttendanceQueryModel(CamelCaseModel):
@@ -150,6 +152,8 @@ class AttendanceQueryModel(CamelCaseModel):
     course_id: Optional[int] = Field(None, description="课程ID筛选", ge=1)
     teacher_id: Optional[int] = Field(None, description="教师ID筛选", ge=1)
     status: Optional[AttendanceStatusEnum] = Field(None, description="状态筛选")
+    cursor: Optional[str] = Field(None, description="分页游标，传入（第一页传空字符串）时使用游标分页并忽略 page")
+    with_total: bool = Field(False, description="游标分页时是否返回总数（短时缓存）")
 
 
 class AttendancePathModel(CamelCaseModel):
@@ -33,9 +33,57 @@ class ClassifyMaterialResponseModel(CamelCaseModel):
     needs_confirmation: bool = Field(..., description="是否需要确认")
     keywords: List[KeywordResponseModel] = Field(default_factory=list, description="提取的关键词列表")
     log_id: Optional[int] = Field(None, description="分类日志ID")
+    pending: bool = Field(False, description="是否正在后台分析")
     error: Optional[str] = Field(None, description="错误信息")
 
 
+class BatchClassifyBodyModel(CamelCaseModel):
+    """批量分类请求模型"""
+    material_ids: Optional[List[int]] = Field(
+        None, description="资料ID列表，不传则分类全部未分类资料", max_length=10000
+    )
+
+
+class BatchClassifyResponseModel(CamelCaseModel):
+    """批量分类任务响应模型"""
+    job_id: str = Field(..., description="任务ID，进度通过 WebSocket 推送")
+    total: int = Field(..., description="待分类资料数")
+
+
+class KeywordSearchQueryModel(CamelCaseModel):
+    """按关键词查找资料查询参数模型"""
+    keywords: str = Field(..., description="关键词，多个用逗号分隔", min_length=1)
+    limit: int = Field(20, description="返回的资料数量", ge=1, le=100)
+
+
+class RelatedMaterialQueryModel(CamelCaseModel):
+    """相似资料查询参数模型"""
+    limit: int = Field(10, description="返回的资料数量", ge=1, le=50)
+
+
+class DuplicateMaterialModel(CamelCaseModel):
+    """重复组中的资料模型"""
+    material_id: int = Field(..., description="资料ID")
+    title: str = Field(..., description="资料标题")
+    file_name: str = Field(..., description="文件名")
+    file_size: int = Field(..., description="文件大小(字节)")
+    uploader_id: int = Field(..., description="上传者ID")
+    created_at: str = Field(..., description="上传时间")
+
+
+class DuplicateReportResponseModel(CamelCaseModel):
+    """近似重复资料报告响应模型"""
+    groups: List[List[DuplicateMaterialModel]] = Field(..., description="重复组，组内按上传时间排序，第一份视为原件")
+    total_groups: int = Field(..., description="重复组数")
+    duplicate_materials: int = Field(..., description="重复资料数（不含原件）")
+    wasted_bytes: int = Field(..., description="重复资料占用的存储空间(字节)")
+
+
+class PopularKeywordQueryModel(CamelCaseModel):
+    """热门关键词查询参数模型"""
+    limit: int = Field(20, description="返回的关键词数量", ge=1, le=100)
+
+
 # ==================== 标签建议 Schema ====================
 
 class TagSuggestionResponseModel(CamelCaseModel):
@@ -28,13 +28,14 @@ class MessageResponseModel(CamelCaseModel):
 
 
 class PaginationModel(CamelCaseModel):
-    """分页模型"""
-    page: int = Field(1, description="当前页码", ge=1)
+    """分页模型（游标分页时 page、pages 为空，total 仅在请求时返回）"""
+    page: Optional[int] = Field(1, description="当前页码", ge=1)
     per_page: int = Field(10, description="每页数量", ge=1, le=100)
-    total: int = Field(..., description="总记录数", ge=0)
-    pages: int = Field(..., description="总页数", ge=0)
+    total: Optional[int] = Field(..., description="总记录数", ge=0)
+    pages: Optional[int] = Field(..., description="总页数", ge=0)
     has_prev: bool = Field(..., description="是否有上一页")
     has_next: bool = Field(..., description="是否有下一页")
+    next_cursor: Optional[str] = Field(None, description="下一页游标（游标分页时返回，没有下一页时为空）")
 
 
 class QueryModel(CamelCaseModel):
@@ -49,3 +50,5 @@ class QueryModel(CamelCaseModel):
     minutes: Optional[int] = Field(10, description="最近N分钟", ge=1, le=1440)  # 最多24小时
     start_time: Optional[datetime] = Field(None, description="开始时间")
     end_time: Optional[datetime] = Field(None, description="结束时间")
+    cursor: Optional[str] = Field(None, description="分页游标，传入（第一页传空字符串）时使用游标分页并忽略 page")
+    with_total: bool = Field(False, description="游标分页时是否返回总数（短时缓存）")
@@ -130,20 +130,30 @@ class MaterialResponseModel(CamelCaseModel):
     updated_at: str = Field(..., description="更新时间")
 
 
+class NearDuplicateModel(CamelCaseModel):
+    """近似重复资料模型"""
+    material_id: int = Field(..., description="资料ID")
+    title: str = Field(..., description="资料标题")
+    distance: int = Field(..., description="内容指纹海明距离（0 表示内容几乎相同）")
+
+
 class MaterialDetailResponseModel(MaterialResponseModel):
     """资料详情响应模型（包含关联信息）"""
     tags: List[MaterialTagResponseModel] = Field(default_factory=list, description="标签列表")
     category_name: Optional[str] = Field(None, description="分类名称")
     uploader_name: Optional[str] = Field(None, description="上传者姓名")
+    near_duplicates: List[NearDuplicateModel] = Field(default_factory=list, description="内容近似重复的资料")
 
 
 class MaterialListResponseModel(CamelCaseModel):
     """资料列表响应模型"""
     materials: List[MaterialResponseModel] = Field(..., description="资料列表")
-    total: int = Field(..., description="资料总数")
-    page: int = Field(1, description="当前页码")
+    total: Optional[int] = Field(..., description="资料总数（游标分页未请求总数时为空）")
+    page: Optional[int] = Field(1, description="当前页码（游标分页时为空）")
     per_page: int = Field(20, description="每页数量")
-    pages: int = Field(..., description="总页数")
+    pages: Optional[int] = Field(..., description="总页数（游标分页时为空）")
+    next_cursor: Optional[str] = Field(None, description="下一页游标（游标分页时返回）")
+    has_next: Optional[bool] = Field(None, description="是否有下一页（游标分页时返回）")
 
 
 class MaterialQueryModel(CamelCaseModel):
@@ -160,6 +170,8 @@ class MaterialQueryModel(CamelCaseModel):
     end_date: Optional[str] = Field(None, description="结束日期(YYYY-MM-DD)")
     sort_by: str = Field("created_at", description="排序字段(created_at, download_count, view_count, file_size)")
     order: str = Field("desc", description="排序方向(asc, desc)")
+    cursor: Optional[str] = Field(None, description="分页游标，传入（第一页传空字符串）时使用游标分页并忽略 page")
+    with_total: bool = Field(False, description="游标分页时是否返回总数（短时缓存）")
 
 
 
@@ -9,6 +9,7 @@ from app.models.class_model import Class
 from app.models.user import User, UserRole
 from app.extensions import db
 from app.utils.helpers import generate_random_string
+from app.utils.pagination import keyset_paginate
 import json
 import logging
 import hashlib
@@ -243,7 +244,9 @@ class AttendanceService:
         page: int = 1,
         per_page: int = 20,
         course_id: Optional[int] = None,
-        status: Optional[str] = None
+        status: Optional[str] = None,
+        cursor: Optional[str] = None,
+        with_total: bool = False
     ) -> Dict[str, Any]:
         """
         获取教师创建的考勤列表（分页）
@@ -254,9 +257,14 @@ class AttendanceService:
             per_page: 每页数量
             course_id: 课程ID筛选
             status: 状态筛选
+            cursor: 分页游标，不为 None 时按 (start_time, id) 游标分页（空字符串表示第一页），忽略 page
+            with_total: 游标分页时是否统计总数（短时缓存）
             
         Returns:
-            包含考勤列表和分页信息的字典
+            包含考勤列表和分页信息的字典；游标分页时 page、pages 为 None，另含 next_cursor 和 has_next
+            
+        Raises:
+            ValueError: 游标无效
         """
         query = Attendance.query.filter_by(teacher_id=teacher_id)
         
@@ -266,6 +274,21 @@ class AttendanceService:
         if status:
             query = query.filter_by(status=AttendanceStatus(status))
         
+        if cursor is not None:
+            count_key = f"teacher_attendances:{teacher_id}:{course_id}:{status}" if with_total else None
+            result = keyset_paginate(
+                query, Attendance.start_time, Attendance.id, cursor, per_page, count_key=count_key
+            )
+            return {
+                'attendances': result['items'],
+                'total': result['total'],
+                'page': None,
+                'per_page': per_page,
+                'pages': None,
+                'next_cursor': result['next_cursor'],
+                'has_next': result['has_next']
+            }
+        
         query = query.order_by(Attendance.start_time.desc())
         
         pagination = query.paginate(page=page, per_page=per_page, error_out=False)
@@ -0,0 +1,215 @@
+"""
+弹幕发送服务
+
+课堂上弹幕集中在同一时刻大量发送，原流程每条弹幕都要查课程、查用户、单独插入并提交，
+SQLite 写锁争用使发送延迟随并发上升，广播还要等前端收到响应后再转发。
+这里把发送拆成两段：
+1. 同步部分只做限流、校验（课程、用户存在性短时缓存）、敏感词过滤和分配 ID，
+   随后立即由服务端向课程房间广播并返回；
+2. 写库由后台线程批量完成，多条弹幕合并为一条 executemany 的 INSERT、一次提交。
+"""
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.exceptions.base import RateLimitError
+from app.extensions import db, socketio
+from app.models.course import Course
+from app.models.interaction import Barrage
+from app.models.user import User
+from app.services.barrage_service import BarrageService
+from app.utils.rate_limiter import RateLimiter
+from app.utils.ttl_cache import TTLCache
+from app.utils.write_behind import WriteBehindWorker
+
+logger = logging.getLogger(__name__)
+
+# 课程、用户存在性的缓存有效期（秒）
+BARRAGE_VALIDITY_CACHE_TTL = 30
+
+# 每个用户每秒可发送的弹幕数，以及允许连续发送的条数
+BARRAGE_RATE_PER_SECOND = 1
+BARRAGE_RATE_BURST = 5
+
+# 定期写库的间隔（秒）
+BARRAGE_FLUSH_INTERVAL = 0.5
+
+# 待写库的弹幕达到该数量时立即唤醒写库线程
+BARRAGE_FLUSH_THRESHOLD = 200
+
+
+class BarrageIngestService:
+    """
+    弹幕发送服务
+
+    各进程（gunicorn worker）各自缓冲、各自写库，ID 由 BarrageService.allocate_id 从本进程预留的段中分配，
+    不同进程的弹幕不会冲突。广播时弹幕尚未写库：本进程按 ID 读取、删除时先把它写入；
+    列表查询和其他进程最多延迟 BARRAGE_FLUSH_INTERVAL 秒可见。
+    限流和存在性缓存同样按进程计算。
+    """
+
+    _course_cache = TTLCache(BARRAGE_VALIDITY_CACHE_TTL)
+    _user_cache = TTLCache(BARRAGE_VALIDITY_CACHE_TTL)
+    _rate_limiter = RateLimiter(BARRAGE_RATE_PER_SECOND, BARRAGE_RATE_BURST)
+
+    # 尚未写库的弹幕行
+    _rows: List[Dict[str, Any]] = []
+    # 正在写库（已取出、尚未提交）的弹幕 ID
+    _flushing_ids: set = set()
+    _lock = threading.Lock()
+    # 同一时间只有一个写库
+    _flush_lock = threading.Lock()
+
+    # 后台写库线程
+    _worker = WriteBehindWorker('barrage-flusher', BARRAGE_FLUSH_INTERVAL)
+
+    @classmethod
+    def ingest(cls, user_id: int, course_id: int, content: str, is_anonymous: bool = False) -> Dict[str, Any]:
+        """
+        发送自由弹幕：校验、过滤后立即广播，稍后写库
+
+        Args:
+            user_id: 用户ID
+            course_id: 课程ID
+            content: 弹幕内容
+            is_anonymous: 是否匿名
+
+        Returns:
+            弹幕字典（与 Barrage.to_dict() 格式相同）
+
+        Raises:
+            RateLimitError: 发送太频繁
+            ValueError: 课程或用户不存在、包含敏感词
+        """
+        if not cls._rate_limiter.allow(user_id):
+            raise RateLimitError("发送太频繁，请稍后再试")
+
+        if not cls._course_cache.get(course_id, lambda: cls._exists(Course, course_id)):
+            raise ValueError("课程不存在")
+        if not cls._user_cache.get(user_id, lambda: cls._exists(User, user_id)):
+            raise ValueError("用户不存在")
+
+        filtered_content, detected_words = BarrageService.filter_sensitive_words(content)
+        if detected_words:
+            logger.warning(
+                f"Sensitive words detected in barrage from user {user_id}: {detected_words}"
+            )
+            raise ValueError(f"内容包含敏感词: {', '.join(detected_words)}")
+
+        now = datetime.now()
+        barrage = Barrage(
+            id=BarrageService.allocate_id(),
+            content=filtered_content,
+            course_id=course_id,
+            user_id=user_id,
+            question_id=None,  # 自由弹幕，不关联问题
+            is_anonymous=is_anonymous,
+            status=True,
+            created_at=now,
+            updated_at=now
+        )
+        cls.enqueue(barrage)
+
+        data = barrage.to_dict()
+        socketio.emit('new_barrage', {
+            'barrage': data,
+            'message': '新弹幕'
+        }, room=f'course_{course_id}')
+
+        logger.info(f"Barrage ingested: {barrage.id} by user {user_id}")
+        return data
+
+    @classmethod
+    def enqueue(cls, barrage: Barrage) -> None:
+        """
+        把弹幕加入待写库缓冲
+
+        Args:
+            barrage: 已分配 ID、未加入会话的弹幕对象
+        """
+        cls._worker.ensure_started(cls.flush, cls._discard)
+
+        row = {column.name: getattr(barrage, column.name) for column in Barrage.__table__.columns}
+        with cls._lock:
+            cls._rows.append(row)
+            size = len(cls._rows)
+
+        if size >= BARRAGE_FLUSH_THRESHOLD:
+            cls._worker.wake()
+
+    @classmethod
+    def is_pending(cls, barrage_id: int) -> bool:
+        """弹幕是否在本进程中尚未写库"""
+        with cls._lock:
+            return barrage_id in cls._flushing_ids or any(row['id'] == barrage_id for row in cls._rows)
+
+    @classmethod
+    def flush_if_pending(cls, barrage_id: int) -> bool:
+        """
+        弹幕在本进程中尚未写库时立即写库（需在应用上下文中调用）
+
+        写库使用独立的数据库会话，失败时的回滚不影响请求会话中尚未提交的修改。
+
+        Returns:
+            是否执行了写库
+        """
+        if not cls.is_pending(barrage_id):
+            return False
+        cls._worker.flush_now()
+        return True
+
+    @classmethod
+    def flush(cls) -> int:
+        """
+        把缓冲的弹幕写入数据库（需在应用上下文中调用）
+
+        所有弹幕合并为一条 executemany 的 INSERT，一次提交；批量写入失败时逐条写入，
+        仍然失败的弹幕（如课程已被删除）记录日志后丢弃，不影响其他弹幕。
+
+        Returns:
+            写入的弹幕数
+        """
+        with cls._flush_lock:
+            with cls._lock:
+                if not cls._rows:
+                    return 0
+                rows, cls._rows = cls._rows, []
+                cls._flushing_ids = {row['id'] for row in rows}
+
+            try:
+                try:
+                    db.session.execute(Barrage.__table__.insert(), rows)
+                    db.session.commit()
+                    return len(rows)
+                except Exception as e:
+                    db.session.rollback()
+                    logger.warning(f"弹幕批量写入失败，改为逐条写入: {str(e)}")
+
+                written = 0
+                for row in rows:
+                    try:
+                        db.session.execute(Barrage.__table__.insert(), row)
+                        db.session.commit()
+                        written += 1
+                    except Exception as e:
+                        db.session.rollback()
+                        logger.error(f"弹幕 {row['id']} 写入失败，已丢弃: {str(e)}")
+                return written
+            finally:
+                with cls._lock:
+                    cls._flushing_ids = set()
+
+    @staticmethod
+    def _exists(model, row_id: int) -> Optional[bool]:
+        """记录存在返回 True，不存在返回 None（不缓存，刚创建的记录立即可用）"""
+        if db.session.query(model.id).filter(model.id == row_id).first() is None:
+            return None
+        return True
+
+    @classmethod
+    def _discard(cls) -> None:
+        """丢弃 fork 时从父进程继承的缓冲（由父进程负责写库）"""
+        with cls._lock:
+            cls._rows = []
+            cls._flushing_ids = set()
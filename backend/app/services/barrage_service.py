@@ -2,24 +2,35 @@
 弹幕服务层
 处理弹幕相关的业务逻辑
 """
-from typing import List, Optional, Dict, Any, Set
+from typing import List, Optional, Dict, Any, Iterable
+from flask import current_app, has_app_context
+from sqlalchemy import func
 from app.models.interaction import Barrage, Question
+from app.models.system import IdSequence
 from app.models.user import User
 from app.models.course import Course
 from app.extensions import db
 from app.schemas.interaction_schemas import BarrageCreateModel
+from app.utils.sensitive_word_matcher import SensitiveWordMatcher
 import logging
+import os
 import re
+import threading
 
 logger = logging.getLogger(__name__)
 
+# 弹幕 ID 序列名，以及每个进程每次预留的 ID 个数
+BARRAGE_ID_SEQUENCE = 'barrages'
+BARRAGE_ID_BLOCK_SIZE = 100
+
 
 class BarrageService:
     """弹幕业务逻辑服务"""
     
     # ==================== 敏感词库 ====================
-    # 实际项目中应该从数据库或配置文件加载
-    SENSITIVE_WORDS = {
+    # 内置词库，配置 SENSITIVE_WORDS_FILE 时再合并文件中的词（每行一个，# 开头为注释）
+    # 修改时整体替换为新集合，不在原集合上增删
+    SENSITIVE_WORDS = frozenset({
         # ========== 政治类 ==========
         '政治敏感', '反动', '颠覆',
         
@@ -29,7 +40,7 @@ class BarrageService:
         
         # ========== 色情类 ==========
         '色情', '黄色', '裸露', '淫秽', '操', 
-        '妈逼', ''
+        '妈逼',
         
         # ========== 赌博类 ==========
         '赌博', '赌钱', '赌场', '博彩',
@@ -61,40 +72,78 @@ class BarrageService:
         '翻墙', 'VPN', '代理服务器',
         '盗版', '破解', '外挂',
         '人肉搜索', '隐私泄露',
-    }
+    })
+    
+    # 敏感词匹配器，首次过滤时构建，敏感词变化时构建新的匹配器整体替换
+    _matcher: Optional[SensitiveWordMatcher] = None
+    _matcher_lock = threading.Lock()
+    
+    # 本进程预留的弹幕 ID 段：(下一个 ID, 段结束)，以及预留时的进程号
+    _id_block = (0, 0)
+    _id_block_pid: Optional[int] = None
+    _id_lock = threading.Lock()
     
     # ==================== 敏感词过滤 ====================
     
-    @staticmethod
-    def build_dfa_tree(sensitive_words: Set[str]) -> Dict[str, Any]:
+    @classmethod
+    def get_matcher(cls) -> SensitiveWordMatcher:
         """
-        构建DFA（确定有限状态自动机）字典树
-        用于高效的敏感词匹配
+        获取当前的敏感词匹配器（首次调用时加载词库并构建）
         
-        Args:
-            sensitive_words: 敏感词集合
-            
         Returns:
-            DFA字典树
+            敏感词匹配器
+        """
+        matcher = cls._matcher
+        if matcher is not None:
+            return matcher
+        
+        with cls._matcher_lock:
+            if cls._matcher is None:
+                cls.SENSITIVE_WORDS = cls.SENSITIVE_WORDS | cls._load_lexicon_file()
+                cls._matcher = SensitiveWordMatcher(cls.SENSITIVE_WORDS)
+                logger.info(f"Sensitive word matcher built with {len(cls._matcher)} words")
+            return cls._matcher
+    
+    @staticmethod
+    def _load_lexicon_file() -> frozenset:
+        """读取配置的敏感词文件，未配置或文件不存在时返回空集合"""
+        path = current_app.config.get('SENSITIVE_WORDS_FILE') if has_app_context() else None
+        if not path:
+            return frozenset()
+        
+        if not os.path.exists(path):
+            logger.warning(f"Sensitive word file not found: {path}")
+            return frozenset()
+        
+        with open(path, encoding='utf-8') as f:
+            return frozenset(
+                line.strip() for line in f
+                if line.strip() and not line.lstrip().startswith('#')
+            )
+    
+    @classmethod
+    def _update_sensitive_words(cls, added: Iterable[str] = (), removed: Iterable[str] = ()) -> int:
         """
-        dfa_tree = {}
+        增删敏感词并整体替换匹配器（正在过滤的请求继续使用旧匹配器）
         
-        for word in sensitive_words:
-            current_dict = dfa_tree
-            for char in word:
-                # 如果字符不在当前字典中，添加它
-                if char not in current_dict:
-                    current_dict[char] = {}
-                current_dict = current_dict[char]
-            # 标记词的结束
-            current_dict['is_end'] = True
-        
-        return dfa_tree
+        Returns:
+            实际增删的词数
+        """
+        cls.get_matcher()
+        with cls._matcher_lock:
+            added = {word for word in added if word} - cls.SENSITIVE_WORDS
+            removed = set(removed) & cls.SENSITIVE_WORDS
+            if not added and not removed:
+                return 0
+            
+            cls.SENSITIVE_WORDS = (cls.SENSITIVE_WORDS | added) - removed
+            cls._matcher = SensitiveWordMatcher(cls.SENSITIVE_WORDS)
+            return len(added) + len(removed)
     
-    @staticmethod
-    def filter_sensitive_words(content: str, replace_char: str = '*') -> tuple[str, List[str]]:
+    @classmethod
+    def filter_sensitive_words(cls, content: str, replace_char: str = '*') -> tuple[str, List[str]]:
         """
-        敏感词过滤（DFA算法）
+        敏感词过滤（Aho-Corasick 自动机，扫描一遍内容）
         
         Args:
             content: 原始内容
@@ -106,39 +155,7 @@ class BarrageService:
         if not content:
             return content, []
         
-        # 构建DFA树
-        dfa_tree = BarrageService.build_dfa_tree(BarrageService.SENSITIVE_WORDS)
-        
-        filtered_content = list(content)
-        detected_words = []
-        i = 0
-        
-        while i < len(content):
-            current_dict = dfa_tree
-            j = i
-            matched_word = ""
-            
-            # 尝试匹配敏感词
-            while j < len(content) and content[j] in current_dict:
-                matched_word += content[j]
-                current_dict = current_dict[content[j]]
-                j += 1
-                
-                # 如果匹配到完整的敏感词
-                if 'is_end' in current_dict:
-                    # 记录检测到的敏感词
-                    detected_words.append(matched_word)
-                    
-                    # 替换敏感词
-                    for k in range(i, j):
-                        filtered_content[k] = replace_char
-                    
-                    i = j
-                    break
-            else:
-                i += 1
-        
-        return ''.join(filtered_content), detected_words
+        return cls.get_matcher().filter(content, replace_char)
     
     @staticmethod
     def simple_filter_sensitive_words(content: str, replace_char: str = '*') -> tuple[str, List[str]]:
@@ -159,7 +176,7 @@ class BarrageService:
         filtered_content = content
         detected_words = []
         
-        for word in BarrageService.SENSITIVE_WORDS:
+        for word in BarrageService.get_matcher().words:
             if word in filtered_content:
                 detected_words.append(word)
                 filtered_content = filtered_content.replace(word, replace_char * len(word))
@@ -182,6 +199,30 @@ class BarrageService:
         
         return is_safe, detected_words
     
+    # ==================== 弹幕 ID ====================
+    
+    @classmethod
+    def allocate_id(cls) -> int:
+        """
+        分配弹幕 ID
+        
+        弹幕先分配 ID、广播，再由后台批量写入，所有写入弹幕的路径都从这里取 ID，避免与自增 ID 冲突。
+        ID 从本进程预留的段中取，用完时再预留 BARRAGE_ID_BLOCK_SIZE 个；
+        预留会提交当前事务，需在添加其他待保存的对象之前调用。
+        
+        Returns:
+            弹幕 ID
+        """
+        with cls._id_lock:
+            next_id, end = cls._id_block
+            if cls._id_block_pid != os.getpid() or next_id >= end:
+                # fork 出的子进程不能沿用父进程的段
+                floor = db.session.query(func.max(Barrage.id)).scalar() or 0
+                next_id, end = IdSequence.reserve(BARRAGE_ID_SEQUENCE, BARRAGE_ID_BLOCK_SIZE, floor)
+                cls._id_block_pid = os.getpid()
+            cls._id_block = (next_id + 1, end)
+            return next_id
+    
     # ==================== 弹幕CRUD操作 ====================
     
     @staticmethod
@@ -223,6 +264,7 @@ class BarrageService:
         
         # 创建弹幕
         barrage = Barrage(
+            id=BarrageService.allocate_id(),
             content=filtered_content,
             course_id=barrage_data.course_id,
             user_id=user_id,
@@ -283,6 +325,7 @@ class BarrageService:
         
         # 创建答案弹幕
         barrage = Barrage(
+            id=BarrageService.allocate_id(),
             content=filtered_content,
             course_id=course_id,
             user_id=user_id,
@@ -312,7 +355,17 @@ class BarrageService:
         Returns:
             弹幕对象，不存在返回None
         """
-        return Barrage.query.get(barrage_id)
+        return BarrageService._get_barrage(barrage_id)
+    
+    @staticmethod
+    def _get_barrage(barrage_id: int) -> Optional[Barrage]:
+        """按 ID 读取弹幕，本进程刚发送、尚未写入数据库的弹幕先写入再读取"""
+        barrage = Barrage.query.get(barrage_id)
+        if barrage is None:
+            from app.services.barrage_ingest_service import BarrageIngestService
+            if BarrageIngestService.flush_if_pending(barrage_id):
+                barrage = Barrage.query.get(barrage_id)
+        return barrage
     
     @staticmethod
     def delete_barrage(barrage_id: int) -> bool:
@@ -325,7 +378,7 @@ class BarrageService:
         Returns:
             是否删除成功
         """
-        barrage = Barrage.query.get(barrage_id)
+        barrage = BarrageService._get_barrage(barrage_id)
         if not barrage:
             return False
         
@@ -351,7 +404,7 @@ class BarrageService:
         Returns:
             是否删除成功
         """
-        barrage = Barrage.query.get(barrage_id)
+        barrage = BarrageService._get_barrage(barrage_id)
         if not barrage:
             return False
         
@@ -570,8 +623,8 @@ class BarrageService:
     
     # ==================== 敏感词管理 ====================
     
-    @staticmethod
-    def add_sensitive_word(word: str) -> bool:
+    @classmethod
+    def add_sensitive_word(cls, word: str) -> bool:
         """
         添加敏感词
         
@@ -581,14 +634,13 @@ class BarrageService:
         Returns:
             是否添加成功
         """
-        if word and word not in BarrageService.SENSITIVE_WORDS:
-            BarrageService.SENSITIVE_WORDS.add(word)
+        if cls._update_sensitive_words(added=[word]):
             logger.info(f"Sensitive word added: {word}")
             return True
         return False
     
-    @staticmethod
-    def remove_sensitive_word(word: str) -> bool:
+    @classmethod
+    def remove_sensitive_word(cls, word: str) -> bool:
         """
         移除敏感词
         
@@ -598,8 +650,7 @@ class BarrageService:
         Returns:
             是否移除成功
         """
-        if word in BarrageService.SENSITIVE_WORDS:
-            BarrageService.SENSITIVE_WORDS.remove(word)
+        if cls._update_sensitive_words(removed=[word]):
             logger.info(f"Sensitive word removed: {word}")
             return True
         return False
@@ -612,12 +663,12 @@ class BarrageService:
         Returns:
             敏感词列表
         """
-        return list(BarrageService.SENSITIVE_WORDS)
+        return list(BarrageService.get_matcher().words)
     
-    @staticmethod
-    def batch_add_sensitive_words(words: List[str]) -> int:
+    @classmethod
+    def batch_add_sensitive_words(cls, words: List[str]) -> int:
         """
-        批量添加敏感词
+        批量添加敏感词（只重建一次匹配器）
         
         Args:
             words: 敏感词列表
@@ -625,10 +676,7 @@ class BarrageService:
         Returns:
             成功添加的数量
         """
-        count = 0
-        for word in words:
-            if BarrageService.add_sensitive_word(word):
-                count += 1
+        count = cls._update_sensitive_words(added=words)
         
         logger.info(f"Batch added {count} sensitive words")
         return count
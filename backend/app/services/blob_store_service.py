@@ -0,0 +1,252 @@
+"""
+资料文件内容存储服务
+
+资料文件按内容 SHA-256 存放，内容相同的资料共用同一个文件并记录引用数，
+删除资料只释放引用，最后一个引用释放后才删除文件。
+"""
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+import logging
+import os
+import threading
+
+from app.extensions import db
+from app.models import FileBlob, FileDigest
+from app.services.storage_usage_service import StorageUsageService
+from app.utils.file_utils import compute_file_hash, delete_file, resolve_file_path
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，只在进程内加锁
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+# 内容文件目录（相对于后端项目根目录）
+BLOB_DIR = os.path.join('uploads', 'blobs')
+
+# 多个工作进程之间互斥用的锁文件名（位于 BLOB_DIR 下）
+BLOB_LOCK_FILE = '.lock'
+
+
+class BlobStoreService:
+    """
+    资料文件内容存储服务
+
+    引用数的修改和文件的移入、删除在同一把锁内完成，
+    避免一个请求删除文件的同时另一个请求正在复用它。
+    """
+
+    _lock = threading.Lock()
+
+    @staticmethod
+    def blob_path(sha256: str, ext: str) -> str:
+        """内容文件的相对路径：<BLOB_DIR>/<前两位>/<三四位>/<sha256><扩展名>"""
+        return os.path.join(BLOB_DIR, sha256[:2], sha256[2:4], f'{sha256}{ext.lower()}')
+
+    @classmethod
+    @contextmanager
+    def _locked(cls):
+        """进程内线程锁 + 进程间文件锁"""
+        with cls._lock:
+            if fcntl is None:
+                yield
+                return
+
+            directory = resolve_file_path(BLOB_DIR)
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, BLOB_LOCK_FILE), 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @classmethod
+    def put_file(cls, temp_path: str, ext: str, sha256: Optional[str] = None, acquire: bool = True) -> FileBlob:
+        """
+        把已写入磁盘的文件存入内容存储（默认增加一次引用）
+
+        内容已存在时删除临时文件，复用已有文件；否则把临时文件改名为内容文件。
+
+        Args:
+            temp_path: 已保存的文件路径（与 BLOB_DIR 在同一文件系统）
+            ext: 文件扩展名（如 .pdf），只在首次存入时使用
+            sha256: 调用方已算出的内容哈希，未传时读取文件计算
+            acquire: 是否增加引用；分片上传合并后的文件还没有资料引用，传 False，
+                之后创建资料时再用 acquire() 按哈希引用
+
+        Returns:
+            FileBlob: 文件内容记录，file_path 即资料应记录的路径
+        """
+        sha256 = sha256 or compute_file_hash(temp_path)
+
+        with cls._locked():
+            blob = FileBlob.query.filter_by(sha256=sha256).first()
+            if blob is not None and os.path.exists(resolve_file_path(blob.file_path)):
+                os.remove(temp_path)
+                if acquire:
+                    cls._add_ref(blob, 1)
+                else:
+                    # 复用的可能是即将被当作无引用文件回收的内容，重新开始计时
+                    cls._touch(blob)
+                db.session.commit()
+                logger.info(f"复用已存储的文件内容: {sha256}")
+                return blob
+
+            file_path = blob.file_path if blob is not None else cls.blob_path(sha256, ext)
+            absolute_path = resolve_file_path(file_path)
+            os.makedirs(os.path.dirname(absolute_path), exist_ok=True)
+            os.replace(temp_path, absolute_path)
+            stat = os.stat(absolute_path)
+            StorageUsageService.on_file_added(file_path, stat.st_size)
+
+            if blob is None:
+                blob = FileBlob(
+                    sha256=sha256, file_path=file_path, file_size=stat.st_size, ref_count=1 if acquire else 0
+                )
+                db.session.add(blob)
+            elif acquire:
+                # 记录还在但文件丢失，用本次上传的内容补回
+                cls._add_ref(blob, 1)
+            else:
+                cls._touch(blob)
+            db.session.commit()
+
+        # 写入摘要缓存，下载时不必再读一遍文件计算 ETag
+        FileDigest.remember(absolute_path, sha256, stat)
+        return blob
+
+    @classmethod
+    def find(cls, sha256: str) -> Optional[FileBlob]:
+        """
+        按内容哈希查找已存储的文件（不增加引用）
+
+        找到的文件可能随后被按哈希引用（秒传），无引用时重新开始计时，
+        避免在客户端创建资料之前被当作无引用文件回收。
+        """
+        with cls._locked():
+            blob = cls._find(sha256)
+            if blob is not None and blob.ref_count <= 0:
+                cls._touch(blob)
+                db.session.commit()
+            return blob
+
+    @staticmethod
+    def _find(sha256: str) -> Optional[FileBlob]:
+        """按内容哈希查找文件仍在磁盘上的内容记录（调用方持有锁）"""
+        blob = FileBlob.query.filter_by(sha256=sha256).first()
+        if blob is None or not os.path.exists(resolve_file_path(blob.file_path)):
+            return None
+        return blob
+
+    @classmethod
+    def acquire(cls, sha256: str) -> Optional[FileBlob]:
+        """
+        按内容哈希增加一次引用（客户端已知文件哈希时可跳过上传）
+
+        Returns:
+            内容已存储时返回 FileBlob，否则返回 None
+        """
+        with cls._locked():
+            blob = cls._find(sha256)
+            if blob is None:
+                return None
+            cls._add_ref(blob, 1)
+            db.session.commit()
+            return blob
+
+    @classmethod
+    def release(cls, file_path: str) -> Optional[str]:
+        """
+        释放资料对文件的一次引用，最后一个引用释放后删除文件
+
+        本功能上线前上传的资料不在内容存储中，直接删除文件。
+
+        Args:
+            file_path: 资料记录的文件路径
+
+        Returns:
+            删除了内容文件时返回其 SHA-256（供调用方清理预览副本等派生文件），否则返回 None
+        """
+        with cls._locked():
+            blob = FileBlob.query.filter_by(file_path=file_path).first()
+            if blob is None:
+                absolute_path = resolve_file_path(file_path)
+                size = os.path.getsize(absolute_path) if os.path.exists(absolute_path) else None
+                if not delete_file(absolute_path):
+                    logger.warning(f"文件删除失败: {file_path}")
+                elif size is not None:
+                    StorageUsageService.on_file_removed(file_path, size)
+                    db.session.commit()
+                return None
+
+            cls._add_ref(blob, -1)
+            db.session.refresh(blob)
+            if blob.ref_count > 0:
+                db.session.commit()
+                return None
+
+            sha256 = blob.sha256
+            db.session.delete(blob)
+            StorageUsageService.on_file_removed(file_path, blob.file_size)
+            db.session.commit()
+            delete_file(resolve_file_path(file_path))
+
+        FileDigest.forget(resolve_file_path(file_path))
+        logger.info(f"文件内容已无引用，删除: {sha256}")
+        return sha256
+
+    @classmethod
+    def remove_unreferenced(cls, min_age_hours: int, batch_size: int) -> Tuple[int, int, List[str]]:
+        """
+        删除无引用的内容文件（分片上传合并后一直没有创建资料的文件）
+
+        Args:
+            min_age_hours: 只删除存入（或最近一次被查找、复用）超过该时长的文件，给客户端留出创建资料的时间
+            batch_size: 最多删除的文件数
+
+        Returns:
+            (删除的文件数, 回收的字节数, 被删除内容的 SHA-256 列表)
+        """
+        cutoff = datetime.now() - timedelta(hours=min_age_hours)
+        removed: List[str] = []
+        reclaimed = 0
+
+        with cls._locked():
+            blobs = FileBlob.query.filter(
+                FileBlob.ref_count <= 0, FileBlob.updated_at < cutoff
+            ).order_by(FileBlob.id).limit(batch_size).all()
+            for blob in blobs:
+                absolute_path = resolve_file_path(blob.file_path)
+                if os.path.exists(absolute_path):
+                    size = os.path.getsize(absolute_path)
+                    os.remove(absolute_path)
+                    StorageUsageService.on_file_removed(absolute_path, size)
+                    reclaimed += size
+                removed.append(blob.sha256)
+                db.session.delete(blob)
+                FileDigest.query.filter_by(file_path=absolute_path).delete()
+            db.session.commit()
+
+        return len(removed), reclaimed, removed
+
+    @staticmethod
+    def _touch(blob: FileBlob) -> None:
+        """把内容记录的更新时间设为当前时间，推迟无引用文件的回收"""
+        db.session.execute(
+            FileBlob.__table__.update()
+            .where(FileBlob.__table__.c.id == blob.id)
+            .values(updated_at=datetime.now())
+        )
+
+    @staticmethod
+    def _add_ref(blob: FileBlob, delta: int) -> None:
+        """在数据库中原子地修改引用数"""
+        db.session.execute(
+            FileBlob.__table__.update()
+            .where(FileBlob.__table__.c.id == blob.id)
+            .values(ref_count=FileBlob.__table__.c.ref_count + delta)
+        )
@@ -6,6 +6,7 @@
 from typing import List, Optional, Dict, Any
 from app.extensions import db
 from app.models import MaterialCategory
+from app.services.material_statistics_service import MaterialStatisticsService
 import logging
 
 logger = logging.getLogger(__name__)
@@ -50,6 +51,7 @@ class CategoryService:
         )
         
         category.save()
+        MaterialStatisticsService.invalidate()
         
         logger.info(f"分类创建成功: {category.id} - {name}")
         return category
@@ -183,6 +185,7 @@ class CategoryService:
             category.sort_order = sort_order
         
         category.save()
+        MaterialStatisticsService.invalidate()
         
         logger.info(f"分类更新成功: {category_id}")
         return category
@@ -224,6 +227,7 @@ class CategoryService:
         
         # 删除分类
         category.delete()
+        MaterialStatisticsService.invalidate()
         
         logger.info(f"分类删除成功: {category_id}")
         return True
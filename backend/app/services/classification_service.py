@@ -6,26 +6,60 @@
 
 import logging
 import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from flask import Flask, current_app
 
 from app.extensions import db
-from app.models.intelligence import ClassificationLog, DocumentKeyword
+from app.models.intelligence import ClassificationLog, DocumentFingerprint, DocumentKeyword, DocumentTerms, KeywordStat
 from app.models.material import Material, MaterialCategory, MaterialTag
 from app.intelligence import (
     DocumentParser,
+    ParseResult,
     KeywordExtractor,
     CategoryClassifier,
     TagRecommender,
     KeywordResult,
+    ClassificationResult,
+    ModelStore,
+    ParserPool,
+    SimilarityIndex,
 )
+from app.intelligence.fingerprint import DUPLICATE_MAX_DISTANCE, hamming_distance, simhash
+from app.services.material_search_service import MaterialSearchService
+from app.services.material_statistics_service import MaterialStatisticsService
+from app.services.storage_usage_service import StorageUsageService
 
 logger = logging.getLogger(__name__)
 
 
-# 模型文件路径
+# 模型版本存储目录
+MODEL_STORE_DIR = os.path.join(os.path.dirname(__file__), '..', 'intelligence', 'models', 'classifier')
+
+# 旧版单文件模型路径，尚未发布过版本时作为兜底加载
 MODEL_PATH = os.path.join(os.path.dirname(__file__), '..', 'intelligence', 'models', 'classifier.pkl')
 
+# 相似资料索引文件：全量部分只在重建时写入，增量部分随新资料追加
+SIMILARITY_BASE_PATH = os.path.join(os.path.dirname(__file__), '..', 'intelligence', 'models', 'similarity-base.npz')
+SIMILARITY_DELTA_PATH = os.path.join(os.path.dirname(__file__), '..', 'intelligence', 'models', 'similarity-delta.npz')
+
+# 文档解析预算：关键词和分类只依赖文档前部内容，超大文档不必全文解析
+PARSE_MAX_PAGES = 50
+PARSE_MAX_CHARS = 200000
+
+# 批量分类每批处理的资料数：每批一次批量预测、一次提交
+BATCH_CHUNK_SIZE = 50
+
+# 上传后台分析的线程数：解析和分词是 CPU 密集任务，少量线程即可，避免挤占请求处理
+ANALYSIS_WORKERS = 2
+
+# 相似资料索引重建时每次从数据库读取的内容词行数
+SIMILARITY_REBUILD_FETCH_SIZE = 500
+
 
 class ClassificationService:
     """
@@ -39,12 +73,65 @@ class ClassificationService:
     _keyword_extractor: Optional[KeywordExtractor] = None
     _tag_recommender: Optional[TagRecommender] = None
 
+    # 模型版本存储，以及当前已加载模型对应的清单状态
+    _model_store = ModelStore(MODEL_STORE_DIR)
+    _model_stamp: Optional[tuple] = None
+    _model_lock = threading.Lock()
+
+    # 相似资料索引，以及当前已加载索引对应的文件状态
+    _similarity_index: Optional[SimilarityIndex] = None
+    _similarity_stamp: Optional[tuple] = None
+    _similarity_lock = threading.RLock()
+    
+    # 相似资料索引重建使用单独的单线程线程池，不占用分析线程；
+    # 重建期间再次提交的请求在本次结束后合并为一次重建
+    _similarity_executor: Optional[ThreadPoolExecutor] = None
+    _similarity_rebuilding: bool = False
+    _similarity_rebuild_requested: bool = False
+
+    # 沙箱解析进程池：文档在子进程中解析，限制 CPU 时间、墙钟时间和内存
+    _parser_pool: Optional[ParserPool] = None
+    _parser_pool_lock = threading.Lock()
+
+    # 上传后台分析的线程池与正在分析的资料
+    _analysis_executor: Optional[ThreadPoolExecutor] = None
+    _pending_analyses: Set[int] = set()
+    _analysis_lock = threading.Lock()
+
     @classmethod
     def _get_classifier(cls) -> CategoryClassifier:
-        """获取分类器实例（懒加载）"""
-        if cls._classifier is None:
-            cls._classifier = CategoryClassifier(model_path=MODEL_PATH)
-        return cls._classifier
+        """
+        获取分类器实例（懒加载）
+        
+        每次获取时检查模型清单是否变化（一次 stat），其他进程发布新版本后
+        在本进程加载新模型并整体替换引用，正在使用旧模型的请求不受影响。
+        """
+        stamp = cls._model_store.stamp()
+        if cls._classifier is not None and stamp == cls._model_stamp:
+            return cls._classifier
+        
+        with cls._model_lock:
+            # 等锁期间可能已被其他线程加载
+            if cls._classifier is None or stamp != cls._model_stamp:
+                cls._classifier = cls._load_classifier()
+                cls._model_stamp = stamp
+            return cls._classifier
+
+    @classmethod
+    def _load_classifier(cls) -> CategoryClassifier:
+        """加载当前版本模型，尚无版本时回退到旧版模型文件"""
+        current = cls._model_store.current()
+        if current:
+            version, path = current
+            classifier = cls._model_store.load(path)
+            if classifier:
+                logger.info(f"已加载分类模型版本: {version}")
+                return classifier
+            # 新版本加载失败时继续使用已加载的模型
+            if cls._classifier is not None:
+                return cls._classifier
+        
+        return CategoryClassifier(model_path=MODEL_PATH)
 
     @classmethod
     def _get_keyword_extractor(cls) -> KeywordExtractor:
@@ -53,6 +140,22 @@ class ClassificationService:
             cls._keyword_extractor = KeywordExtractor()
         return cls._keyword_extractor
 
+    @classmethod
+    def _get_parser_pool(cls) -> ParserPool:
+        """获取沙箱解析进程池（懒加载，子进程在首次解析时启动）"""
+        if cls._parser_pool is None:
+            with cls._parser_pool_lock:
+                if cls._parser_pool is None:
+                    cls._parser_pool = ParserPool()
+        return cls._parser_pool
+
+    @classmethod
+    def _parse_document(cls, file_path: str) -> ParseResult:
+        """在沙箱子进程中按解析预算解析文档"""
+        return cls._get_parser_pool().parse(
+            file_path, max_pages=PARSE_MAX_PAGES, max_chars=PARSE_MAX_CHARS
+        )
+
     @classmethod
     def _get_tag_recommender(cls) -> TagRecommender:
         """获取标签推荐器实例（懒加载）"""
@@ -60,6 +163,130 @@ class ClassificationService:
             cls._tag_recommender = TagRecommender()
         return cls._tag_recommender
 
+    @classmethod
+    def _get_analysis_executor(cls) -> ThreadPoolExecutor:
+        """获取后台分析线程池（懒加载）"""
+        with cls._analysis_lock:
+            if cls._analysis_executor is None:
+                cls._analysis_executor = ThreadPoolExecutor(
+                    max_workers=ANALYSIS_WORKERS, thread_name_prefix='material-analysis'
+                )
+            return cls._analysis_executor
+
+    @classmethod
+    def _get_similarity_executor(cls) -> ThreadPoolExecutor:
+        """获取相似资料索引重建线程池（懒加载，单线程）"""
+        with cls._similarity_lock:
+            if cls._similarity_executor is None:
+                cls._similarity_executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix='similarity-rebuild'
+                )
+            return cls._similarity_executor
+
+    @classmethod
+    def schedule_analysis(cls, material: Material) -> bool:
+        """
+        提交资料后台分析任务
+        
+        在后台依次完成解析、关键词提取、分类和标签推荐，结果写入
+        DocumentKeyword / ClassificationLog，完成后通过 WebSocket 通知上传者。
+        
+        Args:
+            material: 刚上传的资料
+            
+        Returns:
+            是否已提交（不支持解析的文件类型不提交）
+        """
+        ext = os.path.splitext(material.file_path)[1].lower()
+        if ext not in DocumentParser.SUPPORTED_EXTENSIONS:
+            return False
+        
+        with cls._analysis_lock:
+            if material.id in cls._pending_analyses:
+                return True
+            cls._pending_analyses.add(material.id)
+        
+        app = current_app._get_current_object()
+        cls._get_analysis_executor().submit(
+            cls._run_analysis, app, material.id, material.uploader_id
+        )
+        return True
+
+    @classmethod
+    def is_analysis_pending(cls, material_id: int) -> bool:
+        """资料是否正在后台分析"""
+        return material_id in cls._pending_analyses
+
+    @classmethod
+    def _run_analysis(cls, app: Flask, material_id: int, uploader_id: int) -> None:
+        """后台分析任务"""
+        # 延迟导入以避免循环依赖
+        from app.websocket.material_events import notify_material_analyzed
+        
+        with app.app_context():
+            try:
+                result = cls.classify_material(material_id)
+                result['tag_suggestions'] = cls.suggest_tags(material_id) if result['keywords'] else []
+            except Exception as e:
+                logger.error(f"资料后台分析失败: {material_id} - {str(e)}")
+                db.session.rollback()
+                result = {'material_id': material_id, 'error': '资料分析失败'}
+            finally:
+                db.session.remove()
+                with cls._analysis_lock:
+                    cls._pending_analyses.discard(material_id)
+        
+        notify_material_analyzed(uploader_id, result)
+
+    @staticmethod
+    def get_classification(material_id: int) -> Optional[Dict[str, Any]]:
+        """
+        读取已完成的分析结果
+        
+        关键词存在即说明资料已分析过；分类日志取该次分析及之后的最新一条，
+        没有日志说明置信度过低、未给出分类建议。
+        
+        Args:
+            material_id: 资料 ID
+            
+        Returns:
+            与 classify_material 结构相同的字典，尚未分析时返回 None
+        """
+        material = Material.query.get(material_id)
+        if not material:
+            raise ValueError(f"资料不存在: {material_id}")
+        
+        keywords = DocumentKeyword.get_by_material(material_id)
+        if not keywords:
+            return None
+        
+        analyzed_at = min(kw.created_at for kw in keywords)
+        log = ClassificationLog.query.filter(
+            ClassificationLog.material_id == material_id,
+            ClassificationLog.created_at >= analyzed_at
+        ).order_by(ClassificationLog.created_at.desc()).first()
+        
+        if log:
+            category = MaterialCategory.query.get(log.suggested_category_id)
+            result = ClassificationResult.from_confidence(
+                confidence=float(log.confidence or 0),
+                category_id=log.suggested_category_id,
+                category_name=category.name if category else None
+            )
+        else:
+            result = ClassificationResult.from_confidence(confidence=0.0)
+        
+        return {
+            'material_id': material_id,
+            'suggested_category_id': result.category_id,
+            'suggested_category_name': result.category_name,
+            'confidence': result.confidence,
+            'should_auto_apply': result.should_auto_apply,
+            'needs_confirmation': result.needs_confirmation,
+            'keywords': [{'keyword': kw.keyword, 'weight': float(kw.weight)} for kw in keywords],
+            'log_id': log.id if log else None
+        }
+
     @staticmethod
     def classify_material(material_id: int) -> Dict[str, Any]:
         """
@@ -77,7 +304,7 @@ class ClassificationService:
             raise ValueError(f"资料不存在: {material_id}")
         
         # 解析文档内容
-        parse_result = DocumentParser.parse(material.file_path)
+        parse_result = ClassificationService._parse_document(material.file_path)
         if not parse_result.success or not parse_result.content.strip():
             logger.warning(f"文档解析失败或内容为空: {material.file_path}")
             return {
@@ -92,17 +319,29 @@ class ClassificationService:
                 'error': parse_result.error_message or '文档内容为空'
             }
         
+        # 只分词一次，关键词提取和分类预测共用同一份分词结果
+        tokens = ClassificationService._tokenize(parse_result)
+        
         # 提取关键词
         extractor = ClassificationService._get_keyword_extractor()
-        keywords = extractor.extract(parse_result.content)
+        keywords = extractor.extract(parse_result.content, tokens=tokens)
         
         # 保存关键词到数据库
         ClassificationService._save_keywords(material_id, keywords)
         
+        # 内容词（过滤停用词）供相似资料索引、文档指纹和全文索引共用；
+        # 先保存内容词，相似资料索引重建时从中读取
+        terms = extractor.filter_stop_words(tokens)
+        ClassificationService._save_document_terms(material_id, terms)
+        ClassificationService._index_similarity(material_id, terms)
+        MaterialSearchService.index_content(material_id, terms)
+        
         # 进行分类预测
         classifier = ClassificationService._get_classifier()
         keyword_strings = [kw.keyword for kw in keywords]
-        classification_result = classifier.predict(parse_result.content, keyword_strings)
+        classification_result = classifier.predict(
+            parse_result.content, keyword_strings, tokens=tokens
+        )
         
         # 获取分类名称
         category_name = None
@@ -114,24 +353,20 @@ class ClassificationService:
         # 创建分类日志
         log_id = None
         if classification_result.category_id:
-            log = ClassificationLog(
-                material_id=material_id,
-                original_category_id=material.category_id,
-                suggested_category_id=classification_result.category_id,
-                confidence=Decimal(str(classification_result.confidence)),
-                algorithm_used='NaiveBayes',
-                features={'keywords': keyword_strings[:10]}
-            )
+            log = ClassificationService._build_classification_log(material, classification_result, keyword_strings)
             log.save()
             log_id = log.id
             
             # 如果高置信度，自动应用分类
             if classification_result.should_auto_apply:
+                old_category_id = material.category_id
                 material.category_id = classification_result.category_id
                 material.auto_classified = True
+                StorageUsageService.on_material_updated(material, old_category_id)
                 db.session.commit()
                 log.is_accepted = True
                 db.session.commit()
+                MaterialStatisticsService.on_material_updated(material, old_category_id)
         
         return {
             'material_id': material_id,
@@ -145,10 +380,533 @@ class ClassificationService:
         }
 
     @staticmethod
-    def _save_keywords(material_id: int, keywords: List[KeywordResult]) -> None:
-        """保存关键词到数据库"""
-        # 删除旧的关键词
+    def _tokenize(parse_result: ParseResult) -> List[str]:
+        """对解析结果分词，结果保存在 parse_result.tokens 中供后续复用"""
+        if parse_result.tokens is None:
+            extractor = ClassificationService._get_keyword_extractor()
+            parse_result.tokens = extractor.segment(parse_result.content)
+        return parse_result.tokens
+
+    @staticmethod
+    def _build_classification_log(
+        material: Material,
+        result: ClassificationResult,
+        keyword_strings: List[str]
+    ) -> ClassificationLog:
+        """构造分类日志（在应用分类之前调用，original_category_id 记录原分类；不保存）"""
+        return ClassificationLog(
+            material_id=material.id,
+            original_category_id=material.category_id,
+            suggested_category_id=result.category_id,
+            confidence=Decimal(str(result.confidence)),
+            algorithm_used='NaiveBayes',
+            features={'keywords': keyword_strings[:10]}
+        )
+
+    @staticmethod
+    def classify_materials(
+        material_ids: List[int],
+        chunk_size: int = BATCH_CHUNK_SIZE,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        批量分析并分类资料
+        
+        按批处理：逐个解析文档、提取关键词，整批一次预测，
+        关键词和分类日志整批写入、一次提交。
+        
+        Args:
+            material_ids: 资料 ID 列表
+            chunk_size: 每批处理的资料数
+            progress_callback: 每批完成后回调 (已处理数, 总数)
+            
+        Returns:
+            统计结果：总数、已分类数、自动应用数、失败数
+        """
+        classifier = ClassificationService._get_classifier()
+        extractor = ClassificationService._get_keyword_extractor()
+        
+        summary = {'total': len(material_ids), 'classified': 0, 'auto_applied': 0, 'failed': 0}
+        processed = 0
+        
+        for start in range(0, len(material_ids), chunk_size):
+            chunk = material_ids[start:start + chunk_size]
+            materials = Material.query.filter(Material.id.in_(chunk)).all()
+            summary['failed'] += len(chunk) - len(materials)
+            
+            # 解析并提取关键词
+            analyzed = []
+            indexed = []
+            for material in materials:
+                parse_result = ClassificationService._parse_document(material.file_path)
+                if not parse_result.success or not parse_result.content.strip():
+                    summary['failed'] += 1
+                    continue
+                
+                tokens = ClassificationService._tokenize(parse_result)
+                keywords = extractor.extract(parse_result.content, tokens=tokens)
+                ClassificationService._save_keywords(material.id, keywords, commit=False)
+                terms = extractor.filter_stop_words(tokens)
+                ClassificationService._save_document_terms(material.id, terms, commit=False)
+                MaterialSearchService.index_content(material.id, terms, commit=False)
+                indexed.append((material.id, terms))
+                analyzed.append((material, parse_result, [kw.keyword for kw in keywords]))
+            
+            # 整批预测
+            results = classifier.predict_batch(
+                [parse_result.content for _, parse_result, _ in analyzed],
+                keywords_list=[keyword_strings for _, _, keyword_strings in analyzed],
+                tokens_list=[parse_result.tokens for _, parse_result, _ in analyzed]
+            )
+            
+            # 整批写入分类日志
+            logs = []
+            category_changes = []
+            for (material, _, keyword_strings), result in zip(analyzed, results):
+                if not result.category_id:
+                    continue
+                
+                log = ClassificationService._build_classification_log(material, result, keyword_strings)
+                
+                # 如果高置信度，自动应用分类
+                if result.should_auto_apply:
+                    category_changes.append((material, material.category_id))
+                    material.category_id = result.category_id
+                    material.auto_classified = True
+                    log.is_accepted = True
+                    summary['auto_applied'] += 1
+                
+                logs.append(log)
+            
+            db.session.add_all(logs)
+            for material, old_category_id in category_changes:
+                StorageUsageService.on_material_updated(material, old_category_id)
+            db.session.commit()
+            for material, old_category_id in category_changes:
+                MaterialStatisticsService.on_material_updated(material, old_category_id)
+            # 内容词提交后再追加到相似资料索引，期间提交的重建能读到这一批
+            for material_id, terms in indexed:
+                ClassificationService._index_similarity(material_id, terms)
+            summary['classified'] += len(logs)
+            
+            processed += len(chunk)
+            if progress_callback:
+                progress_callback(processed, summary['total'])
+        
+        return summary
+
+    @classmethod
+    def schedule_batch_classification(cls, material_ids: List[int], user_id: int) -> str:
+        """
+        提交批量分类后台任务
+        
+        Args:
+            material_ids: 资料 ID 列表
+            user_id: 发起人 ID，用于推送进度
+            
+        Returns:
+            任务 ID
+        """
+        job_id = uuid.uuid4().hex
+        app = current_app._get_current_object()
+        cls._get_analysis_executor().submit(
+            cls._run_batch_classification, app, job_id, material_ids, user_id
+        )
+        return job_id
+
+    @classmethod
+    def _run_batch_classification(
+        cls,
+        app: Flask,
+        job_id: str,
+        material_ids: List[int],
+        user_id: int
+    ) -> None:
+        """批量分类后台任务，每批完成后推送进度"""
+        # 延迟导入以避免循环依赖
+        from app.websocket.material_events import (
+            notify_batch_classification_progress,
+            notify_batch_classification_completed,
+        )
+        
+        with app.app_context():
+            try:
+                summary = cls.classify_materials(
+                    material_ids,
+                    progress_callback=lambda processed, total: notify_batch_classification_progress(
+                        user_id, job_id, processed, total
+                    )
+                )
+            except Exception as e:
+                logger.error(f"批量分类失败: {job_id} - {str(e)}")
+                db.session.rollback()
+                summary = {'total': len(material_ids), 'error': '批量分类失败'}
+            finally:
+                db.session.remove()
+        
+        notify_batch_classification_completed(user_id, job_id, summary)
+
+    @classmethod
+    def _similarity_file_stamp(cls) -> tuple:
+        """索引文件的修改时间和 inode，用于低成本判断其他进程是否更新了索引"""
+        stamp = []
+        for path in (SIMILARITY_BASE_PATH, SIMILARITY_DELTA_PATH):
+            try:
+                stat = os.stat(path)
+                stamp.append((stat.st_mtime_ns, stat.st_ino))
+            except FileNotFoundError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    @classmethod
+    def _get_similarity_index(cls) -> Optional[SimilarityIndex]:
+        """获取相似资料索引（懒加载，文件变化后重新加载），尚未构建时返回 None"""
+        stamp = cls._similarity_file_stamp()
+        if stamp == cls._similarity_stamp:
+            return cls._similarity_index
+        
+        with cls._similarity_lock:
+            if stamp != cls._similarity_stamp:
+                cls._similarity_index = SimilarityIndex.load(SIMILARITY_BASE_PATH, SIMILARITY_DELTA_PATH)
+                cls._similarity_stamp = stamp
+            return cls._similarity_index
+
+    @classmethod
+    def _index_similarity(cls, material_id: int, terms: List[str]) -> None:
+        """
+        把资料追加到相似资料索引（只重写增量文件），追加过多时提交全量重建
+        
+        尚未构建过索引或词表为空时不追加（向量全为零），直接提交全量重建，
+        重建从已保存的内容词读取，会包含这份资料。
+        多个进程同时追加时可能丢失个别资料，下一次全量重建会补上。
+        """
+        try:
+            with cls._similarity_lock:
+                index = cls._get_similarity_index()
+                if index is None or not index.has_vocabulary:
+                    cls.schedule_similarity_rebuild()
+                    return
+                
+                index.add(material_id, terms)
+                index.save(SIMILARITY_BASE_PATH, SIMILARITY_DELTA_PATH)
+                cls._similarity_index = index
+                cls._similarity_stamp = cls._similarity_file_stamp()
+            
+            if index.needs_rebuild:
+                cls.schedule_similarity_rebuild()
+        except Exception as e:
+            logger.warning(f"更新相似资料索引失败: {material_id} - {str(e)}")
+
+    @classmethod
+    def remove_from_similarity_index(cls, material_id: int) -> None:
+        """从相似资料索引中移除资料（资料删除时调用）"""
+        try:
+            with cls._similarity_lock:
+                index = cls._get_similarity_index()
+                if index is None:
+                    return
+                index.remove(material_id)
+                index.save(SIMILARITY_BASE_PATH, SIMILARITY_DELTA_PATH)
+                cls._similarity_stamp = cls._similarity_file_stamp()
+        except Exception as e:
+            logger.warning(f"从相似资料索引移除资料失败: {material_id} - {str(e)}")
+
+    @classmethod
+    def schedule_similarity_rebuild(cls) -> None:
+        """
+        提交相似资料索引全量重建任务
+        
+        同一进程内同时只有一个重建任务；重建进行中再次提交时，
+        本次结束后再重建一次，读到期间新保存的内容词。
+        """
+        with cls._similarity_lock:
+            cls._similarity_rebuild_requested = True
+            if cls._similarity_rebuilding:
+                return
+            cls._similarity_rebuilding = True
+        
+        app = current_app._get_current_object()
+        cls._get_similarity_executor().submit(cls._run_similarity_rebuild, app)
+
+    @classmethod
+    def _run_similarity_rebuild(cls, app: Flask) -> None:
+        """相似资料索引重建后台任务"""
+        with app.app_context():
+            while True:
+                with cls._similarity_lock:
+                    if not cls._similarity_rebuild_requested:
+                        cls._similarity_rebuilding = False
+                        return
+                    cls._similarity_rebuild_requested = False
+                
+                try:
+                    cls.rebuild_similarity_index()
+                except Exception as e:
+                    logger.error(f"重建相似资料索引失败: {str(e)}")
+                finally:
+                    db.session.remove()
+
+    @classmethod
+    def rebuild_similarity_index(cls) -> int:
+        """
+        全量重建相似资料索引
+        
+        从分析时保存的内容词重新拟合词表和 IDF，不重新解析文档。
+        尚未保存内容词的历史资料需先补算（见 backfill_fingerprints）。
+        
+        Returns:
+            索引中的资料数
+        """
+        rows = DocumentTerms.query.with_entities(
+            DocumentTerms.material_id, DocumentTerms.terms
+        ).order_by(DocumentTerms.material_id).yield_per(SIMILARITY_REBUILD_FETCH_SIZE)
+        
+        index = SimilarityIndex.build((material_id, terms.split()) for material_id, terms in rows)
+        
+        with cls._similarity_lock:
+            index.save(SIMILARITY_BASE_PATH, SIMILARITY_DELTA_PATH, full=True)
+            cls._similarity_index = index
+            cls._similarity_stamp = cls._similarity_file_stamp()
+        
+        logger.info(f"相似资料索引已重建，共 {len(index)} 份资料")
+        return len(index)
+
+    @classmethod
+    def get_related_materials(cls, material_id: int, limit: int = 10) -> List[Dict]:
+        """
+        获取相似资料
+        
+        Args:
+            material_id: 资料 ID
+            limit: 返回数量
+            
+        Returns:
+            按相似度降序排列的资料列表
+        """
+        if not Material.query.get(material_id):
+            raise ValueError(f"资料不存在: {material_id}")
+        
+        index = cls._get_similarity_index()
+        if index is None:
+            # 尚未构建过索引，后台构建后再查询
+            cls.schedule_similarity_rebuild()
+            return []
+        
+        neighbors = index.related(material_id, limit)
+        materials = {
+            material.id: material
+            for material in Material.query.filter(Material.id.in_([mid for mid, _ in neighbors])).all()
+        }
+        
+        results = []
+        for neighbor_id, similarity in neighbors:
+            material = materials.get(neighbor_id)
+            if material:
+                data = material.to_dict()
+                data['similarity'] = similarity
+                results.append(data)
+        return results
+
+    @staticmethod
+    def _save_document_terms(material_id: int, terms: List[str], commit: bool = True) -> None:
+        """保存资料内容词并计算内容指纹（commit=False 时由调用方统一提交）"""
+        if not terms:
+            return
+        
+        try:
+            DocumentTerms.save_for_material(material_id, terms)
+            DocumentFingerprint.save_for_material(material_id, simhash(terms))
+            if commit:
+                db.session.commit()
+        except Exception as e:
+            logger.warning(f"保存资料内容词和指纹失败: {material_id} - {str(e)}")
+            if commit:
+                db.session.rollback()
+
+    @staticmethod
+    def find_near_duplicates(material_id: int) -> List[Dict]:
+        """
+        查找与资料内容近似重复的其他资料
+        
+        Args:
+            material_id: 资料 ID
+            
+        Returns:
+            近似重复资料列表（含海明距离），按距离升序；尚未计算指纹时为空
+        """
+        record = DocumentFingerprint.query.filter_by(material_id=material_id).first()
+        if record is None:
+            return []
+        
+        matches = DocumentFingerprint.find_similar(
+            record.fingerprint, DUPLICATE_MAX_DISTANCE, exclude_material_id=material_id
+        )
+        materials = {
+            material.id: material
+            for material in Material.query.filter(
+                Material.id.in_([match.material_id for match, _ in matches])
+            ).all()
+        }
+        
+        return [
+            {
+                'material_id': match.material_id,
+                'title': materials[match.material_id].title,
+                'distance': distance
+            }
+            for match, distance in matches
+            if match.material_id in materials
+        ]
+
+    @staticmethod
+    def get_duplicate_report() -> Dict[str, Any]:
+        """
+        生成全库近似重复资料报告
+        
+        按指纹分段分桶，只比较同桶内的指纹，再用并查集把相互重复的资料合并成组。
+        
+        Returns:
+            重复组列表（每组按上传时间排序，第一份视为原件）和可节省的存储空间
+        """
+        records = DocumentFingerprint.query.with_entities(
+            DocumentFingerprint.material_id, DocumentFingerprint.simhash,
+            DocumentFingerprint.band_0, DocumentFingerprint.band_1,
+            DocumentFingerprint.band_2, DocumentFingerprint.band_3
+        ).all()
+        
+        fingerprints = {row.material_id: row.simhash & 0xFFFFFFFFFFFFFFFF for row in records}
+        buckets: Dict[tuple, List[int]] = {}
+        for row in records:
+            for band, value in enumerate((row.band_0, row.band_1, row.band_2, row.band_3)):
+                buckets.setdefault((band, value), []).append(row.material_id)
+        
+        # 并查集
+        parent = {material_id: material_id for material_id in fingerprints}
+        
+        def find(material_id):
+            while parent[material_id] != material_id:
+                parent[material_id] = parent[parent[material_id]]
+                material_id = parent[material_id]
+            return material_id
+        
+        for members in buckets.values():
+            for i, a in enumerate(members):
+                for b in members[i + 1:]:
+                    if find(a) != find(b) and hamming_distance(fingerprints[a], fingerprints[b]) <= DUPLICATE_MAX_DISTANCE:
+                        parent[find(a)] = find(b)
+        
+        groups_by_root: Dict[int, List[int]] = {}
+        for material_id in fingerprints:
+            groups_by_root.setdefault(find(material_id), []).append(material_id)
+        duplicate_ids = [ids for ids in groups_by_root.values() if len(ids) > 1]
+        
+        materials = {
+            material.id: material
+            for material in Material.query.filter(
+                Material.id.in_([material_id for ids in duplicate_ids for material_id in ids])
+            ).all()
+        }
+        
+        groups = []
+        wasted_bytes = 0
+        for ids in duplicate_ids:
+            members = sorted(
+                (materials[material_id] for material_id in ids if material_id in materials),
+                key=lambda material: (material.created_at, material.id)
+            )
+            if len(members) < 2:
+                continue
+            wasted_bytes += sum(material.file_size for material in members[1:])
+            groups.append([
+                {
+                    'material_id': material.id,
+                    'title': material.title,
+                    'file_name': material.file_name,
+                    'file_size': material.file_size,
+                    'uploader_id': material.uploader_id,
+                    'created_at': material.created_at.strftime('%Y-%m-%d %H:%M:%S')
+                }
+                for material in members
+            ])
+        
+        groups.sort(key=lambda group: -len(group))
+        return {
+            'groups': groups,
+            'total_groups': len(groups),
+            'duplicate_materials': sum(len(group) - 1 for group in groups),
+            'wasted_bytes': wasted_bytes
+        }
+
+    @staticmethod
+    def backfill_fingerprints(chunk_size: int = BATCH_CHUNK_SIZE) -> int:
+        """
+        为尚无内容词的资料补算内容词和指纹（同时写入全文索引的正文）
+        
+        内容词与指纹同时保存，没有内容词的资料即包括没有指纹的资料。
+        
+        Returns:
+            补算成功的资料数
+        """
+        extractor = ClassificationService._get_keyword_extractor()
+        materials = Material.query.with_entities(Material.id, Material.file_path).outerjoin(
+            DocumentTerms, DocumentTerms.material_id == Material.id
+        ).filter(DocumentTerms.id.is_(None)).order_by(Material.id).all()
+        
+        count = 0
+        for start in range(0, len(materials), chunk_size):
+            for material_id, file_path in materials[start:start + chunk_size]:
+                if os.path.splitext(file_path)[1].lower() not in DocumentParser.SUPPORTED_EXTENSIONS:
+                    continue
+                parse_result = ClassificationService._parse_document(file_path)
+                if not parse_result.success or not parse_result.content.strip():
+                    continue
+                terms = extractor.filter_stop_words(ClassificationService._tokenize(parse_result))
+                if terms:
+                    ClassificationService._save_document_terms(material_id, terms, commit=False)
+                    MaterialSearchService.index_content(material_id, terms, commit=False)
+                    count += 1
+            db.session.commit()
+        
+        logger.info(f"资料内容词和指纹补算完成，共 {count} 份")
+        return count
+
+    @classmethod
+    def schedule_fingerprint_backfill(cls) -> None:
+        """提交资料指纹补算后台任务"""
+        app = current_app._get_current_object()
+        cls._get_analysis_executor().submit(cls._run_fingerprint_backfill, app)
+
+    @classmethod
+    def _run_fingerprint_backfill(cls, app: Flask) -> None:
+        """资料指纹补算后台任务"""
+        with app.app_context():
+            try:
+                if cls.backfill_fingerprints():
+                    # 补算的资料进入相似资料索引
+                    cls.schedule_similarity_rebuild()
+            except Exception as e:
+                logger.error(f"资料指纹补算失败: {str(e)}")
+                db.session.rollback()
+            finally:
+                db.session.remove()
+
+    @staticmethod
+    def get_unclassified_material_ids() -> List[int]:
+        """获取所有未分类资料的 ID"""
+        rows = Material.query.with_entities(Material.id).filter(
+            Material.category_id.is_(None)
+        ).order_by(Material.id).all()
+        return [row.id for row in rows]
+
+    @staticmethod
+    def _save_keywords(material_id: int, keywords: List[KeywordResult], commit: bool = True) -> None:
+        """保存关键词到数据库（commit=False 时由调用方统一提交）"""
+        # 删除旧的关键词，同时记下旧关键词以更新关键词统计
+        old_keywords = DocumentKeyword.query.with_entities(
+            DocumentKeyword.keyword, DocumentKeyword.weight
+        ).filter_by(material_id=material_id).all()
         DocumentKeyword.query.filter_by(material_id=material_id).delete()
+        KeywordStat.apply_change(old_keywords, [(kw.keyword, kw.weight) for kw in keywords])
         
         # 保存新的关键词
         for kw in keywords:
@@ -160,13 +918,16 @@ class ClassificationService:
             )
             db.session.add(doc_keyword)
         
-        db.session.commit()
+        if commit:
+            db.session.commit()
 
     @staticmethod
     def extract_keywords(material_id: int, top_n: int = 10) -> List[Dict]:
         """
         提取资料关键词
         
+        优先读取已保存的关键词，没有时对资料做一次完整分析。
+        
         Args:
             material_id: 资料 ID
             top_n: 返回的关键词数量
@@ -182,24 +943,69 @@ class ClassificationService:
                 for kw in existing_keywords
             ]
         
-        # 如果没有，则提取并保存
-        material = Material.query.get(material_id)
-        if not material:
-            raise ValueError(f"资料不存在: {material_id}")
+        # 如果没有，则完整分析一次，保证关键词与分类日志来自同一次分析
+        result = ClassificationService.classify_material(material_id)
+        return result['keywords'][:top_n]
+
+    @staticmethod
+    def search_materials_by_keywords(keywords: List[str], limit: int = 20) -> List[Dict]:
+        """
+        按关键词查找资料
         
-        # 解析文档
-        parse_result = DocumentParser.parse(material.file_path)
-        if not parse_result.success or not parse_result.content.strip():
+        Args:
+            keywords: 关键词列表
+            limit: 返回的资料数量
+            
+        Returns:
+            按命中关键词权重之和降序排列的资料列表
+        """
+        keywords = list(dict.fromkeys(kw.strip() for kw in keywords if kw.strip()))
+        if not keywords:
             return []
         
-        # 提取关键词
-        extractor = ClassificationService._get_keyword_extractor()
-        keywords = extractor.extract(parse_result.content, top_n=top_n)
+        rows = DocumentKeyword.search_materials(keywords, limit)
+        materials = {
+            material.id: material
+            for material in Material.query.filter(Material.id.in_([row.material_id for row in rows])).all()
+        }
         
-        # 保存到数据库
-        ClassificationService._save_keywords(material_id, keywords)
+        results = []
+        for row in rows:
+            material = materials.get(row.material_id)
+            if material:
+                data = material.to_dict()
+                data['score'] = float(row.score)
+                data['matched_keywords'] = row.matched
+                results.append(data)
+        return results
+
+    @staticmethod
+    def get_popular_keywords(limit: int = 20) -> List[Dict]:
+        """
+        获取热门关键词
         
-        return [{'keyword': kw.keyword, 'weight': kw.weight} for kw in keywords]
+        Args:
+            limit: 返回的关键词数量
+            
+        Returns:
+            按资料数降序排列的关键词列表
+        """
+        return [
+            {'keyword': row.keyword, 'count': row.count, 'avg_weight': float(row.avg_weight or 0)}
+            for row in DocumentKeyword.get_popular_keywords(limit)
+        ]
+
+    @staticmethod
+    def rebuild_keyword_stats() -> int:
+        """
+        从资料关键词全量重建关键词统计（升级后补算已有资料，或校正统计误差）
+        
+        Returns:
+            重建后的关键词数
+        """
+        count = KeywordStat.rebuild()
+        logger.info(f"关键词统计重建完成，共 {count} 个关键词")
+        return count
 
     @staticmethod
     def suggest_tags(material_id: int) -> List[Dict]:
@@ -255,7 +1061,13 @@ class ClassificationService:
         if log.is_accepted is not None:
             raise ValueError("该分类建议已被处理")
         
+        material = Material.query.get(log.material_id)
+        old_category_id = material.category_id if material else None
         log.accept()
+        if material:
+            StorageUsageService.on_material_updated(material, old_category_id)
+            db.session.commit()
+            MaterialStatisticsService.on_material_updated(material, old_category_id)
         return True
 
     @staticmethod
@@ -307,7 +1119,7 @@ class ClassificationService:
         
         for material in materials:
             # 解析文档内容
-            parse_result = DocumentParser.parse(material.file_path)
+            parse_result = ClassificationService._parse_document(material.file_path)
             if parse_result.success and parse_result.content.strip():
                 training_data.append(TrainingItem(
                     text=parse_result.content,
@@ -327,14 +1139,13 @@ class ClassificationService:
                 'accuracy': 0.0
             }
         
-        # 训练模型
-        classifier = ClassificationService._get_classifier()
+        # 在新实例上训练，不影响正在使用当前模型的预测
+        classifier = CategoryClassifier()
         result = classifier.train(training_data, category_names)
         
-        # 保存模型
+        # 发布新版本，各进程下次获取分类器时自动切换
         if result.success:
-            os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
-            classifier.save_model(MODEL_PATH)
+            ClassificationService._model_store.publish(classifier)
         
         return {
             'success': result.success,
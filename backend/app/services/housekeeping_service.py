@@ -0,0 +1,240 @@
+"""
+定期清理服务
+
+在应用进程内定期执行数据保留任务：过期的分片上传、临时文件、旧系统日志、旧的已读通知、
+没有资料引用的内容文件，清理后校正存储用量。多个工作进程通过锁文件保证同一时间只有一个在执行，
+数据库删除分批提交，每项任务的清理结果记录在 housekeeping_runs 表中。
+"""
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Tuple
+import logging
+import os
+import threading
+import time
+
+from flask import Flask, current_app
+
+from app.extensions import db
+from app.models import HousekeepingRun, Notification, SystemLog
+from app.models.system import _delete_in_batches
+from app.services.blob_store_service import BlobStoreService
+from app.services.rendition_service import RenditionService
+from app.services.storage_usage_service import StorageUsageService
+from app.utils.chunked_upload import chunked_upload_manager
+from app.utils.file_utils import resolve_file_path
+from app.utils.storage_init import cleanup_temp_files
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，只在进程内加锁
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+# 两次清理之间的最短间隔（秒）
+HOUSEKEEPING_INTERVAL = 3600
+
+# 各进程检查是否到期的间隔（秒），多个进程轮流检查，实际间隔接近 HOUSEKEEPING_INTERVAL
+HOUSEKEEPING_POLL_INTERVAL = 300
+
+# 进程启动后首次检查前的等待时间（秒），不与启动时的初始化争用资源
+HOUSEKEEPING_INITIAL_DELAY = 60
+
+# 多个工作进程之间互斥用的锁文件（相对于后端项目根目录，不能放在会被清理的 temp 目录下）
+HOUSEKEEPING_LOCK_FILE = os.path.join('uploads', '.housekeeping.lock')
+
+# 每批删除的行数 / 文件数
+HOUSEKEEPING_BATCH_SIZE = 1000
+
+# 保留期限
+LOG_RETENTION_DAYS = 30
+NOTIFICATION_RETENTION_DAYS = 30
+TEMP_FILE_MAX_AGE_HOURS = 24
+UNREFERENCED_BLOB_MAX_AGE_HOURS = 24
+HOUSEKEEPING_RECORD_RETENTION_DAYS = 90
+
+
+class HousekeepingService:
+    """
+    定期清理服务
+
+    每个进程在首个请求时启动一个后台线程，定期检查距上次清理是否已满 HOUSEKEEPING_INTERVAL；
+    上次清理时间取自 housekeeping_runs 表，所有进程共用。
+    """
+
+    _thread: Optional[threading.Thread] = None
+    _thread_pid: Optional[int] = None
+    _app: Optional[Flask] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def init_app(cls, app: Flask) -> None:
+        """注册到应用（HOUSEKEEPING_ENABLED 为 False 时不启动）"""
+        if app.config.get('HOUSEKEEPING_ENABLED', True):
+            app.before_request(cls._ensure_started)
+
+    @classmethod
+    def _ensure_started(cls) -> None:
+        """启动后台清理线程（每个进程一个）"""
+        pid = os.getpid()
+        if cls._thread_pid == pid:
+            return
+
+        with cls._lock:
+            if cls._thread_pid == pid:
+                return
+            cls._app = current_app._get_current_object()
+            cls._thread = threading.Thread(target=cls._run_loop, name='housekeeping', daemon=True)
+            cls._thread_pid = pid
+            cls._thread.start()
+
+    @classmethod
+    def _run_loop(cls) -> None:
+        """后台清理线程"""
+        time.sleep(HOUSEKEEPING_INITIAL_DELAY)
+        while True:
+            with cls._app.app_context():
+                try:
+                    cls.run_if_due()
+                except Exception as e:
+                    logger.warning(f"定期清理失败: {str(e)}")
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+            time.sleep(HOUSEKEEPING_POLL_INTERVAL)
+
+    @classmethod
+    def run_if_due(cls) -> Optional[List[HousekeepingRun]]:
+        """
+        距上次清理已满间隔、且没有其他进程正在清理时执行一次清理
+
+        Returns:
+            本次各任务的清理记录，未执行时返回 None
+        """
+        with cls._file_lock() as acquired:
+            if not acquired:
+                return None
+
+            last_run = HousekeepingRun.query.order_by(HousekeepingRun.created_at.desc()).first()
+            if last_run and last_run.created_at > datetime.now() - timedelta(seconds=HOUSEKEEPING_INTERVAL):
+                return None
+
+            return cls.run_once()
+
+    @classmethod
+    def run_once(cls) -> List[HousekeepingRun]:
+        """
+        依次执行所有清理任务（需在应用上下文中调用），单个任务失败不影响其他任务
+
+        Returns:
+            各任务的清理记录
+        """
+        tasks: List[Tuple[str, Callable[[], Tuple[int, int]]]] = [
+            ('expired_uploads', cls._clean_expired_uploads),
+            ('temp_files', cls._clean_temp_files),
+            ('unreferenced_blobs', cls._clean_unreferenced_blobs),
+            ('system_logs', cls._clean_system_logs),
+            ('notifications', cls._clean_notifications),
+            ('housekeeping_runs', cls._clean_housekeeping_runs),
+            ('storage_usage', cls._reconcile_storage_usage),
+        ]
+
+        runs = []
+        for name, task in tasks:
+            start = time.perf_counter()
+            items_removed, bytes_reclaimed, error_message = 0, 0, None
+            try:
+                items_removed, bytes_reclaimed = task()
+            except Exception as e:
+                db.session.rollback()
+                error_message = str(e)
+                logger.warning(f"清理任务 {name} 失败: {error_message}")
+
+            run = HousekeepingRun(
+                task=name,
+                items_removed=items_removed,
+                bytes_reclaimed=bytes_reclaimed,
+                duration_ms=int((time.perf_counter() - start) * 1000),
+                error_message=error_message
+            )
+            db.session.add(run)
+            db.session.commit()
+            runs.append(run)
+
+            if items_removed:
+                logger.info(f"清理任务 {name}: 删除 {items_removed} 项，回收 {bytes_reclaimed} 字节")
+        return runs
+
+    @classmethod
+    @contextmanager
+    def _file_lock(cls):
+        """尝试获取进程间清理锁，已被其他进程持有时返回 False（不等待）"""
+        if fcntl is None:
+            yield True
+            return
+
+        path = resolve_file_path(HOUSEKEEPING_LOCK_FILE)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _clean_expired_uploads() -> Tuple[int, int]:
+        """过期未完成的分片上传"""
+        return chunked_upload_manager.cleanup_expired_uploads(), 0
+
+    @staticmethod
+    def _clean_temp_files() -> Tuple[int, int]:
+        """超过保留时间的临时文件"""
+        return cleanup_temp_files(resolve_file_path('uploads'), TEMP_FILE_MAX_AGE_HOURS)
+
+    @staticmethod
+    def _clean_unreferenced_blobs() -> Tuple[int, int]:
+        """分片上传合并后一直没有创建资料的内容文件，及其预览副本"""
+        items_removed, bytes_reclaimed = 0, 0
+        while True:
+            count, reclaimed, removed = BlobStoreService.remove_unreferenced(
+                UNREFERENCED_BLOB_MAX_AGE_HOURS, HOUSEKEEPING_BATCH_SIZE
+            )
+            for sha256 in removed:
+                RenditionService.remove_renditions(sha256)
+            items_removed += count
+            bytes_reclaimed += reclaimed
+            if count < HOUSEKEEPING_BATCH_SIZE:
+                return items_removed, bytes_reclaimed
+
+    @staticmethod
+    def _clean_system_logs() -> Tuple[int, int]:
+        """超过保留期限的系统日志"""
+        return SystemLog.clean_old_logs(LOG_RETENTION_DAYS, HOUSEKEEPING_BATCH_SIZE), 0
+
+    @staticmethod
+    def _clean_notifications() -> Tuple[int, int]:
+        """超过保留期限的已读通知"""
+        return Notification.delete_old_notifications(
+            days=NOTIFICATION_RETENTION_DAYS, batch_size=HOUSEKEEPING_BATCH_SIZE
+        ), 0
+
+    @staticmethod
+    def _clean_housekeeping_runs() -> Tuple[int, int]:
+        """超过保留期限的清理记录"""
+        cutoff = datetime.now() - timedelta(days=HOUSEKEEPING_RECORD_RETENTION_DAYS)
+        return _delete_in_batches(
+            HousekeepingRun, [HousekeepingRun.created_at < cutoff], HOUSEKEEPING_BATCH_SIZE
+        ), 0
+
+    @staticmethod
+    def _reconcile_storage_usage() -> Tuple[int, int]:
+        """校正存储用量计数（不删除任何内容）"""
+        StorageUsageService.reconcile()
+        return 0, 0
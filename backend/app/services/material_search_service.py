@@ -0,0 +1,352 @@
+"""
+资料全文检索服务
+
+基于 SQLite FTS5 为资料标题、描述、关键词、文件名和文档正文建立全文索引。
+"""
+from typing import Callable, Dict, Iterable, List, Optional, TypeVar
+import logging
+import re
+import weakref
+
+import jieba
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+from app.extensions import db
+from app.models import Material, DocumentKeyword
+
+logger = logging.getLogger(__name__)
+
+
+# 全文索引表名
+FTS_TABLE = 'material_fts'
+
+# bm25 各列权重，顺序与建表列顺序一致：标题 > 描述 = 关键词 > 文件名 > 正文
+BM25_WEIGHTS = (10.0, 4.0, 4.0, 2.0, 1.0)
+
+# 重建索引时每批写入的资料数
+REBUILD_BATCH_SIZE = 500
+
+# 短于该长度的搜索词使用 LIKE 查询：索引中的检索词是整词，单字只能匹配恰好切为单字的词
+FTS_MIN_QUERY_LENGTH = 2
+
+# 英文、数字词（查询时按前缀匹配，与原 LIKE 子串匹配的行为接近）
+_LATIN_TERM = re.compile(r'^[0-9A-Za-z]+$')
+
+T = TypeVar('T')
+
+
+class MaterialSearchService:
+    """
+    资料全文检索服务
+
+    FTS5 的 unicode61 分词器只按空白和标点切分，中文需要先用 jieba 分好词、以空格连接后写入。
+    写入时采用与 jieba 搜索引擎模式相同的切分（长词额外拆出其中的二字、三字词），
+    查询时用精确模式切分，"机器学习"和"学习"都能命中含"机器学习"的资料。
+
+    全文索引以资料 ID 为 rowid，与资料的创建、更新、分析、删除同步，随 db.drop_all() 一起删除；
+    数据库不是 SQLite 或 SQLite 未编译 FTS5 时不可用，调用方回退到 LIKE 查询。
+    """
+
+    # 各数据库引擎是否支持全文索引（按引擎对象缓存，建表只检查一次；
+    # 同一地址的不同引擎，如两个 sqlite:// 内存库，是不同的数据库）
+    _available: 'weakref.WeakKeyDictionary[Engine, bool]' = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """全文索引是否可用（首次调用时建表，新建时用现有资料填充）"""
+        engine = db.engine
+        available = cls._available.get(engine)
+        if available is None:
+            available = cls._available[engine] = cls._ensure_table()
+        return available
+
+    @classmethod
+    def invalidate(cls, engine: Optional[Engine] = None) -> None:
+        """丢弃引擎的可用性缓存，下次使用时重新检查并在需要时重建索引表"""
+        cls._available.pop(engine if engine is not None else db.engine, None)
+
+    @classmethod
+    def with_fallback(cls, run: Callable[[bool], T]) -> T:
+        """
+        执行可能使用全文索引的查询，全文索引出错（如索引表已被删除）则改用 LIKE 重新执行
+
+        其他数据库错误（如 database is locked）照常抛出，不掩盖为 LIKE 查询。
+
+        Args:
+            run: 查询函数，参数为是否使用全文索引
+
+        Returns:
+            查询结果
+        """
+        try:
+            return run(True)
+        except OperationalError as e:
+            if not cls._is_index_error(e):
+                raise
+            db.session.rollback()
+            cls.invalidate()
+            logger.warning(f"全文索引查询失败，改用 LIKE 查询: {str(e)}")
+            return run(False)
+
+    @staticmethod
+    def _is_index_error(error: OperationalError) -> bool:
+        """是否为全文索引本身的错误（索引表不存在、FTS5 不可用或索引损坏）"""
+        message = str(error.orig).lower()
+        return FTS_TABLE in message or 'fts5' in message or 'no such module' in message
+
+    @classmethod
+    def _ensure_table(cls) -> bool:
+        """创建全文索引表"""
+        if db.engine.dialect.name != 'sqlite':
+            return False
+
+        try:
+            exists = db.session.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {'name': FTS_TABLE}
+            ).first() is not None
+            if not exists:
+                db.session.execute(text(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+                    f"USING fts5(title, description, keywords, file_name, content, tokenize='unicode61')"
+                ))
+                db.session.commit()
+                cls.rebuild()
+            return True
+        except OperationalError as e:
+            db.session.rollback()
+            logger.warning(f"全文索引不可用，资料搜索使用 LIKE 查询: {str(e)}")
+            return False
+
+    @staticmethod
+    def segment(value: Optional[str]) -> str:
+        """把字段文本切分为以空格连接的检索词"""
+        if not value:
+            return ''
+        return MaterialSearchService._join_terms(jieba.cut(value, cut_all=False))
+
+    @staticmethod
+    def _join_terms(words: Iterable[str]) -> str:
+        """
+        按搜索引擎模式展开词语并以空格连接
+
+        与 jieba.cut_for_search 的展开规则一致，但可直接复用已有的分词结果。
+        """
+        freq = jieba.dt.FREQ
+        terms = []
+        for word in words:
+            word = word.strip()
+            if not word:
+                continue
+            for size in (2, 3):
+                if len(word) > size:
+                    terms.extend(
+                        word[i:i + size] for i in range(len(word) - size + 1)
+                        if freq.get(word[i:i + size])
+                    )
+            terms.append(word)
+        return ' '.join(terms)
+
+    @staticmethod
+    def build_match_query(keyword: str) -> Optional[str]:
+        """
+        把用户输入的搜索词转成 FTS5 MATCH 表达式
+
+        每个词作为带引号的短语（不会被解释为 FTS5 语法），多个词之间为 AND；
+        英文、数字词按前缀匹配。
+
+        Returns:
+            MATCH 表达式，没有有效检索词时返回 None
+        """
+        phrases = []
+        for word in jieba.cut(keyword, cut_all=False):
+            word = word.strip()
+            if not word or not any(char.isalnum() for char in word):
+                continue
+            phrase = '"' + word.replace('"', '""') + '"'
+            phrases.append(phrase + '*' if _LATIN_TERM.match(word) else phrase)
+        return ' '.join(phrases) or None
+
+    @classmethod
+    def match_subquery(cls, keyword: str):
+        """
+        全文检索子查询，列为 material_id 和 rank（bm25 分数，越小越相关）
+
+        Returns:
+            子查询；全文索引不可用、搜索词太短或没有有效检索词时返回 None，调用方应回退到 LIKE 查询
+        """
+        if len(keyword.strip()) < FTS_MIN_QUERY_LENGTH or not cls.is_available():
+            return None
+
+        match_query = cls.build_match_query(keyword)
+        if match_query is None:
+            return None
+
+        weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+        return text(
+            f"SELECT rowid AS material_id, bm25({FTS_TABLE}, {weights}) AS rank "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match_query"
+        ).bindparams(match_query=match_query).columns(
+            material_id=db.Integer, rank=db.Float
+        ).subquery('fts')
+
+    @classmethod
+    def index_material(cls, material: Material) -> None:
+        """
+        同步资料的标题、描述、文件名和关键词（资料创建或更新后调用，保留已索引的正文）
+
+        索引失败只记录日志，不影响资料本身的保存。
+        """
+        if not cls.is_available():
+            return
+
+        try:
+            fields = {
+                'material_id': material.id,
+                'title': cls.segment(material.title),
+                'description': cls.segment(material.description),
+                'keywords': cls.segment(cls._keyword_text(material)),
+                'file_name': cls.segment(material.file_name)
+            }
+            updated = db.session.execute(text(
+                f"UPDATE {FTS_TABLE} SET title = :title, description = :description, "
+                f"keywords = :keywords, file_name = :file_name WHERE rowid = :material_id"
+            ), fields).rowcount
+            if not updated:
+                db.session.execute(text(
+                    f"INSERT INTO {FTS_TABLE} (rowid, title, description, keywords, file_name, content) "
+                    f"VALUES (:material_id, :title, :description, :keywords, :file_name, '')"
+                ), fields)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"更新资料全文索引失败: {material.id} - {str(e)}")
+
+    @classmethod
+    def index_content(cls, material_id: int, terms: List[str], commit: bool = True) -> None:
+        """
+        写入资料的正文检索词和分析得到的关键词（资料分析后调用）
+
+        Args:
+            material_id: 资料 ID
+            terms: 正文分词结果（已过滤停用词）
+            commit: 是否提交，批量分析时由调用方统一提交
+        """
+        if not cls.is_available():
+            return
+
+        material = Material.query.get(material_id)
+        if material is None:
+            return
+
+        try:
+            # 同步元数据（确保索引行存在，关键词随分析结果更新）
+            fields = {
+                'material_id': material_id,
+                'title': cls.segment(material.title),
+                'description': cls.segment(material.description),
+                'keywords': cls.segment(cls._keyword_text(material)),
+                'file_name': cls.segment(material.file_name),
+                'content': cls._join_terms(terms)
+            }
+            # 删除和写入放在保存点中：写入失败时只撤销这两步，保留原索引行，
+            # 也不影响调用方事务中尚未提交的其他修改
+            with db.session.begin_nested():
+                db.session.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :material_id"),
+                                   {'material_id': material_id})
+                db.session.execute(text(
+                    f"INSERT INTO {FTS_TABLE} (rowid, title, description, keywords, file_name, content) "
+                    f"VALUES (:material_id, :title, :description, :keywords, :file_name, :content)"
+                ), fields)
+            if commit:
+                db.session.commit()
+        except Exception as e:
+            logger.warning(f"更新资料正文索引失败: {material_id} - {str(e)}")
+            if commit:
+                db.session.rollback()
+
+    @classmethod
+    def remove_material(cls, material_id: int) -> None:
+        """从全文索引中删除资料（资料删除后调用）"""
+        if not cls.is_available():
+            return
+
+        try:
+            db.session.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :material_id"),
+                               {'material_id': material_id})
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"删除资料全文索引失败: {material_id} - {str(e)}")
+
+    @classmethod
+    def rebuild(cls) -> int:
+        """
+        用现有资料重建全文索引的元数据部分
+
+        正文只在资料分析时写入，重建后历史资料的正文需重新分析（或补算指纹）才会进入索引。
+
+        Returns:
+            写入的资料数
+        """
+        db.session.execute(text(f"DELETE FROM {FTS_TABLE}"))
+
+        count = 0
+        last_id = 0
+        while True:
+            materials = Material.query.filter(Material.id > last_id).order_by(Material.id).limit(
+                REBUILD_BATCH_SIZE
+            ).all()
+            if not materials:
+                break
+
+            # 整批查出分析关键词，避免逐个资料查询
+            extracted: Dict[int, List[str]] = {}
+            for material_id, keyword in DocumentKeyword.query.with_entities(
+                DocumentKeyword.material_id, DocumentKeyword.keyword
+            ).filter(DocumentKeyword.material_id.in_([material.id for material in materials])):
+                extracted.setdefault(material_id, []).append(keyword)
+
+            db.session.execute(text(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, description, keywords, file_name, content) "
+                f"VALUES (:material_id, :title, :description, :keywords, :file_name, '')"
+            ), [
+                {
+                    'material_id': material.id,
+                    'title': cls.segment(material.title),
+                    'description': cls.segment(material.description),
+                    'keywords': cls.segment(' '.join(
+                        ([material.keywords] if material.keywords else []) + extracted.get(material.id, [])
+                    )),
+                    'file_name': cls.segment(material.file_name)
+                }
+                for material in materials
+            ])
+            count += len(materials)
+            last_id = materials[-1].id
+
+        db.session.commit()
+        logger.info(f"资料全文索引重建完成，共 {count} 份")
+        return count
+
+    @staticmethod
+    def _keyword_text(material: Material) -> str:
+        """资料的关键词文本：手工填写的关键词加分析提取的关键词"""
+        keywords = [material.keywords] if material.keywords else []
+        keywords.extend(
+            keyword for keyword, in DocumentKeyword.query.with_entities(DocumentKeyword.keyword).filter_by(
+                material_id=material.id
+            )
+        )
+        return ' '.join(keywords)
+
+
+@event.listens_for(db.metadata, 'after_drop')
+def _drop_fts_table(target, connection, **kwargs):
+    """db.drop_all() 时一并删除全文索引表，重新建表后不会残留已删除资料的索引行"""
+    if connection.dialect.name != 'sqlite':
+        return
+    connection.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+    MaterialSearchService.invalidate(connection.engine)
@@ -5,15 +5,26 @@
 """
 from typing import List, Optional, Dict, Any
 from werkzeug.datastructures import FileStorage
-from sqlalchemy import or_, and_, func
+from sqlalchemy import or_, and_
 from app.extensions import db
-from app.models import Material, MaterialCategory, MaterialTag, Course
+from app.models import Material, MaterialTag, Course, KeywordStat, FileBlob
 from app.utils.file_utils import (
-    save_uploaded_file, delete_file, get_file_type,
-    get_file_size_mb, validate_file, get_file_icon
+    stream_uploaded_file, get_file_type, get_file_extension, allowed_file, resolve_file_path,
+    get_file_size_mb, validate_file_name, get_file_icon
 )
-from app.utils.file_security import validate_file_security
+from app.utils.file_security import (
+    SIGNATURE_HEADER_SIZE, check_dangerous_extension, check_filename_length,
+    match_file_signature, validate_file_metadata
+)
+from app.services.blob_store_service import BlobStoreService
+from app.services.classification_service import ClassificationService
+from app.services.material_search_service import MaterialSearchService
+from app.services.material_statistics_service import MaterialStatisticsService
+from app.services.rendition_service import RenditionService
+from app.services.storage_usage_service import StorageUsageService
+from app.utils.pagination import keyset_paginate
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
@@ -50,52 +61,157 @@ class MaterialService:
             ValueError: 文件验证失败或参数错误
         """
         try:
-            # 验证文件基本信息
-            is_valid, error_msg = validate_file(file)
+            # 验证文件名、扩展名和 MIME 类型（不读取文件内容）
+            is_valid, error_msg = validate_file_name(file)
             if not is_valid:
                 raise ValueError(error_msg)
             
-            # 验证文件安全性
-            is_safe, error_msg = validate_file_security(file)
+            is_safe, error_msg = validate_file_metadata(file)
             if not is_safe:
                 raise ValueError(error_msg)
             
-            # 保存文件
-            file_path, unique_filename, file_size = save_uploaded_file(file)
+            # 单次读取上传流：校验魔数和大小、计算哈希并写入临时文件
+            temp_path, sha256, file_size = stream_uploaded_file(file)
+            StorageUsageService.check_quota(uploader_id, file_size)
             
-            # 获取文件类型
-            file_type = get_file_type(file.filename)
+            # 存入内容存储，内容已存储过时复用已有文件
+            blob = BlobStoreService.put_file(temp_path, '.' + get_file_extension(file.filename), sha256)
             
-            # 创建资料记录
-            material = Material(
-                title=title,
-                description=description,
-                file_name=file.filename,
-                file_path=file_path,
-                file_size=file_size,
-                file_type=file_type,
-                course_id=course_id,
-                uploader_id=uploader_id,
-                category_id=category_id
-            )
+        except Exception as e:
+            logger.error(f"资料上传失败: {str(e)}")
+            if 'temp_path' in locals() and os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        
+        # 文件内容的引用交给资料记录，记录未能提交时由 _create_material 释放
+        return MaterialService._create_material(
+            file.filename, blob, title, uploader_id, description, course_id, category_id, tags
+        )
+    
+    @staticmethod
+    def upload_material_by_hash(
+        file_hash: str,
+        file_name: str,
+        title: str,
+        uploader_id: int,
+        description: Optional[str] = None,
+        course_id: Optional[int] = None,
+        category_id: Optional[int] = None,
+        tags: Optional[List[str]] = None
+    ) -> Material:
+        """
+        按内容哈希创建资料（秒传）
+        
+        文件内容已在服务器上（其他资料上传过，或分片上传已合并）时，不再传输文件。
+        
+        Args:
+            file_hash: 文件内容的 SHA-256
+            file_name: 原始文件名
+            其余参数同 upload_material
             
-            material.save()
+        Returns:
+            Material: 创建的资料对象
             
-            # 添加标签
-            if tags:
-                for tag_name in tags:
-                    if tag_name.strip():
-                        material.add_tag(tag_name.strip())
+        Raises:
+            ValueError: 文件名不合法、内容不存在或内容与扩展名不匹配
+        """
+        is_valid, error_msg = check_filename_length(file_name)
+        if not is_valid:
+            raise ValueError(error_msg)
+        
+        is_safe, error_msg = check_dangerous_extension(file_name)
+        if not is_safe:
+            raise ValueError(error_msg)
+        
+        if not allowed_file(file_name):
+            raise ValueError("不支持的文件类型")
+        
+        blob = BlobStoreService.acquire(file_hash.lower())
+        if blob is None:
+            raise ValueError("文件内容不存在，请上传文件")
+        
+        try:
+            StorageUsageService.check_quota(uploader_id, blob.file_size)
             
-            logger.info(f"资料上传成功: {material.id} - {title}")
-            return material
+            with open(resolve_file_path(blob.file_path), 'rb') as f:
+                header = f.read(SIGNATURE_HEADER_SIZE)
+            is_valid, error_msg = match_file_signature(header, get_file_extension(file_name))
+            if not is_valid:
+                raise ValueError(error_msg)
             
         except Exception as e:
-            logger.error(f"资料上传失败: {str(e)}")
-            # 如果创建记录失败，删除已上传的文件
-            if 'file_path' in locals():
-                delete_file(file_path)
+            logger.error(f"资料秒传失败: {str(e)}")
+            BlobStoreService.release(blob.file_path)
             raise
+        
+        return MaterialService._create_material(
+            file_name, blob, title, uploader_id, description, course_id, category_id, tags
+        )
+    
+    @staticmethod
+    def _create_material(
+        file_name: str,
+        blob: FileBlob,
+        title: str,
+        uploader_id: int,
+        description: Optional[str],
+        course_id: Optional[int],
+        category_id: Optional[int],
+        tags: Optional[List[str]]
+    ) -> Material:
+        """
+        创建引用已存储文件内容的资料记录，并提交索引、分析和预览副本任务
+        
+        调用方已持有文件内容的一次引用：记录未能提交时释放该引用；
+        记录提交后引用归记录所有，之后的步骤失败也不再释放（删除资料时释放）。
+        """
+        # 创建资料记录
+        material = Material(
+            title=title,
+            description=description,
+            file_name=file_name,
+            file_path=blob.file_path,
+            file_size=blob.file_size,
+            file_type=get_file_type(file_name),
+            course_id=course_id,
+            uploader_id=uploader_id,
+            category_id=category_id
+        )
+        
+        try:
+            StorageUsageService.on_material_created(material)
+            material.save()
+        except Exception as e:
+            logger.error(f"创建资料记录失败: {str(e)}")
+            # 撤销未提交的用量变化后释放文件内容的引用
+            db.session.rollback()
+            BlobStoreService.release(blob.file_path)
+            raise
+        
+        # 添加标签
+        if tags:
+            for tag_name in tags:
+                if tag_name.strip():
+                    material.add_tag(tag_name.strip())
+        
+        MaterialSearchService.index_material(material)
+        MaterialStatisticsService.on_material_created(material)
+        
+        # 后台分析资料（解析、关键词、分类、标签建议），完成后推送给上传者
+        # 分析失败不影响上传结果，用户仍可稍后手动分析
+        try:
+            ClassificationService.schedule_analysis(material)
+        except Exception as e:
+            logger.warning(f"提交资料后台分析失败: {material.id} - {str(e)}")
+        
+        # 后台生成预览副本（缩略图、文本摘录）
+        try:
+            RenditionService.schedule(material)
+        except Exception as e:
+            logger.warning(f"提交预览副本生成失败: {material.id} - {str(e)}")
+        
+        logger.info(f"资料上传成功: {material.id} - {title}")
+        return material
     
     @staticmethod
     def get_material_by_id(material_id: int, increment_view: bool = False) -> Optional[Material]:
@@ -113,6 +229,7 @@ class MaterialService:
         
         if material and increment_view:
             material.increment_view_count()
+            MaterialStatisticsService.on_material_viewed(material)
         
         return material
     
@@ -129,7 +246,9 @@ class MaterialService:
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
         sort_by: str = 'created_at',
-        order: str = 'desc'
+        order: str = 'desc',
+        cursor: Optional[str] = None,
+        with_total: bool = False
     ) -> Dict[str, Any]:
         """
         获取资料列表（分页、筛选、排序）
@@ -147,9 +266,15 @@ class MaterialService:
             end_date: 结束日期(YYYY-MM-DD)
             sort_by: 排序字段
             order: 排序方向
+            cursor: 分页游标，不为 None 时使用游标分页（空字符串表示第一页），忽略 page
+            with_total: 游标分页时是否统计总数（短时缓存）
             
         Returns:
-            Dict: 包含资料列表和分页信息
+            Dict: 包含资料列表和分页信息；游标分页时 page、pages 为 None，
+                另含 next_cursor 和 has_next
+            
+        Raises:
+            ValueError: 游标无效
         """
         # 构建查询
         query = Material.query
@@ -168,16 +293,6 @@ class MaterialService:
         if file_type:
             query = query.filter(Material.file_type == file_type)
         
-        if search:
-            search_pattern = f"%{search}%"
-            query = query.filter(
-                or_(
-                    Material.title.like(search_pattern),
-                    Material.description.like(search_pattern),
-                    Material.keywords.like(search_pattern)
-                )
-            )
-        
         # 按标签筛选
         if tag_ids and len(tag_ids) > 0:
             from app.models.material import material_tag_relation
@@ -205,23 +320,72 @@ class MaterialService:
             except ValueError:
                 logger.warning(f"无效的结束日期格式: {end_date}")
         
-        # 应用排序
-        sort_column = getattr(Material, sort_by, Material.created_at)
-        if order.lower() == 'desc':
-            query = query.order_by(sort_column.desc())
-        else:
-            query = query.order_by(sort_column.asc())
-        
-        # 分页
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-        
-        return {
-            'materials': pagination.items,
-            'total': pagination.total,
-            'page': page,
-            'per_page': per_page,
-            'pages': pagination.pages
-        }
+        filtered = query
+        
+        def run(use_fts: bool) -> Dict[str, Any]:
+            query = filtered
+            if search:
+                # 优先使用全文索引，不可用时回退到 LIKE 查询
+                fts = MaterialSearchService.match_subquery(search) if use_fts else None
+                if fts is not None:
+                    query = query.join(fts, fts.c.material_id == Material.id)
+                else:
+                    search_pattern = f"%{search}%"
+                    query = query.filter(
+                        or_(
+                            Material.title.like(search_pattern),
+                            Material.description.like(search_pattern),
+                            Material.keywords.like(search_pattern)
+                        )
+                    )
+            
+            # 游标分页：按 (排序列, id) 定位，不做 OFFSET 和 COUNT(*)
+            if cursor is not None:
+                sort_column = Material.__table__.columns.get(sort_by)
+                sort_column = getattr(Material, sort_column.key) if sort_column is not None else Material.created_at
+                count_key = None
+                if with_total:
+                    count_key = (
+                        f"materials:{course_id}:{category_id}:{uploader_id}:{file_type}:{search}:"
+                        f"{sorted(tag_ids) if tag_ids else None}:{start_date}:{end_date}"
+                    )
+            
+                result = keyset_paginate(
+                    query, sort_column, Material.id, cursor, per_page,
+                    descending=order.lower() == 'desc', count_key=count_key
+                )
+                return {
+                    'materials': result['items'],
+                    'total': result['total'],
+                    'page': None,
+                    'per_page': per_page,
+                    'pages': None,
+                    'next_cursor': result['next_cursor'],
+                    'has_next': result['has_next']
+                }
+            
+            # 应用排序
+            sort_column = getattr(Material, sort_by, Material.created_at)
+            if order.lower() == 'desc':
+                query = query.order_by(sort_column.desc())
+            else:
+                query = query.order_by(sort_column.asc())
+            
+            # 分页
+            pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+            
+            return {
+                'materials': pagination.items,
+                'total': pagination.total,
+                'page': page,
+                'per_page': per_page,
+                'pages': pagination.pages
+            }
+        
+        if not search:
+            return run(False)
+        # 全文索引查询出错（如索引表被删除）时改用 LIKE 查询
+        return MaterialSearchService.with_fallback(run)
     
     @staticmethod
     def update_material(
@@ -258,6 +422,8 @@ class MaterialService:
         if not material.is_owner(user_id):
             raise ValueError("无权限修改此资料")
         
+        old_category_id = material.category_id
+        
         # 更新字段
         if title is not None:
             material.title = title
@@ -279,7 +445,10 @@ class MaterialService:
                 if tag_name.strip():
                     material.add_tag(tag_name.strip())
         
+        StorageUsageService.on_material_updated(material, old_category_id)
         material.save()
+        MaterialSearchService.index_material(material)
+        MaterialStatisticsService.on_material_updated(material, old_category_id)
         
         logger.info(f"资料更新成功: {material_id}")
         return material
@@ -308,13 +477,25 @@ class MaterialService:
         if not material.is_owner(user_id):
             raise ValueError("无权限删除此资料")
         
-        # 删除文件
-        file_deleted = delete_file(material.file_path)
-        if not file_deleted:
-            logger.warning(f"文件删除失败: {material.file_path}")
+        file_path = material.file_path
+        
+        # 关键词随资料级联删除，先扣减关键词统计（随删除一起提交）
+        KeywordStat.apply_change(
+            [(kw.keyword, kw.weight) for kw in material.document_keywords], []
+        )
+        
+        MaterialStatisticsService.on_material_deleted(material)
+        StorageUsageService.on_material_deleted(material)
         
         # 删除数据库记录
         material.delete()
+        ClassificationService.remove_from_similarity_index(material_id)
+        MaterialSearchService.remove_material(material_id)
+        
+        # 释放文件引用（记录删除后再释放，中途失败最多留下无引用的文件，不会删掉仍在使用的文件）
+        released_sha256 = BlobStoreService.release(file_path)
+        if released_sha256:
+            RenditionService.remove_renditions(released_sha256)
         
         logger.info(f"资料删除成功: {material_id}")
         return True
@@ -333,10 +514,21 @@ class MaterialService:
         material = Material.query.get(material_id)
         
         if material:
-            material.increment_download_count()
+            MaterialService.record_download(material)
         
         return material
     
+    @staticmethod
+    def record_download(material: Material) -> None:
+        """
+        记录一次下载（增加下载次数并更新统计）
+        
+        Args:
+            material: 资料对象
+        """
+        material.increment_download_count()
+        MaterialStatisticsService.on_material_downloaded(material)
+    
     @staticmethod
     def search_materials(
         keyword: str,
@@ -360,107 +552,76 @@ class MaterialService:
         Returns:
             Dict: 包含搜索结果和分页信息
         """
-        # 构建搜索查询
-        search_pattern = f"%{keyword}%"
-        query = Material.query.filter(
-            or_(
-                Material.title.like(search_pattern),
-                Material.description.like(search_pattern),
-                Material.keywords.like(search_pattern),
-                Material.file_name.like(search_pattern)
-            )
-        )
-        
-        # 应用筛选条件
-        if category_id:
-            query = query.filter(Material.category_id == category_id)
-        
-        if file_type:
-            query = query.filter(Material.file_type == file_type)
-        
-        # 应用排序
-        if sort_by == 'relevance':
-            # 相关度排序：标题匹配 > 描述匹配 > 关键词匹配
-            # 使用 CASE WHEN 实现简单的相关度评分
-            query = query.order_by(
-                db.case(
-                    (Material.title.like(search_pattern), 3),
-                    (Material.description.like(search_pattern), 2),
-                    (Material.keywords.like(search_pattern), 1),
-                    else_=0
-                ).desc(),
-                Material.created_at.desc()
-            )
-        elif sort_by == 'created_at':
-            query = query.order_by(Material.created_at.desc())
-        elif sort_by == 'download_count':
-            query = query.order_by(Material.download_count.desc())
-        elif sort_by == 'view_count':
-            query = query.order_by(Material.view_count.desc())
-        else:
-            query = query.order_by(Material.created_at.desc())
-        
-        # 分页
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-        
-        return {
-            'materials': pagination.items,
-            'total': pagination.total,
-            'page': page,
-            'per_page': per_page,
-            'pages': pagination.pages
-        }
+        def run(use_fts: bool) -> Dict[str, Any]:
+            # 构建搜索查询：优先使用全文索引，不可用时回退到 LIKE 查询
+            fts = MaterialSearchService.match_subquery(keyword) if use_fts else None
+            search_pattern = f"%{keyword}%"
+            if fts is not None:
+                query = Material.query.join(fts, fts.c.material_id == Material.id)
+            else:
+                query = Material.query.filter(
+                    or_(
+                        Material.title.like(search_pattern),
+                        Material.description.like(search_pattern),
+                        Material.keywords.like(search_pattern),
+                        Material.file_name.like(search_pattern)
+                    )
+                )
+            
+            # 应用筛选条件
+            if category_id:
+                query = query.filter(Material.category_id == category_id)
+            
+            if file_type:
+                query = query.filter(Material.file_type == file_type)
+            
+            # 应用排序
+            if sort_by == 'relevance' and fts is not None:
+                # 全文索引按 bm25 排序（分数越小越相关），各字段权重见 BM25_WEIGHTS
+                query = query.order_by(fts.c.rank.asc(), Material.created_at.desc())
+            elif sort_by == 'relevance':
+                # 相关度排序：标题匹配 > 描述匹配 > 关键词匹配
+                # 使用 CASE WHEN 实现简单的相关度评分
+                query = query.order_by(
+                    db.case(
+                        (Material.title.like(search_pattern), 3),
+                        (Material.description.like(search_pattern), 2),
+                        (Material.keywords.like(search_pattern), 1),
+                        else_=0
+                    ).desc(),
+                    Material.created_at.desc()
+                )
+            elif sort_by == 'created_at':
+                query = query.order_by(Material.created_at.desc())
+            elif sort_by == 'download_count':
+                query = query.order_by(Material.download_count.desc())
+            elif sort_by == 'view_count':
+                query = query.order_by(Material.view_count.desc())
+            else:
+                query = query.order_by(Material.created_at.desc())
+            
+            # 分页
+            pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+            
+            return {
+                'materials': pagination.items,
+                'total': pagination.total,
+                'page': page,
+                'per_page': per_page,
+                'pages': pagination.pages
+            }
+        
+        # 全文索引查询出错（如索引表被删除）时改用 LIKE 查询
+        return MaterialSearchService.with_fallback(run)
     
     @staticmethod
     def get_material_statistics() -> Dict[str, Any]:
         """
         获取资料统计信息
         
+        从内存中的统计快照返回，快照由上传、删除、下载等事件增量维护。
+        
         Returns:
-            Dict: 统计信息
+            Dict: 统计信息（最近上传和热门资料已转换为字典）
         """
-        # 总资料数
-        total_materials = Material.query.count()
-        
-        # 总大小
-        total_size = db.session.query(func.sum(Material.file_size)).scalar() or 0
-        
-        # 总下载次数
-        total_downloads = db.session.query(func.sum(Material.download_count)).scalar() or 0
-        
-        # 总浏览次数
-        total_views = db.session.query(func.sum(Material.view_count)).scalar() or 0
-        
-        # 按文件类型统计
-        by_type = db.session.query(
-            Material.file_type,
-            func.count(Material.id).label('count')
-        ).group_by(Material.file_type).all()
-        
-        by_type_dict = {item[0]: item[1] for item in by_type}
-        
-        # 按分类统计
-        by_category = db.session.query(
-            MaterialCategory.name,
-            func.count(Material.id).label('count')
-        ).join(Material, Material.category_id == MaterialCategory.id, isouter=True)\
-         .group_by(MaterialCategory.name).all()
-        
-        by_category_dict = {item[0]: item[1] for item in by_category if item[0]}
-        
-        # 最近上传
-        recent_uploads = Material.query.order_by(Material.created_at.desc()).limit(10).all()
-        
-        # 热门资料（按下载次数）
-        popular_materials = Material.query.order_by(Material.download_count.desc()).limit(10).all()
-        
-        return {
-            'total_materials': total_materials,
-            'total_size': total_size,
-            'total_downloads': total_downloads,
-            'total_views': total_views,
-            'by_type': by_type_dict,
-            'by_category': by_category_dict,
-            'recent_uploads': recent_uploads,
-            'popular_materials': popular_materials
-        }
+        return MaterialStatisticsService.get_statistics()
@@ -0,0 +1,287 @@
+"""
+资料统计服务
+
+在内存中维护资料统计快照：首次请求时统计一次，之后由上传、删除、下载、浏览和
+分类变更事件增量更新，统计接口直接从内存返回。
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import heapq
+import logging
+import threading
+import time
+
+from sqlalchemy import func
+
+from app.extensions import db
+from app.models import Material, MaterialCategory
+from app.utils.counter_buffer import CounterBuffer
+
+logger = logging.getLogger(__name__)
+
+
+# 快照最长有效期（秒）：其他进程中的事件不会通知本进程，过期后重新统计
+STATISTICS_SNAPSHOT_TTL = 60
+
+# 最近上传、热门资料各保留的条数
+STATISTICS_TOP_N = 10
+
+# 榜单条目：(排序值, 资料 ID, 资料字典)，小顶堆，堆顶是榜单中排名最低的一条
+RankEntry = Tuple[Any, int, Dict[str, Any]]
+
+
+class MaterialStatisticsService:
+    """
+    资料统计服务
+
+    按文件类型、按分类的计数和各项总数随事件增量调整；最近上传和热门资料各用一个
+    大小为 STATISTICS_TOP_N 的小顶堆维护，新条目只需与堆顶比较。
+    榜单中的资料被删除后无法从内存补位，此时丢弃快照，下次请求重新统计。
+    """
+
+    _snapshot: Optional[Dict[str, Any]] = None
+    _built_at: float = 0.0
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_statistics(cls) -> Dict[str, Any]:
+        """
+        获取资料统计信息
+
+        Returns:
+            Dict: 总数、按类型和分类的计数、最近上传和热门资料（资料为字典）
+        """
+        with cls._lock:
+            if cls._snapshot is None or time.time() - cls._built_at >= STATISTICS_SNAPSHOT_TTL:
+                cls._snapshot = cls._build()
+                cls._built_at = time.time()
+            return cls._export(cls._snapshot)
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """丢弃快照，下次请求时重新统计"""
+        with cls._lock:
+            cls._snapshot = None
+
+    # ==================== 事件 ====================
+
+    @classmethod
+    def on_material_created(cls, material: Material) -> None:
+        """资料上传后调用"""
+        data = material.to_dict()
+        with cls._lock:
+            snapshot = cls._snapshot
+            if snapshot is None:
+                return
+            if material.category_id is not None and material.category_id not in snapshot['category_names']:
+                cls._snapshot = None
+                return
+
+            snapshot['total_materials'] += 1
+            snapshot['total_size'] += material.file_size
+            snapshot['by_type'][material.file_type] = snapshot['by_type'].get(material.file_type, 0) + 1
+            if material.category_id is not None:
+                snapshot['by_category'][material.category_id] += 1
+
+            cls._offer(snapshot['recent'], (material.created_at, material.id, data))
+            cls._offer(snapshot['popular'], (data['download_count'], material.id, data))
+
+    @classmethod
+    def on_material_deleted(cls, material: Material) -> None:
+        """资料删除前调用（需要读取资料的类型、分类和计数）"""
+        downloads = material.get_count('download_count')
+        views = material.get_count('view_count')
+        with cls._lock:
+            snapshot = cls._snapshot
+            if snapshot is None:
+                return
+            if any(entry[1] == material.id for entry in snapshot['recent'] + snapshot['popular']):
+                cls._snapshot = None
+                return
+
+            snapshot['total_materials'] -= 1
+            snapshot['total_size'] -= material.file_size
+            snapshot['total_downloads'] -= downloads
+            snapshot['total_views'] -= views
+            cls._decrement(snapshot['by_type'], material.file_type)
+            if material.category_id in snapshot['by_category']:
+                snapshot['by_category'][material.category_id] -= 1
+
+    @classmethod
+    def on_material_downloaded(cls, material: Material) -> None:
+        """资料下载计数后调用"""
+        downloads = material.get_count('download_count')
+        with cls._lock:
+            snapshot = cls._snapshot
+            if snapshot is None:
+                return
+            snapshot['total_downloads'] += 1
+            cls._set_field(snapshot['recent'], material.id, 'download_count', downloads)
+
+            popular = snapshot['popular']
+            for index, (_, material_id, data) in enumerate(popular):
+                if material_id == material.id:
+                    data['download_count'] = downloads
+                    popular[index] = (downloads, material_id, data)
+                    heapq.heapify(popular)
+                    return
+
+        # 不在榜单中：下载数超过堆顶时才需要序列化资料并入榜
+        if cls._ranks(snapshot['popular'], (downloads, material.id)):
+            data = material.to_dict()
+            with cls._lock:
+                if cls._snapshot is snapshot and all(entry[1] != material.id for entry in snapshot['popular']):
+                    cls._offer(snapshot['popular'], (data['download_count'], material.id, data))
+
+    @classmethod
+    def on_material_viewed(cls, material: Material) -> None:
+        """资料浏览计数后调用"""
+        views = material.get_count('view_count')
+        with cls._lock:
+            snapshot = cls._snapshot
+            if snapshot is None:
+                return
+            snapshot['total_views'] += 1
+            cls._set_field(snapshot['recent'], material.id, 'view_count', views)
+            cls._set_field(snapshot['popular'], material.id, 'view_count', views)
+
+    @classmethod
+    def on_material_updated(cls, material: Material, old_category_id: Optional[int]) -> None:
+        """
+        资料信息或分类变更后调用
+
+        Args:
+            material: 已提交修改的资料
+            old_category_id: 修改前的分类 ID
+        """
+        data = material.to_dict()
+        with cls._lock:
+            snapshot = cls._snapshot
+            if snapshot is None:
+                return
+            if material.category_id != old_category_id:
+                if material.category_id is not None and material.category_id not in snapshot['category_names']:
+                    cls._snapshot = None
+                    return
+                if old_category_id in snapshot['by_category']:
+                    snapshot['by_category'][old_category_id] -= 1
+                if material.category_id is not None:
+                    snapshot['by_category'][material.category_id] += 1
+
+            for ranking in (snapshot['recent'], snapshot['popular']):
+                for index, (key, material_id, _) in enumerate(ranking):
+                    if material_id == material.id:
+                        ranking[index] = (key, material_id, dict(data))
+
+    # ==================== 内部方法 ====================
+
+    @staticmethod
+    def _build() -> Dict[str, Any]:
+        """从数据库统计，生成快照"""
+        # 先写回本进程缓冲的计数，热门排行和总数才能反映刚发生的下载、浏览；
+        # 写回在独立会话中提交，本会话已加载的资料需重新读取计数
+        try:
+            if CounterBuffer.flush_now():
+                db.session.expire_all()
+        except Exception as e:
+            logger.warning(f"统计前写回计数失败: {str(e)}")
+        
+        total_materials = Material.query.count()
+        total_size = db.session.query(func.sum(Material.file_size)).scalar() or 0
+        total_downloads = db.session.query(func.sum(Material.download_count)).scalar() or 0
+        total_views = db.session.query(func.sum(Material.view_count)).scalar() or 0
+
+        by_type = dict(db.session.query(
+            Material.file_type,
+            func.count(Material.id)
+        ).group_by(Material.file_type).all())
+
+        by_category = {}
+        category_names = {}
+        for category_id, name, count in db.session.query(
+            MaterialCategory.id,
+            MaterialCategory.name,
+            func.count(Material.id)
+        ).join(Material, Material.category_id == MaterialCategory.id, isouter=True)\
+         .group_by(MaterialCategory.id, MaterialCategory.name).all():
+            by_category[category_id] = count
+            category_names[category_id] = name
+
+        recent = [
+            (material.created_at, material.id, material.to_dict())
+            for material in Material.query.order_by(
+                Material.created_at.desc(), Material.id.desc()
+            ).limit(STATISTICS_TOP_N)
+        ]
+        popular = []
+        for material in Material.query.order_by(
+            Material.download_count.desc(), Material.id.desc()
+        ).limit(STATISTICS_TOP_N):
+            data = material.to_dict()
+            popular.append((data['download_count'], material.id, data))
+        heapq.heapify(recent)
+        heapq.heapify(popular)
+
+        logger.info(f"资料统计快照已重建，共 {total_materials} 份资料")
+        return {
+            'total_materials': total_materials,
+            'total_size': total_size,
+            'total_downloads': total_downloads,
+            'total_views': total_views,
+            'by_type': by_type,
+            'by_category': by_category,
+            'category_names': category_names,
+            'recent': recent,
+            'popular': popular
+        }
+
+    @staticmethod
+    def _export(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        """把快照转换为接口返回格式（复制一份，调用方修改不影响快照）"""
+        by_category: Dict[str, int] = {}
+        for category_id, count in snapshot['by_category'].items():
+            name = snapshot['category_names'][category_id]
+            if name:
+                by_category[name] = by_category.get(name, 0) + count
+
+        return {
+            'total_materials': snapshot['total_materials'],
+            'total_size': snapshot['total_size'],
+            'total_downloads': snapshot['total_downloads'],
+            'total_views': snapshot['total_views'],
+            'by_type': dict(snapshot['by_type']),
+            'by_category': by_category,
+            'recent_uploads': [
+                dict(entry[2]) for entry in sorted(snapshot['recent'], key=lambda e: e[:2], reverse=True)
+            ],
+            'popular_materials': [
+                dict(entry[2]) for entry in sorted(snapshot['popular'], key=lambda e: e[:2], reverse=True)
+            ]
+        }
+
+    @staticmethod
+    def _ranks(ranking: List[RankEntry], key: Tuple[Any, int]) -> bool:
+        """排序值为 key 的条目能否进入榜单"""
+        return len(ranking) < STATISTICS_TOP_N or key > ranking[0][:2]
+
+    @classmethod
+    def _offer(cls, ranking: List[RankEntry], entry: RankEntry) -> None:
+        """尝试把条目加入榜单，榜单已满时替换排名最低的一条"""
+        if len(ranking) < STATISTICS_TOP_N:
+            heapq.heappush(ranking, entry)
+        elif cls._ranks(ranking, entry[:2]):
+            heapq.heapreplace(ranking, entry)
+
+    @staticmethod
+    def _set_field(ranking: List[RankEntry], material_id: int, field: str, value: Any) -> None:
+        """更新榜单中资料字典的字段"""
+        for _, entry_id, data in ranking:
+            if entry_id == material_id:
+                data[field] = value
+
+    @staticmethod
+    def _decrement(counts: Dict[str, int], key: str) -> None:
+        """计数减一，减到 0 时移除（与 GROUP BY 结果一致）"""
+        if key in counts:
+            counts[key] -= 1
+            if counts[key] <= 0:
+                del counts[key]
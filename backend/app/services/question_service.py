@@ -7,10 +7,12 @@ from app.models.interaction import Question, QuestionAnswer, Barrage, QuestionSt
 from app.models.user import User
 from app.models.course import Course
 from app.extensions import db
+from app.services.barrage_service import BarrageService
 from app.schemas.interaction_schemas import (
     QuestionCreateModel, QuestionUpdateModel,
     QuestionAnswerCreateModel, QuestionAnswerUpdateModel
 )
+from app.utils.pagination import keyset_paginate
 import logging
 
 logger = logging.getLogger(__name__)
@@ -98,6 +100,50 @@ class QuestionService:
         Returns:
             (问题列表, 总数)
         """
+        query = QuestionService._course_questions_query(course_id, status)
+        
+        # 按创建时间倒序排列
+        query = query.order_by(Question.created_at.desc())
+        
+        # 分页
+        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        
+        return pagination.items, pagination.total
+    
+    @staticmethod
+    def get_questions_by_course_cursor(
+        course_id: int,
+        cursor: Optional[str] = None,
+        per_page: int = 20,
+        status: Optional[str] = None,
+        with_total: bool = False
+    ) -> Dict[str, Any]:
+        """
+        获取课程的问题列表（游标分页）
+        
+        按 (created_at, id) 倒序定位下一页，翻页深度不影响耗时。
+        
+        Args:
+            course_id: 课程ID
+            cursor: 上一页返回的游标，None 或空字符串表示第一页
+            per_page: 每页数量
+            status: 问题状态过滤（可选）
+            with_total: 是否统计总数（短时缓存）
+            
+        Returns:
+            包含 items、next_cursor、has_next、total 的字典
+            
+        Raises:
+            ValueError: 游标无效
+        """
+        query = QuestionService._course_questions_query(course_id, status)
+        count_key = f"questions:{course_id}:{status}" if with_total else None
+        
+        return keyset_paginate(query, Question.created_at, Question.id, cursor, per_page, count_key=count_key)
+    
+    @staticmethod
+    def _course_questions_query(course_id: int, status: Optional[str] = None):
+        """课程问题查询（含状态过滤，未排序）"""
         query = Question.query.filter_by(course_id=course_id)
         
         # 状态过滤
@@ -108,13 +154,7 @@ class QuestionService:
             except ValueError:
                 logger.warning(f"Invalid question status: {status}")
         
-        # 按创建时间倒序排列
-        query = query.order_by(Question.created_at.desc())
-        
-        # 分页
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-        
-        return pagination.items, pagination.total
+        return query
     
     @staticmethod
     def get_questions_by_user(
@@ -256,6 +296,7 @@ class QuestionService:
         
         # 2. ⭐ 同时创建答案弹幕（核心功能）
         barrage = Barrage(
+            id=BarrageService.allocate_id(),
             content=answer_data.content,
             course_id=question.course_id,
             user_id=user_id,
@@ -433,16 +474,10 @@ class QuestionService:
         if not question:
             return None
         
-        question.like_count += 1
-        
-        try:
-            db.session.commit()
-            logger.info(f"Question liked: {question_id}, new count: {question.like_count}")
-            return question
-        except Exception as e:
-            db.session.rollback()
-            logger.error(f"Error liking question: {str(e)}")
-            raise
+        # 点赞数经计数缓冲批量写回，不在请求中单独提交
+        question.increment_like()
+        logger.info(f"Question liked: {question_id}, new count: {question.get_count('like_count')}")
+        return question
     
     @staticmethod
     def unlike_question(question_id: int) -> Optional[Question]:
@@ -459,17 +494,9 @@ class QuestionService:
         if not question:
             return None
         
-        if question.like_count > 0:
-            question.like_count -= 1
-        
-        try:
-            db.session.commit()
-            logger.info(f"Question unliked: {question_id}, new count: {question.like_count}")
-            return question
-        except Exception as e:
-            db.session.rollback()
-            logger.error(f"Error unliking question: {str(e)}")
-            raise
+        question.decrement_like()
+        logger.info(f"Question unliked: {question_id}, new count: {question.get_count('like_count')}")
+        return question
     
     @staticmethod
     def like_answer(answer_id: int) -> Optional[QuestionAnswer]:
@@ -486,16 +513,10 @@ class QuestionService:
         if not answer:
             return None
         
-        answer.like_count += 1
-        
-        try:
-            db.session.commit()
-            logger.info(f"Answer liked: {answer_id}, new count: {answer.like_count}")
-            return answer
-        except Exception as e:
-            db.session.rollback()
-            logger.error(f"Error liking answer: {str(e)}")
-            raise
+        # 点赞数经计数缓冲批量写回，不在请求中单独提交
+        answer.increment_like()
+        logger.info(f"Answer liked: {answer_id}, new count: {answer.get_count('like_count')}")
+        return answer
     
     @staticmethod
     def unlike_answer(answer_id: int) -> Optional[QuestionAnswer]:
@@ -512,17 +533,9 @@ class QuestionService:
         if not answer:
             return None
         
-        if answer.like_count > 0:
-            answer.like_count -= 1
-        
-        try:
-            db.session.commit()
-            logger.info(f"Answer unliked: {answer_id}, new count: {answer.like_count}")
-            return answer
-        except Exception as e:
-            db.session.rollback()
-            logger.error(f"Error unliking answer: {str(e)}")
-            raise
+        answer.decrement_like()
+        logger.info(f"Answer unliked: {answer_id}, new count: {answer.get_count('like_count')}")
+        return answer
     
     # ==================== 统计和查询 ====================
     
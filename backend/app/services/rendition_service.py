@@ -0,0 +1,240 @@
+"""
+资料预览副本服务
+
+资料上传后在后台生成小体积的预览副本（图片缩略图、文档开头的文本摘录），
+预览请求有副本时直接返回副本，不再传输原文件。
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Set
+import logging
+import os
+import tempfile
+import threading
+
+from flask import Flask, current_app
+
+from app.extensions import db
+from app.intelligence import DocumentParser
+from app.models import FileDigest, Material
+from app.services.blob_store_service import BlobStoreService
+from app.services.classification_service import ClassificationService
+from app.services.storage_usage_service import StorageUsageService
+from app.utils.file_utils import resolve_file_path
+
+logger = logging.getLogger(__name__)
+
+
+# 预览副本目录（相对于后端项目根目录），按原文件内容的 SHA-256 存放，内容相同的资料共用副本
+RENDITION_DIR = os.path.join('uploads', 'renditions')
+
+# 副本格式版本，生成参数变化时递增，旧副本不再被使用
+RENDITION_VERSION = 1
+
+# 缩略图最长边（像素）和 JPEG 质量
+THUMBNAIL_MAX_SIZE = 800
+THUMBNAIL_QUALITY = 80
+
+# 文档摘录的页数和字符数上限
+EXCERPT_MAX_PAGES = 1
+EXCERPT_MAX_CHARS = 3000
+
+# 生成副本的后台线程数
+RENDITION_WORKERS = 1
+
+# 生成缩略图的图片格式（GIF 可能是动图，缩成 JPEG 会丢失动画，不生成缩略图）
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.webp'}
+
+# 副本类型及文件扩展名
+RENDITION_EXTENSIONS = {
+    'thumbnail': '.jpg',
+    'excerpt': '.txt',
+}
+
+
+class RenditionService:
+    """
+    资料预览副本服务
+
+    副本路径由原文件内容哈希、副本类型和版本决定，文件存在即表示已生成，不需要额外记录。
+    视频没有可用的抽帧工具，不生成副本，预览时按 Range 分段返回原文件。
+    """
+
+    _executor: Optional[ThreadPoolExecutor] = None
+    _pending: Set[str] = set()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def rendition_kind(file_path: str) -> Optional[str]:
+        """文件对应的副本类型，不支持生成副本时返回 None"""
+        ext = os.path.splitext(file_path)[1].lower()
+        if ext in IMAGE_EXTENSIONS:
+            return 'thumbnail'
+        if ext in DocumentParser.SUPPORTED_EXTENSIONS:
+            return 'excerpt'
+        return None
+
+    @staticmethod
+    def rendition_path(sha256: str, kind: str) -> str:
+        """副本的绝对路径"""
+        return resolve_file_path(os.path.join(
+            RENDITION_DIR, sha256[:2], f'{sha256}-{kind}-v{RENDITION_VERSION}{RENDITION_EXTENSIONS[kind]}'
+        ))
+
+    @classmethod
+    def remove_renditions(cls, sha256: str) -> None:
+        """删除文件内容对应的全部副本（内容文件删除后调用）"""
+        # 与内容文件共用一把锁，校正存储用量时不会读到文件已删除、计数尚未更新的中间状态
+        with BlobStoreService._locked():
+            removed = False
+            for kind in RENDITION_EXTENSIONS:
+                path = cls.rendition_path(sha256, kind)
+                if os.path.exists(path):
+                    size = os.path.getsize(path)
+                    os.remove(path)
+                    StorageUsageService.on_file_removed(path, size)
+                    removed = True
+            if removed:
+                db.session.commit()
+
+    @classmethod
+    def get_rendition(cls, material: Material) -> Optional[str]:
+        """
+        获取资料的预览副本
+
+        副本尚未生成时提交后台生成（兼顾本功能上线前上传的资料），本次返回 None。
+
+        Returns:
+            副本绝对路径，没有可用副本时返回 None
+        """
+        kind = cls.rendition_kind(material.file_path)
+        if kind is None:
+            return None
+
+        file_path = resolve_file_path(material.file_path)
+        if not os.path.exists(file_path):
+            return None
+
+        path = cls.rendition_path(FileDigest.get_sha256(file_path), kind)
+        if os.path.exists(path):
+            return path
+
+        cls.schedule(material)
+        return None
+
+    @classmethod
+    def schedule(cls, material: Material) -> bool:
+        """
+        提交后台生成副本任务（资料上传后调用）
+
+        Returns:
+            是否已提交（不支持的文件类型不提交）
+        """
+        if cls.rendition_kind(material.file_path) is None:
+            return False
+
+        file_path = resolve_file_path(material.file_path)
+        with cls._lock:
+            if file_path in cls._pending:
+                return True
+            cls._pending.add(file_path)
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=RENDITION_WORKERS, thread_name_prefix='material-rendition'
+                )
+
+        app = current_app._get_current_object()
+        cls._executor.submit(cls._run, app, file_path)
+        return True
+
+    @classmethod
+    def _run(cls, app: Flask, file_path: str) -> None:
+        """后台生成任务"""
+        with app.app_context():
+            try:
+                cls.generate(file_path)
+            except Exception as e:
+                logger.warning(f"生成预览副本失败: {file_path} - {str(e)}")
+                db.session.rollback()
+            finally:
+                db.session.remove()
+                with cls._lock:
+                    cls._pending.discard(file_path)
+
+    @classmethod
+    def generate(cls, file_path: str) -> Optional[str]:
+        """
+        为文件生成预览副本（已存在时直接返回）
+
+        Args:
+            file_path: 原文件绝对路径
+
+        Returns:
+            副本绝对路径，不支持或无法生成时返回 None
+        """
+        kind = cls.rendition_kind(file_path)
+        if kind is None:
+            return None
+
+        path = cls.rendition_path(FileDigest.get_sha256(file_path), kind)
+        if os.path.exists(path):
+            return path
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 先写临时文件再改名，预览请求不会读到写了一半的副本
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        os.close(fd)
+        try:
+            if kind == 'thumbnail':
+                created = cls._make_thumbnail(file_path, temp_path)
+            else:
+                created = cls._make_excerpt(file_path, temp_path)
+            if not created:
+                return None
+            with BlobStoreService._locked():
+                # 其他进程可能已生成同一副本，不重复计入用量
+                if os.path.exists(path):
+                    return path
+                os.replace(temp_path, path)
+                StorageUsageService.on_file_added(path, os.path.getsize(path))
+                db.session.commit()
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        logger.info(f"预览副本已生成: {path}")
+        return path
+
+    @staticmethod
+    def _make_thumbnail(file_path: str, output_path: str) -> bool:
+        """生成缩略图（按 EXIF 方向旋转，透明背景填充为白色）"""
+        from PIL import Image, ImageOps
+
+        with Image.open(file_path) as image:
+            # JPEG 直接按缩小比例解码，大图不必完整解码
+            image.draft('RGB', (THUMBNAIL_MAX_SIZE, THUMBNAIL_MAX_SIZE))
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((THUMBNAIL_MAX_SIZE, THUMBNAIL_MAX_SIZE))
+
+            if image.mode in ('RGBA', 'LA', 'P'):
+                image = image.convert('RGBA')
+                background = Image.new('RGB', image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel('A'))
+                image = background
+            elif image.mode != 'RGB':
+                image = image.convert('RGB')
+
+            image.save(output_path, 'JPEG', quality=THUMBNAIL_QUALITY, optimize=True)
+        return True
+
+    @staticmethod
+    def _make_excerpt(file_path: str, output_path: str) -> bool:
+        """在沙箱进程中解析文档开头，生成文本摘录"""
+        result = ClassificationService._get_parser_pool().parse(
+            file_path, max_pages=EXCERPT_MAX_PAGES, max_chars=EXCERPT_MAX_CHARS
+        )
+        if not result.success or not result.content.strip():
+            return False
+
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(result.content.strip())
+        return True
@@ -0,0 +1,189 @@
+"""
+存储用量服务
+
+按目录、分类、用户记录文件占用的空间：文件保存和删除时增量更新 StorageUsage，
+查询存储信息和检查用户配额只读取计数，不遍历目录；定期清理时按磁盘和资料表校正累计误差。
+"""
+from typing import Any, Dict, Optional, Tuple
+import logging
+import os
+
+from flask import current_app
+from sqlalchemy import cast, func, literal
+
+from app.extensions import db
+from app.models import Material, StorageUsage
+from app.utils.file_utils import resolve_file_path
+from app.utils.storage_init import scan_storage_usage
+
+logger = logging.getLogger(__name__)
+
+
+# 存储根目录（相对于后端项目根目录），目录用量按其下的一级子目录统计
+STORAGE_ROOT = 'uploads'
+
+
+class StorageUsageService:
+    """
+    存储用量服务
+
+    内容文件、旧资料文件和预览副本在写入、删除时更新目录用量；
+    临时目录变化频繁且文件很快被清理，只在定期校正时更新。
+    增量更新不提交，与文件记录的修改一起由调用方提交。
+    """
+
+    @staticmethod
+    def directory_of(file_path: str) -> Optional[str]:
+        """文件所在的存储目录名（STORAGE_ROOT 下的一级子目录），不在存储目录中时返回 None"""
+        relative = os.path.relpath(resolve_file_path(file_path), resolve_file_path(STORAGE_ROOT))
+        parts = relative.split(os.sep)
+        if len(parts) < 2 or parts[0] == os.pardir:
+            return None
+        return parts[0]
+
+    @classmethod
+    def on_file_added(cls, file_path: str, size: int) -> None:
+        """文件写入存储目录后调用"""
+        directory = cls.directory_of(file_path)
+        if directory is not None:
+            StorageUsage.apply_change(StorageUsage.SCOPE_DIRECTORY, directory, size, 1)
+
+    @classmethod
+    def on_file_removed(cls, file_path: str, size: int) -> None:
+        """文件从存储目录删除后调用"""
+        directory = cls.directory_of(file_path)
+        if directory is not None:
+            StorageUsage.apply_change(StorageUsage.SCOPE_DIRECTORY, directory, -size, -1)
+
+    @staticmethod
+    def on_material_created(material: Material) -> None:
+        """资料记录保存前调用"""
+        StorageUsage.apply_change(StorageUsage.SCOPE_USER, material.uploader_id, material.file_size, 1)
+        if material.category_id is not None:
+            StorageUsage.apply_change(StorageUsage.SCOPE_CATEGORY, material.category_id, material.file_size, 1)
+
+    @staticmethod
+    def on_material_deleted(material: Material) -> None:
+        """资料记录删除前调用"""
+        StorageUsage.apply_change(StorageUsage.SCOPE_USER, material.uploader_id, -material.file_size, -1)
+        if material.category_id is not None:
+            StorageUsage.apply_change(StorageUsage.SCOPE_CATEGORY, material.category_id, -material.file_size, -1)
+
+    @staticmethod
+    def on_material_updated(material: Material, old_category_id: Optional[int]) -> None:
+        """资料修改保存前调用（分类变化时把用量移到新分类）"""
+        if material.category_id == old_category_id:
+            return
+        if old_category_id is not None:
+            StorageUsage.apply_change(StorageUsage.SCOPE_CATEGORY, old_category_id, -material.file_size, -1)
+        if material.category_id is not None:
+            StorageUsage.apply_change(StorageUsage.SCOPE_CATEGORY, material.category_id, material.file_size, 1)
+
+    @staticmethod
+    def get_storage_info() -> Dict[str, Any]:
+        """
+        获取存储信息
+
+        Returns:
+            Dict: 总字节数、总文件数和各目录的用量
+        """
+        directories = StorageUsage.get_scope_usage(StorageUsage.SCOPE_DIRECTORY)
+        total_size = sum(size for size, _ in directories.values())
+        return {
+            'total_size': total_size,
+            'total_size_mb': round(total_size / (1024 * 1024), 2),
+            'file_count': sum(count for _, count in directories.values()),
+            'directories': {
+                name: {'total_size': size, 'file_count': count}
+                for name, (size, count) in sorted(directories.items())
+            }
+        }
+
+    @staticmethod
+    def get_user_usage(user_id: int) -> Tuple[int, int]:
+        """用户上传资料占用的空间，返回 (字节数, 文件数)"""
+        return StorageUsage.get_usage(StorageUsage.SCOPE_USER, user_id)
+
+    @classmethod
+    def check_quota(cls, user_id: int, size: int) -> None:
+        """
+        检查用户再上传 size 字节后是否超出配额（USER_STORAGE_QUOTA_MB 为 0 时不限制）
+
+        Raises:
+            ValueError: 超出配额
+        """
+        quota_mb = current_app.config.get('USER_STORAGE_QUOTA_MB', 0)
+        if not quota_mb:
+            return
+
+        used, _ = cls.get_user_usage(user_id)
+        if used + size > quota_mb * 1024 * 1024:
+            raise ValueError(
+                f"存储空间不足：已使用 {round(used / (1024 * 1024), 2)} MB，配额 {quota_mb} MB"
+            )
+
+    @classmethod
+    def reconcile(cls) -> int:
+        """
+        遍历存储目录、汇总资料表，校正累计的用量误差
+
+        按差值原子调整计数，只要差值由同一时刻的计数和实际用量算出，
+        之后其他请求的增量更新就不会被覆盖或重复计入：
+            目录用量  持有内容存储的锁读取计数并遍历目录，期间文件的存入、删除和对应的计数更新都要等待
+            资料用量  计数和资料表汇总在同一条查询中读取
+
+        Returns:
+            int: 校正的计数行数
+        """
+        # 内容存储服务依赖本服务更新目录用量，在这里导入避免循环导入
+        from app.services.blob_store_service import BlobStoreService
+
+        with BlobStoreService._locked():
+            recorded = StorageUsage.get_scope_usage(StorageUsage.SCOPE_DIRECTORY)
+            actual = scan_storage_usage(resolve_file_path(STORAGE_ROOT))
+            corrected = cls._apply_corrections(StorageUsage.SCOPE_DIRECTORY, recorded, actual)
+            db.session.commit()
+
+        for scope, column in (
+            (StorageUsage.SCOPE_USER, Material.uploader_id),
+            (StorageUsage.SCOPE_CATEGORY, Material.category_id),
+        ):
+            recorded, actual = cls._material_usage(scope, column)
+            corrected += cls._apply_corrections(scope, recorded, actual)
+        db.session.commit()
+
+        if corrected:
+            logger.info(f"存储用量已校正 {corrected} 项")
+        return corrected
+
+    @staticmethod
+    def _material_usage(scope: str, column) -> Tuple[Dict[str, Tuple[int, int]], Dict[str, Tuple[int, int]]]:
+        """在同一条查询中读取一个范围的计数和按资料表汇总的实际用量，返回 (计数, 实际用量)"""
+        recorded_rows = db.session.query(
+            literal(True).label('recorded'), StorageUsage.key.label('key'),
+            StorageUsage.total_size.label('size'), StorageUsage.file_count.label('count')
+        ).filter(StorageUsage.scope == scope)
+        actual_rows = db.session.query(
+            literal(False), cast(column, db.String), func.sum(Material.file_size), func.count(Material.id)
+        ).filter(column.isnot(None)).group_by(column)
+
+        usage: Dict[bool, Dict[str, Tuple[int, int]]] = {True: {}, False: {}}
+        for is_recorded, key, size, count in recorded_rows.union_all(actual_rows):
+            usage[bool(is_recorded)][key] = (int(size or 0), count)
+        return usage[True], usage[False]
+
+    @staticmethod
+    def _apply_corrections(
+        scope: str,
+        recorded: Dict[str, Tuple[int, int]],
+        actual: Dict[str, Tuple[int, int]]
+    ) -> int:
+        """按实际用量与计数之差调整计数（不提交），返回调整的行数"""
+        corrected = 0
+        for key in set(recorded) | set(actual):
+            recorded_size, recorded_count = recorded.get(key, (0, 0))
+            actual_size, actual_count = actual.get(key, (0, 0))
+            if (recorded_size, recorded_count) != (actual_size, actual_count):
+                StorageUsage.apply_change(scope, key, actual_size - recorded_size, actual_count - recorded_count)
+                corrected += 1
+        return corrected
@@ -7,6 +7,7 @@ from app.models.attendance import Attendance, AttendanceRecord, AttendanceStatus
 from app.models.course import Course
 from app.models.user import User
 from app.extensions import db
+from app.utils.pagination import keyset_paginate
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,7 +21,9 @@ class StudentAttendanceService:
         student_id: int,
         page: int = 1,
         per_page: int = 20,
-        status: Optional[str] = None
+        status: Optional[str] = None,
+        cursor: Optional[str] = None,
+        with_total: bool = False
     ) -> Dict[str, Any]:
         """
         获取学生的考勤通知列表
@@ -30,21 +33,26 @@ class StudentAttendanceService:
             page: 页码
             per_page: 每页数量
             status: 状态筛选
+            cursor: 分页游标，不为 None 时按 (created_at, id) 游标分页（空字符串表示第一页），忽略 page
+            with_total: 游标分页时是否统计总数（短时缓存）
             
         Returns:
-            包含考勤列表和分页信息的字典
+            包含考勤列表和分页信息的字典；游标分页时 page、pages 为 None，另含 next_cursor 和 has_next
         """
         try:
             # 获取学生信息
             student = User.query.get(student_id)
             if not student or not student.class_id:
-                return {
+                result = {
                     'attendances': [],
                     'total': 0,
                     'page': page,
                     'per_page': per_page,
                     'pages': 0
                 }
+                if cursor is not None:
+                    result.update(page=None, pages=None, next_cursor=None, has_next=False)
+                return result
             
             # 构建查询 - 查询学生所在班级的考勤
             query = Attendance.query.filter_by(class_id=student.class_id)
@@ -59,21 +67,44 @@ class StudentAttendanceService:
                     # 如果状态值无效，忽略筛选
                     logger.warning(f"Invalid status filter: {status}")
             
-            # 按创建时间倒序排列
-            query = query.order_by(Attendance.created_at.desc())
-            
-            # 分页
-            pagination = query.paginate(
-                page=page,
-                per_page=per_page,
-                error_out=False
-            )
+            if cursor is not None:
+                # 游标分页：按 (created_at, id) 倒序定位
+                count_key = f"student_attendances:{student.class_id}:{status}" if with_total else None
+                keyset = keyset_paginate(
+                    query, Attendance.created_at, Attendance.id, cursor, per_page, count_key=count_key
+                )
+                items = keyset['items']
+                result = {
+                    'total': keyset['total'],
+                    'page': None,
+                    'per_page': per_page,
+                    'pages': None,
+                    'next_cursor': keyset['next_cursor'],
+                    'has_next': keyset['has_next']
+                }
+            else:
+                # 按创建时间倒序排列
+                query = query.order_by(Attendance.created_at.desc())
+                
+                # 分页
+                pagination = query.paginate(
+                    page=page,
+                    per_page=per_page,
+                    error_out=False
+                )
+                items = pagination.items
+                result = {
+                    'total': pagination.total,
+                    'page': page,
+                    'per_page': per_page,
+                    'pages': pagination.pages
+                }
             
             # 转换为字典并添加额外信息
             attendances = []
             now = datetime.now()
             
-            for attendance in pagination.items:
+            for attendance in items:
                 # 自动更新考勤状态（根据当前时间）
                 StudentAttendanceService._update_attendance_status(attendance, now)
                 
@@ -114,13 +145,7 @@ class StudentAttendanceService:
                 
                 attendances.append(attendance_dict)
             
-            return {
-                'attendances': attendances,
-                'total': pagination.total,
-                'page': page,
-                'per_page': per_page,
-                'pages': pagination.pages
-            }
+            return {'attendances': attendances, **result}
             
         except Exception as e:
             logger.error(f"Error getting student attendances: {str(e)}")
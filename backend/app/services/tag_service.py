@@ -6,6 +6,7 @@
 from typing import List, Optional
 from app.extensions import db
 from app.models import MaterialTag
+from app.intelligence.tag_recommender import TagRecommender
 import logging
 
 logger = logging.getLogger(__name__)
@@ -35,6 +36,7 @@ class TagService:
         
         tag = MaterialTag(name=name)
         tag.save()
+        TagRecommender.invalidate_tag_index()
         
         logger.info(f"标签创建成功: {tag.id} - {name}")
         return tag
@@ -142,6 +144,7 @@ class TagService:
             raise ValueError(f"该标签正在被 {tag.usage_count} 个资料使用，无法删除")
         
         tag.delete()
+        TagRecommender.invalidate_tag_index()
         
         logger.info(f"标签删除成功: {tag_id}")
         return True
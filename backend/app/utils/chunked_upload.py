@@ -2,18 +2,53 @@
 大文件分片上传工具
 
 支持大文件的分片上传、断点续传功能。
+
+初始化时给出分片大小（chunk_size）的上传使用定位写入模式：初始化时预分配目标文件，
+每个分片直接写到 分片索引 × 分片大小 的位置，合并只需落盘并改名，不再逐个读取分片文件重写。
+未给出分片大小的上传仍按分片文件保存、合并时拼接。
+
+元数据 JSON 只在初始化时写一次；已上传的分片记在每个上传独立的分片状态文件中，
+每个分片占一个字节，收到分片后只定位写入自己的那个字节，并发上传的分片之间没有读改写竞争。
+
+初始化时可给出整个文件和每个分片的 SHA-256：分片写入时同时计算哈希，不一致的分片被拒绝；
+整个文件的 SHA-256 随分片按顺序到达逐步计算，合并时只需补算本进程尚未计入的分片。
+定位写入模式下每个分片只写入一次（写入前独占创建认领标记），重复发送的分片不再写入，
+已计入整文件哈希的数据不会被替换成其他内容。
 """
+import errno
 import os
+import re
 import hashlib
 import json
-from typing import Dict, Optional, List
+import threading
+from typing import Any, Dict, Optional, List, Tuple
 from datetime import datetime, timedelta
 from werkzeug.datastructures import FileStorage
 
 
+# 定位写入模式下预分配的数据文件名（位于上传目录内）
+UPLOAD_DATA_FILE = 'data.part'
+
+# 写入分片时每次从请求流读取的字节数
+CHUNK_COPY_SIZE = 1024 * 1024
+
+# 分片状态文件名（位于上传目录内），第 i 个字节非零表示第 i 个分片已收到
+UPLOAD_CHUNK_MAP_FILE = 'chunks.map'
+
+# 定位写入模式下分片的认领标记文件名（位于上传目录内），写入分片前独占创建
+UPLOAD_CHUNK_CLAIM_FILE = 'chunk_{}.claim'
+
+# SHA-256 十六进制格式
+SHA256_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+
 class ChunkedUploadManager:
     """分片上传管理器"""
     
+    # 本进程中各上传已按顺序计入的整文件哈希：upload_id -> (哈希对象, 已计入的分片数)
+    _file_hashers: Dict[str, Tuple[Any, int]] = {}
+    _hash_lock = threading.Lock()
+    
     def __init__(self, temp_dir: str = None):
         """
         初始化分片上传管理器
@@ -44,7 +79,15 @@ class ChunkedUploadManager:
         data = f"{filename}_{file_size}_{datetime.now().isoformat()}"
         return hashlib.md5(data.encode()).hexdigest()
     
-    def init_upload(self, filename: str, file_size: int, total_chunks: int) -> Dict:
+    def init_upload(
+        self,
+        filename: str,
+        file_size: int,
+        total_chunks: int,
+        chunk_size: int = None,
+        file_hash: str = None,
+        chunk_hashes: List[str] = None
+    ) -> Dict:
         """
         初始化分片上传
         
@@ -52,32 +95,60 @@ class ChunkedUploadManager:
             filename: 文件名
             file_size: 文件大小
             total_chunks: 总分片数
+            chunk_size: 分片大小（字节，最后一片可以更小），给出时使用定位写入模式
+            file_hash: 整个文件的 SHA-256（可选），合并时校验
+            chunk_hashes: 每个分片的 SHA-256（可选），分片到达时校验
             
         Returns:
             Dict: 上传信息
+            
+        Raises:
+            ValueError: 分片大小与文件大小、分片数不一致，或哈希格式错误
         """
+        if chunk_size is not None and (
+            chunk_size <= 0 or total_chunks != max(1, -(-file_size // chunk_size))
+        ):
+            raise ValueError("分片大小与文件大小、分片数不一致")
+        
+        if file_hash is not None:
+            file_hash = file_hash.lower()
+            if not SHA256_PATTERN.match(file_hash):
+                raise ValueError("文件哈希格式错误，应为 SHA-256 十六进制字符串")
+        
+        if chunk_hashes is not None:
+            chunk_hashes = [chunk_hash.lower() for chunk_hash in chunk_hashes]
+            if len(chunk_hashes) != total_chunks:
+                raise ValueError("分片哈希数量与分片数不一致")
+            if not all(SHA256_PATTERN.match(chunk_hash) for chunk_hash in chunk_hashes):
+                raise ValueError("分片哈希格式错误，应为 SHA-256 十六进制字符串")
+        
         upload_id = self.generate_upload_id(filename, file_size)
         
         # 创建上传目录
         upload_dir = os.path.join(self.temp_dir, upload_id)
         os.makedirs(upload_dir, exist_ok=True)
         
-        # 保存元数据
+        if chunk_size is not None:
+            self._preallocate(os.path.join(upload_dir, UPLOAD_DATA_FILE), file_size)
+        
+        with open(os.path.join(upload_dir, UPLOAD_CHUNK_MAP_FILE), 'wb') as f:
+            f.truncate(total_chunks)
+        
+        # 保存元数据（之后不再修改）
         metadata = {
             'upload_id': upload_id,
             'filename': filename,
             'file_size': file_size,
             'total_chunks': total_chunks,
-            'uploaded_chunks': [],
+            'chunk_size': chunk_size,
+            'file_hash': file_hash,
+            'chunk_hashes': chunk_hashes,
             'created_at': datetime.now().isoformat(),
             'expires_at': (datetime.now() + timedelta(days=1)).isoformat()
         }
+        self.save_upload_metadata(upload_id, metadata)
         
-        metadata_path = os.path.join(self.metadata_dir, f"{upload_id}.json")
-        with open(metadata_path, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, ensure_ascii=False, indent=2)
-        
-        return metadata
+        return dict(metadata, uploaded_chunks=[])
     
     def save_chunk(self, upload_id: str, chunk_index: int, chunk_data: FileStorage) -> bool:
         """
@@ -90,6 +161,9 @@ class ChunkedUploadManager:
             
         Returns:
             bool: 是否成功
+            
+        Raises:
+            ValueError: 分片内容与初始化时给出的分片哈希不一致
         """
         try:
             # 获取元数据
@@ -97,20 +171,60 @@ class ChunkedUploadManager:
             if not metadata:
                 return False
             
+            if not 0 <= chunk_index < metadata['total_chunks']:
+                return False
+            
+            # 分片哈希用于校验；恰好是下一个待计入的分片时，顺带计入整文件哈希
+            chunk_hasher = hashlib.sha256()
+            file_hasher = self._take_file_hasher(upload_id, chunk_index)
+            hashers = [chunk_hasher] if file_hasher is None else [chunk_hasher, file_hasher]
+            
             # 保存分片
             upload_dir = os.path.join(self.temp_dir, upload_id)
-            chunk_path = os.path.join(upload_dir, f"chunk_{chunk_index}")
             
-            chunk_data.save(chunk_path)
+            if metadata.get('chunk_size'):
+                # 已收到或正在写入的分片不再重写，重复发送已收到的分片视为成功
+                claim_path = os.path.join(upload_dir, UPLOAD_CHUNK_CLAIM_FILE.format(chunk_index))
+                if not self._claim_chunk(claim_path):
+                    return chunk_index in self.get_uploaded_chunks(upload_id)
+                
+                # 定位写入：直接写到目标文件中该分片的位置；写入失败时释放认领，允许重新上传
+                offset = chunk_index * metadata['chunk_size']
+                length = min(metadata['chunk_size'], metadata['file_size'] - offset)
+                path = os.path.join(upload_dir, UPLOAD_DATA_FILE)
+                try:
+                    written = self._write_at(path, offset, length, chunk_data, hashers)
+                    if written:
+                        self._verify_chunk(metadata, chunk_index, chunk_hasher)
+                except Exception:
+                    os.remove(claim_path)
+                    raise
+                if not written:
+                    os.remove(claim_path)
+                    return False
+            else:
+                chunk_path = os.path.join(upload_dir, f"chunk_{chunk_index}")
+                temp_path = f"{chunk_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                open(temp_path, 'wb').close()
+                try:
+                    self._write_at(temp_path, 0, None, chunk_data, hashers)
+                    self._verify_chunk(metadata, chunk_index, chunk_hasher)
+                    os.replace(temp_path, chunk_path)
+                finally:
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+            
+            # 数据写完后再标记分片已收到
+            self._mark_chunk(upload_id, chunk_index)
             
-            # 更新元数据
-            if chunk_index not in metadata['uploaded_chunks']:
-                metadata['uploaded_chunks'].append(chunk_index)
-                metadata['uploaded_chunks'].sort()
-                self.save_upload_metadata(upload_id, metadata)
+            if file_hasher is not None:
+                self._put_file_hasher(upload_id, chunk_index, file_hasher)
+                self._advance_file_hasher(upload_id, metadata)
             
             return True
             
+        except ValueError:
+            raise
         except Exception as e:
             print(f"保存分片失败: {e}")
             return False
@@ -149,10 +263,13 @@ class ChunkedUploadManager:
             bool: 是否成功
         """
         metadata_path = os.path.join(self.metadata_dir, f"{upload_id}.json")
+        temp_path = f"{metadata_path}.{os.getpid()}.tmp"
         
         try:
-            with open(metadata_path, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
+            # 先写临时文件再改名，读取方不会读到写了一半的元数据
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(metadata, f, ensure_ascii=False)
+            os.replace(temp_path, metadata_path)
             return True
         except Exception as e:
             print(f"保存元数据失败: {e}")
@@ -168,13 +285,13 @@ class ChunkedUploadManager:
         Returns:
             bool: 是否完成
         """
-        metadata = self.get_upload_metadata(upload_id)
-        if not metadata:
+        chunk_map = self._read_chunk_map(upload_id)
+        if chunk_map is None:
             return False
         
-        return len(metadata['uploaded_chunks']) == metadata['total_chunks']
+        return chunk_map.count(0) == 0
     
-    def merge_chunks(self, upload_id: str, output_path: str) -> bool:
+    def merge_chunks(self, upload_id: str, output_path: str) -> Optional[str]:
         """
         合并分片文件
         
@@ -183,49 +300,204 @@ class ChunkedUploadManager:
             output_path: 输出文件路径
             
         Returns:
-            bool: 是否成功
+            Optional[str]: 合并后文件的 SHA-256，失败时返回 None
         """
         try:
             metadata = self.get_upload_metadata(upload_id)
             if not metadata:
-                return False
+                return None
             
             if not self.is_upload_complete(upload_id):
-                return False
+                return None
             
             upload_dir = os.path.join(self.temp_dir, upload_id)
             
             # 确保输出目录存在
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
             
-            # 合并分片
+            if metadata.get('chunk_size'):
+                # 定位写入模式：数据已在目标文件中，补算剩余分片的哈希后落盘改名即可
+                data_path = os.path.join(upload_dir, UPLOAD_DATA_FILE)
+                if os.path.getsize(data_path) != metadata['file_size']:
+                    return None
+                
+                with self._hash_lock:
+                    file_hasher, hashed_chunks = self._file_hashers.pop(upload_id, (hashlib.sha256(), 0))
+                for chunk_index in range(hashed_chunks, metadata['total_chunks']):
+                    for data in self._read_chunk(upload_id, metadata, chunk_index):
+                        file_hasher.update(data)
+                file_hash = file_hasher.hexdigest()
+                if metadata.get('file_hash') and file_hash != metadata['file_hash']:
+                    self.cleanup_upload(upload_id)
+                    return None
+                
+                fd = os.open(data_path, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+                os.replace(data_path, output_path)
+                self.cleanup_upload(upload_id)
+                return file_hash
+            
+            # 合并分片（拼接的同时计算哈希）
+            file_hasher = hashlib.sha256()
             with open(output_path, 'wb') as output_file:
                 for chunk_index in range(metadata['total_chunks']):
                     chunk_path = os.path.join(upload_dir, f"chunk_{chunk_index}")
                     
                     if not os.path.exists(chunk_path):
-                        return False
+                        return None
                     
-                    with open(chunk_path, 'rb') as chunk_file:
-                        output_file.write(chunk_file.read())
+                    for data in self._read_chunk(upload_id, metadata, chunk_index):
+                        file_hasher.update(data)
+                        output_file.write(data)
             
-            # 验证文件大小
+            # 验证文件大小和哈希
             actual_size = os.path.getsize(output_path)
             expected_size = metadata['file_size']
+            file_hash = file_hasher.hexdigest()
             
-            if actual_size != expected_size:
+            if actual_size != expected_size or (metadata.get('file_hash') and file_hash != metadata['file_hash']):
                 os.remove(output_path)
-                return False
+                return None
             
             # 清理临时文件
             self.cleanup_upload(upload_id)
             
-            return True
+            return file_hash
             
         except Exception as e:
             print(f"合并分片失败: {e}")
+            return None
+    
+    @staticmethod
+    def _preallocate(path: str, file_size: int) -> None:
+        """预分配目标文件（磁盘空间不足时在初始化阶段就失败）"""
+        with open(path, 'wb') as f:
+            if file_size > 0 and hasattr(os, 'posix_fallocate'):
+                try:
+                    os.posix_fallocate(f.fileno(), 0, file_size)
+                    return
+                except OSError as e:
+                    # 文件系统不支持预分配时退回为稀疏文件；空间不足直接报错
+                    if e.errno == errno.ENOSPC:
+                        raise
+            f.truncate(file_size)
+    
+    @staticmethod
+    def _claim_chunk(claim_path: str) -> bool:
+        """独占创建分片的认领标记，已被认领时返回 False（多个进程、线程之间同样互斥）"""
+        try:
+            os.close(os.open(claim_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
             return False
     
+    @staticmethod
+    def _write_at(
+        path: str, offset: int, length: Optional[int], chunk_data: FileStorage, hashers: List[Any]
+    ) -> bool:
+        """
+        把分片数据写到文件的指定位置，同时更新哈希
+        
+        各分片写入互不重叠的区间，并发上传的分片可以同时写同一个文件。
+        
+        Args:
+            length: 分片应有的长度，None 表示不检查
+            
+        Returns:
+            bool: 分片长度与预期一致时返回 True
+        """
+        written = 0
+        fd = os.open(path, os.O_WRONLY)
+        try:
+            while True:
+                data = chunk_data.stream.read(CHUNK_COPY_SIZE)
+                if not data:
+                    break
+                if length is not None and written + len(data) > length:
+                    return False
+                for hasher in hashers:
+                    hasher.update(data)
+                if hasattr(os, 'pwrite'):
+                    os.pwrite(fd, data, offset + written)
+                else:
+                    os.lseek(fd, offset + written, os.SEEK_SET)
+                    os.write(fd, data)
+                written += len(data)
+        finally:
+            os.close(fd)
+        return length is None or written == length
+    
+    @staticmethod
+    def _verify_chunk(metadata: Dict, chunk_index: int, chunk_hasher: Any) -> None:
+        """分片内容与初始化时给出的分片哈希不一致时抛出 ValueError"""
+        chunk_hashes = metadata.get('chunk_hashes')
+        if chunk_hashes and chunk_hasher.hexdigest() != chunk_hashes[chunk_index]:
+            raise ValueError(f"分片 {chunk_index} 校验失败，请重新上传该分片")
+    
+    def _read_chunk(self, upload_id: str, metadata: Dict, chunk_index: int):
+        """按块读取已保存的分片数据"""
+        upload_dir = os.path.join(self.temp_dir, upload_id)
+        if metadata.get('chunk_size'):
+            path = os.path.join(upload_dir, UPLOAD_DATA_FILE)
+            offset = chunk_index * metadata['chunk_size']
+            remaining = min(metadata['chunk_size'], metadata['file_size'] - offset)
+        else:
+            path = os.path.join(upload_dir, f"chunk_{chunk_index}")
+            offset = 0
+            remaining = None
+        
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            while remaining is None or remaining > 0:
+                data = f.read(CHUNK_COPY_SIZE if remaining is None else min(CHUNK_COPY_SIZE, remaining))
+                if not data:
+                    break
+                if remaining is not None:
+                    remaining -= len(data)
+                yield data
+    
+    def _take_file_hasher(self, upload_id: str, chunk_index: int) -> Optional[Any]:
+        """
+        分片恰好是本进程下一个待计入整文件哈希的分片时，返回哈希对象的副本
+        
+        第 0 个分片开始计算；其他进程处理的分片由 _advance_file_hasher 或合并时补算。
+        """
+        with self._hash_lock:
+            state = self._file_hashers.get(upload_id)
+            if state is None:
+                return hashlib.sha256() if chunk_index == 0 else None
+            file_hasher, hashed_chunks = state
+            return file_hasher.copy() if hashed_chunks == chunk_index else None
+    
+    def _put_file_hasher(self, upload_id: str, chunk_index: int, file_hasher: Any) -> bool:
+        """分片计入成功后保存哈希状态（期间已被其他线程推进时放弃）"""
+        with self._hash_lock:
+            hashed_chunks = self._file_hashers.get(upload_id, (None, 0))[1]
+            if hashed_chunks != chunk_index:
+                return False
+            self._file_hashers[upload_id] = (file_hasher, chunk_index + 1)
+            return True
+    
+    def _advance_file_hasher(self, upload_id: str, metadata: Dict) -> None:
+        """把先于前面分片到达的后续分片依次计入整文件哈希（刚写入的数据通常仍在页缓存中）"""
+        while True:
+            with self._hash_lock:
+                state = self._file_hashers.get(upload_id)
+                if state is None or state[1] >= metadata['total_chunks']:
+                    return
+                file_hasher, chunk_index = state[0].copy(), state[1]
+            
+            chunk_map = self._read_chunk_map(upload_id)
+            if chunk_map is None or not chunk_map[chunk_index]:
+                return
+            for data in self._read_chunk(upload_id, metadata, chunk_index):
+                file_hasher.update(data)
+            if not self._put_file_hasher(upload_id, chunk_index, file_hasher):
+                return
+    
     def cleanup_upload(self, upload_id: str) -> bool:
         """
         清理上传临时文件
@@ -236,6 +508,9 @@ class ChunkedUploadManager:
         Returns:
             bool: 是否成功
         """
+        with self._hash_lock:
+            self._file_hashers.pop(upload_id, None)
+        
         try:
             # 删除分片目录
             upload_dir = os.path.join(self.temp_dir, upload_id)
@@ -264,14 +539,47 @@ class ChunkedUploadManager:
         Returns:
             List[int]: 缺失的分片索引列表
         """
-        metadata = self.get_upload_metadata(upload_id)
-        if not metadata:
+        chunk_map = self._read_chunk_map(upload_id)
+        if chunk_map is None:
             return []
         
-        all_chunks = set(range(metadata['total_chunks']))
-        uploaded_chunks = set(metadata['uploaded_chunks'])
+        return [index for index, received in enumerate(chunk_map) if not received]
+    
+    def get_uploaded_chunks(self, upload_id: str) -> List[int]:
+        """
+        获取已上传的分片列表
         
-        return sorted(list(all_chunks - uploaded_chunks))
+        Args:
+            upload_id: 上传ID
+            
+        Returns:
+            List[int]: 已上传的分片索引列表
+        """
+        chunk_map = self._read_chunk_map(upload_id)
+        if chunk_map is None:
+            return []
+        
+        return [index for index, received in enumerate(chunk_map) if received]
+    
+    def _mark_chunk(self, upload_id: str, chunk_index: int) -> None:
+        """在分片状态文件中标记分片已收到（只写该分片对应的一个字节）"""
+        fd = os.open(os.path.join(self.temp_dir, upload_id, UPLOAD_CHUNK_MAP_FILE), os.O_WRONLY)
+        try:
+            if hasattr(os, 'pwrite'):
+                os.pwrite(fd, b'\x01', chunk_index)
+            else:
+                os.lseek(fd, chunk_index, os.SEEK_SET)
+                os.write(fd, b'\x01')
+        finally:
+            os.close(fd)
+    
+    def _read_chunk_map(self, upload_id: str) -> Optional[bytes]:
+        """读取分片状态，上传不存在时返回 None"""
+        try:
+            with open(os.path.join(self.temp_dir, upload_id, UPLOAD_CHUNK_MAP_FILE), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
     
     def cleanup_expired_uploads(self) -> int:
         """
@@ -300,6 +608,12 @@ class ChunkedUploadManager:
                     self.cleanup_upload(upload_id)
                     cleaned_count += 1
             
+            # 已由其他进程合并或取消的上传，清除本进程残留的哈希状态
+            with self._hash_lock:
+                for upload_id in list(self._file_hashers):
+                    if not os.path.exists(os.path.join(self.metadata_dir, f"{upload_id}.json")):
+                        del self._file_hashers[upload_id]
+            
             return cleaned_count
             
         except Exception as e:
@@ -0,0 +1,137 @@
+"""
+计数缓冲
+
+浏览次数、下载次数、点赞数等高频计数先在进程内累加，由后台线程定期以
+UPDATE ... SET n = n + :delta 批量写回数据库，避免每次请求读-改-写并单独提交：
+并发时不会丢失更新，热门资料也不会反复争用 SQLite 写锁。
+"""
+import logging
+import threading
+from typing import Dict, List, Tuple
+
+from sqlalchemy import bindparam, case
+
+from app.extensions import db
+from app.utils.write_behind import WriteBehindWorker
+
+logger = logging.getLogger(__name__)
+
+# 定期写回的间隔（秒）
+COUNTER_FLUSH_INTERVAL = 5
+
+# 待写回的计数条目达到该数量时立即唤醒写回线程
+COUNTER_FLUSH_THRESHOLD = 1000
+
+# 计数键：(表名, 列名, 行 ID)
+CounterKey = Tuple[str, str, int]
+
+
+class CounterBuffer:
+    """
+    计数缓冲
+
+    各进程（gunicorn worker）各自缓冲、各自写回，写回用增量更新，多个进程的结果自然累加。
+    读取时调用 pending() 把本进程尚未写回的增量加到数据库值上，刚点赞、刚下载后看到的就是最新值；
+    其他进程的未写回增量最多延迟 COUNTER_FLUSH_INTERVAL 秒可见。按计数排序和汇总统计直接读库，
+    同样有这一延迟。
+    """
+
+    # 尚未写回的增量
+    _deltas: Dict[CounterKey, int] = {}
+    # 正在写回（已取出、尚未提交）的增量，读取时同样计入
+    _flushing: Dict[CounterKey, int] = {}
+    _lock = threading.Lock()
+    # 同一时间只有一个写回
+    _flush_lock = threading.Lock()
+
+    # 后台写回线程
+    _worker = WriteBehindWorker('counter-flusher', COUNTER_FLUSH_INTERVAL)
+
+    @classmethod
+    def increment(cls, table: str, column: str, row_id: int, delta: int = 1) -> None:
+        """
+        累加计数
+
+        Args:
+            table: 表名
+            column: 计数列名
+            row_id: 行 ID
+            delta: 增量，可为负数（写回时结果不会小于 0）
+        """
+        cls._worker.ensure_started(cls.flush, cls._discard)
+
+        key = (table, column, row_id)
+        with cls._lock:
+            cls._deltas[key] = cls._deltas.get(key, 0) + delta
+            size = len(cls._deltas)
+
+        if size >= COUNTER_FLUSH_THRESHOLD:
+            cls._worker.wake()
+
+    @classmethod
+    def pending(cls, table: str, column: str, row_id: int) -> int:
+        """本进程尚未写回数据库的增量"""
+        key = (table, column, row_id)
+        with cls._lock:
+            return cls._deltas.get(key, 0) + cls._flushing.get(key, 0)
+
+    @classmethod
+    def flush(cls) -> int:
+        """
+        把缓冲的增量写回数据库（需在应用上下文中调用）
+
+        同一列的增量合并为一条 executemany 的 UPDATE，所有列在一个事务中提交；
+        写回失败时增量放回缓冲，下次重试。
+
+        Returns:
+            写回的计数条目数
+        """
+        with cls._flush_lock:
+            with cls._lock:
+                if not cls._deltas:
+                    return 0
+                cls._flushing, cls._deltas = cls._deltas, {}
+                flushing = cls._flushing
+
+            grouped: Dict[Tuple[str, str], List[Dict[str, int]]] = {}
+            for (table, column, row_id), delta in flushing.items():
+                if delta:
+                    grouped.setdefault((table, column), []).append({'row_id': row_id, 'delta': delta})
+
+            try:
+                for (table_name, column_name), params in grouped.items():
+                    table = db.metadata.tables[table_name]
+                    value = table.c[column_name] + bindparam('delta')
+                    values = {column_name: case((value < 0, 0), else_=value)}
+                    if 'updated_at' in table.c:
+                        # 计数变化不算内容修改，不触发 updated_at 的自动更新
+                        values['updated_at'] = table.c.updated_at
+                    db.session.execute(
+                        table.update().where(table.c.id == bindparam('row_id')).values(values),
+                        params
+                    )
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                # 放回缓冲，与写回期间新产生的增量合并
+                with cls._lock:
+                    for key, delta in flushing.items():
+                        cls._deltas[key] = cls._deltas.get(key, 0) + delta
+                    cls._flushing = {}
+                raise
+
+            with cls._lock:
+                cls._flushing = {}
+            return len(flushing)
+
+    @classmethod
+    def flush_now(cls) -> int:
+        """在独立的数据库会话中立即写回（请求中调用，不影响请求会话中的事务）"""
+        return cls._worker.flush_now()
+
+    @classmethod
+    def _discard(cls) -> None:
+        """丢弃 fork 时从父进程继承的缓冲（由父进程负责写回）"""
+        with cls._lock:
+            cls._deltas = {}
+            cls._flushing = {}
@@ -0,0 +1,103 @@
+"""
+文件下发工具
+
+为资料下载和预览生成响应：
+- 以文件内容的 SHA-256 作为强 ETag，If-None-Match 命中时返回 304；
+- 支持 Range 请求（206 / 416），视频拖动进度条时只传输需要的片段；
+- 可配置为只做鉴权、由前端代理发送文件（X-Accel-Redirect / X-Sendfile）。
+
+nginx 配置示例（FILE_DELIVERY_MODE=x-accel，FILE_DELIVERY_ROOT=/app）::
+
+    location /protected-files/ {
+        internal;
+        alias /app/;
+    }
+"""
+import mimetypes
+import os
+import unicodedata
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+from flask import Response, current_app, request, send_file
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+
+from app.models import FileDigest
+
+
+def deliver_file(file_path: str, download_name: str, as_attachment: bool) -> Response:
+    """
+    生成文件下发响应
+
+    Args:
+        file_path: 文件绝对路径
+        download_name: 下载时的文件名
+        as_attachment: 是否作为附件下载（False 时浏览器在线预览）
+
+    Returns:
+        Response: 200 / 206 / 304 / 416 响应；代理模式下 200 响应不含文件内容
+    """
+    stat = os.stat(file_path)
+    etag = FileDigest.get_sha256(file_path, stat)
+    last_modified = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+    mode = current_app.config.get('FILE_DELIVERY_MODE', 'direct')
+
+    if mode not in ('x-accel', 'x-sendfile'):
+        # send_file 的 conditional 处理 If-None-Match、If-Range 和 Range
+        try:
+            response = send_file(
+                file_path,
+                as_attachment=as_attachment,
+                download_name=download_name,
+                etag=etag,
+                last_modified=last_modified,
+                conditional=True
+            )
+        except RequestedRangeNotSatisfiable as e:
+            # 416 响应带 Content-Range: bytes */文件大小
+            response = e.get_response()
+    else:
+        response = Response(mimetype=mimetypes.guess_type(download_name)[0] or 'application/octet-stream')
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        _set_content_disposition(response, download_name, as_attachment)
+        response.make_conditional(request)
+        if response.status_code == 200:
+            # 由代理按原始请求的 Range 发送文件
+            if mode == 'x-accel':
+                relative_path = os.path.relpath(file_path, current_app.config['FILE_DELIVERY_ROOT'])
+                response.headers['X-Accel-Redirect'] = current_app.config['FILE_ACCEL_PREFIX'] + quote(
+                    relative_path.replace(os.sep, '/')
+                )
+            else:
+                response.headers['X-Sendfile'] = file_path
+
+    # 需要登录才能访问，不允许共享缓存；浏览器缓存后每次用 ETag 重新验证
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def is_new_download(response: Response) -> bool:
+    """
+    响应是否算作一次新的下载
+
+    304 和错误响应不算；Range 请求只有从文件开头开始的才算，
+    避免视频拖动、断点续传产生的后续片段重复计数。
+    """
+    if response.status_code not in (200, 206):
+        return False
+    byte_range = request.range
+    return byte_range is None or byte_range.ranges[0][0] == 0
+
+
+def _set_content_disposition(response: Response, download_name: str, as_attachment: bool) -> None:
+    """设置 Content-Disposition（非 ASCII 文件名按 RFC 2231 编码，与 send_file 一致）"""
+    disposition = 'attachment' if as_attachment else 'inline'
+    try:
+        download_name.encode('ascii')
+        names = {'filename': download_name}
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize('NFKD', download_name).encode('ascii', 'ignore').decode('ascii')
+        names = {'filename': simple, 'filename*': "UTF-8''" + quote(download_name, safe="!#$&+^`|~")}
+    response.headers.set('Content-Disposition', disposition, **names)
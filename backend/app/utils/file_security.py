@@ -61,6 +61,9 @@ FILE_SIGNATURES = {
     'pptx': [b'PK\x03\x04'],  # PPTX是ZIP格式
 }
 
+# 校验魔数需要读取的文件头字节数
+SIGNATURE_HEADER_SIZE = 16
+
 
 def check_dangerous_extension(filename: str) -> Tuple[bool, Optional[str]]:
     """
@@ -100,11 +103,28 @@ def verify_file_signature(file: FileStorage, expected_ext: str) -> Tuple[bool, O
     
     # 读取文件头
     file.seek(0)
-    header = file.read(16)
+    header = file.read(SIGNATURE_HEADER_SIZE)
     file.seek(0)  # 重置文件指针
     
+    return match_file_signature(header, expected_ext)
+
+
+def match_file_signature(header: bytes, expected_ext: str) -> Tuple[bool, Optional[str]]:
+    """
+    检查已读取的文件头是否与扩展名的魔数匹配（流式上传时使用，不需要回读文件）
+    
+    Args:
+        header: 文件开头的字节（至少 SIGNATURE_HEADER_SIZE 字节，文件更短时为全部内容）
+        expected_ext: 期望的文件扩展名
+        
+    Returns:
+        Tuple[bool, Optional[str]]: (是否匹配, 错误信息)
+    """
+    signatures = FILE_SIGNATURES.get(expected_ext)
+    if signatures is None:
+        return True, None
+    
     # 检查是否匹配任一签名
-    signatures = FILE_SIGNATURES[expected_ext]
     for signature in signatures:
         if header.startswith(signature):
             return True, None
@@ -227,6 +247,28 @@ def validate_file_security(file: FileStorage) -> Tuple[bool, Optional[str]]:
     """
     综合验证文件安全性
     
+    Args:
+        file: 上传的文件对象
+        
+    Returns:
+        Tuple[bool, Optional[str]]: (是否安全, 错误信息)
+    """
+    is_valid, error = validate_file_metadata(file)
+    if not is_valid:
+        return False, error
+    
+    # 检查文件内容
+    is_safe, error = check_file_content(file)
+    if not is_safe:
+        return False, error
+    
+    return True, None
+
+
+def validate_file_metadata(file: FileStorage) -> Tuple[bool, Optional[str]]:
+    """
+    验证文件名和 MIME 类型（不读取文件内容，魔数在流式保存时校验）
+    
     Args:
         file: 上传的文件对象
         
@@ -248,9 +290,4 @@ def validate_file_security(file: FileStorage) -> Tuple[bool, Optional[str]]:
     if not is_valid:
         return False, error
     
-    # 检查文件内容
-    is_safe, error = check_file_content(file)
-    if not is_safe:
-        return False, error
-    
     return True, None
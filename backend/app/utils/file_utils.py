@@ -3,7 +3,9 @@
 
 提供文件上传、存储、验证等功能。
 """
+import hashlib
 import os
+import tempfile
 import uuid
 from datetime import datetime
 from typing import Tuple, Optional, Dict, Any
@@ -11,6 +13,11 @@ from werkzeug.utils import secure_filename
 from werkzeug.datastructures import FileStorage
 import mimetypes
 
+from app.utils.file_security import SIGNATURE_HEADER_SIZE, match_file_signature
+
+# 后端项目根目录（资料相对路径以此为基准）
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 # 允许的文件扩展名
 ALLOWED_EXTENSIONS = {
     # 文档
@@ -57,6 +64,12 @@ FILE_TYPE_MAPPING = {
 # 文件大小限制（字节）
 MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
 
+# 流式保存上传文件时每次读取的字节数
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# 流式保存上传文件的临时目录（与资料文件同一文件系统，保存完成后直接改名）
+UPLOAD_TEMP_DIR = os.path.join('uploads', 'temp', 'uploads')
+
 # 文件类型图标映射（用于前端显示）
 FILE_TYPE_ICONS = {
     'pdf': 'file-pdf',
@@ -168,6 +181,23 @@ def generate_unique_filename(original_filename: str) -> str:
     return unique_name
 
 
+def resolve_file_path(file_path: str) -> str:
+    """
+    把资料记录中的文件路径转换为绝对路径
+    
+    相对路径相对于后端项目根目录（backend 目录）。
+    
+    Args:
+        file_path: 资料记录中的文件路径
+        
+    Returns:
+        str: 绝对路径
+    """
+    if os.path.isabs(file_path):
+        return file_path
+    return os.path.join(BACKEND_DIR, file_path)
+
+
 def get_upload_path(base_dir: str = None) -> str:
     """
     获取上传路径（按年月组织）
@@ -201,6 +231,35 @@ def validate_file(file: FileStorage, max_size: int = MAX_FILE_SIZE) -> Tuple[boo
         file: 上传的文件对象
         max_size: 最大文件大小（字节）
         
+    Returns:
+        Tuple[bool, Optional[str]]: (是否有效, 错误信息)
+    """
+    is_valid, error_msg = validate_file_name(file)
+    if not is_valid:
+        return False, error_msg
+    
+    # 检查文件大小
+    file.seek(0, os.SEEK_END)
+    file_size = file.tell()
+    file.seek(0)  # 重置文件指针
+    
+    if file_size > max_size:
+        max_size_mb = max_size / (1024 * 1024)
+        return False, f"文件大小超过限制（最大 {max_size_mb:.0f}MB）"
+    
+    if file_size == 0:
+        return False, "文件大小为0"
+    
+    return True, None
+
+
+def validate_file_name(file: FileStorage) -> Tuple[bool, Optional[str]]:
+    """
+    验证上传文件的文件名和扩展名（不读取文件内容）
+    
+    Args:
+        file: 上传的文件对象
+        
     Returns:
         Tuple[bool, Optional[str]]: (是否有效, 错误信息)
     """
@@ -216,19 +275,82 @@ def validate_file(file: FileStorage, max_size: int = MAX_FILE_SIZE) -> Tuple[boo
     if not allowed_file(file.filename):
         return False, f"不支持的文件类型。允许的类型: {', '.join(sorted(ALLOWED_EXTENSIONS))}"
     
-    # 检查文件大小
-    file.seek(0, os.SEEK_END)
-    file_size = file.tell()
-    file.seek(0)  # 重置文件指针
+    return True, None
+
+
+def stream_uploaded_file(
+    file: FileStorage,
+    max_size: int = MAX_FILE_SIZE,
+    chunk_size: int = UPLOAD_CHUNK_SIZE
+) -> Tuple[str, str, int]:
+    """
+    单次读取保存上传文件
     
-    if file_size > max_size:
-        max_size_mb = max_size / (1024 * 1024)
-        return False, f"文件大小超过限制（最大 {max_size_mb:.0f}MB）"
+    按固定大小分块读取上传流，在同一个循环里校验文件头魔数、检查大小上限、
+    计算 SHA-256 并写入临时文件，不需要回读或整体缓冲文件。
+    调用方负责把临时文件改名到最终位置（或校验失败后删除）。
     
-    if file_size == 0:
-        return False, "文件大小为0"
+    Args:
+        file: 上传的文件对象（文件名已通过 validate_file_name 验证）
+        max_size: 最大文件大小（字节）
+        chunk_size: 每次读取的字节数
+        
+    Returns:
+        Tuple[str, str, int]: (临时文件绝对路径, SHA-256, 文件大小)
+        
+    Raises:
+        ValueError: 文件为空、超过大小限制或内容与扩展名不匹配
+    """
+    ext = get_file_extension(file.filename)
+    temp_dir = resolve_file_path(UPLOAD_TEMP_DIR)
+    os.makedirs(temp_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=temp_dir, suffix='.part')
     
-    return True, None
+    hasher = hashlib.sha256()
+    file_size = 0
+    header = b''
+    header_checked = False
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            while True:
+                chunk = file.stream.read(chunk_size)
+                if not chunk:
+                    break
+                
+                file_size += len(chunk)
+                if file_size > max_size:
+                    raise ValueError(f"文件大小超过限制（最大 {max_size / (1024 * 1024):.0f}MB）")
+                
+                if not header_checked:
+                    header += chunk[:SIGNATURE_HEADER_SIZE - len(header)]
+                    if len(header) >= SIGNATURE_HEADER_SIZE:
+                        _check_signature(header, ext)
+                        header_checked = True
+                
+                hasher.update(chunk)
+                f.write(chunk)
+            
+            if file_size == 0:
+                raise ValueError("文件大小为0")
+            if not header_checked:
+                # 文件比魔数长度还短
+                _check_signature(header, ext)
+            
+            # 落盘后再改名，避免掉电后留下内容不完整的资料文件
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    
+    return temp_path, hasher.hexdigest(), file_size
+
+
+def _check_signature(header: bytes, ext: str) -> None:
+    """文件头与扩展名不匹配时抛出 ValueError"""
+    is_valid, error_msg = match_file_signature(header, ext)
+    if not is_valid:
+        raise ValueError(error_msg)
 
 
 def save_uploaded_file(file: FileStorage, base_dir: str = None) -> Tuple[str, str, int]:
@@ -423,6 +545,25 @@ def ensure_upload_directory(base_dir: str = None) -> str:
     return os.path.abspath(base_dir)
 
 
+def compute_file_hash(file_path: str, algorithm: str = 'sha256', chunk_size: int = 1024 * 1024) -> str:
+    """
+    分块计算文件内容的哈希
+    
+    Args:
+        file_path: 文件路径
+        algorithm: 哈希算法
+        chunk_size: 每次读取的字节数
+        
+    Returns:
+        str: 十六进制哈希值
+    """
+    hasher = hashlib.new(algorithm)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
 def get_file_info(file_path: str) -> Dict[str, Any]:
     """
     获取文件详细信息
@@ -0,0 +1,169 @@
+"""
+游标分页工具
+
+为按时间等字段倒序的大列表提供键集（keyset）分页：
+用"上一页最后一条记录的排序值和 ID"作为游标，下一页以
+WHERE (排序列, id) < (游标值) 直接在索引上定位，耗时与翻到第几页无关。
+"""
+import base64
+import binascii
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import literal, tuple_
+
+# 总数缓存有效期（秒）：游标分页时总数只是参考值，允许短时间内不精确
+COUNT_CACHE_TTL = 30
+
+# 总数缓存最多保存的查询条件数
+COUNT_CACHE_MAX_ENTRIES = 1024
+
+_count_cache: Dict[str, Tuple[int, float]] = {}
+_count_cache_lock = threading.Lock()
+
+
+def encode_cursor(sort_key: str, values: List[Any]) -> str:
+    """
+    生成游标
+
+    Args:
+        sort_key: 排序方式标识（如 "created_at:desc"），用于拒绝跨排序方式使用的游标
+        values: 最后一条记录的排序值和 ID
+
+    Returns:
+        URL 安全的不透明字符串
+    """
+    payload = {
+        's': sort_key,
+        'v': [{'dt': value.isoformat()} if isinstance(value, datetime) else value for value in values]
+    }
+    raw = json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, sort_key: str) -> List[Any]:
+    """
+    解析游标
+
+    Args:
+        cursor: encode_cursor 生成的游标
+        sort_key: 当前请求的排序方式标识
+
+    Returns:
+        排序值和 ID
+
+    Raises:
+        ValueError: 游标无效或与当前排序方式不一致
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw.decode('utf-8'))
+        if payload['s'] != sort_key:
+            raise ValueError
+        return [
+            datetime.fromisoformat(value['dt']) if isinstance(value, dict) else value
+            for value in payload['v']
+        ]
+    except (binascii.Error, UnicodeDecodeError, KeyError, TypeError, ValueError):
+        raise ValueError("无效的分页游标")
+
+
+def cached_count(cache_key: str, query) -> int:
+    """
+    带短时缓存的查询总数
+
+    Args:
+        cache_key: 能唯一标识查询条件的字符串
+        query: 查询对象（排序会被去掉）
+
+    Returns:
+        总记录数（可能是 COUNT_CACHE_TTL 秒内的旧值）
+    """
+    now = time.time()
+    with _count_cache_lock:
+        cached = _count_cache.get(cache_key)
+        if cached is not None and now - cached[1] < COUNT_CACHE_TTL:
+            return cached[0]
+
+    total = query.order_by(None).count()
+
+    with _count_cache_lock:
+        if len(_count_cache) >= COUNT_CACHE_MAX_ENTRIES:
+            # 先淘汰过期项，仍然满时清空
+            for key in [key for key, (_, at) in _count_cache.items() if now - at >= COUNT_CACHE_TTL]:
+                del _count_cache[key]
+            if len(_count_cache) >= COUNT_CACHE_MAX_ENTRIES:
+                _count_cache.clear()
+        _count_cache[cache_key] = (total, now)
+    return total
+
+
+def keyset_paginate(
+    query,
+    sort_column,
+    id_column,
+    cursor: Optional[str],
+    per_page: int,
+    descending: bool = True,
+    count_key: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    键集分页
+
+    按 (排序列, ID) 排序，ID 保证排序值相同时顺序稳定、不重不漏。
+    多取一条判断是否还有下一页，不需要 COUNT(*)。
+
+    Args:
+        query: 已应用筛选条件、尚未排序的查询
+        sort_column: 排序列
+        id_column: ID 列
+        cursor: 上一页返回的游标，空字符串或 None 表示第一页
+        per_page: 每页数量
+        descending: 是否倒序
+        count_key: 需要总数时传入缓存键（见 cached_count），否则不统计总数
+
+    Returns:
+        包含 items、next_cursor、has_next、total（未统计时为 None）的字典
+
+    Raises:
+        ValueError: 游标无效
+    """
+    sort_key = f"{sort_column.key}:{'desc' if descending else 'asc'}"
+    total = cached_count(count_key, query) if count_key is not None else None
+
+    if cursor:
+        cursor_values = decode_cursor(cursor, sort_key)
+        if len(cursor_values) != 2:
+            raise ValueError("无效的分页游标")
+
+        position = tuple_(sort_column, id_column)
+        # 按列类型绑定参数，日期时间与库中存储格式一致才能正确比较
+        values = tuple_(*(
+            literal(value, type_=column.type)
+            for value, column in zip(cursor_values, (sort_column, id_column))
+        ))
+        query = query.filter(position < values if descending else position > values)
+
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+
+    rows = query.limit(per_page + 1).all()
+    has_next = len(rows) > per_page
+    items = rows[:per_page]
+
+    next_cursor = None
+    if has_next:
+        last = items[-1]
+        next_cursor = encode_cursor(sort_key, [getattr(last, sort_column.key), getattr(last, id_column.key)])
+
+    return {
+        'items': items,
+        'next_cursor': next_cursor,
+        'has_next': has_next,
+        'total': total
+    }
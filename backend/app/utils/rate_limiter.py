@@ -0,0 +1,62 @@
+"""
+限流工具
+
+按键（如用户 ID）的令牌桶限流，用于防止单个用户刷屏拖慢整个课堂。
+"""
+import threading
+import time
+from typing import Dict, Hashable, Tuple
+
+
+class RateLimiter:
+    """
+    令牌桶限流器（进程内，线程安全）
+
+    每个键的桶容量为 burst，每秒恢复 rate 个令牌：允许短时间连续发送 burst 次，
+    之后平均每秒最多 rate 次。桶已恢复满的键不需要保存，条目过多时淘汰。
+    """
+
+    def __init__(self, rate: float, burst: int, max_entries: int = 10000):
+        """
+        Args:
+            rate: 每秒恢复的次数
+            burst: 最多连续次数
+            max_entries: 最多保存的键数
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_entries = max_entries
+        # 键 -> (剩余令牌, 上次更新时间)
+        self._buckets: Dict[Hashable, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, key: Hashable) -> bool:
+        """
+        消耗一个令牌
+
+        Returns:
+            是否允许本次操作
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                return False
+
+            if key not in self._buckets and len(self._buckets) >= self.max_entries:
+                self._evict(now)
+            self._buckets[key] = (tokens - 1, now)
+            return True
+
+    def _evict(self, now: float) -> None:
+        """淘汰桶已恢复满的键，仍然过多时清空"""
+        full = [
+            key for key, (tokens, updated_at) in self._buckets.items()
+            if tokens + (now - updated_at) * self.rate >= self.burst
+        ]
+        for key in full:
+            del self._buckets[key]
+        if len(self._buckets) >= self.max_entries:
+            self._buckets.clear()
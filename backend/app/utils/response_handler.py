@@ -57,36 +57,55 @@ class ResponseHandler:
     @staticmethod
     def paginated(
         items: list,
-        total: int,
-        page: int,
+        total: Optional[int],
+        page: Optional[int],
         per_page: int,
-        message: str = "获取成功"
+        message: str = "获取成功",
+        next_cursor: Optional[str] = None,
+        has_next: Optional[bool] = None
     ) -> Dict[str, Any]:
         """
         返回分页数据响应
         
+        页码分页传入 page 和 total；游标分页 page 传 None，并传入 has_next 和 next_cursor，
+        total 未统计时传 None。
+        
         Args:
             items: 数据列表
             total: 总记录数
-            page: 当前页码
+            page: 当前页码（游标分页时为 None）
             per_page: 每页数量
             message: 响应消息
+            next_cursor: 下一页游标（游标分页）
+            has_next: 是否有下一页（游标分页）
             
         Returns:
             包含分页信息的成功响应字典
         """
-        # 计算总页数
-        pages = (total + per_page - 1) // per_page if per_page > 0 else 0
-        
-        # 创建分页模型
-        pagination = PaginationModel(
-            page=page,
-            per_page=per_page,
-            total=total,
-            pages=pages,
-            has_prev=page > 1,
-            has_next=page < pages
-        )
+        if page is None:
+            # 游标分页：没有页码和总页数
+            pagination = PaginationModel(
+                page=None,
+                per_page=per_page,
+                total=total,
+                pages=None,
+                has_prev=False,
+                has_next=bool(has_next),
+                next_cursor=next_cursor
+            )
+        else:
+            # 计算总页数
+            pages = (total + per_page - 1) // per_page if per_page > 0 else 0
+            
+            # 创建分页模型
+            pagination = PaginationModel(
+                page=page,
+                per_page=per_page,
+                total=total,
+                pages=pages,
+                has_prev=page > 1,
+                has_next=page < pages
+            )
         
         # 返回成功响应，包含分页数据和列表
         response = BaseResponseModel(
@@ -0,0 +1,129 @@
+"""
+敏感词匹配模块
+
+以全部敏感词构建 Aho-Corasick 自动机，扫描一遍文本找出其中的敏感词。
+"""
+
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+
+class SensitiveWordMatcher:
+    """
+    敏感词匹配器
+
+    构建后不再修改，敏感词变化时构建新的匹配器整体替换，多个线程可以同时使用同一个匹配器。
+    匹配一条文本的代价与文本长度（及命中数）成正比，与敏感词数量无关。
+
+    命中规则与原先逐位置查字典树一致：从左到右，每个位置取以该位置开头的最短敏感词，
+    命中后从词尾继续，命中之间不重叠。
+    """
+
+    def __init__(self, words: Iterable[str]):
+        """
+        构建自动机
+
+        Args:
+            words: 敏感词（空字符串忽略，区分大小写）
+        """
+        self.words: FrozenSet[str] = frozenset(word for word in words if word)
+
+        # Aho-Corasick 自动机：转移表、失配指针、各状态结尾的敏感词长度
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[int]] = [[]]
+
+        for word in self.words:
+            self._add_word(word)
+
+        self._build_failure_links()
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def find(self, text: str) -> List[Tuple[int, int]]:
+        """
+        查找文本中的敏感词
+
+        Args:
+            text: 待检查的文本
+
+        Returns:
+            命中位置 (起始下标, 结束下标) 列表，按起始下标升序、互不重叠
+        """
+        # 以各位置开头的最短敏感词的结束下标：结尾越早越先扫到，首次登记的即为最短
+        shortest_end: Dict[int, int] = {}
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        node = 0
+
+        for end, char in enumerate(text, start=1):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length in outputs[node]:
+                shortest_end.setdefault(end - length, end)
+
+        matches = []
+        position = 0
+        for start in sorted(shortest_end):
+            if start >= position:
+                position = shortest_end[start]
+                matches.append((start, position))
+        return matches
+
+    def filter(self, text: str, replace_char: str = '*') -> Tuple[str, List[str]]:
+        """
+        替换文本中的敏感词
+
+        Args:
+            text: 原始文本
+            replace_char: 替换字符
+
+        Returns:
+            (替换后的文本, 按出现顺序命中的敏感词列表)
+        """
+        matches = self.find(text)
+        if not matches:
+            return text, []
+
+        parts = []
+        detected = []
+        position = 0
+        for start, end in matches:
+            parts.append(text[position:start])
+            parts.append(replace_char * (end - start))
+            detected.append(text[start:end])
+            position = end
+        parts.append(text[position:])
+        return ''.join(parts), detected
+
+    def _add_word(self, word: str) -> None:
+        """把敏感词插入自动机的字典树"""
+        node = 0
+        for char in word:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            node = next_node
+        self._outputs[node].append(len(word))
+
+    def _build_failure_links(self) -> None:
+        """广度优先计算失配指针，并合并后缀状态结尾的敏感词"""
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+
+                if self._outputs[self._fail[child]]:
+                    self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
@@ -19,6 +19,12 @@ def init_storage_directories(base_dir: str = 'uploads'):
         # 资料文件目录
         os.path.join(base_dir, 'materials'),
         
+        # 资料文件内容目录（按内容哈希存放）
+        os.path.join(base_dir, 'blobs'),
+        
+        # 预览副本目录
+        os.path.join(base_dir, 'renditions'),
+        
         # 临时文件目录
         os.path.join(base_dir, 'temp'),
         
@@ -77,16 +83,59 @@ def create_gitignore_for_uploads(base_dir: str = 'uploads'):
     print(f"✓ 创建 .gitignore: {gitignore_path}")
 
 
+def scan_storage_usage(base_dir: str = 'uploads') -> dict:
+    """
+    遍历目录统计各一级子目录占用的空间
+    
+    文件很多时需要较长时间，只在初始化和定期校正存储用量时使用。
+    
+    Args:
+        base_dir: 基础目录
+        
+    Returns:
+        dict: {子目录名: (字节数, 文件数)}
+    """
+    usage = {}
+    
+    if not os.path.exists(base_dir):
+        return usage
+    
+    for entry in os.scandir(base_dir):
+        if not entry.is_dir(follow_symlinks=False):
+            continue
+        
+        total_size = 0
+        file_count = 0
+        for root, dirs, files in os.walk(entry.path):
+            for file in files:
+                # 跳过 .gitkeep、.gitignore 和锁文件
+                if file.startswith('.'):
+                    continue
+                try:
+                    total_size += os.path.getsize(os.path.join(root, file))
+                except OSError:
+                    # 遍历期间被删除
+                    continue
+                file_count += 1
+        usage[entry.name] = (total_size, file_count)
+    
+    return usage
+
+
 def get_storage_info(base_dir: str = 'uploads') -> dict:
     """
     获取存储信息
     
+    读取增量维护的存储用量（需在应用上下文中调用），不遍历目录。
+    
     Args:
         base_dir: 基础目录
         
     Returns:
         dict: 存储信息
     """
+    from app.services.storage_usage_service import StorageUsageService
+    
     if not os.path.exists(base_dir):
         return {
             'exists': False,
@@ -94,22 +143,11 @@ def get_storage_info(base_dir: str = 'uploads') -> dict:
             'file_count': 0
         }
     
-    total_size = 0
-    file_count = 0
-    
-    for root, dirs, files in os.walk(base_dir):
-        for file in files:
-            if file != '.gitkeep' and file != '.gitignore':
-                file_path = os.path.join(root, file)
-                total_size += os.path.getsize(file_path)
-                file_count += 1
-    
+    info = StorageUsageService.get_storage_info()
     return {
         'exists': True,
         'base_dir': os.path.abspath(base_dir),
-        'total_size': total_size,
-        'total_size_mb': round(total_size / (1024 * 1024), 2),
-        'file_count': file_count
+        **info
     }
 
 
@@ -120,17 +158,20 @@ def cleanup_temp_files(base_dir: str = 'uploads', max_age_hours: int = 24):
     Args:
         base_dir: 基础目录
         max_age_hours: 最大保留时间（小时）
+        
+    Returns:
+        tuple: (清理的文件数, 回收的字节数)
     """
     import time
-    from datetime import datetime, timedelta
     
     temp_dir = os.path.join(base_dir, 'temp')
     
     if not os.path.exists(temp_dir):
-        return
+        return 0, 0
     
     cutoff_time = time.time() - (max_age_hours * 3600)
     cleaned_count = 0
+    cleaned_bytes = 0
     
     for root, dirs, files in os.walk(temp_dir):
         for file in files:
@@ -140,14 +181,17 @@ def cleanup_temp_files(base_dir: str = 'uploads', max_age_hours: int = 24):
             file_path = os.path.join(root, file)
             
             # 检查文件修改时间
-            if os.path.getmtime(file_path) < cutoff_time:
-                try:
+            try:
+                stat = os.stat(file_path)
+                if stat.st_mtime < cutoff_time:
                     os.remove(file_path)
                     cleaned_count += 1
-                except Exception as e:
-                    print(f"删除文件失败 {file_path}: {e}")
+                    cleaned_bytes += stat.st_size
+            except Exception as e:
+                print(f"删除文件失败 {file_path}: {e}")
     
     print(f"✓ 清理了 {cleaned_count} 个临时文件")
+    return cleaned_count, cleaned_bytes
 
 
 def main():
@@ -165,12 +209,13 @@ def main():
     create_gitignore_for_uploads()
     print()
     
-    # 显示存储信息
-    info = get_storage_info()
+    # 显示存储信息（初始化脚本不依赖数据库，直接遍历目录）
+    usage = scan_storage_usage()
+    total_size = sum(size for size, _ in usage.values())
     print("存储信息:")
-    print(f"  - 基础目录: {info.get('base_dir', 'N/A')}")
-    print(f"  - 文件数量: {info.get('file_count', 0)}")
-    print(f"  - 总大小: {info.get('total_size_mb', 0)} MB")
+    print(f"  - 基础目录: {os.path.abspath('uploads')}")
+    print(f"  - 文件数量: {sum(count for _, count in usage.values())}")
+    print(f"  - 总大小: {round(total_size / (1024 * 1024), 2)} MB")
     print()
     
     print("=" * 60)
@@ -0,0 +1,67 @@
+"""
+短时缓存
+
+进程内的带有效期缓存，用于高频请求中反复查询、允许短时间不精确的数据
+（如课程、用户是否存在），有效期内不再查库。
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    带有效期的进程内缓存（线程安全）
+
+    加载结果为 None 时不缓存，刚创建的记录不会因为之前查不到而在有效期内一直查不到。
+    条目数达到上限时先淘汰过期项，仍然满时清空。
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 1024):
+        """
+        Args:
+            ttl: 有效期（秒）
+            max_entries: 最多保存的条目数
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[Any, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Optional[Any]:
+        """
+        读取缓存，不存在或已过期时调用 loader 加载
+
+        Args:
+            key: 缓存键
+            loader: 加载函数（在锁外调用）
+
+        Returns:
+            缓存值，加载结果为 None 时返回 None
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and now - cached[1] < self.ttl:
+                return cached[0]
+
+        value = loader()
+        if value is None:
+            return None
+
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                for stale in [k for k, (_, at) in self._entries.items() if now - at >= self.ttl]:
+                    del self._entries[stale]
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+            self._entries[key] = (value, now)
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """删除一个缓存键，不传时清空"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
@@ -0,0 +1,111 @@
+"""
+写后缓冲的后台写回线程
+
+计数、弹幕等高频写入先在进程内缓冲，由后台线程定期（或缓冲达到阈值时被唤醒）批量写回数据库。
+各缓冲只需实现自己的 flush()，线程的启动、fork 后的重置、退出前的写回都由这里负责。
+"""
+import atexit
+import logging
+import os
+import threading
+from typing import Callable, Optional
+
+from flask import Flask, current_app
+
+from app.extensions import db
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindWorker:
+    """
+    写后缓冲的后台写回线程
+
+    每个进程（gunicorn worker）一个线程，首次写入缓冲时启动；fork 出的子进程首次写入时
+    先调用 on_fork 丢弃从父进程继承的缓冲（由父进程负责写回），再启动自己的线程。
+    每次写回都在独立的应用上下文（独立的数据库会话）中进行，写回失败时的回滚不影响请求的会话。
+    """
+
+    def __init__(self, name: str, interval: float):
+        """
+        Args:
+            name: 线程名
+            interval: 定期写回的间隔（秒）
+        """
+        self.name = name
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._app: Optional[Flask] = None
+        self._flush: Optional[Callable[[], int]] = None
+
+    def ensure_started(self, flush: Callable[[], int], on_fork: Callable[[], None]) -> None:
+        """
+        启动本进程的写回线程（已启动时直接返回，需在应用上下文中调用）
+
+        Args:
+            flush: 写回函数，在应用上下文中调用，返回写回的条目数
+            on_fork: fork 出的子进程首次启动时调用，丢弃从父进程继承的缓冲
+        """
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+
+        with self._lock:
+            if self._pid == pid:
+                return
+            if self._pid is not None:
+                on_fork()
+            self._app = current_app._get_current_object()
+            self._flush = flush
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._pid = pid
+            self._thread.start()
+
+        atexit.register(self._flush_at_exit)
+
+    def wake(self) -> None:
+        """唤醒写回线程立即写回（缓冲达到阈值时调用）"""
+        self._wakeup.set()
+
+    def flush_now(self) -> int:
+        """
+        在当前线程中立即写回（需在应用上下文中调用）
+
+        使用独立的应用上下文和数据库会话，请求中尚未提交的修改不会被一起提交或回滚。
+
+        Returns:
+            写回的条目数；本进程尚未启动写回线程（没有缓冲）时返回 0
+        """
+        if self._flush is None or self._pid != os.getpid():
+            return 0
+        return self._flush_in_context(current_app._get_current_object())
+
+    def _flush_in_context(self, app: Flask) -> int:
+        """在新的应用上下文中写回，结束后释放会话"""
+        with app.app_context():
+            try:
+                return self._flush()
+            finally:
+                db.session.remove()
+
+    def _run(self) -> None:
+        """后台写回线程"""
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self._flush_in_context(self._app)
+            except Exception as e:
+                logger.warning(f"后台写回失败（{self.name}），稍后重试: {str(e)}")
+
+    def _flush_at_exit(self) -> None:
+        """进程退出前写回剩余缓冲"""
+        if self._app is None or self._pid != os.getpid():
+            return
+        try:
+            self._flush_in_context(self._app)
+        except Exception as e:
+            logger.error(f"退出前写回失败（{self.name}）: {str(e)}")
@@ -3,7 +3,7 @@
 处理投票、提问、弹幕等实时互动事件
 """
 from flask_socketio import emit, join_room, leave_room, rooms
-from flask import request
+from flask import request, session
 from app.extensions import socketio
 import logging
 
@@ -373,12 +373,56 @@ def handle_answer_accepted(data):
 
 # ==================== 弹幕相关事件 ====================
 
+@socketio.on('send_barrage')
+def handle_send_barrage(data):
+    """
+    通过WebSocket发送自由弹幕
+    
+    与 POST /api/v1/barrages/ 相同：校验、过滤后由服务端广播给房间内所有用户（包括发送者），稍后写库。
+    
+    Args:
+        data: {
+            'course_id': int,
+            'content': str,
+            'is_anonymous': bool (可选)
+        }
+    
+    Returns:
+        确认消息 {'success': bool, 'barrage': dict} 或 {'success': False, 'message': str}
+    """
+    from app.exceptions.base import RateLimitError
+    from app.services.barrage_ingest_service import BarrageIngestService
+    
+    user_id = session.get('user_id')
+    if not user_id:
+        return {'success': False, 'message': '请先登录'}
+    
+    course_id = data.get('course_id')
+    content = (data.get('content') or '').strip()
+    if not course_id or not content:
+        return {'success': False, 'message': '缺少必要参数'}
+    if len(content) > 200:
+        return {'success': False, 'message': '弹幕内容不能超过200字'}
+    
+    try:
+        barrage = BarrageIngestService.ingest(
+            user_id, course_id, content, bool(data.get('is_anonymous', False))
+        )
+        return {'success': True, 'barrage': barrage}
+    except (RateLimitError, ValueError) as e:
+        return {'success': False, 'message': str(e)}
+    except Exception as e:
+        logger.error(f"Error sending barrage: {str(e)}")
+        return {'success': False, 'message': '服务器内部错误'}
+
+
 @socketio.on('barrage_sent')
 def handle_barrage_sent(data):
     """
     弹幕发送事件 ⭐ 核心功能
     
-    用户发送弹幕后，实时广播给房间内所有用户
+    用户发送答案弹幕后，实时广播给房间内所有用户。
+    自由弹幕已由服务端在发送时广播，这里不再转发。
     
     Args:
         data: {
@@ -402,6 +446,11 @@ def handle_barrage_sent(data):
             emit('error', {'message': '缺少必要参数'})
             return
         
+        # 判断是否为答案弹幕
+        is_answer = barrage_data.get('question_id') is not None
+        if not is_answer:
+            return
+        
         room = f'course_{course_id}'
         
         # 广播弹幕给所有在线用户（不包括发送者自己，因为发送者前端已经显示了）
@@ -410,11 +459,7 @@ def handle_barrage_sent(data):
             'message': '新弹幕'
         }, room=room, include_self=False)
         
-        # 判断是否为答案弹幕
-        is_answer = barrage_data.get('question_id') is not None
-        barrage_type = '答案弹幕' if is_answer else '自由弹幕'
-        
-        logger.info(f"{barrage_type} sent in room {room}: {barrage_data.get('content')[:20]}...")
+        logger.info(f"答案弹幕 sent in room {room}: {barrage_data.get('content')[:20]}...")
         
     except Exception as e:
         logger.error(f"Error broadcasting barrage: {str(e)}")
@@ -0,0 +1,73 @@
+"""
+资料相关的WebSocket事件推送
+"""
+from app.extensions import socketio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# ==================== 服务端主动推送的函数 ====================
+
+def notify_material_analyzed(user_id, analysis_data):
+    """
+    通知上传者资料后台分析完成
+    
+    Args:
+        user_id: 上传者ID
+        analysis_data: 分析结果（分类建议、关键词、标签建议）
+    """
+    try:
+        logger.info(f"Notifying user {user_id} material analyzed: {analysis_data.get('material_id')}")
+        
+        # 向上传者个人发送
+        socketio.emit('material_analyzed', {
+            'message': '资料分析完成',
+            'analysis': analysis_data
+        }, room=f"user_{user_id}")
+        
+    except Exception as e:
+        logger.error(f"Error notifying material analyzed: {str(e)}")
+
+
+def notify_batch_classification_progress(user_id, job_id, processed, total):
+    """
+    推送批量分类进度
+    
+    Args:
+        user_id: 发起人ID
+        job_id: 任务ID
+        processed: 已处理数
+        total: 总数
+    """
+    try:
+        socketio.emit('batch_classification_progress', {
+            'job_id': job_id,
+            'processed': processed,
+            'total': total
+        }, room=f"user_{user_id}")
+        
+    except Exception as e:
+        logger.error(f"Error notifying batch classification progress: {str(e)}")
+
+
+def notify_batch_classification_completed(user_id, job_id, summary):
+    """
+    通知批量分类完成
+    
+    Args:
+        user_id: 发起人ID
+        job_id: 任务ID
+        summary: 统计结果
+    """
+    try:
+        logger.info(f"Notifying user {user_id} batch classification completed: {job_id}")
+        
+        socketio.emit('batch_classification_completed', {
+            'message': '批量分类完成',
+            'job_id': job_id,
+            'summary': summary
+        }, room=f"user_{user_id}")
+        
+    except Exception as e:
+        logger.error(f"Error notifying batch classification completed: {str(e)}")
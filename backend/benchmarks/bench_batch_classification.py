@@ -0,0 +1,53 @@
+"""
+批量分类基准
+
+对比逐条 predict 与一次 predict_batch 的耗时（分词结果预先算好，只比较预测本身）。
+
+运行方式:
+    python -m benchmarks.bench_batch_classification [--docs 2000]
+"""
+import argparse
+import time
+
+import jieba
+
+from app.intelligence import CategoryClassifier
+from app.intelligence.category_classifier import TrainingItem
+from benchmarks.fixtures import CHINESE_WORDS, random_text
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量分类基准')
+    parser.add_argument('--docs', type=int, default=2000, help='待分类文档数')
+    parser.add_argument('--chars', type=int, default=5000, help='每篇文档字符数')
+    args = parser.parse_args()
+
+    jieba.initialize()
+    classifier = CategoryClassifier()
+    classifier.train([
+        TrainingItem(text=random_text(CHINESE_WORDS[i::3], 2000, seed=j, sep='的'), category_id=i + 1)
+        for i in range(3) for j in range(5)
+    ])
+
+    texts = [random_text(CHINESE_WORDS, args.chars, seed=i, sep='，') for i in range(args.docs)]
+    tokens_list = [list(jieba.cut(text)) for text in texts]
+    keywords_list = [['机器学习', '课程']] * len(texts)
+
+    start = time.perf_counter()
+    single = [classifier.predict(text, keywords, tokens=tokens)
+              for text, keywords, tokens in zip(texts, keywords_list, tokens_list)]
+    single_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = classifier.predict_batch(texts, keywords_list=keywords_list, tokens_list=tokens_list)
+    batch_elapsed = time.perf_counter() - start
+
+    assert [r.category_id for r in single] == [r.category_id for r in batch]
+
+    print(f"文档数: {args.docs}，每篇 {args.chars} 字符")
+    print(f"  逐条 predict:  {single_elapsed * 1000:8.1f} ms")
+    print(f"  predict_batch: {batch_elapsed * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+分片上传基准
+
+模拟上传一个大文件（默认 2 GB，5 MB 分片），对比分片文件 + 合并拼接与定位写入 + 改名两种模式：
+分片写入耗时、合并耗时和写入磁盘的总字节数。
+
+运行方式:
+    python -m benchmarks.bench_chunked_upload [--size-mb 2048] [--chunk-mb 5]
+"""
+import argparse
+import io
+import os
+import shutil
+import tempfile
+import time
+
+from werkzeug.datastructures import FileStorage
+
+
+def run(manager, directory, size, chunk_size, total_chunks, payload, offset_mode):
+    """上传并合并一次，返回 (分片写入耗时, 合并耗时)"""
+    metadata = manager.init_upload('lecture.mp4', size, total_chunks, chunk_size if offset_mode else None)
+    upload_id = metadata['upload_id']
+
+    start = time.perf_counter()
+    for index in range(total_chunks):
+        length = min(chunk_size, size - index * chunk_size)
+        manager.save_chunk(upload_id, index, FileStorage(stream=io.BytesIO(payload[:length])))
+    upload_time = time.perf_counter() - start
+
+    output_path = os.path.join(directory, 'merged.mp4')
+    start = time.perf_counter()
+    assert manager.merge_chunks(upload_id, output_path)
+    merge_time = time.perf_counter() - start
+    assert os.path.getsize(output_path) == size
+    os.remove(output_path)
+    return upload_time, merge_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description='分片上传基准')
+    parser.add_argument('--size-mb', type=int, default=2048, help='文件大小（MB）')
+    parser.add_argument('--chunk-mb', type=int, default=5, help='分片大小（MB）')
+    args = parser.parse_args()
+
+    from app.utils.chunked_upload import ChunkedUploadManager
+
+    size = args.size_mb * 1024 * 1024
+    chunk_size = args.chunk_mb * 1024 * 1024
+    total_chunks = -(-size // chunk_size)
+    payload = os.urandom(chunk_size)
+
+    directory = tempfile.mkdtemp()
+    try:
+        manager = ChunkedUploadManager(os.path.join(directory, 'temp'))
+        print(f"文件大小: {args.size_mb} MB, 分片: {args.chunk_mb} MB x {total_chunks}")
+
+        for name, offset_mode in (('分片文件 + 拼接', False), ('定位写入 + 改名', True)):
+            upload_time, merge_time = run(manager, directory, size, chunk_size, total_chunks, payload, offset_mode)
+            written_mb = args.size_mb if offset_mode else args.size_mb * 2
+            print(f"  {name}: 分片写入 {upload_time:6.2f} s, 合并 {merge_time:6.2f} s, "
+                  f"合计 {upload_time + merge_time:6.2f} s, 写入 {written_mb} MB")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+计数写入基准
+
+多个线程同时对少量热门资料计浏览次数，对比每次读-改-写并提交与经计数缓冲批量写回的
+耗时，以及两种方式最终写入数据库的计数是否等于实际次数。
+
+运行方式:
+    python -m benchmarks.bench_counters [--threads 8] [--views 500]
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description='计数写入基准')
+    parser.add_argument('--threads', type=int, default=8, help='并发线程数')
+    parser.add_argument('--views', type=int, default=500, help='每个线程的浏览次数')
+    parser.add_argument('--materials', type=int, default=5, help='热门资料数')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    os.environ['DEV_DATABASE_URL'] = 'sqlite:///' + os.path.join(directory, 'bench.db')
+
+    from app import create_app
+    from app.extensions import db
+    from app.models import Material
+    from app.utils.counter_buffer import CounterBuffer
+
+    app = create_app('development')
+    with app.app_context():
+        db.create_all()
+        db.session.execute(Material.__table__.insert(), [
+            {'id': i, 'title': f'资料{i}', 'file_name': f'{i}.pdf', 'file_path': 'a.pdf', 'file_size': 1,
+             'file_type': 'document', 'uploader_id': 1}
+            for i in range(1, args.materials + 1)
+        ])
+        db.session.commit()
+
+    def commit_each(worker):
+        with app.app_context():
+            for i in range(args.views):
+                material = Material.query.get((worker + i) % args.materials + 1)
+                material.view_count += 1
+                try:
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+            db.session.remove()
+
+    def buffered(worker):
+        with app.app_context():
+            for i in range(args.views):
+                Material.query.get((worker + i) % args.materials + 1).increment_view_count()
+            db.session.remove()
+
+    expected = args.threads * args.views
+    for name, target in [('逐次提交', commit_each), ('计数缓冲', buffered)]:
+        with app.app_context():
+            db.session.execute(Material.__table__.update().values(view_count=0))
+            db.session.commit()
+
+        threads = [threading.Thread(target=target, args=(worker,)) for worker in range(args.threads)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        with app.app_context():
+            CounterBuffer.flush()
+            elapsed = time.perf_counter() - start
+            total = db.session.query(db.func.sum(Material.view_count)).scalar()
+
+        print(f"  {name}: {elapsed * 1000:8.1f} ms，写入计数 {total} / {expected}")
+
+
+if __name__ == '__main__':
+    main()
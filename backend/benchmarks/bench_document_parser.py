@@ -0,0 +1,63 @@
+"""
+文档解析基准
+
+对比全文解析与按预算流式解析在大文档上的耗时和峰值内存。
+
+运行方式:
+    python -m benchmarks.bench_document_parser [--pages 400]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from app.intelligence.document_parser import DocumentParser
+from app.services.classification_service import PARSE_MAX_CHARS, PARSE_MAX_PAGES
+from benchmarks.fixtures import CHINESE_WORDS, LATIN_WORDS, random_text, write_text_pdf
+
+
+def measure(label: str, func) -> None:
+    """执行一次解析并打印耗时与峰值内存"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"  {label:<28} {elapsed * 1000:9.1f} ms   峰值内存 {peak / 1024 / 1024:7.1f} MB"
+          f"   字符数 {len(result.content):>9}   截断 {result.truncated}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='文档解析基准')
+    parser.add_argument('--pages', type=int, default=400, help='PDF 页数')
+    parser.add_argument('--txt-mb', type=int, default=20, help='文本文件大小（MB）')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_path = os.path.join(temp_dir, 'textbook.pdf')
+        write_text_pdf(pdf_path, [
+            random_text(LATIN_WORDS, 3000, seed=i) for i in range(args.pages)
+        ])
+
+        txt_path = os.path.join(temp_dir, 'notes.txt')
+        with open(txt_path, 'w', encoding='utf-8') as f:
+            chunk = random_text(CHINESE_WORDS, 1024 * 1024 // 3, sep='，')
+            for _ in range(args.txt_mb):
+                f.write(chunk)
+
+        budget = dict(max_pages=PARSE_MAX_PAGES, max_chars=PARSE_MAX_CHARS)
+
+        print(f"PDF: {args.pages} 页, {os.path.getsize(pdf_path) / 1024 / 1024:.1f} MB")
+        measure('全文解析', lambda: DocumentParser.parse(pdf_path))
+        measure(f'预算解析 {budget}', lambda: DocumentParser.parse(pdf_path, **budget))
+
+        print(f"TXT: {os.path.getsize(txt_path) / 1024 / 1024:.1f} MB")
+        measure('全文解析', lambda: DocumentParser.parse(txt_path))
+        measure('预算解析', lambda: DocumentParser.parse(txt_path, **budget))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+关键词统计基准
+
+在临时 SQLite 库中写入大量资料关键词，对比热门关键词的全表聚合与读取 KeywordStat、
+以及按关键词 LIKE 扫描与精确匹配多关键词查找的耗时。
+
+运行方式:
+    python -m benchmarks.bench_keyword_index [--materials 20000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description='关键词统计基准')
+    parser.add_argument('--materials', type=int, default=20000, help='资料数量')
+    parser.add_argument('--repeat', type=int, default=20, help='重复次数')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    os.environ['DEV_DATABASE_URL'] = 'sqlite:///' + os.path.join(directory, 'bench.db')
+
+    from sqlalchemy import func
+    from app import create_app
+    from app.extensions import db
+    from app.models import Material, DocumentKeyword, KeywordStat
+    from benchmarks.fixtures import CHINESE_WORDS
+
+    app = create_app('development')
+    with app.app_context():
+        db.create_all()
+
+        # 词表：常用词加长尾编号词
+        rng = random.Random(0)
+        vocabulary = CHINESE_WORDS + [f"{rng.choice(CHINESE_WORDS)}{i}" for i in range(5000)]
+
+        db.session.execute(Material.__table__.insert(), [
+            {'id': i, 'title': f'资料{i}', 'file_name': 'a.txt', 'file_path': 'a.txt', 'file_size': 1,
+             'file_type': 'document', 'uploader_id': 1}
+            for i in range(1, args.materials + 1)
+        ])
+        rows = []
+        for material_id in range(1, args.materials + 1):
+            for keyword in rng.sample(vocabulary, 10):
+                rows.append({'material_id': material_id, 'keyword': keyword, 'weight': round(rng.random(), 4)})
+        db.session.execute(DocumentKeyword.__table__.insert(), rows)
+        db.session.commit()
+
+        start = time.perf_counter()
+        KeywordStat.rebuild()
+        rebuild = time.perf_counter() - start
+
+        def aggregate():
+            return db.session.query(
+                DocumentKeyword.keyword,
+                func.count(DocumentKeyword.id).label('count'),
+                func.avg(DocumentKeyword.weight).label('avg_weight')
+            ).group_by(DocumentKeyword.keyword).order_by(func.count(DocumentKeyword.id).desc()).limit(20).all()
+
+        def like_scan():
+            return DocumentKeyword.query.filter(DocumentKeyword.keyword.like('%机器学习%')).all()
+
+        print(f"资料数: {args.materials}，关键词行数: {len(rows)}，统计重建: {rebuild * 1000:.1f} ms")
+        for label, func_ in [('热门关键词 全表聚合', aggregate),
+                             ('热门关键词 KeywordStat', lambda: KeywordStat.get_popular(20)),
+                             ('单关键词 LIKE 扫描', like_scan),
+                             ('三关键词 加权精确查找', lambda: DocumentKeyword.search_materials(
+                                 ['机器学习', '课程', '神经网络'], 20))]:
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                func_()
+            elapsed = (time.perf_counter() - start) / args.repeat
+            print(f"  {label}: {elapsed * 1000:8.2f} ms / 次")
+
+
+if __name__ == '__main__':
+    main()
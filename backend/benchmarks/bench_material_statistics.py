@@ -0,0 +1,71 @@
+"""
+资料统计基准
+
+在临时 SQLite 库中写入大量资料，对比每次请求都从数据库统计与从内存快照返回的耗时，
+以及下载事件增量维护快照的开销。
+
+运行方式:
+    python -m benchmarks.bench_material_statistics [--materials 100000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description='资料统计基准')
+    parser.add_argument('--materials', type=int, default=100000, help='资料数量')
+    parser.add_argument('--repeat', type=int, default=20, help='重复次数')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    os.environ['DEV_DATABASE_URL'] = 'sqlite:///' + os.path.join(directory, 'bench.db')
+
+    from app import create_app
+    from app.extensions import db
+    from app.models import Material, MaterialCategory
+    from app.services.material_statistics_service import MaterialStatisticsService
+
+    app = create_app('development')
+    with app.app_context():
+        db.create_all()
+
+        rng = random.Random(0)
+        db.session.add_all(MaterialCategory(id=i, name=f'分类{i}') for i in range(1, 21))
+        db.session.execute(Material.__table__.insert(), [
+            {'id': i, 'title': f'资料{i}', 'file_name': f'{i}.pdf', 'file_path': 'a.pdf',
+             'file_size': rng.randint(1, 10 ** 7), 'file_type': rng.choice(['document', 'image', 'video']),
+             'uploader_id': 1, 'category_id': rng.choice([None] + list(range(1, 21))),
+             'download_count': rng.randint(0, 1000), 'view_count': rng.randint(0, 5000)}
+            for i in range(1, args.materials + 1)
+        ])
+        db.session.commit()
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            MaterialStatisticsService.invalidate()
+            MaterialStatisticsService.get_statistics()
+        rebuild_time = (time.perf_counter() - start) / args.repeat
+
+        start = time.perf_counter()
+        for _ in range(args.repeat * 100):
+            MaterialStatisticsService.get_statistics()
+        cached_time = (time.perf_counter() - start) / (args.repeat * 100)
+
+        materials = Material.query.limit(1000).all()
+        start = time.perf_counter()
+        for material in materials:
+            material.increment_download_count()
+            MaterialStatisticsService.on_material_downloaded(material)
+        event_time = (time.perf_counter() - start) / len(materials)
+
+        print(f"资料数: {args.materials}")
+        print(f"  每次从数据库统计: {rebuild_time * 1000:8.2f} ms")
+        print(f"  从内存快照返回:   {cached_time * 1000:8.3f} ms")
+        print(f"  下载事件维护快照: {event_time * 1000:8.3f} ms / 次")
+
+
+if __name__ == '__main__':
+    main()
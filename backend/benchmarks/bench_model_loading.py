@@ -0,0 +1,100 @@
+"""
+分类模型加载基准
+
+对比旧版 pickle 模型文件与版本存储（joblib + mmap）的冷启动耗时和进程内存。
+每种方式在独立子进程中加载，模拟 worker 冷启动。
+
+运行方式:
+    python -m benchmarks.bench_model_loading [--docs 600]
+"""
+import argparse
+import os
+import pickle
+import random
+import subprocess
+import sys
+import tempfile
+
+from app.intelligence import CategoryClassifier, ModelStore
+from app.intelligence.category_classifier import TrainingItem
+from benchmarks.fixtures import CHINESE_WORDS
+
+# 子进程：加载模型并报告耗时和内存（VmRSS 中 RssAnon 为进程私有，RssFile 可跨进程共享）
+LOADER = '''
+import sys, time
+import jieba
+from app.intelligence import CategoryClassifier
+
+# 分词词典与模型无关，先加载，避免计入模型的耗时和内存
+jieba.initialize()
+
+def rss():
+    fields = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('VmRSS', 'RssAnon', 'RssFile'):
+                fields[key] = int(value.split()[0]) / 1024
+    return fields
+
+before = rss()
+start = time.perf_counter()
+classifier = CategoryClassifier()
+assert classifier.load_model(sys.argv[1], mmap=sys.argv[2] == 'mmap')
+classifier.predict('机器学习 课程 学生')
+elapsed = time.perf_counter() - start
+after = rss()
+print(f"{elapsed * 1000:.1f} " + ' '.join(f"{after[k] - before[k]:.1f}" for k in ('VmRSS', 'RssAnon', 'RssFile')))
+'''
+
+
+def make_training_data(docs: int, seed: int = 0):
+    """生成词表较大的训练数据：中文词加随机编号，模拟真实文档的长尾词"""
+    rng = random.Random(seed)
+    items = []
+    for i in range(docs):
+        category_id = i % 20 + 1
+        words = [f"{rng.choice(CHINESE_WORDS)}{rng.randint(0, 5000)}" for _ in range(800)]
+        items.append(TrainingItem(text=' '.join(words), category_id=category_id))
+    return items
+
+
+def run_loader(path: str, mode: str):
+    output = subprocess.run(
+        [sys.executable, '-c', LOADER, path, mode],
+        capture_output=True, text=True, check=True, cwd=os.getcwd()
+    ).stdout.split()
+    return [float(value) for value in output]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='分类模型加载基准')
+    parser.add_argument('--docs', type=int, default=600, help='训练文档数')
+    args = parser.parse_args()
+
+    classifier = CategoryClassifier()
+    result = classifier.train(make_training_data(args.docs))
+    print(f"训练文档: {args.docs}，{result.message}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        # 旧格式：pickle 整个管道（包含 stop_words_）
+        legacy_path = os.path.join(directory, 'classifier.pkl')
+        with open(legacy_path, 'wb') as f:
+            pickle.dump({'pipeline': classifier._pipeline, 'category_mapping': classifier._category_mapping}, f)
+
+        store = ModelStore(os.path.join(directory, 'store'))
+        store.publish(classifier)
+        _, store_path = store.current()
+
+        print(f"  旧版 pickle 文件: {os.path.getsize(legacy_path) / 1024 / 1024:8.2f} MB")
+        print(f"  版本存储文件:     {os.path.getsize(store_path) / 1024 / 1024:8.2f} MB")
+        print("  方式              冷启动(ms)   RSS增量(MB)  私有(MB)  共享(MB)")
+        for label, path, mode in [('旧版 pickle', legacy_path, 'copy'),
+                                  ('joblib 无 mmap', store_path, 'copy'),
+                                  ('joblib + mmap', store_path, 'mmap')]:
+            elapsed, rss, anon, shared = run_loader(path, mode)
+            print(f"  {label:16s} {elapsed:10.1f} {rss:12.1f} {anon:9.1f} {shared:9.1f}")
+
+
+if __name__ == '__main__':
+    main()
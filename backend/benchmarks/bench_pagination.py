@@ -0,0 +1,75 @@
+"""
+列表分页基准
+
+在临时 SQLite 库中写入大量资料，对比翻到深页时 OFFSET 分页（含 COUNT(*)）
+与游标分页的单页耗时。
+
+运行方式:
+    python -m benchmarks.bench_pagination [--materials 200000]
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def main():
+    parser = argparse.ArgumentParser(description='列表分页基准')
+    parser.add_argument('--materials', type=int, default=200000, help='资料数量')
+    parser.add_argument('--per-page', type=int, default=20, help='每页数量')
+    parser.add_argument('--repeat', type=int, default=20, help='重复次数')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    os.environ['DEV_DATABASE_URL'] = 'sqlite:///' + os.path.join(directory, 'bench.db')
+
+    from app import create_app
+    from app.extensions import db
+    from app.models import Material
+    from app.utils.pagination import encode_cursor, keyset_paginate
+
+    app = create_app('development')
+    with app.app_context():
+        db.create_all()
+
+        # 每 10 份资料共用一个创建时间，模拟批量导入
+        base = datetime(2024, 1, 1)
+        db.session.execute(Material.__table__.insert(), [
+            {'id': i, 'title': f'资料{i}', 'file_name': f'{i}.pdf', 'file_path': 'a.pdf', 'file_size': 1,
+             'file_type': 'document', 'uploader_id': 1, 'created_at': base + timedelta(seconds=i // 10)}
+            for i in range(1, args.materials + 1)
+        ])
+        db.session.commit()
+
+        print(f"资料数: {args.materials}，每页 {args.per_page} 条")
+        total_pages = args.materials // args.per_page
+        for page in [1, total_pages // 10, total_pages // 2, total_pages]:
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                offset = Material.query.order_by(Material.created_at.desc()).paginate(
+                    page=page, per_page=args.per_page, error_out=False
+                ).items
+            offset_time = (time.perf_counter() - start) / args.repeat
+
+            # 用上一页最后一条记录生成游标，等价于从第一页一直翻到这里
+            cursor = ''
+            if page > 1:
+                last = Material.query.order_by(Material.created_at.desc(), Material.id.desc()).offset(
+                    (page - 1) * args.per_page - 1
+                ).first()
+                cursor = encode_cursor('created_at:desc', [last.created_at, last.id])
+
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                keyset = keyset_paginate(
+                    Material.query, Material.created_at, Material.id, cursor, args.per_page
+                )['items']
+            keyset_time = (time.perf_counter() - start) / args.repeat
+
+            assert len(offset) == len(keyset)
+            print(f"  第 {page:6d} 页: OFFSET {offset_time * 1000:8.2f} ms，游标 {keyset_time * 1000:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
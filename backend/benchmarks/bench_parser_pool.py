@@ -0,0 +1,59 @@
+"""
+沙箱解析开销基准
+
+对比进程内解析与沙箱进程池解析同一批文档的耗时，以及子进程冷启动的耗时。
+
+运行方式:
+    python -m benchmarks.bench_parser_pool [--documents 200]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from app.intelligence.document_parser import DocumentParser
+from app.intelligence.parser_pool import ParserPool
+from benchmarks.fixtures import CHINESE_WORDS, LATIN_WORDS, random_text, write_text_pdf
+
+
+def main():
+    parser = argparse.ArgumentParser(description='沙箱解析开销基准')
+    parser.add_argument('--documents', type=int, default=200, help='文档数量')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    paths = []
+    for i in range(args.documents):
+        if i % 2:
+            path = os.path.join(directory, f'doc{i}.pdf')
+            write_text_pdf(path, [random_text(LATIN_WORDS, 2000, seed=i * 10 + page) for page in range(5)])
+        else:
+            path = os.path.join(directory, f'doc{i}.txt')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(random_text(CHINESE_WORDS, 20000, seed=i, sep='，'))
+        paths.append(path)
+
+    start = time.perf_counter()
+    for path in paths:
+        DocumentParser.parse(path, max_pages=50, max_chars=200000)
+    in_process = time.perf_counter() - start
+
+    pool = ParserPool(workers=1)
+    start = time.perf_counter()
+    pool.parse(paths[0], max_pages=50, max_chars=200000)
+    cold_start = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for path in paths:
+        pool.parse(path, max_pages=50, max_chars=200000)
+    sandboxed = time.perf_counter() - start
+    pool.shutdown()
+
+    print(f"文档数: {args.documents}（PDF 与文本各半）")
+    print(f"  进程内解析: {in_process / len(paths) * 1000:8.2f} ms / 份")
+    print(f"  沙箱解析:   {sandboxed / len(paths) * 1000:8.2f} ms / 份")
+    print(f"  子进程冷启动: {cold_start * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
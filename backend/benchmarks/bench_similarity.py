@@ -0,0 +1,70 @@
+"""
+相似资料查询基准
+
+构建大规模 TF-IDF 索引，测量 top-k 查询、增量追加和保存增量文件的耗时。
+
+运行方式:
+    python -m benchmarks.bench_similarity [--docs 20000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from app.intelligence import SimilarityIndex
+from benchmarks.fixtures import CHINESE_WORDS
+
+
+def make_documents(count: int, length: int, seed: int = 0):
+    """用常用词加长尾编号词生成分词结果"""
+    rng = random.Random(seed)
+    for material_id in range(1, count + 1):
+        yield material_id, [f"{rng.choice(CHINESE_WORDS)}{rng.randint(0, 20000)}" for _ in range(length)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='相似资料查询基准')
+    parser.add_argument('--docs', type=int, default=20000, help='资料数量')
+    parser.add_argument('--length', type=int, default=500, help='每份资料的词数')
+    parser.add_argument('--repeat', type=int, default=50, help='重复次数')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = SimilarityIndex.build(make_documents(args.docs, args.length))
+    build = time.perf_counter() - start
+
+    directory = tempfile.mkdtemp()
+    base_path, delta_path = os.path.join(directory, 'base.npz'), os.path.join(directory, 'delta.npz')
+    start = time.perf_counter()
+    index.save(base_path, delta_path, full=True)
+    save_full = time.perf_counter() - start
+
+    start = time.perf_counter()
+    SimilarityIndex.load(base_path, delta_path)
+    load = time.perf_counter() - start
+
+    rng = random.Random(1)
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        index.related(rng.randint(1, args.docs), 10)
+    query = (time.perf_counter() - start) / args.repeat
+
+    extra = list(make_documents(args.repeat, args.length, seed=2))
+    start = time.perf_counter()
+    for material_id, tokens in extra:
+        index.add(args.docs + material_id, tokens)
+        index.save(base_path, delta_path)
+    append = (time.perf_counter() - start) / args.repeat
+
+    _, matrix = index._state
+    print(f"资料数: {args.docs}，矩阵 {matrix.shape}，非零元素 {matrix.nnz}")
+    print(f"  全量构建:          {build * 1000:10.1f} ms")
+    print(f"  保存全量文件:      {save_full * 1000:10.1f} ms ({os.path.getsize(base_path) / 1024 / 1024:.1f} MB)")
+    print(f"  加载:              {load * 1000:10.1f} ms")
+    print(f"  top-10 查询:       {query * 1000:10.2f} ms / 次")
+    print(f"  追加并保存增量:    {append * 1000:10.2f} ms / 次")
+
+
+if __name__ == '__main__':
+    main()
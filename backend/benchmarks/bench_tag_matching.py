@@ -0,0 +1,66 @@
+"""
+标签匹配基准
+
+对比逐个标签比较与 TagIndex 两种方式匹配现有标签的耗时。
+
+运行方式:
+    python -m benchmarks.bench_tag_matching [--tags 10000]
+"""
+import argparse
+import random
+import time
+
+from app.intelligence import TagIndex
+from benchmarks.fixtures import CHINESE_WORDS
+
+
+def make_tag_names(count: int, seed: int = 0):
+    """用词表组合出指定数量、互不相同的标签名"""
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        names.add(''.join(rng.sample(CHINESE_WORDS, rng.randint(1, 3))) + str(rng.randint(0, 99)))
+    return sorted(names)
+
+
+def naive_match(tags, keywords):
+    """原实现：每个标签与每个关键词逐一比较"""
+    matched = {}
+    for tag_id, name in tags:
+        tag_lower = name.lower()
+        for position, keyword in enumerate(keywords):
+            keyword_lower = keyword.lower()
+            if tag_lower == keyword_lower or keyword_lower in tag_lower or tag_lower in keyword_lower:
+                matched[tag_id] = position
+                break
+    return matched
+
+
+def main():
+    parser = argparse.ArgumentParser(description='标签匹配基准')
+    parser.add_argument('--tags', type=int, default=10000, help='标签数量')
+    parser.add_argument('--repeat', type=int, default=20, help='重复次数')
+    args = parser.parse_args()
+
+    tags = list(enumerate(make_tag_names(args.tags), start=1))
+    keywords = ['机器学习', '课程设计', '神经网络算法', '化学', '软件测试', '历史', '数学模型', '编程', '知识', '教学']
+
+    start = time.perf_counter()
+    index = TagIndex(tags)
+    build = time.perf_counter() - start
+
+    assert index.match_keywords(keywords) == naive_match(tags, keywords)
+
+    print(f"标签数量: {len(tags)}，关键词数量: {len(keywords)}")
+    print(f"  构建索引: {build * 1000:8.1f} ms")
+    for label, func in [('逐个比较', lambda: naive_match(tags, keywords)),
+                        ('TagIndex', lambda: index.match_keywords(keywords))]:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            func()
+        elapsed = (time.perf_counter() - start) / args.repeat
+        print(f"  {label}: {elapsed * 1000:8.3f} ms / 次")
+
+
+if __name__ == '__main__':
+    main()
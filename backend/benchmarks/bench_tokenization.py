@@ -0,0 +1,54 @@
+"""
+分词复用基准
+
+对比关键词提取与分类预测各自分词、与共用一次分词两种方式的耗时。
+
+运行方式:
+    python -m benchmarks.bench_tokenization [--chars 200000]
+"""
+import argparse
+import time
+
+import jieba
+
+from app.intelligence import CategoryClassifier, KeywordExtractor
+from app.intelligence.category_classifier import TrainingItem
+from benchmarks.fixtures import CHINESE_WORDS, random_text
+
+
+def main():
+    parser = argparse.ArgumentParser(description='分词复用基准')
+    parser.add_argument('--chars', type=int, default=200000, help='文档字符数')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数')
+    args = parser.parse_args()
+
+    jieba.initialize()
+    extractor = KeywordExtractor()
+    classifier = CategoryClassifier()
+    classifier.train([
+        TrainingItem(text=random_text(CHINESE_WORDS[i::3], 2000, seed=j, sep='的'), category_id=i + 1)
+        for i in range(3) for j in range(5)
+    ])
+
+    text = random_text(CHINESE_WORDS, args.chars, sep='，')
+
+    def separate():
+        keywords = extractor.extract(text)
+        classifier.predict(text, [kw.keyword for kw in keywords])
+
+    def shared():
+        tokens = extractor.segment(text)
+        keywords = extractor.extract(text, tokens=tokens)
+        classifier.predict(text, [kw.keyword for kw in keywords], tokens=tokens)
+
+    print(f"文档长度: {len(text)} 字符")
+    for label, func in [('分别分词', separate), ('共用分词', shared)]:
+        start = time.process_time()
+        for _ in range(args.repeat):
+            func()
+        elapsed = (time.process_time() - start) / args.repeat
+        print(f"  {label}: {elapsed * 1000:8.1f} ms CPU / 次")
+
+
+if __name__ == '__main__':
+    main()
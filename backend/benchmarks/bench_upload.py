@@ -0,0 +1,85 @@
+"""
+上传保存基准
+
+对同一个上传文件，对比原流程（定位到末尾取大小、回读文件头校验魔数、保存、再读一遍计算哈希）
+与单次流式读取保存的耗时和读取字节数。
+
+运行方式:
+    python -m benchmarks.bench_upload [--size-mb 90]
+"""
+import argparse
+import io
+import os
+import shutil
+import tempfile
+import time
+
+from werkzeug.datastructures import FileStorage
+
+
+class CountingFile(io.FileIO):
+    """统计读取字节数的文件"""
+
+    def __init__(self, path):
+        super().__init__(path, 'rb')
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+    def readinto(self, buffer):
+        count = super().readinto(buffer)
+        self.bytes_read += count or 0
+        return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='上传保存基准')
+    parser.add_argument('--size-mb', type=int, default=90, help='文件大小（MB）')
+    args = parser.parse_args()
+
+    from app.utils import file_utils
+    from app.utils.file_security import validate_file_security
+    from app.utils.file_utils import compute_file_hash, save_uploaded_file, stream_uploaded_file, validate_file
+
+    directory = tempfile.mkdtemp()
+    source = os.path.join(directory, 'source.pdf')
+    with open(source, 'wb') as f:
+        f.write(b'%PDF-1.7\n')
+        for _ in range(args.size_mb):
+            f.write(os.urandom(1024 * 1024))
+    file_utils.UPLOAD_TEMP_DIR = os.path.join(directory, 'temp')
+
+    def make_upload():
+        return FileStorage(stream=CountingFile(source), filename='source.pdf', content_type='application/pdf')
+
+    try:
+        file = make_upload()
+        start = time.perf_counter()
+        validate_file(file)
+        validate_file_security(file)
+        saved_path, _, _ = save_uploaded_file(file, os.path.join(directory, 'materials'))
+        compute_file_hash(saved_path)
+        legacy_time = time.perf_counter() - start
+        # 保存后的文件还要完整读一遍计算哈希
+        legacy_read = file.stream.bytes_read + os.path.getsize(saved_path)
+        file.close()
+
+        file = make_upload()
+        start = time.perf_counter()
+        stream_uploaded_file(file)
+        stream_time = time.perf_counter() - start
+        stream_read = file.stream.bytes_read
+        file.close()
+    finally:
+        shutil.rmtree(directory)
+
+    print(f"文件大小: {args.size_mb} MB")
+    print(f"  原流程:   {legacy_time * 1000:8.1f} ms, 读取 {legacy_read / 1024 / 1024:6.1f} MB")
+    print(f"  流式保存: {stream_time * 1000:8.1f} ms, 读取 {stream_read / 1024 / 1024:6.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
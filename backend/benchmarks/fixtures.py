@@ -0,0 +1,67 @@
+"""
+基准测试夹具
+
+生成大体量的测试文件，避免把大文件提交到仓库。
+"""
+import random
+from typing import List
+
+# 生成英文页面文本用的词表（PDF 标准字体不支持中文）
+LATIN_WORDS = [
+    'learning', 'teaching', 'course', 'student', 'algorithm', 'network',
+    'analysis', 'system', 'design', 'model', 'data', 'structure',
+    'physics', 'chemistry', 'history', 'mathematics', 'language', 'program',
+]
+
+# 生成中文文本用的词表
+CHINESE_WORDS = [
+    '机器学习', '深度学习', '人工智能', '神经网络', '数据分析', '教学',
+    '课程', '学生', '教师', '知识', '算法', '模型', '训练', '数学',
+    '物理', '化学', '历史', '编程', '软件', '系统', '设计', '测试',
+]
+
+
+def random_text(words: List[str], length: int, seed: int = 0, sep: str = ' ') -> str:
+    """用词表拼出指定长度左右的文本"""
+    rng = random.Random(seed)
+    parts = []
+    size = 0
+    while size < length:
+        word = rng.choice(words)
+        parts.append(word)
+        size += len(word) + len(sep)
+    return sep.join(parts)
+
+
+def write_text_pdf(path: str, pages: List[str]) -> None:
+    """生成每页包含一段文本的最小 PDF 文件"""
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>', None,
+               b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    page_ids = []
+    for text in pages:
+        # 每 80 个字符换一行，避免单行过长
+        lines = [text[i:i + 80] for i in range(0, len(text), 80)]
+        ops = ' T* '.join(f'({line})Tj' for line in lines)
+        stream = f'BT /F1 10 Tf 12 TL 40 760 Td {ops} ET'.encode('latin-1')
+        objects.append(b'<< /Length %d >>\nstream\n%s\nendstream' % (len(stream), stream))
+        objects.append(
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+            b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % len(objects)
+        )
+        page_ids.append(len(objects))
+    kids = b' '.join(b'%d 0 R' % i for i in page_ids)
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, len(page_ids))
+
+    data = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref_offset = len(data)
+    data += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    data += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    data += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (
+        len(objects) + 1, xref_offset
+    )
+    with open(path, 'wb') as f:
+        f.write(data)
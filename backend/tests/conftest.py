@@ -1,4 +1,6 @@
 import pytest
+from flask import Flask
+
 from app import create_app
 from app.extensions import db
 
@@ -21,3 +23,21 @@ def client(app):
 def runner(app):
     """创建测试运行器"""
     return app.test_cli_runner()
+
+@pytest.fixture
+def db_uri():
+    """db_app 使用的数据库地址，需要多线程各自连接时在测试类中覆盖为文件数据库"""
+    return 'sqlite://'
+
+@pytest.fixture
+def db_app(db_uri):
+    """只初始化数据库的最小应用（默认内存 SQLite），用于服务层和工具类测试"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = db_uri
+    db.init_app(app)
+    
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
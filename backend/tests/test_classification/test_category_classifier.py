@@ -242,3 +242,61 @@ class TestConfidenceThresholdBehavior:
             f"低置信度 ({confidence}) 不应该自动应用"
         assert result.needs_confirmation is False, \
             f"低置信度 ({confidence}) 不应该需要确认"
+
+
+# ============================================================================
+# 属性测试：分词结果复用
+# ============================================================================
+
+class TestSharedTokenization:
+    """分类器复用分词结果测试"""
+
+    @given(training_data=training_data_strategy(), text=chinese_text_strategy())
+    @settings(max_examples=10, deadline=None)
+    def test_predict_with_tokens_matches_predict_with_text(self, training_data, text):
+        """传入分词结果与由分类器自行分词的预测结果应一致"""
+        classifier = CategoryClassifier()
+        assert classifier.train(training_data).success
+
+        keywords = ['机器学习', '课程']
+        tokens = list(jieba.cut(text, cut_all=False))
+
+        from_text = classifier.predict(text, keywords)
+        from_tokens = classifier.predict(text, keywords, tokens=tokens)
+
+        assert from_tokens.category_id == from_text.category_id
+        assert abs(from_tokens.confidence - from_text.confidence) < 1e-9
+
+
+# ============================================================================
+# 属性测试：批量预测
+# ============================================================================
+
+class TestPredictBatch:
+    """批量预测测试"""
+
+    @given(
+        training_data=training_data_strategy(),
+        texts=st.lists(chinese_text_strategy(), min_size=1, max_size=8)
+    )
+    @settings(max_examples=10, deadline=None)
+    def test_predict_batch_matches_predict(self, training_data, texts):
+        """批量预测结果应与逐条预测一致，空文本得到低置信度结果"""
+        classifier = CategoryClassifier()
+        assert classifier.train(training_data).success
+
+        keywords_list = [['机器学习'] if i % 2 else None for i in range(len(texts))]
+        texts = texts + ['']
+        keywords_list = keywords_list + [None]
+
+        batch = classifier.predict_batch(texts, keywords_list=keywords_list)
+
+        assert len(batch) == len(texts)
+        for text, keywords, result in zip(texts[:-1], keywords_list, batch):
+            tokenized = classifier._prepare_text(text, keywords, None)
+            assert result.category_id == classifier._pipeline.predict([tokenized])[0]
+            single = classifier.predict(text, keywords)
+            assert result.category_id == single.category_id
+            assert abs(result.confidence - single.confidence) < 1e-9
+        assert batch[-1].category_id is None
+        assert batch[-1].confidence == 0.0
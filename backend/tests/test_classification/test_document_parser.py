@@ -11,6 +11,7 @@ from datetime import datetime
 from hypothesis import given, strategies as st, settings, assume
 
 from app.intelligence.document_parser import ParseResult, DocumentParser
+from benchmarks.fixtures import write_text_pdf
 
 
 # 自定义策略：生成有效的 ParseResult 对象
@@ -189,3 +190,79 @@ class TestDocumentParsingRoundTrip:
             # 清理临时文件
             if os.path.exists(temp_path):
                 os.unlink(temp_path)
+
+
+class TestStreamingParse:
+    """流式解析与预算截断测试"""
+
+    @given(
+        content=valid_text_content_strategy(),
+        max_chars=st.integers(min_value=1, max_value=600)
+    )
+    @settings(max_examples=50, deadline=None)
+    def test_txt_char_budget_returns_prefix(self, content: str, max_chars: int):
+        """字符预算下，解析结果应为原文前缀，且仅在原文超出预算时标记截断"""
+        with tempfile.NamedTemporaryFile(
+            mode='w', suffix='.txt', encoding='utf-8', delete=False
+        ) as f:
+            f.write(content)
+            temp_path = f.name
+
+        try:
+            result = DocumentParser.parse(temp_path, max_chars=max_chars)
+
+            assert result.success, f"解析失败: {result.error_message}"
+            if result.content:
+                assert content.startswith(result.content)
+            assert len(result.content) <= max_chars
+            assert result.truncated == (len(content) >= max_chars)
+        finally:
+            os.unlink(temp_path)
+
+    def test_pdf_page_budget_stops_early(self):
+        """页数预算下只读取前 N 页，并标记截断"""
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as f:
+            temp_path = f.name
+
+        try:
+            write_text_pdf(temp_path, [f'Page{i}' for i in range(10)])
+
+            full = DocumentParser.parse(temp_path)
+            assert full.success and not full.truncated
+            assert all(f'Page{i}' in full.content for i in range(10))
+
+            limited = DocumentParser.parse(temp_path, max_pages=3)
+            assert limited.success and limited.truncated
+            assert 'Page2' in limited.content
+            assert 'Page3' not in limited.content
+
+            segments = list(DocumentParser.stream(temp_path, max_pages=20))
+            assert len(segments) == 10
+        finally:
+            os.unlink(temp_path)
+
+    def test_docx_stream_yields_paragraphs(self):
+        """Word 文档按段落流式产出"""
+        try:
+            from docx import Document
+        except ImportError:
+            pytest.skip("python-docx 未安装")
+
+        with tempfile.NamedTemporaryFile(suffix='.docx', delete=False) as f:
+            temp_path = f.name
+
+        try:
+            doc = Document()
+            for i in range(5):
+                doc.add_paragraph(f'第{i}段 教学资料内容')
+            doc.save(temp_path)
+
+            stream = DocumentParser.stream(temp_path)
+            assert list(stream) == [f'第{i}段 教学资料内容' for i in range(5)]
+            assert not stream.truncated
+
+            stream = DocumentParser.stream(temp_path, max_chars=15)
+            assert ''.join(stream) == '第0段 教学资料内容第1段 教'
+            assert stream.truncated
+        finally:
+            os.unlink(temp_path)
@@ -0,0 +1,77 @@
+"""
+文档指纹属性测试
+
+使用 hypothesis 进行属性测试，验证 SimHash 指纹和 LSH 分段的正确性。
+"""
+
+from hypothesis import given, strategies as st, settings
+
+from app.intelligence.fingerprint import (
+    SIMHASH_BANDS,
+    SIMHASH_BITS,
+    DUPLICATE_MAX_DISTANCE,
+    simhash,
+    hamming_distance,
+    split_bands
+)
+
+
+WORDS = ['机器学习', '深度学习', '神经网络', '算法', '模型', '教学', '课程', '学生', '考试', '编程',
+         '数据', '分析', '系统', '设计', '测试', '物理', '化学', '历史', '数学', '软件']
+
+fingerprint_strategy = st.integers(min_value=0, max_value=(1 << SIMHASH_BITS) - 1)
+
+
+class TestSimHash:
+    """SimHash 指纹测试"""
+
+    @given(tokens=st.lists(st.sampled_from(WORDS), min_size=1, max_size=200))
+    @settings(max_examples=100, deadline=None)
+    def test_order_independent(self, tokens):
+        """指纹只取决于词频，与词序无关，且在 64 位范围内"""
+        fingerprint = simhash(tokens)
+
+        assert 0 <= fingerprint < 1 << SIMHASH_BITS
+        assert simhash(list(reversed(tokens))) == fingerprint
+        assert simhash(sorted(tokens)) == fingerprint
+
+    @given(
+        tokens=st.lists(st.sampled_from(WORDS), min_size=1, max_size=200),
+        times=st.integers(min_value=2, max_value=5)
+    )
+    @settings(max_examples=100, deadline=None)
+    def test_repeated_content_same_fingerprint(self, tokens, times):
+        """内容重复多遍（词频等比例放大）时指纹不变"""
+        assert simhash(tokens * times) == simhash(tokens)
+
+    def test_empty_tokens(self):
+        """没有词时指纹为 0"""
+        assert simhash([]) == 0
+
+
+class TestBands:
+    """LSH 分段测试"""
+
+    @given(fingerprint=fingerprint_strategy)
+    @settings(max_examples=100, deadline=None)
+    def test_bands_reassemble(self, fingerprint):
+        """各分段拼回后应等于原指纹"""
+        bands = split_bands(fingerprint)
+        width = SIMHASH_BITS // SIMHASH_BANDS
+
+        assert len(bands) == SIMHASH_BANDS
+        assert sum(band << (i * width) for i, band in enumerate(bands)) == fingerprint
+
+    @given(
+        fingerprint=fingerprint_strategy,
+        flips=st.sets(st.integers(min_value=0, max_value=SIMHASH_BITS - 1), max_size=DUPLICATE_MAX_DISTANCE)
+    )
+    @settings(max_examples=200, deadline=None)
+    def test_near_fingerprints_share_band(self, fingerprint, flips):
+        """海明距离不超过阈值的两个指纹至少有一段相同（按分段查候选不会漏掉）"""
+        other = fingerprint
+        for bit in flips:
+            other ^= 1 << bit
+
+        assert hamming_distance(fingerprint, other) == len(flips)
+        assert any(a == b for a, b in zip(split_bands(fingerprint), split_bands(other)))
@@ -157,3 +157,30 @@ class TestKeywordStopWordFiltering:
             # 验证不是停用词
             assert kw.keyword not in stop_words, \
                 f"关键词是停用词: {kw.keyword!r}"
+
+
+class TestSharedTokenization:
+    """分词结果复用测试"""
+
+    @given(text=chinese_text_strategy(), top_n=top_n_strategy())
+    @settings(max_examples=100, deadline=None)
+    def test_extract_with_tokens_matches_jieba_extract_tags(self, text: str, top_n: int):
+        """
+        传入预先分好的词时，结果应与直接提取一致，
+        且与 jieba.analyse.extract_tags 的排序和权重一致。
+        """
+        import jieba.analyse
+
+        extractor = KeywordExtractor()
+        tokens = extractor.segment(text)
+
+        from_tokens = extractor.extract(text, top_n=top_n, tokens=tokens)
+        from_text = extractor.extract(text, top_n=top_n)
+        assert from_tokens == from_text
+
+        expected = [
+            (keyword, min(1.0, max(0.0, float(weight))))
+            for keyword, weight in jieba.analyse.extract_tags(text, topK=top_n * 2, withWeight=True)
+            if not extractor._should_filter(keyword)
+        ][:top_n]
+        assert [(kw.keyword, kw.weight) for kw in from_tokens] == expected
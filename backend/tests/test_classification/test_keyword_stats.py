@@ -0,0 +1,64 @@
+"""
+关键词统计测试
+
+验证关键词统计的增量更新、并发插入同一关键词时不回滚整批更新，以及从资料关键词全量重建。
+"""
+
+from sqlalchemy.orm import Query
+
+from app.extensions import db
+from app.models import DocumentKeyword, KeywordStat
+
+
+def stats():
+    return {
+        row.keyword: (row.material_count, float(row.total_weight))
+        for row in KeywordStat.query.all()
+    }
+
+
+def test_apply_change(db_app):
+    """新增、移除关键词后计数和权重之和正确"""
+    KeywordStat.apply_change([], [('机器学习', 0.5), ('算法', 0.25)])
+    KeywordStat.apply_change([('算法', 0.25)], [('机器学习', 0.25)])
+    db.session.commit()
+
+    assert stats() == {'机器学习': (2, 0.75), '算法': (0, 0.0)}
+
+
+def test_concurrent_insert_retries_update(db_app, monkeypatch):
+    """其他进程在更新与插入之间插入了同一关键词时改为更新，同批其他关键词不受影响"""
+    db.session.add(KeywordStat(keyword='机器学习', material_count=1, total_weight=0.5))
+    db.session.commit()
+
+    update = Query.update
+    calls = []
+
+    def racing_update(self, values, **kwargs):
+        # 第一次更新模拟“行还不存在”，之后照常执行
+        calls.append(1)
+        if len(calls) == 1:
+            return 0
+        return update(self, values, **kwargs)
+
+    monkeypatch.setattr(Query, 'update', racing_update)
+    KeywordStat.apply_change([], [('机器学习', 0.25), ('算法', 0.5)])
+    db.session.commit()
+
+    assert stats() == {'机器学习': (2, 0.75), '算法': (1, 0.5)}
+
+
+def test_rebuild(db_app):
+    """热门关键词只读取统计；重建后计入已有资料的关键词并清除误差"""
+    db.session.add_all([
+        DocumentKeyword(material_id=1, keyword='机器学习', weight=0.5),
+        DocumentKeyword(material_id=2, keyword='机器学习', weight=0.25),
+        DocumentKeyword(material_id=2, keyword='算法', weight=0.5),
+    ])
+    db.session.add(KeywordStat(keyword='过时', material_count=3, total_weight=1))
+    db.session.commit()
+
+    assert [row.keyword for row in DocumentKeyword.get_popular_keywords()] == ['过时']
+
+    assert KeywordStat.rebuild() == 2
+    assert stats() == {'机器学习': (2, 0.75), '算法': (1, 0.5)}
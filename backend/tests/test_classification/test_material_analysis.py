@@ -0,0 +1,276 @@
+"""
+资料后台分析测试
+
+验证上传后提交后台分析、分析期间分类接口返回 pending、
+分析结果写入 DocumentKeyword / ClassificationLog，以及完成后向上传者推送通知；
+批量分类接口提交后台任务，按批推送进度，完成后推送统计结果；
+相似资料索引从保存的内容词重建，并在单独的线程中合并执行。
+"""
+
+import threading
+
+import pytest
+from flask import session
+
+from app.api.material_api import ClassificationAPI
+from app.extensions import db
+from app.intelligence import ClassificationResult
+from app.models import ClassificationLog, DocumentKeyword, DocumentTerms, Material, MaterialCategory
+from app.schemas.classification_schemas import BatchClassifyBodyModel, MaterialClassifyPathModel
+from app.services import classification_service
+from app.services.classification_service import ClassificationService
+from app.websocket import material_events
+
+
+class RecordingSocketIO:
+    """记录广播的 socketio 替身"""
+
+    def __init__(self):
+        self.emitted = []
+
+    def emit(self, event, data, room=None):
+        self.emitted.append((event, data, room))
+
+
+class StubClassifier:
+    """固定给出"需要确认"分类建议的分类器替身"""
+
+    def predict(self, text, keywords=None, tokens=None):
+        return ClassificationResult.from_confidence(0.4, category_id=1, category_name='计算机')
+
+    def predict_batch(self, texts, keywords_list=None, tokens_list=None):
+        return [self.predict(text) for text in texts]
+
+
+@pytest.fixture
+def analysis_app(db_app, tmp_path, monkeypatch):
+    """含一个分类的数据库；分析线程池、索引文件和广播都与其他测试隔离"""
+    monkeypatch.setattr(material_events, 'socketio', RecordingSocketIO())
+    monkeypatch.setattr(ClassificationService, '_analysis_executor', None)
+    monkeypatch.setattr(ClassificationService, '_pending_analyses', set())
+    monkeypatch.setattr(ClassificationService, '_classifier', StubClassifier())
+    monkeypatch.setattr(ClassificationService, '_get_classifier', classmethod(lambda cls: cls._classifier))
+    monkeypatch.setattr(ClassificationService, '_similarity_index', None)
+    monkeypatch.setattr(ClassificationService, '_similarity_stamp', None)
+    monkeypatch.setattr(ClassificationService, '_similarity_executor', None)
+    monkeypatch.setattr(ClassificationService, '_similarity_rebuilding', False)
+    monkeypatch.setattr(ClassificationService, '_similarity_rebuild_requested', False)
+    monkeypatch.setattr(classification_service, 'SIMILARITY_BASE_PATH', str(tmp_path / 'similarity-base.npz'))
+    monkeypatch.setattr(classification_service, 'SIMILARITY_DELTA_PATH', str(tmp_path / 'similarity-delta.npz'))
+
+    db_app.secret_key = 'test'
+
+    db.session.add(MaterialCategory(id=1, name='计算机'))
+    db.session.commit()
+    return db_app
+
+
+def add_material(tmp_path, material_id, text='机器学习是人工智能的一个分支。深度学习使用神经网络。\n' * 50):
+    path = tmp_path / f'{material_id}.txt'
+    path.write_text(text, encoding='utf-8')
+    material = Material(
+        id=material_id, title='讲义', file_name=path.name, file_path=str(path),
+        file_size=path.stat().st_size, file_type='txt', uploader_id=7
+    )
+    db.session.add(material)
+    db.session.commit()
+    return material
+
+
+def wait_for_analyses():
+    ClassificationService._analysis_executor.shutdown(wait=True)
+    wait_for_similarity_rebuild()
+
+
+def wait_for_similarity_rebuild():
+    if ClassificationService._similarity_executor is not None:
+        ClassificationService._similarity_executor.shutdown(wait=True)
+
+
+def call_api(app, view, role='TEACHER', **kwargs):
+    """以用户 7 的身份调用接口，返回 (响应体, 状态码)"""
+    with app.test_request_context():
+        session['user_id'] = 7
+        session['role'] = role
+        body, status = view(**kwargs)
+        return (body if isinstance(body, dict) else body.get_json()), status
+
+
+def classify(app, material_id):
+    """调用分类接口，返回响应数据"""
+    body, status = call_api(
+        app, ClassificationAPI.classify_material, path=MaterialClassifyPathModel(material_id=material_id)
+    )
+    assert status == 200
+    return body['data']
+
+
+def classify_batch(app, material_ids=None, role='TEACHER'):
+    """调用批量分类接口"""
+    return call_api(
+        app, ClassificationAPI.classify_batch, role=role, body=BatchClassifyBodyModel(material_ids=material_ids)
+    )
+
+
+def test_unsupported_file_not_scheduled(analysis_app, tmp_path):
+    """不支持解析的文件类型不提交后台分析"""
+    material = add_material(tmp_path, 1)
+    material.file_path = str(tmp_path / 'lecture.mp4')
+
+    assert not ClassificationService.schedule_analysis(material)
+    assert ClassificationService._analysis_executor is None
+
+
+def test_analysis_results_stored_and_notified(analysis_app, tmp_path):
+    """后台分析保存关键词和分类日志，完成后向上传者的房间推送结果"""
+    material = add_material(tmp_path, 1)
+
+    assert ClassificationService.schedule_analysis(material)
+    wait_for_analyses()
+
+    keywords = {row.keyword for row in DocumentKeyword.get_by_material(1)}
+    assert {'机器学习', '神经网络'} & keywords
+    log = ClassificationLog.query.filter_by(material_id=1).one()
+    assert log.suggested_category_id == 1 and not log.is_accepted
+
+    [(event, data, room)] = material_events.socketio.emitted
+    assert (event, room) == ('material_analyzed', 'user_7')
+    analysis = data['analysis']
+    assert (analysis['material_id'], analysis['log_id']) == (1, log.id)
+    assert analysis['needs_confirmation']
+    assert 'tag_suggestions' in analysis
+
+    # 分析完成后分类接口直接读取保存的结果
+    assert not ClassificationService.is_analysis_pending(1)
+    result = classify(analysis_app, 1)
+    assert not result['pending']
+    assert result['logId'] == log.id
+    assert {kw['keyword'] for kw in result['keywords']} == keywords
+
+
+def test_pending_while_analysis_runs(analysis_app, tmp_path, monkeypatch):
+    """分析进行中分类接口返回 pending，同一资料不重复提交；失败时推送错误"""
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def blocking_classify(material_id):
+        calls.append(material_id)
+        started.set()
+        release.wait(5)
+        raise RuntimeError('解析进程异常退出')
+
+    monkeypatch.setattr(ClassificationService, 'classify_material', staticmethod(blocking_classify))
+    material = add_material(tmp_path, 1)
+
+    assert ClassificationService.schedule_analysis(material)
+    assert started.wait(5)
+    assert ClassificationService.schedule_analysis(material)
+    assert ClassificationService.is_analysis_pending(1)
+    assert classify(analysis_app, 1)['pending']
+
+    release.set()
+    wait_for_analyses()
+
+    assert calls == [1]
+    assert not ClassificationService.is_analysis_pending(1)
+    assert material_events.socketio.emitted == [(
+        'material_analyzed',
+        {'message': '资料分析完成', 'analysis': {'material_id': 1, 'error': '资料分析失败'}},
+        'user_7'
+    )]
+
+
+def test_classify_batch_job(analysis_app, tmp_path):
+    """批量分类去重后提交后台任务，推送进度和统计；不存在的资料计为失败"""
+    for material_id in (1, 2):
+        add_material(tmp_path, material_id)
+
+    body, status = classify_batch(analysis_app, [2, 1, 2, 99])
+    assert status == 202
+    assert body['data']['total'] == 3
+    job_id = body['data']['jobId']
+    wait_for_analyses()
+
+    assert material_events.socketio.emitted == [
+        ('batch_classification_progress', {'job_id': job_id, 'processed': 3, 'total': 3}, 'user_7'),
+        ('batch_classification_completed', {
+            'message': '批量分类完成',
+            'job_id': job_id,
+            'summary': {'total': 3, 'classified': 2, 'auto_applied': 0, 'failed': 1}
+        }, 'user_7'),
+    ]
+    logs = ClassificationLog.query.order_by(ClassificationLog.material_id).all()
+    assert [(log.material_id, log.suggested_category_id, log.original_category_id) for log in logs] == \
+        [(1, 1, None), (2, 1, None)]
+    assert DocumentKeyword.query.filter_by(material_id=2).count() > 0
+
+
+def test_classify_batch_defaults_to_unclassified(analysis_app, tmp_path):
+    """不传资料 ID 时分类全部未分类资料，没有时返回 400；学生无权批量分类"""
+    add_material(tmp_path, 1).category_id = 1
+    add_material(tmp_path, 2)
+    db.session.commit()
+
+    body, status = classify_batch(analysis_app)
+    assert (status, body['data']['total']) == (202, 1)
+    wait_for_analyses()
+    assert [log.material_id for log in ClassificationLog.query] == [2]
+
+    assert classify_batch(analysis_app, [])[1] == 400
+    assert classify_batch(analysis_app, [1], role='STUDENT')[1] == 403
+
+
+def test_batch_progress_per_chunk(analysis_app, tmp_path):
+    """每批完成后回调一次进度"""
+    for material_id in (1, 2, 3):
+        add_material(tmp_path, material_id)
+    progress = []
+
+    summary = ClassificationService.classify_materials(
+        [1, 2, 3], chunk_size=2, progress_callback=lambda processed, total: progress.append((processed, total))
+    )
+
+    assert progress == [(2, 3), (3, 3)]
+    assert summary == {'total': 3, 'classified': 3, 'auto_applied': 0, 'failed': 0}
+
+
+def test_similarity_rebuilt_from_stored_terms(analysis_app, tmp_path, monkeypatch):
+    """分析时保存内容词，首次分析后构建相似资料索引；重建不再解析文档"""
+    for material_id in (1, 2):
+        add_material(tmp_path, material_id)
+    ClassificationService.classify_materials([1, 2])
+    wait_for_similarity_rebuild()
+
+    assert {'人工智能', '神经网络'} <= set(DocumentTerms.query.filter_by(material_id=1).one().get_terms())
+    assert [item['id'] for item in ClassificationService.get_related_materials(1)] == [2]
+
+    monkeypatch.setattr(
+        ClassificationService, '_parse_document', classmethod(lambda cls, path: pytest.fail('重建不应解析文档'))
+    )
+    assert ClassificationService.rebuild_similarity_index() == 2
+
+
+def test_similarity_rebuilds_coalesced(analysis_app, monkeypatch):
+    """尚无索引时的追加都提交重建；重建在单独线程中执行，期间的请求合并为一次"""
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def blocking_rebuild():
+        calls.append(len(calls))
+        started.set()
+        release.wait(5)
+        return 0
+
+    monkeypatch.setattr(ClassificationService, 'rebuild_similarity_index', staticmethod(blocking_rebuild))
+
+    ClassificationService._index_similarity(1, ['机器学习'])
+    assert started.wait(5)
+    for material_id in (2, 3, 4):
+        ClassificationService._index_similarity(material_id, ['神经网络'])
+    release.set()
+    wait_for_similarity_rebuild()
+
+    assert calls == [0, 1]
+    assert not ClassificationService._similarity_rebuilding
+    assert ClassificationService._similarity_executor._max_workers == 1
+    assert ClassificationService._analysis_executor is None
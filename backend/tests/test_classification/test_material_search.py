@@ -0,0 +1,191 @@
+"""
+资料全文检索测试
+
+验证检索词切分、FTS5 查询表达式的构造，索引与资料表的同步，以及只在全文索引出错时回退到 LIKE 查询。
+"""
+
+import sqlite3
+
+import pytest
+from flask import Flask
+from hypothesis import given, strategies as st, settings
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.extensions import db
+from app.models import DocumentKeyword, Material
+from app.services.material_search_service import FTS_TABLE, MaterialSearchService
+from app.services.material_service import MaterialService
+
+# 预先初始化 jieba，避免首次加载时超时
+import jieba
+jieba.initialize()
+
+
+def fts5_available():
+    try:
+        sqlite3.connect(':memory:').execute('CREATE VIRTUAL TABLE t USING fts5(a)')
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+class TestSegment:
+    """检索词切分测试"""
+
+    def test_long_words_expanded(self):
+        """长词额外拆出其中的词典词，与 jieba 搜索引擎模式一致"""
+        text = '机器学习和自然语言处理'
+
+        assert sorted(MaterialSearchService.segment(text).split()) == sorted(
+            word for word in jieba.cut_for_search(text) if word.strip()
+        )
+
+    def test_empty(self):
+        """空文本切分为空字符串"""
+        assert MaterialSearchService.segment(None) == ''
+        assert MaterialSearchService.segment('') == ''
+
+
+class TestMatchQuery:
+    """FTS5 查询表达式测试"""
+
+    def test_terms_quoted_and_latin_prefix(self):
+        """每个词带引号，英文、数字词按前缀匹配"""
+        assert MaterialSearchService.build_match_query('数学 algo') == '"数学" "algo"*'
+        assert MaterialSearchService.build_match_query('say "hi"') == '"say"* "hi"*'
+
+    def test_no_terms(self):
+        """只有标点或空白时没有有效检索词"""
+        assert MaterialSearchService.build_match_query(' ，。!') is None
+
+    @pytest.mark.skipif(not fts5_available(), reason='SQLite 未编译 FTS5')
+    @given(keyword=st.text(min_size=1, max_size=30))
+    @settings(max_examples=200, deadline=None)
+    def test_any_input_is_valid_syntax(self, keyword):
+        """任意用户输入构造的表达式都不会产生 FTS5 语法错误"""
+        match_query = MaterialSearchService.build_match_query(keyword)
+        if match_query is None:
+            return
+
+        connection = sqlite3.connect(':memory:')
+        connection.execute('CREATE VIRTUAL TABLE t USING fts5(a)')
+        connection.execute('INSERT INTO t VALUES (?)', ('机器 学习 机器学习 algorithm',))
+        connection.execute('SELECT rowid FROM t WHERE t MATCH ?', (match_query,)).fetchall()
+
+
+def add_material(material_id, title, description=None):
+    material = Material(
+        id=material_id, title=title, description=description, file_name=f'{material_id}.pdf',
+        file_path=f'{material_id}.pdf', file_size=1, file_type='document', uploader_id=1
+    )
+    db.session.add(material)
+    db.session.commit()
+    MaterialSearchService.index_material(material)
+    return material
+
+
+def search_ids(keyword):
+    return sorted(material.id for material in MaterialService.search_materials(keyword)['materials'])
+
+
+def list_ids(keyword):
+    return sorted(material.id for material in MaterialService.get_materials(search=keyword)['materials'])
+
+
+@pytest.mark.skipif(not fts5_available(), reason='SQLite 未编译 FTS5')
+class TestMaterialSearchIndex:
+    """全文索引与资料表同步测试"""
+
+    def test_index_follows_material_changes(self, db_app):
+        """创建、修改、写入正文、删除后检索结果随之变化"""
+        material = add_material(1, '机器学习导论')
+        add_material(2, '数据结构', '课程大纲')
+
+        assert search_ids('机器学习') == [1]
+        assert list_ids('课程') == [2]
+
+        material.title = '线性代数'
+        db.session.commit()
+        MaterialSearchService.index_material(material)
+        assert search_ids('机器学习') == []
+        assert search_ids('线性代数') == [1]
+
+        MaterialSearchService.index_content(2, ['神经网络', '训练'])
+        assert search_ids('神经网络') == [2]
+
+        MaterialSearchService.remove_material(2)
+        assert search_ids('数据结构') == []
+
+    def test_separate_databases_with_same_url(self, db_app):
+        """两个应用使用相同地址的不同内存库时各自建表"""
+        add_material(1, '机器学习导论')
+        assert search_ids('机器学习') == [1]
+
+        other = Flask(__name__)
+        other.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(other)
+        with other.app_context():
+            db.create_all()
+            add_material(7, '机器学习实践')
+            assert search_ids('机器学习') == [7]
+            db.session.remove()
+
+    def test_drop_all_removes_index(self, db_app):
+        """drop_all 后重新建表，旧资料的索引行不会命中新资料"""
+        add_material(1, '机器学习导论')
+        assert search_ids('机器学习') == [1]
+
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+        add_material(1, '数据结构')
+
+        assert search_ids('机器学习') == []
+        assert search_ids('数据结构') == [1]
+
+    def test_missing_table_falls_back_to_like(self, db_app):
+        """索引表在使用中被删除时改用 LIKE 查询，之后重新建表"""
+        add_material(1, '机器学习导论')
+        assert search_ids('机器学习') == [1]
+
+        db.session.execute(text(f"DROP TABLE {FTS_TABLE}"))
+        db.session.commit()
+
+        assert search_ids('机器学习') == [1]
+        assert list_ids('机器学习') == [1]
+        assert MaterialSearchService.match_subquery('机器学习') is not None
+        assert search_ids('机器学习') == [1]
+
+    def test_single_character_uses_like(self, db_app):
+        """单字搜索词不在索引的整词中，使用 LIKE 子串匹配"""
+        add_material(1, '机器学习导论')
+
+        assert MaterialSearchService.match_subquery('学') is None
+        assert search_ids('学') == [1]
+        assert list_ids('学') == [1]
+
+    def test_failed_content_write_keeps_transaction(self, db_app, monkeypatch):
+        """正文写入失败时只撤销索引的删除和写入，保留原索引行和调用方未提交的修改"""
+        add_material(1, '机器学习导论')
+        MaterialSearchService.index_content(1, ['神经网络'])
+
+        db.session.add(DocumentKeyword(material_id=1, keyword='深度学习', weight=0.5))
+        monkeypatch.setattr(MaterialSearchService, '_join_terms', staticmethod(lambda words: {}))
+        MaterialSearchService.index_content(1, ['卷积'], commit=False)
+        db.session.commit()
+
+        assert DocumentKeyword.query.filter_by(material_id=1).count() == 1
+        assert search_ids('神经网络') == [1]
+
+    def test_other_errors_not_hidden(self, db_app):
+        """全文索引以外的数据库错误照常抛出，不改用 LIKE 查询"""
+        calls = []
+
+        def run(use_fts):
+            calls.append(use_fts)
+            raise OperationalError('SELECT 1', {}, sqlite3.OperationalError('database is locked'))
+
+        with pytest.raises(OperationalError, match='database is locked'):
+            MaterialSearchService.with_fallback(run)
+        assert calls == [True]
@@ -0,0 +1,77 @@
+"""
+模型版本存储测试
+
+验证模型发布、版本切换和旧版本清理。
+"""
+
+import os
+
+import pytest
+
+from app.intelligence.category_classifier import CategoryClassifier, TrainingItem
+from app.intelligence.model_store import ModelStore, KEEP_OLD_VERSIONS
+
+# 预先初始化 jieba，避免首次加载时超时
+import jieba
+jieba.initialize()
+
+
+CATEGORY_WORDS = {
+    1: ['机器学习', '深度学习', '人工智能', '神经网络', '算法', '模型'],
+    2: ['教学', '课程', '学生', '教师', '知识', '考试'],
+}
+
+
+@pytest.fixture(scope="module")
+def trained_classifier():
+    """训练好的分类器"""
+    training_data = [
+        TrainingItem(text=' '.join(words[i:] + words[:i]), category_id=category_id)
+        for category_id, words in CATEGORY_WORDS.items()
+        for i in range(len(words))
+    ]
+    classifier = CategoryClassifier()
+    assert classifier.train(training_data, {1: '人工智能', 2: '教育'}).success
+    return classifier
+
+
+class TestModelStore:
+    """模型版本存储测试"""
+
+    def test_empty_store_has_no_version(self, tmp_path):
+        """尚未发布时没有当前版本"""
+        store = ModelStore(str(tmp_path / 'classifier'))
+
+        assert store.stamp() is None
+        assert store.current() is None
+
+    def test_published_model_predicts_same_as_original(self, tmp_path, trained_classifier):
+        """发布后以 mmap 方式加载的模型预测结果应与原模型一致"""
+        store = ModelStore(str(tmp_path))
+
+        version = store.publish(trained_classifier)
+        current_version, path = store.current()
+        loaded = store.load(path)
+
+        assert current_version == version
+        assert loaded.is_trained
+        text = '神经网络 算法 模型 课程'
+        expected = trained_classifier.predict(text)
+        actual = loaded.predict(text)
+        assert actual.category_id == expected.category_id
+        assert abs(actual.confidence - expected.confidence) < 1e-9
+        assert loaded.get_category_name(1) == '人工智能'
+
+    def test_publish_changes_stamp_and_prunes_old_versions(self, tmp_path, trained_classifier):
+        """每次发布都会改变清单状态，并只保留有限的历史版本"""
+        store = ModelStore(str(tmp_path))
+
+        stamps = []
+        for _ in range(KEEP_OLD_VERSIONS + 3):
+            store.publish(trained_classifier)
+            stamps.append(store.stamp())
+
+        assert len(set(stamps)) == len(stamps)
+        model_files = [name for name in os.listdir(tmp_path) if name.endswith('.joblib')]
+        assert len(model_files) == KEEP_OLD_VERSIONS + 1
+        assert os.path.basename(store.current()[1]) in model_files
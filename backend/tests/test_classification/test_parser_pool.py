@@ -0,0 +1,147 @@
+"""
+沙箱解析进程池测试
+
+验证子进程解析结果与进程内解析一致，以及超时、CPU 时间超限、内存超限和子进程回收。
+"""
+
+import os
+import textwrap
+
+import pytest
+
+from app.intelligence.document_parser import DocumentParser
+from app.intelligence import parser_pool
+from app.intelligence.parser_pool import (
+    ParserPool,
+    ERROR_CPU_LIMIT,
+    ERROR_MEMORY_LIMIT,
+    ERROR_TIMEOUT,
+)
+
+
+@pytest.fixture
+def text_file(tmp_path):
+    """中文文本文件"""
+    path = tmp_path / 'doc.txt'
+    path.write_text('机器学习是人工智能的一个分支。\n深度学习使用神经网络。\n' * 200, encoding='utf-8')
+    return str(path)
+
+
+@pytest.fixture
+def blocking_file(tmp_path):
+    """打开后读取会一直阻塞的"文本文件"（命名管道），模拟病态文档"""
+    path = tmp_path / 'blocking.txt'
+    os.mkfifo(path)
+    return str(path)
+
+
+@pytest.fixture
+def fake_worker(tmp_path, monkeypatch):
+    """用指定代码替换解析子进程脚本：读到任务后执行该代码"""
+    def install(body):
+        script = tmp_path / 'fake_worker.py'
+        script.write_text(
+            'import sys, time\n'
+            'for line in sys.stdin:\n' + textwrap.indent(textwrap.dedent(body), '    '),
+            encoding='utf-8'
+        )
+        monkeypatch.setattr(parser_pool, 'WORKER_SCRIPT', str(script))
+    return install
+
+
+class TestParserPool:
+    """沙箱解析进程池测试"""
+
+    def test_matches_in_process_parse(self, text_file):
+        """子进程解析结果应与进程内解析一致"""
+        pool = ParserPool(workers=1)
+        try:
+            result = pool.parse(text_file, max_chars=1000)
+            expected = DocumentParser.parse(text_file, max_chars=1000)
+
+            assert result.success
+            assert result.error_code is None
+            assert result.content == expected.content
+            assert result.truncated == expected.truncated
+            assert result.file_type == expected.file_type
+        finally:
+            pool.shutdown()
+
+    def test_missing_or_unsupported_file(self, tmp_path):
+        """文件不存在或格式不支持时直接返回错误，不启动子进程"""
+        pool = ParserPool(workers=1)
+
+        assert not pool.parse(str(tmp_path / 'missing.txt')).success
+        assert not pool.parse(str(tmp_path / 'image.png')).success
+        assert pool._idle == []
+
+    @pytest.mark.skipif(not hasattr(os, 'mkfifo'), reason='需要命名管道')
+    def test_wall_timeout(self, blocking_file, text_file):
+        """超过墙钟时间应返回 timeout 错误，之后的任务由新的子进程正常处理"""
+        pool = ParserPool(workers=1, wall_timeout=0.5)
+        try:
+            result = pool.parse(blocking_file)
+
+            assert not result.success
+            assert result.error_code == ERROR_TIMEOUT
+            assert pool.parse(text_file).success
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.skipif(not os.path.exists('/proc/self/statm'), reason='需要 /proc 读取内存')
+    def test_memory_limit(self, blocking_file):
+        """常驻内存超限应返回 memory_limit 错误"""
+        pool = ParserPool(workers=1, memory_limit=1024)
+        try:
+            result = pool.parse(blocking_file)
+
+            assert not result.success
+            assert result.error_code == ERROR_MEMORY_LIMIT
+        finally:
+            pool.shutdown()
+
+    def test_worker_recycled_after_max_jobs(self, text_file):
+        """子进程处理满 max_jobs 个任务后应被回收重建"""
+        pool = ParserPool(workers=1, max_jobs=2)
+        try:
+            pool.parse(text_file)
+            first_pid = pool._idle[0].pid
+            pool.parse(text_file)
+            assert pool._idle == []
+
+            pool.parse(text_file)
+            assert pool._idle[0].pid != first_pid
+        finally:
+            pool.shutdown()
+
+    def test_partial_result_times_out(self, fake_worker, text_file):
+        """结果只写出半行后停住，也应在墙钟时间上限处返回 timeout 错误"""
+        fake_worker("""
+            sys.stdout.write('{"content": ')
+            sys.stdout.flush()
+            time.sleep(30)
+        """)
+        pool = ParserPool(workers=1, wall_timeout=0.5)
+        try:
+            result = pool.parse(text_file)
+
+            assert result.error_code == ERROR_TIMEOUT
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.skipif(os.name != 'posix', reason='需要 RLIMIT_CPU')
+    def test_cpu_limit(self, fake_worker, text_file):
+        """CPU 时间超限被内核结束时应返回 cpu_limit 错误"""
+        fake_worker("""
+            import resource
+            resource.setrlimit(resource.RLIMIT_CPU, (1, resource.getrlimit(resource.RLIMIT_CPU)[1]))
+            while True:
+                pass
+        """)
+        pool = ParserPool(workers=1, wall_timeout=10, cpu_limit=1)
+        try:
+            result = pool.parse(text_file)
+
+            assert result.error_code == ERROR_CPU_LIMIT
+        finally:
+            pool.shutdown()
@@ -0,0 +1,114 @@
+"""
+相似资料索引属性测试
+
+使用 hypothesis 进行属性测试，验证相似度查询、增量追加和持久化的正确性。
+"""
+
+import numpy as np
+from hypothesis import given, strategies as st, settings
+
+from app.intelligence.similarity_index import SimilarityIndex
+
+
+WORDS = ['机器学习', '深度学习', '神经网络', '算法', '模型', '教学', '课程', '学生', '考试', '编程']
+
+
+@st.composite
+def documents_strategy(draw):
+    """生成 (资料 ID, 分词结果) 列表"""
+    count = draw(st.integers(min_value=2, max_value=15))
+    return [
+        (material_id, draw(st.lists(st.sampled_from(WORDS), min_size=1, max_size=30)))
+        for material_id in range(1, count + 1)
+    ]
+
+
+def brute_force(index, material_id):
+    """逐对计算余弦相似度"""
+    material_ids, matrix = index._state
+    dense = matrix.toarray()
+    query = dense[list(material_ids).index(material_id)]
+    scores = {}
+    for other_id, row in zip(material_ids, dense):
+        if other_id and other_id != material_id:
+            norm = np.linalg.norm(query) * np.linalg.norm(row)
+            score = float(query @ row / norm) if norm else 0.0
+            if score > 1e-12:
+                scores[int(other_id)] = score
+    return scores
+
+
+class TestSimilarityIndex:
+    """相似资料索引测试"""
+
+    @given(documents=documents_strategy(), top_k=st.integers(min_value=1, max_value=20))
+    @settings(max_examples=100, deadline=None)
+    def test_related_matches_brute_force(self, documents, top_k):
+        """top-k 结果应与逐对计算的余弦相似度一致，且按相似度降序"""
+        index = SimilarityIndex.build(documents)
+        expected = brute_force(index, 1)
+
+        related = index.related(1, top_k)
+
+        assert len(related) == min(top_k, len(expected))
+        assert all(a[1] >= b[1] for a, b in zip(related, related[1:]))
+        for material_id, score in related:
+            assert abs(score - expected[material_id]) < 1e-9
+        if related:
+            assert related[-1][1] >= sorted(expected.values(), reverse=True)[len(related) - 1] - 1e-9
+
+    @given(documents=documents_strategy(), extra=st.lists(st.sampled_from(WORDS), min_size=1, max_size=30))
+    @settings(max_examples=50, deadline=None)
+    def test_incremental_changes_survive_save_and_load(self, tmp_path_factory, documents, extra):
+        """增量追加、替换和删除在保存后重新加载结果不变"""
+        directory = tmp_path_factory.mktemp('similarity')
+        base_path, delta_path = str(directory / 'base.npz'), str(directory / 'delta.npz')
+
+        index = SimilarityIndex.build(documents)
+        index.save(base_path, delta_path, full=True)
+        index.add(len(documents) + 1, extra)
+        index.add(1, extra)
+        index.remove(2)
+        index.save(base_path, delta_path)
+
+        loaded = SimilarityIndex.load(base_path, delta_path)
+
+        assert len(loaded) == len(index) == len(documents)
+        assert loaded.related(1, 20) == index.related(1, 20)
+        assert loaded.related(2, 20) == []
+        assert all(material_id != 2 for material_id, _ in loaded.related(1, 20))
+
+    def test_delta_from_previous_build_is_ignored(self, tmp_path):
+        """全量重建后，旧的增量文件不再生效"""
+        base_path, delta_path = str(tmp_path / 'base.npz'), str(tmp_path / 'delta.npz')
+
+        old = SimilarityIndex.build([(1, ['算法', '模型']), (2, ['课程', '学生'])])
+        old.save(base_path, delta_path, full=True)
+        old.add(3, ['算法'])
+        old.save(base_path, delta_path)
+
+        rebuilt = SimilarityIndex.build([(1, ['算法', '模型']), (2, ['课程', '学生'])], max_features=10)
+        rebuilt.save(base_path, delta_path + '.unused', full=True)
+
+        loaded = SimilarityIndex.load(base_path, delta_path)
+        assert len(loaded) == 2
+
+    def test_small_corpus_keeps_vocabulary(self):
+        """只有一两份资料时不剔除常见词，追加后不需要重建，共有词可算出相似度"""
+        single = SimilarityIndex.build([(1, ['算法', '模型'])])
+        single.add(2, ['算法', '课程'])
+
+        assert sorted(single._terms) == ['模型', '算法']
+        assert not single.needs_rebuild
+        assert [material_id for material_id, _ in single.related(2)] == [1]
+
+        pair = SimilarityIndex.build([(1, ['算法', '模型']), (2, ['算法', '课程'])])
+        assert [material_id for material_id, _ in pair.related(1)] == [2]
+
+    def test_common_terms_dropped_in_large_corpus(self):
+        """资料足够多时，出现在几乎所有资料中的词不进入词表，行向量仍为单位长度"""
+        documents = [(material_id, ['课程', WORDS[material_id % 5]]) for material_id in range(1, 21)]
+        index = SimilarityIndex.build(documents)
+
+        assert '课程' not in index._terms
+        assert np.allclose(np.linalg.norm(index._state[1].toarray(), axis=1), 1.0)
@@ -159,3 +159,81 @@ class TestTagRecommenderBehavior:
             for i in range(len(suggestions) - 1):
                 assert suggestions[i].relevance >= suggestions[i + 1].relevance, \
                     f"标签建议未按相关度排序: {suggestions[i].relevance} < {suggestions[i + 1].relevance}"
+
+
+# ============================================================================
+# 属性测试：标签索引
+# ============================================================================
+
+class TestTagIndex:
+    """标签索引匹配测试"""
+
+    @given(
+        tag_names=st.lists(
+            st.text(alphabet='机器学习数据ABab', min_size=1, max_size=6),
+            max_size=30,
+            unique=True
+        ),
+        keywords=st.lists(st.text(alphabet='机器学习数据ABab', max_size=8), max_size=10)
+    )
+    @settings(max_examples=200, deadline=None)
+    def test_index_matches_naive_scan(self, tag_names, keywords):
+        """索引匹配结果应与逐个标签比较的结果一致"""
+        from app.intelligence.tag_index import TagIndex
+
+        tags = list(enumerate(tag_names, start=1))
+        index = TagIndex(tags)
+
+        expected = {}
+        for tag_id, name in tags:
+            tag_lower = name.lower()
+            for position, keyword in enumerate(keywords):
+                keyword_lower = keyword.lower()
+                if not keyword_lower:
+                    continue
+                if (tag_lower == keyword_lower or
+                        keyword_lower in tag_lower or
+                        tag_lower in keyword_lower):
+                    expected[tag_id] = position
+                    break
+
+        assert index.match_keywords(keywords) == expected
+        assert list(index.match_keywords(keywords)) == sorted(expected)
+
+    def test_postings_linear_in_name_length(self):
+        """每个标签名只登记单字和相邻两字，长标签名不产生大量键"""
+        from app.intelligence.tag_index import TagIndex
+
+        name = ''.join(chr(0x4E00 + i) for i in range(50))
+        index = TagIndex([(1, name)])
+
+        assert len(index._postings) == 50 + 49
+        assert index.match(name[10:30]) == {1}
+        assert index.match(name[10] + name[12]) == set()
+
+
+class TestTagIndexInvalidation:
+    """标签索引失效测试"""
+
+    def test_invalidate_during_rebuild_not_overwritten(self, db_app, monkeypatch):
+        """重建期间标签被增删时，不发布旧的重建结果"""
+        from app.extensions import db
+        from app.intelligence import tag_recommender
+        from app.intelligence.tag_index import TagIndex
+        from app.models import MaterialTag
+
+        db.session.add(MaterialTag(name='机器学习'))
+        db.session.commit()
+        monkeypatch.setattr(TagRecommender, '_tag_index', None)
+
+        def racing_index(rows):
+            # 模拟读取标签后、发布索引前，另一个线程新增标签并使索引失效
+            TagRecommender.invalidate_tag_index()
+            return TagIndex(rows)
+
+        monkeypatch.setattr(tag_recommender, 'TagIndex', racing_index)
+        assert len(TagRecommender.get_tag_index()) == 1
+        assert TagRecommender._tag_index is None
+
+        monkeypatch.setattr(tag_recommender, 'TagIndex', TagIndex)
+        assert TagRecommender.get_tag_index() is TagRecommender._tag_index
@@ -0,0 +1 @@
+# 服务层测试
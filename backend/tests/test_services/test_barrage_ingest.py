@@ -0,0 +1,146 @@
+"""
+弹幕发送测试
+
+验证发送时立即分配唯一 ID 并广播、批量写库、限流和校验，
+以及弹幕 ID 段的预留不与已有弹幕冲突。
+"""
+
+import threading
+
+import pytest
+
+from app.exceptions.base import RateLimitError
+from app.extensions import db
+from app.models import Barrage, Course, IdSequence, User
+from app.services import barrage_ingest_service
+from app.services.barrage_ingest_service import BarrageIngestService
+from app.services.barrage_service import BarrageService
+from app.utils.rate_limiter import RateLimiter
+from app.utils.ttl_cache import TTLCache
+
+
+class RecordingSocketIO:
+    """记录广播的 socketio 替身"""
+
+    def __init__(self):
+        self.emitted = []
+
+    def emit(self, event, data, room=None):
+        self.emitted.append((event, data, room))
+
+
+@pytest.fixture
+def ingest_app(db_app, monkeypatch):
+    """含一个课程和一个用户的数据库，广播记录到替身中"""
+    monkeypatch.setattr(barrage_ingest_service, 'socketio', RecordingSocketIO())
+    monkeypatch.setattr(BarrageIngestService, '_course_cache', TTLCache(30))
+    monkeypatch.setattr(BarrageIngestService, '_user_cache', TTLCache(30))
+    monkeypatch.setattr(BarrageIngestService, '_rate_limiter', RateLimiter(1, 1000))
+    monkeypatch.setattr(BarrageService, '_id_block', (0, 0))
+    monkeypatch.setattr(BarrageService, '_id_block_pid', None)
+
+    db.session.add(User(
+        id=1, username='student', user_code='S001', password_hash='x',
+        email='s@example.com', real_name='学生'
+    ))
+    db.session.add(Course(
+        id=1, name='课程', code='C001', semester='2024-2025-1',
+        academic_year='2024-2025', teacher_id=1
+    ))
+    db.session.commit()
+    BarrageIngestService._rows = []
+    # 后台写库线程每个进程只启动一次，让它写入当前测试的数据库
+    BarrageIngestService._worker._app = db_app
+    yield db_app
+    BarrageIngestService._rows = []
+
+
+def test_ingest_broadcasts_before_write(ingest_app):
+    """发送后立即广播并返回，写库后与广播内容一致"""
+    data = BarrageIngestService.ingest(1, 1, '老师讲得好', False)
+
+    assert barrage_ingest_service.socketio.emitted == [
+        ('new_barrage', {'barrage': data, 'message': '新弹幕'}, 'course_1')
+    ]
+    assert data['content'] == '老师讲得好'
+    assert data['question_id'] is None
+
+    BarrageIngestService.flush()
+    assert Barrage.query.get(data['id']).to_dict() == data
+
+
+def test_concurrent_ingest_unique_ids(ingest_app):
+    """多线程同时发送，ID 互不相同，全部写库"""
+    ids = []
+
+    def send():
+        with ingest_app.app_context():
+            for index in range(50):
+                ids.append(BarrageIngestService.ingest(1, 1, f'弹幕{index}')['id'])
+
+    threads = [threading.Thread(target=send) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(ids)) == 200
+
+    BarrageIngestService.flush()
+    assert Barrage.query.count() == 200
+
+
+def test_pending_barrage_flushed_on_read(ingest_app):
+    """本进程尚未写库的弹幕按 ID 读取、删除时先写库"""
+    data = BarrageIngestService.ingest(1, 1, '待写库')
+
+    assert BarrageService.get_barrage_by_id(data['id']).content == '待写库'
+    assert BarrageService.delete_barrage(data['id'])
+    assert not BarrageIngestService.is_pending(data['id'])
+
+
+def test_bad_row_dropped(ingest_app):
+    """批量写库失败时逐条写入，冲突的弹幕丢弃，其余正常写入"""
+    first = BarrageIngestService.ingest(1, 1, '第一条')
+    BarrageIngestService.flush()
+    BarrageIngestService.enqueue(Barrage(
+        id=first['id'], content='重复', course_id=1, user_id=1, is_anonymous=False, status=True
+    ))
+    second = BarrageIngestService.ingest(1, 1, '第二条')
+
+    BarrageIngestService.flush()
+    assert Barrage.query.get(second['id']).content == '第二条'
+    assert Barrage.query.get(first['id']).content == '第一条'
+
+
+def test_validation(ingest_app):
+    """课程、用户不存在或包含敏感词时拒绝，不广播"""
+    with pytest.raises(ValueError, match='课程不存在'):
+        BarrageIngestService.ingest(1, 99, '你好')
+    with pytest.raises(ValueError, match='用户不存在'):
+        BarrageIngestService.ingest(99, 1, '你好')
+    with pytest.raises(ValueError, match='敏感词'):
+        BarrageIngestService.ingest(1, 1, '一起赌博')
+
+    assert barrage_ingest_service.socketio.emitted == []
+    assert BarrageIngestService._rows == []
+
+
+def test_rate_limited(ingest_app, monkeypatch):
+    """超过连续发送条数后拒绝"""
+    monkeypatch.setattr(BarrageIngestService, '_rate_limiter', RateLimiter(0.001, 3))
+
+    for _ in range(3):
+        BarrageIngestService.ingest(1, 1, '刷屏')
+    with pytest.raises(RateLimitError):
+        BarrageIngestService.ingest(1, 1, '刷屏')
+
+
+def test_id_block_starts_after_existing_barrages(ingest_app):
+    """首次预留的 ID 段从已有弹幕的最大 ID 之后开始，之后按段递增"""
+    db.session.add(Barrage(id=500, content='旧弹幕', course_id=1, user_id=1))
+    db.session.commit()
+
+    assert BarrageService.allocate_id() == 501
+    assert IdSequence.reserve('barrages', 10) == (601, 611)
+    assert IdSequence.reserve('barrages', 10, floor=1000) == (1001, 1011)
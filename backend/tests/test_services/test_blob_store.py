@@ -0,0 +1,149 @@
+"""
+文件内容存储测试
+
+验证内容相同的文件只存一份、按引用数释放，旧路径资料的删除，以及创建资料失败时引用的释放。
+"""
+
+import hashlib
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.extensions import db
+from app.models import FileBlob, FileDigest, Material
+from app.services import blob_store_service
+from app.services.blob_store_service import BlobStoreService
+from app.services.material_search_service import MaterialSearchService
+from app.services.material_service import MaterialService
+from app.utils.file_utils import resolve_file_path
+
+
+@pytest.fixture
+def blob_app(db_app, tmp_path, monkeypatch):
+    """内容文件写入临时目录"""
+    monkeypatch.setattr(blob_store_service, 'BLOB_DIR', str(tmp_path / 'blobs'))
+    return db_app
+
+
+def write(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_bytes(content)
+    return str(path)
+
+
+def test_same_content_stored_once(blob_app, tmp_path):
+    """内容相同的两次上传共用一个文件，引用数为 2"""
+    content = b'%PDF-1.4 lecture notes'
+    first = BlobStoreService.put_file(write(tmp_path, 'a.pdf', content), '.pdf')
+    second_temp = write(tmp_path, 'b.pdf', content)
+    second = BlobStoreService.put_file(second_temp, '.PDF')
+
+    sha256 = hashlib.sha256(content).hexdigest()
+    assert first.file_path == second.file_path
+    assert first.file_path.endswith(f'{sha256}.pdf')
+    assert not (tmp_path / 'b.pdf').exists()
+    assert FileBlob.query.count() == 1
+    assert FileBlob.query.one().ref_count == 2
+    # 存入时已记录摘要，不必重新读文件
+    assert FileDigest.query.filter_by(file_path=resolve_file_path(first.file_path)).one().sha256 == sha256
+
+
+def test_release_drops_last_reference_only(blob_app, tmp_path):
+    """释放一个引用后文件仍在，最后一个引用释放后删除文件和记录"""
+    content = b'shared content'
+    blob = BlobStoreService.put_file(write(tmp_path, 'a.txt', content), '.txt')
+    BlobStoreService.put_file(write(tmp_path, 'b.txt', content), '.txt')
+    absolute_path = resolve_file_path(blob.file_path)
+
+    assert BlobStoreService.release(blob.file_path) is None
+    assert FileBlob.query.one().ref_count == 1
+    with open(absolute_path, 'rb') as f:
+        assert f.read() == content
+
+    assert BlobStoreService.release(blob.file_path) == hashlib.sha256(content).hexdigest()
+    assert FileBlob.query.count() == 0
+    assert FileDigest.query.count() == 0
+    assert not os.path.exists(absolute_path)
+
+
+def test_acquire(blob_app, tmp_path):
+    """已存储的内容可按哈希直接增加引用，未存储的返回 None"""
+    content = b'known content'
+    sha256 = hashlib.sha256(content).hexdigest()
+    assert BlobStoreService.acquire(sha256) is None
+
+    BlobStoreService.put_file(write(tmp_path, 'a.txt', content), '.txt')
+    assert BlobStoreService.acquire(sha256).ref_count == 2
+
+
+def test_missing_file_restored(blob_app, tmp_path):
+    """记录还在但文件丢失时，用新上传的内容补回"""
+    content = b'lost content'
+    blob = BlobStoreService.put_file(write(tmp_path, 'a.txt', content), '.txt')
+    absolute_path = resolve_file_path(blob.file_path)
+    os.remove(absolute_path)
+
+    BlobStoreService.put_file(write(tmp_path, 'b.txt', content), '.txt')
+    with open(absolute_path, 'rb') as f:
+        assert f.read() == content
+    assert FileBlob.query.one().ref_count == 2
+
+
+def test_release_legacy_path(blob_app, tmp_path):
+    """不在内容存储中的旧资料文件直接删除"""
+    legacy = write(tmp_path, 'legacy.pdf', b'old upload')
+
+    assert BlobStoreService.release(legacy) is None
+    assert not (tmp_path / 'legacy.pdf').exists()
+
+
+def test_put_without_reference(blob_app, tmp_path):
+    """分片上传合并的文件先以零引用存入，创建资料时按哈希引用"""
+    content = b'merged upload'
+    blob = BlobStoreService.put_file(write(tmp_path, 'a.bin', content), '.bin', acquire=False)
+    assert blob.ref_count == 0
+
+    sha256 = hashlib.sha256(content).hexdigest()
+    assert BlobStoreService.find(sha256).file_path == blob.file_path
+    assert BlobStoreService.acquire(sha256).ref_count == 1
+
+
+def test_reused_unreferenced_blob_not_collected(blob_app, tmp_path):
+    """无引用的文件被查找（秒传）或再次合并存入后重新计时，不会被立即回收"""
+    contents = [b'offered for instant upload', b'merged again', b'abandoned']
+    blobs = [
+        BlobStoreService.put_file(write(tmp_path, f'{index}.bin', content), '.bin', acquire=False)
+        for index, content in enumerate(contents)
+    ]
+    old = datetime.now() - timedelta(days=2)
+    FileBlob.query.update({FileBlob.created_at: old, FileBlob.updated_at: old})
+    db.session.commit()
+
+    BlobStoreService.find(hashlib.sha256(contents[0]).hexdigest())
+    BlobStoreService.put_file(write(tmp_path, 'again.bin', contents[1]), '.bin', acquire=False)
+
+    count, _, removed = BlobStoreService.remove_unreferenced(24, 100)
+    assert (count, removed) == (1, [blobs[2].sha256])
+    assert {blob.sha256 for blob in FileBlob.query} == {blobs[0].sha256, blobs[1].sha256}
+
+
+@pytest.mark.parametrize('fail_after_commit', [False, True])
+def test_create_failure_releases_uncommitted_reference_only(blob_app, tmp_path, monkeypatch, fail_after_commit):
+    """创建资料失败时，记录未提交才释放引用；记录已提交后引用归记录所有"""
+    content = b'plain lecture notes'
+    BlobStoreService.put_file(write(tmp_path, 'a.txt', content), '.txt')
+
+    def fail(*args):
+        raise RuntimeError('写入失败')
+
+    if fail_after_commit:
+        monkeypatch.setattr(MaterialSearchService, 'index_material', staticmethod(fail))
+    else:
+        monkeypatch.setattr(Material, 'save', fail)
+
+    with pytest.raises(RuntimeError):
+        MaterialService.upload_material_by_hash(hashlib.sha256(content).hexdigest(), 'notes.txt', '讲义', 1)
+
+    assert Material.query.count() == (1 if fail_after_commit else 0)
+    assert FileBlob.query.one().ref_count == (2 if fail_after_commit else 1)
@@ -0,0 +1,125 @@
+"""
+定期清理测试
+
+验证旧日志和通知的分批删除、每项任务的清理记录、执行间隔，以及其他进程持有锁时跳过。
+"""
+
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.extensions import db
+from app.models import FileBlob, HousekeepingRun, Notification, NotificationType, SystemLog
+from app.services import blob_store_service, housekeeping_service, storage_usage_service
+from app.services.housekeeping_service import HousekeepingService
+from app.utils.chunked_upload import ChunkedUploadManager
+
+
+@pytest.fixture
+def housekeeping_app(db_app, tmp_path, monkeypatch):
+    """上传相关目录都在临时目录下"""
+    uploads = tmp_path / 'uploads'
+    monkeypatch.setattr(blob_store_service, 'BLOB_DIR', str(uploads / 'blobs'))
+    monkeypatch.setattr(storage_usage_service, 'STORAGE_ROOT', str(uploads))
+    monkeypatch.setattr(housekeeping_service, 'HOUSEKEEPING_LOCK_FILE', str(uploads / '.housekeeping.lock'))
+    monkeypatch.setattr(housekeeping_service, 'chunked_upload_manager', ChunkedUploadManager(str(uploads / 'temp')))
+    monkeypatch.setattr(housekeeping_service, 'resolve_file_path', lambda path: str(tmp_path / path))
+    return db_app
+
+
+def add_rows(model, count, age_days, **fields):
+    created_at = datetime.now() - timedelta(days=age_days)
+    for _ in range(count):
+        db.session.add(model(created_at=created_at, **fields))
+    db.session.commit()
+
+
+def test_old_logs_deleted_in_batches(housekeeping_app):
+    """超过保留期限的日志按批删除，未过期的保留"""
+    add_rows(SystemLog, 25, 40, action='login', module='auth')
+    add_rows(SystemLog, 3, 1, action='login', module='auth')
+
+    assert SystemLog.clean_old_logs(days=30, batch_size=10) == 25
+    assert SystemLog.query.count() == 3
+
+
+def test_old_notifications_deleted_for_all_users(housekeeping_app):
+    """不指定用户时清理所有用户的旧已读通知，未读通知保留"""
+    add_rows(Notification, 4, 40, user_id=1, type=NotificationType.SYSTEM, title='t', content='c', is_read=True)
+    add_rows(Notification, 4, 40, user_id=2, type=NotificationType.SYSTEM, title='t', content='c', is_read=True)
+    add_rows(Notification, 2, 40, user_id=2, type=NotificationType.SYSTEM, title='t', content='c', is_read=False)
+
+    assert Notification.delete_old_notifications(user_id=1, days=30) == 4
+    assert Notification.delete_old_notifications(days=30, batch_size=3) == 4
+    assert Notification.query.count() == 2
+
+
+def test_run_once_records_each_task(housekeeping_app, tmp_path):
+    """每项任务记录一行，临时文件和无引用的内容文件的回收字节数被统计"""
+    add_rows(SystemLog, 5, 40, action='login', module='auth')
+
+    stale = tmp_path / 'uploads' / 'temp' / 'stale.tmp'
+    stale.parent.mkdir(parents=True, exist_ok=True)
+    stale.write_bytes(b'x' * 100)
+    old = time.time() - 48 * 3600
+    os.utime(stale, (old, old))
+
+    blob_file = tmp_path / 'uploads' / 'blobs' / 'orphan.bin'
+    blob_file.parent.mkdir(parents=True)
+    blob_file.write_bytes(b'y' * 50)
+    db.session.add(FileBlob(
+        sha256='a' * 64, file_path=str(blob_file), file_size=50, ref_count=0,
+        created_at=datetime.now() - timedelta(days=2), updated_at=datetime.now() - timedelta(days=2)
+    ))
+    db.session.commit()
+
+    runs = {run.task: run for run in HousekeepingService.run_once()}
+
+    assert set(runs) == {
+        'expired_uploads', 'temp_files', 'unreferenced_blobs',
+        'system_logs', 'notifications', 'housekeeping_runs', 'storage_usage'
+    }
+    assert all(run.error_message is None for run in runs.values())
+    assert (runs['temp_files'].items_removed, runs['temp_files'].bytes_reclaimed) == (1, 100)
+    assert (runs['unreferenced_blobs'].items_removed, runs['unreferenced_blobs'].bytes_reclaimed) == (1, 50)
+    assert runs['system_logs'].items_removed == 5
+    assert not stale.exists()
+    assert not blob_file.exists()
+    assert FileBlob.query.count() == 0
+
+
+def test_failed_task_recorded(housekeeping_app, monkeypatch):
+    """单个任务失败时记录错误，其他任务照常执行"""
+    def fail():
+        raise RuntimeError('disk error')
+    monkeypatch.setattr(HousekeepingService, '_clean_temp_files', staticmethod(fail))
+
+    runs = {run.task: run for run in HousekeepingService.run_once()}
+
+    assert runs['temp_files'].error_message == 'disk error'
+    assert runs['system_logs'].error_message is None
+
+
+def test_run_if_due_respects_interval(housekeeping_app):
+    """距上次清理不满间隔时不执行"""
+    assert HousekeepingService.run_if_due() is not None
+    assert HousekeepingService.run_if_due() is None
+
+
+@pytest.mark.skipif(housekeeping_service.fcntl is None, reason='需要 fcntl')
+def test_run_if_due_skips_when_locked(housekeeping_app):
+    """其他进程正在清理（持有锁文件）时跳过本轮"""
+    fcntl = housekeeping_service.fcntl
+    lock_path = housekeeping_service.HOUSEKEEPING_LOCK_FILE
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+
+    with open(lock_path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            assert HousekeepingService.run_if_due() is None
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    assert HousekeepingRun.query.count() == 0
@@ -0,0 +1,96 @@
+"""
+资料统计快照测试
+
+验证经过一系列上传、下载、浏览、改分类和删除事件增量维护的快照，
+与直接从数据库重新统计的结果一致。
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.extensions import db
+from app.models import Material, MaterialCategory
+from app.services.material_statistics_service import MaterialStatisticsService
+from app.utils.counter_buffer import CounterBuffer
+
+
+@pytest.fixture
+def statistics_app(db_app):
+    """含三个分类的数据库，每个测试从空快照开始"""
+    db.session.add_all(MaterialCategory(id=i, name=f'分类{i}') for i in range(1, 4))
+    db.session.commit()
+    CounterBuffer._deltas = {}
+    CounterBuffer._worker._app = db_app
+    MaterialStatisticsService.invalidate()
+    yield db_app
+    MaterialStatisticsService.invalidate()
+    CounterBuffer._deltas = {}
+
+
+def fresh_statistics():
+    """丢弃快照后重新统计"""
+    MaterialStatisticsService.invalidate()
+    return MaterialStatisticsService.get_statistics()
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_incremental_matches_rebuild(statistics_app, seed):
+    """增量维护的结果与重新统计一致"""
+    rng = random.Random(seed)
+    base = datetime(2024, 1, 1)
+    MaterialStatisticsService.get_statistics()
+
+    next_id = 1
+    for step in range(300):
+        ids = [material_id for material_id, in db.session.query(Material.id)]
+        action = rng.random()
+
+        if action < 0.3 or not ids:
+            material = Material(
+                id=next_id, title=f'资料{next_id}', file_name='a.pdf', file_path='a.pdf',
+                file_size=rng.randint(1, 1000), file_type=rng.choice(['document', 'image', 'video']),
+                uploader_id=1, category_id=rng.choice([None, 1, 2, 3]),
+                created_at=base + timedelta(seconds=step)
+            )
+            next_id += 1
+            material.save()
+            MaterialStatisticsService.on_material_created(material)
+        elif action < 0.7:
+            material = Material.query.get(rng.choice(ids))
+            material.increment_download_count()
+            MaterialStatisticsService.on_material_downloaded(material)
+        elif action < 0.85:
+            material = Material.query.get(rng.choice(ids))
+            material.increment_view_count()
+            MaterialStatisticsService.on_material_viewed(material)
+        elif action < 0.95:
+            material = Material.query.get(rng.choice(ids))
+            old_category_id = material.category_id
+            material.category_id = rng.choice([None, 1, 2, 3])
+            db.session.commit()
+            MaterialStatisticsService.on_material_updated(material, old_category_id)
+        else:
+            material = Material.query.get(rng.choice(ids))
+            MaterialStatisticsService.on_material_deleted(material)
+            material.delete()
+
+        if rng.random() < 0.1:
+            CounterBuffer.flush()
+            db.session.expire_all()
+
+        # 定期对比，对比后从新快照继续增量维护
+        if step % 20 == 19:
+            cached = MaterialStatisticsService.get_statistics()
+            assert cached == fresh_statistics()
+
+
+def test_export_is_a_copy(statistics_app):
+    """修改返回结果不影响快照"""
+    stats = MaterialStatisticsService.get_statistics()
+    stats['by_type']['document'] = 100
+    stats['recent_uploads'].append({})
+
+    assert MaterialStatisticsService.get_statistics()['by_type'] == {}
+    assert MaterialStatisticsService.get_statistics()['recent_uploads'] == []
@@ -0,0 +1,71 @@
+"""
+预览副本测试
+
+验证缩略图和文本摘录的生成，以及内容相同的文件共用副本。
+"""
+
+import shutil
+
+import pytest
+from PIL import Image
+
+from app.services import blob_store_service, rendition_service
+from app.services.rendition_service import RenditionService, THUMBNAIL_MAX_SIZE
+
+
+@pytest.fixture
+def rendition_app(db_app, tmp_path, monkeypatch):
+    """副本和内容存储的锁文件写入临时目录"""
+    monkeypatch.setattr(rendition_service, 'RENDITION_DIR', str(tmp_path / 'renditions'))
+    monkeypatch.setattr(blob_store_service, 'BLOB_DIR', str(tmp_path / 'blobs'))
+    return db_app
+
+
+def test_thumbnail(rendition_app, tmp_path):
+    """大图缩小到最长边不超过上限，透明背景转为 JPEG"""
+    source = tmp_path / 'photo.png'
+    Image.new('RGBA', (3000, 1500), (255, 0, 0, 128)).save(source)
+
+    path = RenditionService.generate(str(source))
+
+    with Image.open(path) as thumbnail:
+        assert thumbnail.format == 'JPEG'
+        assert max(thumbnail.size) == THUMBNAIL_MAX_SIZE
+        assert thumbnail.size[0] == 2 * thumbnail.size[1]
+
+
+def test_same_content_shares_rendition(rendition_app, tmp_path):
+    """内容相同的文件得到同一个副本，第二次不重新生成"""
+    first = tmp_path / 'a.jpg'
+    Image.new('RGB', (100, 100), (0, 128, 0)).save(first)
+    second = tmp_path / 'b.jpg'
+    shutil.copy(first, second)
+
+    path = RenditionService.generate(str(first))
+    assert RenditionService.generate(str(second)) == path
+
+
+def test_excerpt(rendition_app, tmp_path):
+    """文档生成开头的文本摘录"""
+    source = tmp_path / 'notes.txt'
+    source.write_text('第一章 绪论\n' + '内容' * 5000, encoding='utf-8')
+
+    path = RenditionService.generate(str(source))
+
+    with open(path, encoding='utf-8') as f:
+        excerpt = f.read()
+    assert excerpt.startswith('第一章 绪论')
+    assert len(excerpt) <= rendition_service.EXCERPT_MAX_CHARS
+
+
+def test_unsupported(rendition_app, tmp_path):
+    """视频、GIF 等格式不生成副本"""
+    source = tmp_path / 'lecture.mp4'
+    source.write_bytes(b'\x00' * 100)
+    animation = tmp_path / 'demo.gif'
+    frames = [Image.new('RGB', (50, 50), color) for color in ((255, 0, 0), (0, 0, 255))]
+    frames[0].save(animation, save_all=True, append_images=frames[1:], duration=100)
+
+    for path in (source, animation):
+        assert RenditionService.rendition_kind(str(path)) is None
+        assert RenditionService.generate(str(path)) is None
@@ -0,0 +1,163 @@
+"""
+存储用量测试
+
+验证内容文件存入、释放时目录用量的增量更新，资料创建、删除、改分类时用户和分类用量的更新，
+用户配额检查，以及按磁盘和资料表校正累计误差。
+"""
+
+import os
+import threading
+
+import pytest
+
+from app.extensions import db
+from app.models import Material, StorageUsage
+from app.services import blob_store_service, storage_usage_service
+from app.services.blob_store_service import BlobStoreService
+from app.services.storage_usage_service import StorageUsageService
+from app.utils.storage_init import get_storage_info
+
+DIRECTORY = StorageUsage.SCOPE_DIRECTORY
+
+
+@pytest.fixture
+def usage_app(db_app, tmp_path, monkeypatch):
+    """存储目录在临时目录下"""
+    uploads = tmp_path / 'uploads'
+    monkeypatch.setattr(storage_usage_service, 'STORAGE_ROOT', str(uploads))
+    monkeypatch.setattr(blob_store_service, 'BLOB_DIR', str(uploads / 'blobs'))
+    return db_app
+
+
+def put(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_bytes(content)
+    return BlobStoreService.put_file(str(path), '.bin')
+
+
+def create_material(blob, uploader_id=1, category_id=None):
+    material = Material(
+        title='t', file_name='a.bin', file_path=blob.file_path, file_size=blob.file_size,
+        file_type='other', uploader_id=uploader_id, category_id=category_id
+    )
+    StorageUsageService.on_material_created(material)
+    material.save()
+    return material
+
+
+def test_blob_store_updates_directory_usage(usage_app, tmp_path):
+    """内容相同的文件只算一次，最后一个引用释放后扣减"""
+    first = put(tmp_path, 'a', b'x' * 100)
+    put(tmp_path, 'b', b'x' * 100)
+    put(tmp_path, 'c', b'y' * 30)
+
+    assert StorageUsage.get_usage(DIRECTORY, 'blobs') == (130, 2)
+
+    BlobStoreService.release(first.file_path)
+    assert StorageUsage.get_usage(DIRECTORY, 'blobs') == (130, 2)
+    BlobStoreService.release(first.file_path)
+    assert StorageUsage.get_usage(DIRECTORY, 'blobs') == (30, 1)
+
+
+def test_material_usage_by_user_and_category(usage_app, tmp_path):
+    """用户和分类用量按资料累计，改分类时移到新分类，删除时扣减"""
+    blob = put(tmp_path, 'a', b'x' * 100)
+    first = create_material(blob, uploader_id=1, category_id=5)
+    create_material(blob, uploader_id=1, category_id=5)
+
+    assert StorageUsageService.get_user_usage(1) == (200, 2)
+    assert StorageUsage.get_usage(StorageUsage.SCOPE_CATEGORY, 5) == (200, 2)
+
+    first.category_id = 6
+    StorageUsageService.on_material_updated(first, 5)
+    first.save()
+    assert StorageUsage.get_usage(StorageUsage.SCOPE_CATEGORY, 5) == (100, 1)
+    assert StorageUsage.get_usage(StorageUsage.SCOPE_CATEGORY, 6) == (100, 1)
+
+    StorageUsageService.on_material_deleted(first)
+    first.delete()
+    assert StorageUsageService.get_user_usage(1) == (100, 1)
+    assert StorageUsage.get_usage(StorageUsage.SCOPE_CATEGORY, 6) == (0, 0)
+
+
+def test_check_quota(usage_app, tmp_path):
+    """超出配额时拒绝，未设置配额时不限制"""
+    create_material(put(tmp_path, 'a', b'x' * 1024 * 1024))
+
+    StorageUsageService.check_quota(1, 10 * 1024 * 1024)
+
+    usage_app.config['USER_STORAGE_QUOTA_MB'] = 2
+    StorageUsageService.check_quota(1, 1024 * 1024)
+    with pytest.raises(ValueError, match='存储空间不足'):
+        StorageUsageService.check_quota(1, 1024 * 1024 + 1)
+    StorageUsageService.check_quota(2, 2 * 1024 * 1024)
+
+
+def test_reconcile_corrects_drift(usage_app, tmp_path):
+    """校正后计数与磁盘和资料表一致，存储信息直接读取计数"""
+    create_material(put(tmp_path, 'a', b'x' * 100), uploader_id=1)
+    temp_dir = tmp_path / 'uploads' / 'temp'
+    temp_dir.mkdir(parents=True)
+    (temp_dir / 'upload.tmp').write_bytes(b'z' * 7)
+    (temp_dir / '.gitkeep').touch()
+
+    # 模拟进程中途退出等原因造成的误差
+    StorageUsage.apply_change(DIRECTORY, 'blobs', 999, 3)
+    StorageUsage.apply_change(StorageUsage.SCOPE_USER, 2, 50, 1)
+    db.session.commit()
+
+    assert StorageUsageService.reconcile() == 3
+    assert StorageUsage.get_usage(DIRECTORY, 'blobs') == (100, 1)
+    assert StorageUsage.get_usage(DIRECTORY, 'temp') == (7, 1)
+    assert StorageUsageService.get_user_usage(1) == (100, 1)
+    assert StorageUsageService.get_user_usage(2) == (0, 0)
+    assert StorageUsageService.reconcile() == 0
+
+    info = get_storage_info(storage_usage_service.STORAGE_ROOT)
+    assert info['exists']
+    assert (info['total_size'], info['file_count']) == (107, 2)
+    assert info['directories']['blobs'] == {'total_size': 100, 'file_count': 1}
+
+
+class TestConcurrentReconcile:
+    """校正期间其他线程存入文件"""
+
+    @pytest.fixture
+    def db_uri(self, tmp_path):
+        """文件数据库，上传线程和校正各用自己的连接和事务"""
+        return f"sqlite:///{tmp_path / 'usage.db'}"
+
+    def test_reconcile_waits_for_concurrent_upload(self, usage_app, tmp_path, monkeypatch):
+        """遍历目录期间其他线程存入的文件等校正结束后再计入，不会重复计入"""
+        create_material(put(tmp_path, 'a', b'x' * 100))
+        scan = storage_usage_service.scan_storage_usage
+        uploader = threading.Thread(target=self.upload, args=(usage_app, tmp_path))
+
+        def scan_with_upload(root):
+            uploader.start()
+            uploader.join(timeout=0.5)
+            assert uploader.is_alive()
+            return scan(root)
+
+        monkeypatch.setattr(storage_usage_service, 'scan_storage_usage', scan_with_upload)
+        assert StorageUsageService.reconcile() == 0
+        uploader.join()
+        monkeypatch.setattr(storage_usage_service, 'scan_storage_usage', scan)
+
+        assert StorageUsage.get_usage(DIRECTORY, 'blobs') == (130, 2)
+        assert StorageUsageService.get_user_usage(1) == (130, 2)
+        assert StorageUsageService.reconcile() == 0
+
+    @staticmethod
+    def upload(app, tmp_path):
+        with app.app_context():
+            create_material(put(tmp_path, 'b', b'y' * 30))
+            db.session.remove()
+
+
+def test_files_outside_storage_root_not_counted(usage_app, tmp_path):
+    """不在存储目录中的文件不计入目录用量"""
+    StorageUsageService.on_file_added(str(tmp_path / 'elsewhere.bin'), 10)
+    StorageUsageService.on_file_added(os.path.join(storage_usage_service.STORAGE_ROOT, 'loose.bin'), 10)
+
+    assert StorageUsage.get_scope_usage(DIRECTORY) == {}
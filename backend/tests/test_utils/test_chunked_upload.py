@@ -0,0 +1,183 @@
+"""
+分片上传测试
+
+验证定位写入模式下乱序分片的写入、合并改名，原分片文件模式，并发上传时的分片状态记录，
+以及分片哈希校验和整文件哈希的计算。
+"""
+
+import hashlib
+import io
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from app.utils.chunked_upload import ChunkedUploadManager, UPLOAD_DATA_FILE
+
+CHUNK_SIZE = 1000
+CONTENT = os.urandom(4 * CHUNK_SIZE + 321)
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return ChunkedUploadManager(str(tmp_path / 'temp'))
+
+
+def chunk(index, content=CONTENT):
+    return FileStorage(stream=io.BytesIO(content[index * CHUNK_SIZE:(index + 1) * CHUNK_SIZE]))
+
+
+def upload_all(manager, upload_id, total_chunks):
+    order = list(range(total_chunks))
+    random.Random(0).shuffle(order)
+    for index in order:
+        assert manager.save_chunk(upload_id, index, chunk(index))
+
+
+@pytest.mark.parametrize('chunk_size', [CHUNK_SIZE, None])
+def test_upload_and_merge(manager, tmp_path, chunk_size):
+    """分片乱序上传后合并得到原文件，临时文件被清理"""
+    metadata = manager.init_upload('lecture.mp4', len(CONTENT), 5, chunk_size=chunk_size)
+    upload_id = metadata['upload_id']
+
+    upload_all(manager, upload_id, 5)
+    assert manager.is_upload_complete(upload_id)
+
+    output_path = str(tmp_path / 'out' / 'lecture.mp4')
+    assert manager.merge_chunks(upload_id, output_path) == hashlib.sha256(CONTENT).hexdigest()
+    with open(output_path, 'rb') as f:
+        assert f.read() == CONTENT
+    assert not os.path.exists(os.path.join(manager.temp_dir, upload_id))
+    assert manager.get_upload_metadata(upload_id) is None
+
+
+def test_offset_mode_preallocates(manager):
+    """定位写入模式在初始化时创建完整大小的目标文件"""
+    upload_id = manager.init_upload('a.bin', len(CONTENT), 5, chunk_size=CHUNK_SIZE)['upload_id']
+
+    assert os.path.getsize(os.path.join(manager.temp_dir, upload_id, UPLOAD_DATA_FILE)) == len(CONTENT)
+
+
+def test_offset_mode_rejects_bad_chunks(manager):
+    """分片长度不符或索引越界时拒绝"""
+    upload_id = manager.init_upload('a.bin', len(CONTENT), 5, chunk_size=CHUNK_SIZE)['upload_id']
+
+    assert not manager.save_chunk(upload_id, 0, FileStorage(stream=io.BytesIO(b'short')))
+    assert not manager.save_chunk(upload_id, 4, FileStorage(stream=io.BytesIO(b'x' * CHUNK_SIZE)))
+    assert not manager.save_chunk(upload_id, 5, chunk(0))
+    assert manager.get_missing_chunks(upload_id) == [0, 1, 2, 3, 4]
+
+
+def test_inconsistent_chunk_size(manager):
+    """分片大小与分片数不一致时初始化失败"""
+    with pytest.raises(ValueError):
+        manager.init_upload('a.bin', len(CONTENT), 4, chunk_size=CHUNK_SIZE)
+
+
+@pytest.mark.parametrize('chunk_size', [CHUNK_SIZE, None])
+def test_parallel_chunks_all_recorded(manager, chunk_size):
+    """多个线程同时上传分片，每个分片都被记录，元数据文件不被改写"""
+    content = os.urandom(64 * CHUNK_SIZE)
+    upload_id = manager.init_upload('a.bin', len(content), 64, chunk_size=chunk_size)['upload_id']
+    metadata_path = os.path.join(manager.metadata_dir, f'{upload_id}.json')
+    metadata_mtime = os.stat(metadata_path).st_mtime_ns
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(
+            lambda index: manager.save_chunk(upload_id, index, chunk(index, content)), range(64)
+        ))
+
+    assert all(results)
+    assert manager.is_upload_complete(upload_id)
+    assert manager.get_missing_chunks(upload_id) == []
+    assert manager.get_uploaded_chunks(upload_id) == list(range(64))
+    assert os.stat(metadata_path).st_mtime_ns == metadata_mtime
+
+
+def test_missing_chunks(manager):
+    """未收到的分片按索引顺序列出"""
+    upload_id = manager.init_upload('a.bin', len(CONTENT), 5, chunk_size=CHUNK_SIZE)['upload_id']
+    for index in (3, 0):
+        manager.save_chunk(upload_id, index, chunk(index))
+
+    assert manager.get_missing_chunks(upload_id) == [1, 2, 4]
+    assert manager.get_uploaded_chunks(upload_id) == [0, 3]
+    assert not manager.is_upload_complete(upload_id)
+
+
+def chunk_hashes(content=CONTENT):
+    return [
+        hashlib.sha256(content[start:start + CHUNK_SIZE]).hexdigest()
+        for start in range(0, len(content), CHUNK_SIZE)
+    ]
+
+
+@pytest.mark.parametrize('chunk_size', [CHUNK_SIZE, None])
+def test_corrupted_chunk_rejected(manager, chunk_size):
+    """与分片哈希不一致的分片被拒绝且不记为已收到，重新上传正确内容后可以完成"""
+    upload_id = manager.init_upload(
+        'a.bin', len(CONTENT), 5, chunk_size=chunk_size, chunk_hashes=chunk_hashes()
+    )['upload_id']
+
+    corrupted = bytearray(CONTENT[:CHUNK_SIZE])
+    corrupted[10] ^= 0xFF
+    with pytest.raises(ValueError, match='分片 0 校验失败'):
+        manager.save_chunk(upload_id, 0, FileStorage(stream=io.BytesIO(bytes(corrupted))))
+    assert 0 in manager.get_missing_chunks(upload_id)
+
+    upload_all(manager, upload_id, 5)
+    assert manager.merge_chunks(upload_id, os.path.join(manager.temp_dir, 'out.bin')) == \
+        hashlib.sha256(CONTENT).hexdigest()
+
+
+@pytest.mark.parametrize('order', ['sequential', 'reversed'])
+def test_file_hash_computed_while_chunks_land(manager, tmp_path, order):
+    """分片按顺序到达时整文件哈希随之算完，合并时不再读取分片；乱序到达时结果同样正确"""
+    upload_id = manager.init_upload('a.bin', len(CONTENT), 5, chunk_size=CHUNK_SIZE)['upload_id']
+    indexes = range(5) if order == 'sequential' else reversed(range(5))
+    for index in indexes:
+        manager.save_chunk(upload_id, index, chunk(index))
+
+    assert manager._file_hashers[upload_id][1] == 5
+
+    read_chunk = manager._read_chunk
+    manager._read_chunk = lambda *args: pytest.fail('合并时不应再读取分片')
+    try:
+        file_hash = manager.merge_chunks(upload_id, str(tmp_path / 'out.bin'))
+    finally:
+        manager._read_chunk = read_chunk
+    assert file_hash == hashlib.sha256(CONTENT).hexdigest()
+
+
+def test_received_chunk_not_rewritten(manager, tmp_path):
+    """已收到的分片再次发送不同内容时不写入，合并结果的哈希与文件内容一致"""
+    upload_id = manager.init_upload('a.bin', 8, 2, chunk_size=4)['upload_id']
+    assert manager.save_chunk(upload_id, 0, FileStorage(stream=io.BytesIO(b'aaaa')))
+    assert manager.save_chunk(upload_id, 1, FileStorage(stream=io.BytesIO(b'bbbb')))
+    assert manager.save_chunk(upload_id, 0, FileStorage(stream=io.BytesIO(b'EVIL')))
+
+    output_path = tmp_path / 'out.bin'
+    file_hash = manager.merge_chunks(upload_id, str(output_path))
+    assert output_path.read_bytes() == b'aaaabbbb'
+    assert file_hash == hashlib.sha256(b'aaaabbbb').hexdigest()
+
+
+def test_file_hash_mismatch(manager, tmp_path):
+    """合并结果与初始化时给出的文件哈希不一致时失败"""
+    upload_id = manager.init_upload(
+        'a.bin', len(CONTENT), 5, chunk_size=CHUNK_SIZE, file_hash='0' * 64
+    )['upload_id']
+    upload_all(manager, upload_id, 5)
+
+    assert manager.merge_chunks(upload_id, str(tmp_path / 'out.bin')) is None
+    assert not (tmp_path / 'out.bin').exists()
+
+
+def test_invalid_hashes(manager):
+    """哈希格式或数量不对时初始化失败"""
+    with pytest.raises(ValueError):
+        manager.init_upload('a.bin', len(CONTENT), 5, file_hash='abc')
+    with pytest.raises(ValueError):
+        manager.init_upload('a.bin', len(CONTENT), 5, chunk_hashes=chunk_hashes()[:4])
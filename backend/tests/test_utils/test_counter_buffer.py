@@ -0,0 +1,60 @@
+"""
+计数缓冲测试
+
+验证并发累加不丢失、读取时计入未写回的增量，以及写回后与数据库一致。
+"""
+
+import threading
+
+import pytest
+
+from app.extensions import db
+from app.models import Material
+from app.utils.counter_buffer import CounterBuffer
+
+
+@pytest.fixture
+def counter_app(db_app):
+    """含一条资料的数据库，后台写回线程写入当前测试的数据库"""
+    db.session.add(Material(
+        id=1, title='资料', file_name='a.pdf', file_path='a.pdf', file_size=1,
+        file_type='document', uploader_id=1
+    ))
+    db.session.commit()
+    CounterBuffer._deltas = {}
+    # 后台写回线程每个进程只启动一次，让它写回当前测试的数据库
+    CounterBuffer._worker._app = db_app
+    yield db_app
+    CounterBuffer._deltas = {}
+
+
+def test_concurrent_increments_not_lost(counter_app):
+    """多线程同时累加，写回后数据库值等于累加次数"""
+    def view():
+        with counter_app.app_context():
+            material = Material.query.get(1)
+            for _ in range(200):
+                material.increment_view_count()
+
+    threads = [threading.Thread(target=view) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert Material.query.get(1).to_dict()['view_count'] == 1600
+
+    CounterBuffer.flush()
+    db.session.expire_all()
+    assert Material.query.get(1).view_count == 1600
+    assert Material.query.get(1).get_count('view_count') == 1600
+
+
+def test_decrement_never_below_zero(counter_app):
+    """负增量写回后计数不小于 0"""
+    CounterBuffer.increment('materials', 'download_count', 1, -3)
+    assert Material.query.get(1).get_count('download_count') == 0
+
+    CounterBuffer.flush()
+    db.session.expire_all()
+    assert Material.query.get(1).download_count == 0
@@ -0,0 +1,98 @@
+"""
+文件下发测试
+
+验证强 ETag 与 304、Range 分段、代理下发模式和下载计数判断。
+"""
+
+import hashlib
+
+import pytest
+
+from app.models import FileDigest
+from app.utils.file_delivery import deliver_file, is_new_download
+
+CONTENT = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def delivery_app(db_app, tmp_path):
+    """配置前端代理发送文件的前缀和根目录"""
+    db_app.config['FILE_ACCEL_PREFIX'] = '/protected-files/'
+    db_app.config['FILE_DELIVERY_ROOT'] = str(tmp_path)
+    return db_app
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / 'media' / 'lecture.mp4'
+    path.parent.mkdir()
+    path.write_bytes(CONTENT)
+    return str(path)
+
+
+def deliver(app, path, headers=None):
+    with app.test_request_context(headers=headers or {}):
+        response = deliver_file(path, '第一讲.mp4', as_attachment=False)
+        response.direct_passthrough = False
+        return response, is_new_download(response)
+
+
+def test_strong_etag_and_not_modified(delivery_app, video):
+    """ETag 为内容 SHA-256，If-None-Match 命中时返回 304 且不计下载"""
+    response, counted = deliver(delivery_app, video)
+    etag = hashlib.sha256(CONTENT).hexdigest()
+
+    assert response.status_code == 200
+    assert response.get_etag() == (etag, False)
+    assert response.get_data() == CONTENT
+    assert counted
+
+    response, counted = deliver(delivery_app, video, {'If-None-Match': f'"{etag}"'})
+    assert response.status_code == 304
+    assert not counted
+
+
+def test_range(delivery_app, video):
+    """Range 请求返回对应片段，只有从开头开始的片段计为下载"""
+    response, counted = deliver(delivery_app, video, {'Range': 'bytes=100-199'})
+    assert response.status_code == 206
+    assert response.headers['Content-Range'] == f'bytes 100-199/{len(CONTENT)}'
+    assert response.get_data() == CONTENT[100:200]
+    assert not counted
+
+    response, counted = deliver(delivery_app, video, {'Range': 'bytes=0-9'})
+    assert response.status_code == 206
+    assert counted
+
+    response, counted = deliver(delivery_app, video, {'Range': f'bytes={len(CONTENT)}-'})
+    assert response.status_code == 416
+    assert not counted
+
+
+def test_digest_recomputed_after_change(delivery_app, video):
+    """文件内容变化后重新计算摘要"""
+    first = FileDigest.get_sha256(video)
+    with open(video, 'ab') as f:
+        f.write(b'more')
+
+    assert FileDigest.get_sha256(video) != first
+    assert FileDigest.get_sha256(video) == hashlib.sha256(CONTENT + b'more').hexdigest()
+
+
+@pytest.mark.parametrize('mode, header', [('x-accel', 'X-Accel-Redirect'), ('x-sendfile', 'X-Sendfile')])
+def test_offload(delivery_app, video, mode, header):
+    """代理模式下只返回头部，由代理发送文件；条件请求仍由应用判断"""
+    delivery_app.config['FILE_DELIVERY_MODE'] = mode
+
+    response, _ = deliver(delivery_app, video, {'Range': 'bytes=100-199'})
+    assert response.status_code == 200
+    assert response.get_data() == b''
+    assert response.headers[header] == (
+        '/protected-files/media/lecture.mp4' if mode == 'x-accel' else video
+    )
+    assert "filename*=UTF-8''" in response.headers['Content-Disposition']
+
+    etag = hashlib.sha256(CONTENT).hexdigest()
+    response, _ = deliver(delivery_app, video, {'If-None-Match': f'"{etag}"'})
+    assert response.status_code == 304
+    assert header not in response.headers
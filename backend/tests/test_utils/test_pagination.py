@@ -0,0 +1,92 @@
+"""
+游标分页测试
+
+验证游标编解码，以及按游标逐页遍历与整体排序结果一致（排序值相同的记录不重不漏）。
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from hypothesis import given, strategies as st, settings
+from sqlalchemy import Column, DateTime, Integer, create_engine
+from sqlalchemy.orm import Session, declarative_base
+
+from app.utils.pagination import decode_cursor, encode_cursor, keyset_paginate
+
+Base = declarative_base()
+
+
+class Item(Base):
+    __tablename__ = 'items'
+
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime, nullable=False)
+
+
+class TestCursor:
+    """游标编解码测试"""
+
+    def test_roundtrip(self):
+        """排序值（含日期时间）和 ID 编码后可还原"""
+        values = [datetime(2024, 5, 1, 8, 30), 42]
+
+        assert decode_cursor(encode_cursor('created_at:desc', values), 'created_at:desc') == values
+
+    def test_sort_key_mismatch(self):
+        """排序方式不一致的游标被拒绝"""
+        cursor = encode_cursor('created_at:desc', [1, 2])
+
+        with pytest.raises(ValueError):
+            decode_cursor(cursor, 'created_at:asc')
+
+    @pytest.mark.parametrize('cursor', ['@@@', 'bm90IGpzb24', 'e30'])
+    def test_invalid(self, cursor):
+        """无法解析的游标抛出 ValueError"""
+        with pytest.raises(ValueError):
+            decode_cursor(cursor, 'created_at:desc')
+
+
+class TestKeysetPaginate:
+    """键集分页测试"""
+
+    @given(
+        offsets=st.lists(st.integers(min_value=0, max_value=5), min_size=0, max_size=40),
+        per_page=st.integers(min_value=1, max_value=7),
+        descending=st.booleans()
+    )
+    @settings(max_examples=100, deadline=None)
+    def test_walk_matches_sorted_order(self, offsets, per_page, descending):
+        """逐页遍历的结果与 (时间, ID) 排序一致，时间相同的记录也不重不漏"""
+        engine = create_engine('sqlite://')
+        Base.metadata.create_all(engine)
+        base = datetime(2024, 1, 1)
+
+        with Session(engine) as session:
+            session.add_all(
+                Item(id=i + 1, created_at=base + timedelta(seconds=offset))
+                for i, offset in enumerate(offsets)
+            )
+            session.commit()
+
+            expected = [
+                item.id for item in sorted(
+                    session.query(Item).all(),
+                    key=lambda item: (item.created_at, item.id),
+                    reverse=descending
+                )
+            ]
+
+            walked = []
+            cursor = None
+            while True:
+                page = keyset_paginate(
+                    session.query(Item), Item.created_at, Item.id, cursor, per_page, descending=descending
+                )
+                assert len(page['items']) <= per_page
+                walked.extend(item.id for item in page['items'])
+                if not page['has_next']:
+                    assert page['next_cursor'] is None
+                    break
+                cursor = page['next_cursor']
+
+        assert walked == expected
@@ -0,0 +1,57 @@
+"""
+限流与短时缓存测试
+"""
+
+import time
+
+from app.utils.rate_limiter import RateLimiter
+from app.utils.ttl_cache import TTLCache
+
+
+def test_rate_limiter_burst_and_refill(monkeypatch):
+    """允许连续 burst 次，之后按速率恢复，不同键互不影响"""
+    now = [100.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    limiter = RateLimiter(rate=2, burst=3)
+
+    assert [limiter.allow('a') for _ in range(4)] == [True, True, True, False]
+    assert limiter.allow('b')
+
+    now[0] += 0.5
+    assert limiter.allow('a')
+    assert not limiter.allow('a')
+
+
+def test_rate_limiter_evicts_full_buckets(monkeypatch):
+    """条目过多时淘汰已恢复满的键"""
+    now = [0.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    limiter = RateLimiter(rate=1, burst=1, max_entries=2)
+
+    limiter.allow('a')
+    now[0] += 10
+    limiter.allow('b')
+    limiter.allow('c')
+
+    assert set(limiter._buckets) == {'b', 'c'}
+
+
+def test_ttl_cache_expiry_and_none(monkeypatch):
+    """有效期内不重新加载，过期后重新加载，None 不缓存"""
+    now = [0.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    cache = TTLCache(ttl=30)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return len(calls) if len(calls) > 1 else None
+
+    assert cache.get('k', loader) is None
+    assert cache.get('k', loader) == 2
+    assert cache.get('k', loader) == 2
+    now[0] += 31
+    assert cache.get('k', loader) == 3
+
+    cache.invalidate('k')
+    assert cache.get('k', loader) == 4
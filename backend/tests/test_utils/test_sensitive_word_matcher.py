@@ -0,0 +1,109 @@
+"""
+敏感词匹配测试
+
+验证 Aho-Corasick 匹配结果与原逐位置查字典树的结果一致，
+以及弹幕服务增删敏感词时整体替换匹配器、合并敏感词文件。
+"""
+
+import random
+
+import pytest
+from flask import Flask
+
+from app.services.barrage_service import BarrageService
+from app.utils.sensitive_word_matcher import SensitiveWordMatcher
+
+
+def dfa_filter(words, content, replace_char='*'):
+    """原实现：每个位置沿字典树匹配，命中最短的词后从词尾继续"""
+    tree = {}
+    for word in words:
+        node = tree
+        for char in word:
+            node = node.setdefault(char, {})
+        node['is_end'] = True
+
+    filtered = list(content)
+    detected = []
+    i = 0
+    while i < len(content):
+        node = tree
+        j = i
+        while j < len(content) and content[j] in node:
+            node = node[content[j]]
+            j += 1
+            if 'is_end' in node:
+                detected.append(content[i:j])
+                filtered[i:j] = replace_char * (j - i)
+                i = j
+                break
+        else:
+            i += 1
+    return ''.join(filtered), detected
+
+
+@pytest.fixture
+def sensitive_words(monkeypatch):
+    """每个测试使用独立的敏感词集合和匹配器"""
+    monkeypatch.setattr(BarrageService, 'SENSITIVE_WORDS', frozenset({'赌博', '博彩', '操', '操场'}))
+    monkeypatch.setattr(BarrageService, '_matcher', None)
+
+
+@pytest.mark.parametrize('content, expected', [
+    ('赌博彩票', ('**彩票', ['赌博'])),
+    ('在操场上', ('在*场上', ['操'])),
+    ('博彩和赌博', ('**和**', ['博彩', '赌博'])),
+    ('正常内容', ('正常内容', [])),
+])
+def test_filter_examples(content, expected):
+    """重叠、前缀关系的敏感词按原规则替换"""
+    matcher = SensitiveWordMatcher({'赌博', '博彩', '操', '操场', ''})
+
+    assert matcher.filter(content) == expected
+    assert '' not in matcher.words
+
+
+def test_matches_dfa_on_random_text():
+    """随机词库和文本上与原实现结果一致"""
+    rng = random.Random(0)
+    alphabet = 'abcde'
+    for _ in range(200):
+        words = {''.join(rng.choices(alphabet, k=rng.randint(1, 4))) for _ in range(rng.randint(1, 8))}
+        content = ''.join(rng.choices(alphabet + 'xyz', k=rng.randint(0, 40)))
+
+        assert SensitiveWordMatcher(words).filter(content, '#') == dfa_filter(words, content, '#')
+
+
+def test_builtin_lexicon_has_no_empty_word():
+    """内置词库没有空字符串，相邻的词没有被拼接"""
+    assert '' not in BarrageService.SENSITIVE_WORDS
+    assert {'妈逼', '赌博'} <= BarrageService.SENSITIVE_WORDS
+
+
+def test_update_replaces_matcher(sensitive_words):
+    """增删敏感词时构建新匹配器替换，旧匹配器不受影响"""
+    old_matcher = BarrageService.get_matcher()
+
+    assert BarrageService.add_sensitive_word('作弊')
+    assert not BarrageService.add_sensitive_word('作弊')
+    assert not BarrageService.add_sensitive_word('')
+    assert BarrageService.filter_sensitive_words('考试作弊') == ('考试**', ['作弊'])
+    assert old_matcher.filter('考试作弊') == ('考试作弊', [])
+
+    assert BarrageService.batch_add_sensitive_words(['代考', '代写', '代考', '赌博']) == 2
+    assert BarrageService.remove_sensitive_word('赌博')
+    assert not BarrageService.remove_sensitive_word('赌博')
+    assert BarrageService.check_content_safety('赌博代考') == (False, ['代考'])
+    assert set(BarrageService.get_sensitive_words()) == {'博彩', '操', '操场', '作弊', '代考', '代写'}
+
+
+def test_lexicon_file_merged(sensitive_words, tmp_path):
+    """配置的敏感词文件在首次构建时合并，空行和注释忽略"""
+    lexicon = tmp_path / 'words.txt'
+    lexicon.write_text('# 自定义词库\n刷课\n\n  代签  \n', encoding='utf-8')
+    app = Flask(__name__)
+    app.config['SENSITIVE_WORDS_FILE'] = str(lexicon)
+
+    with app.app_context():
+        assert BarrageService.filter_sensitive_words('帮忙代签刷课') == ('帮忙****', ['代签', '刷课'])
+    assert BarrageService.SENSITIVE_WORDS == {'赌博', '博彩', '操', '操场', '刷课', '代签'}
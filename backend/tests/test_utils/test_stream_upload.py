@@ -0,0 +1,77 @@
+"""
+流式保存上传文件测试
+
+验证单次读取时的魔数校验、大小上限、哈希计算和失败时的临时文件清理。
+"""
+
+import hashlib
+import io
+import os
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from app.utils import file_utils
+from app.utils.file_utils import stream_uploaded_file
+
+
+class CountingStream(io.BytesIO):
+    """记录读取次数的流，用于确认只读一遍"""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+@pytest.fixture(autouse=True)
+def temp_dir(tmp_path, monkeypatch):
+    directory = tmp_path / 'temp'
+    monkeypatch.setattr(file_utils, 'UPLOAD_TEMP_DIR', str(directory))
+    return directory
+
+
+def upload(data, filename):
+    return FileStorage(stream=CountingStream(data), filename=filename)
+
+
+def test_single_pass(temp_dir):
+    """分块读取一遍即完成保存，哈希和大小与内容一致"""
+    content = b'%PDF-1.7\n' + os.urandom(300_000)
+    file = upload(content, '讲义.pdf')
+
+    temp_path, sha256, file_size = stream_uploaded_file(file, chunk_size=4096)
+
+    assert file.stream.bytes_read == len(content)
+    assert sha256 == hashlib.sha256(content).hexdigest()
+    assert file_size == len(content)
+    with open(temp_path, 'rb') as f:
+        assert f.read() == content
+
+
+@pytest.mark.parametrize('content, filename, message', [
+    (b'MZ\x90\x00' + b'\x00' * 100, 'fake.pdf', '不匹配'),
+    (b'%PD', 'short.pdf', '不匹配'),
+    (b'', 'empty.txt', '文件大小为0'),
+    (b'x' * 2000, 'big.txt', '超过限制'),
+])
+def test_rejected(temp_dir, content, filename, message):
+    """伪装文件、空文件和超大文件被拒绝，临时文件被删除"""
+    with pytest.raises(ValueError, match=message):
+        stream_uploaded_file(upload(content, filename), max_size=1000, chunk_size=7)
+
+    assert os.listdir(temp_dir) == []
+
+
+def test_oversized_stops_early(temp_dir):
+    """超过上限后立即停止读取"""
+    file = upload(b'x' * 100_000, 'big.txt')
+
+    with pytest.raises(ValueError):
+        stream_uploaded_file(file, max_size=1000, chunk_size=512)
+
+    assert file.stream.bytes_read <= 1024
@@ -0,0 +1,64 @@
+"""
+写后缓冲后台写回线程测试
+
+验证唤醒后在后台写回、立即写回使用独立的数据库会话，以及 fork 出的子进程丢弃继承的缓冲。
+"""
+
+import threading
+
+from app.extensions import db
+from app.utils.write_behind import WriteBehindWorker
+
+
+class RecordingFlush:
+    """记录每次写回时使用的数据库会话"""
+
+    def __init__(self):
+        self.sessions = []
+        self.flushed = threading.Event()
+
+    def __call__(self):
+        self.sessions.append(db.session())
+        self.flushed.set()
+        return 1
+
+
+def test_wake_flushes_in_background(db_app):
+    """唤醒后后台线程立即写回，不必等到定期写回的间隔"""
+    flush = RecordingFlush()
+    worker = WriteBehindWorker('test-flusher', 60)
+
+    worker.ensure_started(flush, lambda: None)
+    worker.wake()
+
+    assert flush.flushed.wait(5)
+    assert flush.sessions[0] is not db.session()
+
+
+def test_flush_now_uses_own_session(db_app):
+    """立即写回在独立的会话中进行，不影响调用方会话；未启动时不写回"""
+    flush = RecordingFlush()
+    worker = WriteBehindWorker('test-flusher', 60)
+    assert worker.flush_now() == 0
+
+    worker.ensure_started(flush, lambda: None)
+    session = db.session()
+
+    assert worker.flush_now() == 1
+    assert flush.sessions[-1] is not session
+    assert db.session() is session
+
+
+def test_forked_process_discards_inherited_buffer(db_app):
+    """子进程首次使用时丢弃从父进程继承的缓冲并启动自己的线程，同一进程只启动一次"""
+    forks = []
+    worker = WriteBehindWorker('test-flusher', 60)
+
+    worker.ensure_started(RecordingFlush(), lambda: forks.append(1))
+    parent_thread = worker._thread
+    worker.ensure_started(RecordingFlush(), lambda: forks.append(1))
+    assert forks == [] and worker._thread is parent_thread
+
+    worker._pid = -1  # 模拟 fork：记录的是父进程的 pid
+    worker.ensure_started(RecordingFlush(), lambda: forks.append(1))
+    assert forks == [1] and worker._thread is not parent_thread